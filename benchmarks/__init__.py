@@ -0,0 +1 @@
+"""Benchmark scripts that measure the performance of the meal planner API."""
@@ -0,0 +1,81 @@
+"""
+Compare the bytes saved by each encoding with the CPU time it costs.
+
+Compresses a listing of recipes like the one GET /recipes/ returns with each
+installed encoding, then times a precompressed body that's served again from
+the cache. Run from the root of the repository with:
+    poetry run python -m benchmarks.compression --recipes 200
+"""
+
+import argparse
+import json
+import statistics
+import time
+import uuid
+from typing import Callable
+
+from meal_planner.compression import ENCODINGS, PrecompressedBody
+
+RECIPES = 200
+INGREDIENTS = 8
+RUNS = 20
+UNITS = ["cup", "tbsp", "tsp", "oz", "lb"]
+
+
+def build_listing(recipes: int) -> bytes:
+    """Return a JSON listing of fake recipes with a few ingredients each."""
+    items = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Recipe {index}",
+            "servings": 4,
+            "ingredients": [
+                {
+                    "food": {"id": str(uuid.uuid4()), "name": f"Food {i}"},
+                    "amount": i + 0.5,
+                    "unit": UNITS[i % len(UNITS)],
+                }
+                for i in range(INGREDIENTS)
+            ],
+        }
+        for index in range(recipes)
+    ]
+    return json.dumps({"items": items, "total": recipes}).encode()
+
+
+def time_ms(func: Callable[[], object], runs: int) -> float:
+    """Return the median number of milliseconds that a call takes."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    """Print the size and cost of each encoding for a large listing."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=RECIPES)
+    parser.add_argument("--runs", type=int, default=RUNS)
+    args = parser.parse_args()
+
+    content = build_listing(args.recipes)
+    print(f"uncompressed: {len(content):>9,} bytes")
+    for name, encoding in ENCODINGS.items():
+        size = len(encoding.compress(content))
+        elapsed = time_ms(lambda e=encoding: e.compress(content), args.runs)
+        saved = 1 - size / len(content)
+        print(
+            f"{name:>12}: {size:>9,} bytes ({saved:.0%} saved) "
+            f"in {elapsed:.2f}ms",
+        )
+
+    body = PrecompressedBody(content, minimum_size=0)
+    body.response("gzip")  # the first request for gzip compresses the body
+    cached = time_ms(lambda: body.response("gzip"), args.runs)
+    print(f"precompressed gzip hit: {cached:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compare recipe insert throughput with and without group commit.
+
+Concurrent writers create recipes in a file-based SQLite database, either
+each committing its own transaction or through the GroupCommitter. Run from
+the root of the repository with:
+    poetry run python -m benchmarks.group_commit --writers 8
+"""
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from meal_planner.dependencies.database import (
+    apply_sqlite_profile,
+    enable_savepoints,
+)
+from meal_planner.models.base import UUIDAuditBase
+from meal_planner.schemas.recipe import RecipeCreateSchema, RecipeIngredient
+from meal_planner.services.group_commit import GroupCommitter
+from meal_planner.services.recipes import recipe_service
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+WRITERS = 8
+RECIPES = 400
+FOODS = ["Onion", "Salt", "Tomato", "Steak", "Black beans", "Sweet corn"]
+
+
+def make_recipe(index: int) -> RecipeCreateSchema:
+    """Return a recipe to insert during the benchmark."""
+    return RecipeCreateSchema(
+        name=f"Recipe {index}",
+        description="Benchmark recipe",
+        ingredients=[
+            RecipeIngredient(food=food, amount=index % 7 + 1, unit="self")
+            for food in FOODS[index % 3 : index % 3 + 4]
+        ],
+    )
+
+
+def make_factory(path: Path, profile: str, *, grouped: bool) -> sessionmaker:
+    """Create a fresh database and return a factory for its sessions."""
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},
+    )
+    apply_sqlite_profile(engine, profile)
+    if grouped:
+        # configured like the app's group commit engine
+        enable_savepoints(engine, immediate=True)
+    UUIDAuditBase.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False)
+
+
+def run(
+    factory: sessionmaker,
+    args: argparse.Namespace,
+    *,
+    grouped: bool,
+) -> float:
+    """Insert the recipes from concurrent writers and return inserts/second."""
+    committer = GroupCommitter(window=args.window, max_batch=args.max_batch)
+
+    def separate(index: int) -> None:
+        with factory() as db:
+            recipe_service.create(db, data=make_recipe(index))
+
+    def together(index: int) -> None:
+        committer.submit(
+            lambda db: db.add(
+                recipe_service.create(
+                    db,
+                    data=make_recipe(index),
+                    defer_commit=True,
+                ),
+            ),
+        )
+
+    if grouped:
+        committer.start(factory)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.writers) as pool:
+        list(pool.map(together if grouped else separate, range(args.recipes)))
+    elapsed = time.perf_counter() - start
+    committer.stop()
+    return args.recipes / elapsed
+
+
+def main() -> None:
+    """Print the insert throughput of each mode for each SQLite profile."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=WRITERS)
+    parser.add_argument("--recipes", type=int, default=RECIPES)
+    parser.add_argument("--window", type=float, default=0.002)
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in ("default", "production"):
+            for grouped in (False, True):
+                name = f"{profile}-{'grouped' if grouped else 'separate'}"
+                factory = make_factory(
+                    Path(directory) / f"{name}.db",
+                    profile,
+                    grouped=grouped,
+                )
+                rate = run(factory, args, grouped=grouped)
+                print(f"{name:>20}: {rate:8.1f} recipes/second")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Measure how long it takes a new worker to import the app and serve its docs.
+
+Each run starts a fresh interpreter so that nothing is cached between runs.
+Run from the root of the repository with:
+    poetry run python -m benchmarks.import_time --budget 2.0
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+RUNS = 5
+IMPORTTIME_COLUMNS = 3  # self time | cumulative time | module name
+TOP_MODULES = 10
+
+# imports the app, then generates or loads the OpenAPI document like the
+# first request to /docs would, and reports how long each step took
+SCRIPT = """
+import json, time
+start = time.perf_counter()
+from meal_planner.api import app
+imported = time.perf_counter()
+app.openapi()
+done = time.perf_counter()
+print(json.dumps({"import": imported - start, "openapi": done - imported}))
+"""
+
+
+def time_startup() -> dict[str, float]:
+    """Return how long one fresh interpreter took to import the app."""
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(output.stdout)
+
+
+def slowest_modules() -> list[tuple[int, str]]:
+    """Return the app's modules that take the longest to import themselves."""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import meal_planner.api"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    modules = []
+    for line in output.stderr.splitlines():
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) != IMPORTTIME_COLUMNS or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        if name.startswith("meal_planner"):
+            modules.append((int(parts[0]), name))
+    return sorted(modules, reverse=True)[:TOP_MODULES]
+
+
+def main() -> None:
+    """Time the startup of the app and fail if it's over the budget."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        help="fail if the median startup time is over this many seconds",
+    )
+    args = parser.parse_args()
+
+    results = [time_startup() for _ in range(args.runs)]
+    imports = [result["import"] for result in results]
+    docs = [result["openapi"] for result in results]
+    total = statistics.median(i + d for i, d in zip(imports, docs))
+    print(f"import meal_planner.api: {statistics.median(imports):.3f}s median")
+    print(f"first OpenAPI document:  {statistics.median(docs):.3f}s median")
+    print(f"total startup:           {total:.3f}s median")
+    print("\nSlowest app modules (self time):")
+    for microseconds, name in slowest_modules():
+        print(f"  {microseconds / 1000:7.1f}ms  {name}")
+
+    if args.budget is not None and total > args.budget:
+        print(f"\nStartup is over the budget of {args.budget:.3f}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Compare loading a large page of recipes as ORM records and as plain rows.
+
+Loads every recipe with its ingredients, either as ORM records with their
+foods eager loaded or as the read-only RecipeRows that listings use, and
+reports how long it takes and how much memory the results use, measured with
+tracemalloc. Run from the root of the repository with:
+    poetry run python -m benchmarks.lean_rows --recipes 10000
+"""
+
+import argparse
+import gc
+import random
+import statistics
+import time
+import tracemalloc
+from typing import Callable
+from uuid import uuid4
+
+from meal_planner.models.base import UUIDAuditBase
+from meal_planner.models.food import Food
+from meal_planner.models.ingredient import Ingredient
+from meal_planner.models.recipe import Recipe
+from meal_planner.services.recipes import recipe_service
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+RECIPES = 10000
+INGREDIENTS = 8
+FOODS = 200
+RUNS = 5
+UNITS = ["g", "oz", "cup", "tbsp", "self"]
+
+
+def seed(db: Session, recipes: int) -> None:
+    """Insert foods and recipes that use them with bulk INSERTs."""
+    foods = [{"id": uuid4(), "name": f"Food {i}"} for i in range(FOODS)]
+    db.execute(insert(Food), foods)
+    recipe_rows = []
+    ingredient_rows = []
+    for index in range(recipes):
+        recipe_id = uuid4()
+        recipe_rows.append(
+            {
+                "id": recipe_id,
+                "name": f"Recipe {index}",
+                "description": "Benchmark recipe",
+            },
+        )
+        ingredient_rows.extend(
+            {
+                "id": uuid4(),
+                "recipe_id": recipe_id,
+                "food_id": food["id"],
+                "amount": random.randint(1, 8),
+                "unit": random.choice(UNITS),
+            }
+            for food in random.sample(foods, INGREDIENTS)
+        )
+    db.execute(insert(Recipe), recipe_rows)
+    db.execute(insert(Ingredient), ingredient_rows)
+    db.commit()
+
+
+def load_records(db: Session) -> list:
+    """Load every recipe as an ORM record, with its ingredients and foods."""
+    return list(
+        recipe_service.get_all(db, recipe_service.query_with_ingredients()),
+    )
+
+
+def load_rows(db: Session) -> list:
+    """Load every recipe as a read-only RecipeRow."""
+    rows = recipe_service.get_rows(db, recipe_service.query_summaries())
+    return recipe_service.add_ingredients(db, rows)
+
+
+def time_ms(db: Session, load: Callable[[Session], list], runs: int) -> float:
+    """Return the median number of milliseconds that loading takes."""
+    timings = []
+    for _ in range(runs):
+        db.expunge_all()
+        gc.collect()
+        start = time.perf_counter()
+        load(db)
+        timings.append((time.perf_counter() - start) * 1000)
+    db.expunge_all()
+    return statistics.median(timings)
+
+
+def memory_mb(
+    db: Session,
+    load: Callable[[Session], list],
+) -> tuple[float, float]:
+    """Return the MiB that the loaded results hold and the peak while loading."""
+    db.expunge_all()
+    gc.collect()
+    tracemalloc.start()
+    results = load(db)
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    db.expunge_all()
+    return held / 2**20, peak / 2**20
+
+
+def main() -> None:
+    """Print how long each way of loading recipes takes and its memory use."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=RECIPES)
+    parser.add_argument("--runs", type=int, default=RUNS)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    UUIDAuditBase.metadata.create_all(engine)
+    with Session(engine, autoflush=False) as db:
+        seed(db, args.recipes)
+        print(f"loading {args.recipes} recipes, median of {args.runs} runs")
+        for name, load in [
+            ("orm records", load_records),
+            ("plain rows", load_rows),
+        ]:
+            elapsed = time_ms(db, load, args.runs)
+            held, peak = memory_mb(db, load)
+            print(
+                f"  {name:>11}: {elapsed:8.1f}ms"
+                f" {held:7.1f}MiB held {peak:7.1f}MiB peak",
+            )
+
+
+if __name__ == "__main__":
+    main()
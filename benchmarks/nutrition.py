@@ -0,0 +1,136 @@
+"""
+Time computing the nutrition of a page of recipes.
+
+Compares the aggregate query that the nutrition service uses with loading
+each recipe's ingredients and adding them up in Python, and with reading the
+nutrition from the service's cache. Run from the root of the repository with:
+    poetry run python -m benchmarks.nutrition --recipes 500
+"""
+
+import argparse
+import random
+import statistics
+import time
+from typing import Callable
+
+from meal_planner.models.base import UUIDAuditBase
+from meal_planner.models.food_nutrient import FoodNutrient
+from meal_planner.models.recipe import Recipe
+from meal_planner.schemas.nutrition import FoodNutrientCreateSchema
+from meal_planner.schemas.recipe import RecipeCreateSchema, RecipeIngredient
+from meal_planner.services.nutrition import NutritionService
+from meal_planner.services.recipes import recipe_service
+from meal_planner.units import CUPS, EACH, GRAMS
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session, selectinload
+
+RECIPES = 500
+INGREDIENTS = 8
+FOODS = 200
+RUNS = 10
+UNITS = ["g", "oz", "cup", "tbsp", EACH]
+
+
+def seed(db: Session, recipes: int) -> list:
+    """Insert foods with nutrients and recipes that use them."""
+    service = NutritionService(model=FoodNutrient, maxsize=recipes)
+    service.load(
+        db,
+        (
+            FoodNutrientCreateSchema(
+                food=f"Food {i}",
+                kcal=random.uniform(10, 500),
+                protein_g=random.uniform(0, 30),
+                fat_g=random.uniform(0, 30),
+                carbs_g=random.uniform(0, 60),
+                grams_per_cup=random.uniform(50, 250),
+                grams_each=random.uniform(5, 200),
+            )
+            for i in range(FOODS)
+        ),
+    )
+    ids = []
+    for index in range(recipes):
+        foods = random.sample(range(FOODS), INGREDIENTS)
+        data = RecipeCreateSchema(
+            name=f"Recipe {index}",
+            description="Benchmark recipe",
+            ingredients=[
+                RecipeIngredient(
+                    food=f"Food {food}",
+                    amount=random.randint(1, 8),
+                    unit=random.choice(UNITS),
+                )
+                for food in foods
+            ],
+        )
+        recipe = recipe_service.create(db, data=data, defer_commit=True)
+        db.add(recipe)
+        ids.append(recipe.id)
+    db.commit()
+    return ids
+
+
+def python_loop(db: Session, ids: list) -> dict:
+    """Load every ingredient and add up the calories row by row in Python."""
+    stmt = (
+        select(Recipe)
+        .where(Recipe.id.in_(ids))
+        .options(selectinload(Recipe.ingredients))
+    )
+    nutrients = {row.food_id: row for row in db.scalars(select(FoodNutrient))}
+    totals = {}
+    for recipe in db.scalars(stmt):
+        kcal = 0.0
+        for ingredient in recipe.ingredients:
+            row = nutrients[ingredient.food_id]
+            if ingredient.unit in GRAMS:
+                grams = ingredient.amount * GRAMS[ingredient.unit]
+            elif ingredient.unit in CUPS:
+                grams = (
+                    ingredient.amount
+                    * CUPS[ingredient.unit]
+                    * row.grams_per_cup
+                )
+            else:
+                grams = ingredient.amount * row.grams_each
+            kcal += grams * row.kcal / 100
+        totals[recipe.id] = kcal
+    db.expunge_all()
+    return totals
+
+
+def time_ms(func: Callable[[], object], runs: int) -> float:
+    """Return the median number of milliseconds that a call takes."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    """Print how long each way of computing nutrition takes."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=RECIPES)
+    parser.add_argument("--runs", type=int, default=RUNS)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    UUIDAuditBase.metadata.create_all(engine)
+    with Session(engine, autoflush=False) as db:
+        ids = seed(db, args.recipes)
+        service = NutritionService(model=FoodNutrient, maxsize=args.recipes)
+        loop = time_ms(lambda: python_loop(db, ids), args.runs)
+        query = time_ms(lambda: service.compute(db, ids), args.runs)
+        service.per_serving(db, ids)
+        cached = time_ms(lambda: service.per_serving(db, ids), args.runs)
+    print(f"nutrition of {args.recipes} recipes, median of {args.runs} runs")
+    print(f"  python loop over rows: {loop:8.2f}ms")
+    print(f"  aggregate query:       {query:8.2f}ms")
+    print(f"  cached per recipe:     {cached:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Compare read and write concurrency of the SQLite profiles.
+
+Run from the root of the repository with:
+    poetry run python -m benchmarks.sqlite_profile
+"""
+
+import random
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from meal_planner.dependencies.database import (
+    SQLITE_PROFILES,
+    apply_sqlite_profile,
+)
+from meal_planner.models.base import UUIDAuditBase
+from meal_planner.schemas.recipe import RecipeCreateSchema, RecipeIngredient
+from meal_planner.services.recipes import recipe_service
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+SEED_RECIPES = 200
+READERS = 4
+WRITERS = 2
+DURATION_SECONDS = 5.0
+FOODS = ["Onion", "Salt", "Tomato", "Steak", "Black beans", "Sweet corn"]
+
+
+def make_recipe(index: int) -> RecipeCreateSchema:
+    """Return a recipe to insert during the benchmark."""
+    return RecipeCreateSchema(
+        name=f"Recipe {index}",
+        description="Benchmark recipe",
+        ingredients=[
+            RecipeIngredient(food=food, amount=index % 7 + 1, unit="self")
+            for food in random.sample(FOODS, 4)
+        ],
+    )
+
+
+def run_profile(profile: str, directory: Path) -> dict[str, float]:
+    """Run concurrent readers and writers against a database using a profile."""
+    engine = create_engine(
+        f"sqlite:///{directory / f'{profile}.db'}",
+        connect_args={"check_same_thread": False},
+        pool_size=READERS + WRITERS,
+    )
+    apply_sqlite_profile(engine, profile)
+    UUIDAuditBase.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    with factory() as db:
+        ids = [
+            recipe_service.create(db, data=make_recipe(i)).id
+            for i in range(SEED_RECIPES)
+        ]
+
+    stop = threading.Event()
+    latencies: list[float] = []
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def read() -> None:
+        with factory() as db:
+            while not stop.is_set():
+                start = time.perf_counter()
+                recipe = recipe_service.get(db, random.choice(ids))
+                _ = [i.food.name for i in recipe.ingredients] if recipe else []
+                db.rollback()  # end the read transaction like a request would
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+                    counts["reads"] += 1
+
+    def write() -> None:
+        index = SEED_RECIPES
+        with factory() as db:
+            while not stop.is_set():
+                index += 1
+                try:
+                    recipe_service.create(db, data=make_recipe(index))
+                except OperationalError:
+                    db.rollback()
+                    with lock:
+                        counts["errors"] += 1
+                    continue
+                with lock:
+                    counts["writes"] += 1
+
+    threads = [threading.Thread(target=read) for _ in range(READERS)]
+    threads += [threading.Thread(target=write) for _ in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION_SECONDS)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    latencies.sort()
+    return {
+        "reads/s": counts["reads"] / DURATION_SECONDS,
+        "writes/s": counts["writes"] / DURATION_SECONDS,
+        "write errors": counts["errors"],
+        "read p50 ms": statistics.median(latencies) * 1000,
+        "read p99 ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def main() -> None:
+    """Run the benchmark for every profile and print the results."""
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            name: run_profile(name, Path(directory))
+            for name in SQLITE_PROFILES
+        }
+    metrics = list(next(iter(results.values())))
+    print(f"{'metric':<14}" + "".join(f"{name:>14}" for name in results))
+    for metric in metrics:
+        row = "".join(
+            f"{result[metric]:>14.1f}" for result in results.values()
+        )
+        print(f"{metric:<14}{row}")
+
+
+if __name__ == "__main__":
+    main()
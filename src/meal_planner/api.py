@@ -1,15 +1,109 @@
 """Instantiate the meal planner API and root-level endpoints."""
 
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator
+
 from fastapi import FastAPI, status
 from fastapi.responses import RedirectResponse
 from fastapi_pagination import add_pagination
 
+from meal_planner.config import get_config
+from meal_planner.openapi import install_openapi
+from meal_planner.routers.foods import food_router
+from meal_planner.routers.meal_plans import meal_plan_router
 from meal_planner.routers.recipes import recipe_router
 
-app = FastAPI()
+# optional subsystems are only imported when they're turned on, which keeps
+# them from adding to the startup time of workers that don't use them
+config = get_config()
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:  # pragma: no cover
+    """
+    Start the background threads with the app and stop them on shutdown.
+
+    The server waits for requests in flight before shutting down the app, then
+    the threads are stopped and the connection pools are closed.
+    """
+    from meal_planner.dependencies import database
+
+    if config.group_commit_enabled:
+        from meal_planner.services.group_commit import group_committer
+
+        group_committer.start(database.create_group_commit_session_factory())
+    if config.jobs_enabled:
+        from meal_planner.jobs import job_runner
+
+        job_runner.start(database.create_session_factory())
+    yield
+    if config.jobs_enabled:
+        job_runner.stop()
+    if config.group_commit_enabled:
+        group_committer.stop()
+    database.dispose_engines()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(recipe_router)
+app.include_router(meal_plan_router)
+app.include_router(food_router)
+
+if config.jobs_enabled:
+    from meal_planner.routers.jobs import job_router
+
+    app.include_router(job_router)
+
+if config.admission_enabled:
+    from meal_planner.routers.metrics import metrics_router
+
+    app.include_router(metrics_router)
+
 add_pagination(app)
 
+if config.database_replica_urls:
+    from meal_planner.middleware.read_your_writes import (
+        ReadYourWritesMiddleware,
+    )
+
+    app.add_middleware(
+        ReadYourWritesMiddleware,
+        max_age=config.read_primary_after_write_seconds,
+    )
+
+if config.compression_enabled:
+    from meal_planner.middleware.compression import CompressionMiddleware
+
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=config.compression_minimum_size,
+    )
+
+if config.profiling_token:
+    from meal_planner.middleware.profiling import ProfilingMiddleware
+
+    app.add_middleware(
+        ProfilingMiddleware,
+        token=config.profiling_token,
+        report_lines=config.profiling_report_lines,
+    )
+
+# added last so that it's the outermost middleware and rejects requests early
+if config.admission_enabled:
+    from meal_planner.middleware.admission import (
+        AdmissionControlMiddleware,
+        admission_controller,
+    )
+
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        controller=admission_controller,
+        retry_after=config.admission_retry_after_seconds,
+    )
+
+install_openapi(app, Path(config.openapi_path))
+
 
 @app.get("/")
 async def root() -> RedirectResponse:
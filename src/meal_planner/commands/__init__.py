@@ -0,0 +1 @@
+"""Manage command line scripts for maintaining the database."""
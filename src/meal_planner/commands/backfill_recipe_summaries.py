@@ -0,0 +1,28 @@
+"""
+Recompute the summary columns that are denormalized onto each recipe.
+
+Run this after adding the summary columns to an existing database with:
+    poetry run python -m meal_planner.commands.backfill_recipe_summaries
+"""
+
+import argparse
+
+from meal_planner.dependencies.database import create_session_factory
+from meal_planner.services.recipes import recipe_service
+
+
+def main() -> None:  # pragma: no cover
+    """Backfill the summary columns of every recipe in the database."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    with create_session_factory()() as db:
+        total = recipe_service.backfill_summaries(
+            db,
+            batch_size=args.batch_size,
+        )
+    print(f"Updated the summary columns of {total} recipes")  # noqa: T201
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
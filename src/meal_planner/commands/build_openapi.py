@@ -0,0 +1,30 @@
+"""
+Prebuild the OpenAPI document so that workers don't generate it on startup.
+
+Run this as part of building a release with:
+    poetry run python -m meal_planner.commands.build_openapi
+"""
+
+import argparse
+from pathlib import Path
+
+from meal_planner.api import app
+from meal_planner.config import get_config
+from meal_planner.openapi import write_openapi
+
+
+def main() -> None:  # pragma: no cover
+    """Write the OpenAPI document for the app to a file."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=get_config().openapi_path,
+    )
+    args = parser.parse_args()
+    write_openapi(app, args.output)
+    print(f"Wrote the OpenAPI document to {args.output}")  # noqa: T201
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,39 @@
+"""
+Load the nutrients of foods from a CSV file.
+
+The CSV needs a header with the columns food, kcal, protein_g, fat_g, and
+carbs_g, which are per 100 g of the food, and can have grams_per_cup and
+grams_each. Foods that don't exist yet are created. Run it with:
+    poetry run python -m meal_planner.commands.load_food_nutrients foods.csv
+"""
+
+import argparse
+from pathlib import Path
+
+from meal_planner.dependencies.database import create_session_factory
+from meal_planner.services.nutrition import (
+    nutrition_service,
+    read_nutrient_csv,
+)
+
+
+def main() -> None:  # pragma: no cover
+    """Load food nutrients from a CSV file into the database."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    with (
+        args.path.open(newline="", encoding="utf-8") as file,
+        create_session_factory()() as db,
+    ):
+        total = nutrition_service.load(
+            db,
+            read_nutrient_csv(file),
+            batch_size=args.batch_size,
+        )
+    print(f"Loaded the nutrients of {total} foods")  # noqa: T201
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,176 @@
+"""Compress response bodies with the encodings that clients accept."""
+
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Protocol
+
+from starlette.responses import Response
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+# media types worth compressing, besides text/* and anything ending in +json
+COMPRESSIBLE_TYPES = {"application/json", "application/javascript"}
+
+
+class StreamCompressor(Protocol):
+    """Compress a body that's sent in several chunks."""
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress the next chunk of the body."""
+
+    def flush(self) -> bytes:
+        """Return whatever is left once the last chunk has been compressed."""
+
+
+@dataclass(frozen=True)
+class Encoding:
+    """A content encoding and the functions that apply it."""
+
+    name: str
+    compress: Callable[[bytes], bytes]
+    compressor: Callable[[], StreamCompressor]
+
+
+def gzip_compressor() -> StreamCompressor:
+    """Return a streaming gzip compressor."""
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+
+def gzip_compress(data: bytes) -> bytes:
+    """Compress a whole body with gzip."""
+    compressor = gzip_compressor()
+    return compressor.compress(data) + compressor.flush()
+
+
+# encodings in the order they're preferred when a client accepts several
+ENCODINGS: dict[str, Encoding] = {}
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    pass
+else:  # pragma: no cover
+    ENCODINGS["zstd"] = Encoding(
+        name="zstd",
+        compress=zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress,
+        compressor=zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj,
+    )
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    pass
+else:  # pragma: no cover
+
+    class BrotliCompressor:
+        """Adapt brotli's streaming compressor to the StreamCompressor API."""
+
+        def __init__(self) -> None:
+            """Init the underlying brotli compressor."""
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+        def compress(self, data: bytes) -> bytes:
+            """Compress the next chunk of the body."""
+            return self._compressor.process(data)
+
+        def flush(self) -> bytes:
+            """Return whatever is left once the last chunk has been compressed."""
+            return self._compressor.finish()
+
+    ENCODINGS["br"] = Encoding(
+        name="br",
+        compress=lambda data: brotli.compress(data, quality=BROTLI_QUALITY),
+        compressor=BrotliCompressor,
+    )
+
+ENCODINGS["gzip"] = Encoding(
+    name="gzip",
+    compress=gzip_compress,
+    compressor=gzip_compressor,
+)
+
+
+def negotiate(accept_encoding: str) -> Encoding | None:
+    """
+    Pick the encoding to use from a request's Accept-Encoding header.
+
+    Encodings are ranked by the quality values the client sent, and ties are
+    broken by the order of ENCODINGS. Returns None if the client doesn't
+    accept any of the encodings that are installed.
+    """
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        weight = 1.0
+        key, _, value = params.strip().partition("=")
+        if key.strip() == "q":
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for name, encoding in ENCODINGS.items():
+        weight = weights.get(name, wildcard)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    """Check whether responses of a media type are worth compressing."""
+    media_type = content_type.partition(";")[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type.endswith("+json")
+        or media_type in COMPRESSIBLE_TYPES
+    )
+
+
+class PrecompressedBody:
+    """
+    A cached response body that keeps a compressed copy for each encoding.
+
+    Each encoding is only applied the first time a client asks for it, so hot
+    cached responses are compressed once instead of on every request.
+    """
+
+    def __init__(self, content: bytes, minimum_size: int) -> None:
+        """Init the body with its uncompressed content."""
+        self.content = content
+        self.minimum_size = minimum_size
+        self._encoded: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding: Encoding) -> bytes:
+        """Return the body compressed with an encoding."""
+        with self._lock:
+            if encoding.name not in self._encoded:
+                self._encoded[encoding.name] = encoding.compress(self.content)
+            return self._encoded[encoding.name]
+
+    def response(
+        self,
+        accept_encoding: str,
+        media_type: str = "application/json",
+    ) -> Response:
+        """Return a response in the best encoding that the client accepts."""
+        headers = {"Vary": "Accept-Encoding"}
+        encoding = None
+        if len(self.content) >= self.minimum_size:
+            encoding = negotiate(accept_encoding)
+        if encoding is None:
+            return Response(
+                self.content,
+                media_type=media_type,
+                headers=headers,
+            )
+        headers["Content-Encoding"] = encoding.name
+        return Response(
+            self.encoded(encoding),
+            media_type=media_type,
+            headers=headers,
+        )
@@ -1,9 +1,178 @@
 """Manage configuration settings using dynaconf."""
 
-from dynaconf import Dynaconf
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from dynaconf import Dynaconf, Validator
+
+# written by `make openapi` and loaded instead of generating the schema
+DEFAULT_OPENAPI_PATH = Path(__file__).with_name("openapi.json")
+# the concurrency and queue size of each class of request, which settings
+# can override one class or one limit at a time
+DEFAULT_ADMISSION_LIMITS = {
+    "read": {"concurrency": 24, "queue_size": 64},
+    "write": {"concurrency": 8, "queue_size": 32},
+    "bulk": {"concurrency": 4, "queue_size": 8},
+}
+
+
+def merge_admission_limits(value: Any) -> Any:  # noqa: ANN401
+    """Fill in the classes and limits that the admission_limits leave out."""
+    if not isinstance(value, dict):
+        return value  # rejected by valid_admission_limits()
+    merged = dict(value)
+    for request_class, defaults in DEFAULT_ADMISSION_LIMITS.items():
+        override = value.get(request_class, {})
+        if isinstance(override, dict):
+            merged[request_class] = {**defaults, **override}
+    return merged
+
+
+def valid_admission_limits(value: Any) -> bool:  # noqa: ANN401
+    """Check that the admission_limits only set known classes and limits."""
+    return isinstance(value, dict) and all(
+        request_class in DEFAULT_ADMISSION_LIMITS
+        and isinstance(limits, dict)
+        and set(limits) <= set(DEFAULT_ADMISSION_LIMITS[request_class])
+        and all(isinstance(limit, int) for limit in limits.values())
+        for request_class, limits in value.items()
+    )
+
 
 settings = Dynaconf(
     envvar_prefix="MEAL_PLANNER",
     settings_files=["settings.toml", ".secrets.toml"],
     environments=True,
+    validators=[
+        # database
+        Validator("sqlite_profile", default="default"),
+        Validator("database_replica_urls", default=[]),
+        Validator("replica_retry_seconds", default=30),
+        Validator("read_primary_after_write_seconds", default=5),
+        # group commit, which coalesces concurrent writes into one transaction
+        Validator("group_commit_enabled", default=False),
+        Validator("group_commit_window_seconds", default=0.002),
+        Validator("group_commit_max_batch", default=64),
+        # idempotency keys
+        Validator("idempotency_ttl_seconds", default=86400),
+        Validator("idempotency_wait_seconds", default=10),
+        # how long a key stays claimed by a request that hasn't finished, so
+        # retries can take over keys claimed by requests that crashed
+        Validator("idempotency_lease_seconds", default=60),
+        # admission control, keeping the total concurrency below the size of
+        # the threadpool that runs sync route handlers
+        Validator("admission_enabled", default=True),
+        Validator(
+            "admission_limits",
+            default=DEFAULT_ADMISSION_LIMITS,
+            cast=merge_admission_limits,
+            condition=valid_admission_limits,
+            messages={
+                "condition": (
+                    "{name} can only set the concurrency and queue_size of "
+                    "the read, write, and bulk classes, got {value}"
+                ),
+            },
+        ),
+        Validator("admission_queue_timeout_seconds", default=5),
+        Validator("admission_retry_after_seconds", default=1),
+        # response compression
+        Validator("compression_enabled", default=True),
+        Validator("compression_minimum_size", default=1024),
+        # recipes uploaded to POST /recipes/stream, which are parsed as they
+        # arrive, so these limits bound the memory that each upload uses
+        Validator("recipe_upload_max_bytes", default=16 * 1024 * 1024),
+        Validator("recipe_upload_max_ingredients", default=10000),
+        Validator("recipe_upload_max_value_length", default=64 * 1024),
+        Validator("recipe_upload_batch_size", default=500),
+        # background jobs
+        Validator("jobs_enabled", default=True),
+        Validator("job_workers", default=2),
+        Validator("job_queue_size", default=100),
+        Validator("job_retry_delay_seconds", default=5),
+        Validator("job_lease_seconds", default=60),
+        # profiling requests that send this token in the X-Profile header,
+        # which is off unless a token is set in .secrets.toml
+        Validator("profiling_token", default=None),
+        Validator("profiling_report_lines", default=50),
+        # production server, where 0 workers means one per available core
+        Validator("server_host", default="127.0.0.1"),
+        Validator("server_port", default=8000),
+        Validator("server_workers", default=0),
+        Validator("server_backlog", default=2048),
+        Validator("server_keep_alive_seconds", default=5),
+        Validator("server_graceful_shutdown_seconds", default=30),
+        # docs
+        Validator("openapi_path", default=str(DEFAULT_OPENAPI_PATH)),
+    ],
 )
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """
+    A frozen copy of the settings that's cheap to read on hot paths.
+
+    Every dynaconf lookup goes through its lazy loading and environment
+    switching logic, so the settings are copied into this plain object once
+    at startup and read from here everywhere else.
+    """
+
+    database_url: str | None
+    sqlite_profile: str
+    database_replica_urls: tuple[str, ...]
+    replica_retry_seconds: float
+    read_primary_after_write_seconds: int
+    group_commit_enabled: bool
+    group_commit_window_seconds: float
+    group_commit_max_batch: int
+    idempotency_ttl_seconds: int
+    idempotency_wait_seconds: float
+    idempotency_lease_seconds: float
+    admission_enabled: bool
+    admission_limits: dict[str, dict[str, int]]
+    admission_queue_timeout_seconds: float
+    admission_retry_after_seconds: int
+    compression_enabled: bool
+    compression_minimum_size: int
+    recipe_upload_max_bytes: int
+    recipe_upload_max_ingredients: int
+    recipe_upload_max_value_length: int
+    recipe_upload_batch_size: int
+    jobs_enabled: bool
+    job_workers: int
+    job_queue_size: int
+    job_retry_delay_seconds: float
+    job_lease_seconds: float
+    profiling_token: str | None
+    profiling_report_lines: int
+    server_host: str
+    server_port: int
+    server_workers: int
+    server_backlog: int
+    server_keep_alive_seconds: int
+    server_graceful_shutdown_seconds: int
+    openapi_path: str
+
+
+@lru_cache
+def get_config() -> Config:
+    """Freeze the dynaconf settings into a Config the first time it's called."""
+    values = settings.as_dict()
+    return Config(
+        **{
+            option.name: freeze(values.get(option.name.upper()))
+            for option in fields(Config)
+        },
+    )
+
+
+def freeze(value: Any) -> Any:  # noqa: ANN401
+    """Convert the lists and boxes that dynaconf returns into plain values."""
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return {key: freeze(item) for key, item in value.items()}
+    return value
@@ -1,20 +1,219 @@
 # pylint: disable=invalid-name
 """Manage connection to the database using a SQLAlchemy session factory."""
 
-from typing import Generator
+import itertools
+import os
+import time
+from functools import lru_cache
+from typing import Any, Generator, Sequence
 
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import Connection, Engine, create_engine, event
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session, sessionmaker
 
-from meal_planner.config import settings
+from meal_planner.config import get_config
 
+# PRAGMAs applied to every new SQLite connection, grouped into profiles
+SQLITE_PROFILES: dict[str, dict[str, Any]] = {
+    # only enforces foreign keys, which SQLite leaves off by default
+    "default": {
+        "foreign_keys": "ON",
+    },
+    # lets readers run while a write is in progress and trades a little
+    # durability on power loss (not on app crashes) for much cheaper commits
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "foreign_keys": "ON",
+        "busy_timeout": 5000,  # milliseconds to wait for a lock
+        "cache_size": -64000,  # negative values are in KiB, so 64 MiB
+        "mmap_size": 268435456,  # 256 MiB
+        "temp_store": "MEMORY",
+    },
+}
 
-def create_session_factory() -> sessionmaker:  # pragma: no cover
-    """Create a sessionmaker with database connection details."""
-    engine = create_engine(settings.database_url, pool_pre_ping=True)
+
+def apply_sqlite_profile(engine: Engine, profile: str) -> None:
+    """
+    Set the PRAGMAs in a SQLite profile each time the engine connects.
+
+    Parameters
+    ----------
+    engine: Engine
+        The SQLAlchemy engine to configure. Engines for other databases are
+        left unchanged.
+    profile: str
+        The name of a profile in SQLITE_PROFILES
+
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = SQLITE_PROFILES[profile]
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection: Any, _: Any) -> None:  # noqa: ANN401
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def enable_savepoints(engine: Engine, *, immediate: bool = False) -> None:
+    """
+    Let SQLAlchemy manage SQLite transactions so that SAVEPOINTs work.
+
+    The sqlite3 driver starts and commits transactions on its own, which breaks
+    SAVEPOINTs. This turns that off and emits BEGIN whenever SQLAlchemy starts
+    a transaction instead, following the recipe in the SQLAlchemy docs.
+
+    Parameters
+    ----------
+    engine: Engine
+        The SQLAlchemy engine to configure. Engines for other databases are
+        left unchanged.
+    immediate: bool
+        Take the write lock when each transaction starts, for engines that are
+        only used to write
+
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    begin = "BEGIN IMMEDIATE" if immediate else "BEGIN"
+
+    @event.listens_for(engine, "connect")
+    def disable_driver_transactions(
+        dbapi_connection: Any,  # noqa: ANN401
+        _: Any,  # noqa: ANN401
+    ) -> None:
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin_transaction(connection: Connection) -> None:
+        connection.exec_driver_sql(begin)
+
+
+# requests with this cookie or header read from the primary database
+PRIMARY_COOKIE = "meal_planner_read_primary"
+CONSISTENCY_HEADER = "X-Read-Consistency"
+
+
+class ReplicaPool:
+    """
+    Hand out sessions connected to read replicas in round-robin order.
+
+    Replicas that can't be reached are skipped for retry_seconds before they
+    are tried again, so a replica outage only slows down the first request
+    that finds it.
+    """
+
+    def __init__(self, urls: Sequence[str], retry_seconds: float) -> None:
+        """Init the ReplicaPool with the URLs of each read replica."""
+        self.factories = []
+        for url in urls:
+            engine = create_engine(url, pool_pre_ping=True)
+            apply_sqlite_profile(engine, get_config().sqlite_profile)
+            self.factories.append(
+                sessionmaker(autocommit=False, autoflush=False, bind=engine),
+            )
+        self.retry_seconds = retry_seconds
+        self._unhealthy_until = [0.0] * len(self.factories)
+        self._counter = itertools.count()
+
+    def session(self) -> Session | None:
+        """Return a session for the next healthy replica, or None if none are."""
+        for _ in self.factories:
+            index = next(self._counter) % len(self.factories)
+            if self._unhealthy_until[index] > time.monotonic():
+                continue
+            db = self.factories[index]()
+            try:
+                db.connection()  # check out a connection, pinging it first
+            except OperationalError:
+                db.close()
+                self._unhealthy_until[index] = (
+                    time.monotonic() + self.retry_seconds
+                )
+                continue
+            return db
+        return None
+
+
+def wants_primary(request: Request) -> bool:
+    """Check whether a request needs to read its own recent writes."""
+    return (
+        PRIMARY_COOKIE in request.cookies
+        or request.headers.get(CONSISTENCY_HEADER, "").lower() == "strong"
+    )
+
+
+@lru_cache
+def create_replica_pool() -> ReplicaPool:  # pragma: no cover
+    """Create a pool of sessions for the read replicas in the settings."""
+    return ReplicaPool(
+        urls=get_config().database_replica_urls,
+        retry_seconds=get_config().replica_retry_seconds,
+    )
+
+
+@lru_cache
+def create_session_factory() -> sessionmaker:
+    """
+    Create a sessionmaker with database connection details.
+
+    The result is cached so that every request shares the same engine and its
+    connection pool instead of opening new connections each time. Services
+    write in SAVEPOINTs that have to roll back with the request's transaction,
+    so SQLAlchemy manages the SQLite transactions.
+    """
+    engine = create_engine(get_config().database_url, pool_pre_ping=True)
+    apply_sqlite_profile(engine, get_config().sqlite_profile)
+    enable_savepoints(engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@lru_cache
+def create_group_commit_session_factory() -> sessionmaker:  # pragma: no cover
+    """
+    Create a sessionmaker for the shared transactions of the group committer.
+
+    Each write in a batch runs in a SAVEPOINT, so SQLAlchemy manages the
+    SQLite transactions. They're started with BEGIN IMMEDIATE, which waits
+    for the write lock up front, because a batch that first took a read lock
+    would fail instead of waiting when another connection is writing.
+    """
+    engine = create_engine(get_config().database_url, pool_pre_ping=True)
+    apply_sqlite_profile(engine, get_config().sqlite_profile)
+    enable_savepoints(engine, immediate=True)
     return sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def dispose_engines(*, close: bool = True) -> None:
+    """
+    Dispose of the connection pools of every engine that's been created.
+
+    Parameters
+    ----------
+    close: bool
+        Close the pooled connections. A forked worker passes False so that it
+        drops the connections inherited from its parent without closing them
+        underneath the parent, and opens its own on the next checkout.
+
+    """
+    factories = [create_session_factory, create_group_commit_session_factory]
+    for factory in factories:
+        if factory.cache_info().currsize:
+            factory().kw["bind"].dispose(close=close)
+    if create_replica_pool.cache_info().currsize:
+        for factory in create_replica_pool().factories:
+            factory.kw["bind"].dispose(close=close)
+
+
+# connections can't be shared across processes, so forked workers (such as
+# gunicorn's with --preload) start with empty pools
+os.register_at_fork(after_in_child=lambda: dispose_engines(close=False))
+
+
 def get_db() -> Generator[Session, None, None]:  # pragma: no cover
     """
     Yield a connection to the database to manage transactions.
@@ -32,3 +231,30 @@ def get_db() -> Generator[Session, None, None]:  # pragma: no cover
         yield db
     finally:
         db.close()
+
+
+def get_read_db(
+    request: Request,
+) -> Generator[Session, None, None]:  # pragma: no cover
+    """
+    Yield a connection to a read replica for endpoints that only read data.
+
+    Requests fall back to the primary database if no replicas are configured
+    or healthy, or if the client needs to read its own writes.
+
+    Yields
+    ------
+    Session
+        A SQLAlchemy session that manages a connection to the database
+
+    """
+    db = None
+    if not wants_primary(request):
+        db = create_replica_pool().session()
+    if db is None:
+        db = create_session_factory()()
+
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,20 @@
+"""Run heavy recomputations in the background instead of during requests."""
+
+__all__ = [
+    "JobCancelledError",
+    "JobContext",
+    "JobRunner",
+    "job_runner",
+]
+
+from meal_planner.config import get_config
+from meal_planner.jobs.handlers import register_handlers
+from meal_planner.jobs.runner import JobCancelledError, JobContext, JobRunner
+
+job_runner = JobRunner(
+    max_workers=get_config().job_workers,
+    max_queued=get_config().job_queue_size,
+    retry_delay=get_config().job_retry_delay_seconds,
+    lease=get_config().job_lease_seconds,
+)
+register_handlers(job_runner)
@@ -0,0 +1,56 @@
+"""Register the kinds of background jobs that can be enqueued."""
+
+from typing import Any
+from uuid import UUID
+
+import sqlalchemy as sa
+
+from meal_planner.jobs.runner import JobContext, JobRunner
+from meal_planner.models.meal_plan import MealPlan
+from meal_planner.services.idempotency import idempotency_service
+from meal_planner.services.meal_plans import meal_plan_service
+from meal_planner.services.recipes import recipe_service
+
+
+def register_handlers(runner: JobRunner) -> None:
+    """Register the handlers for every kind of job with a runner."""
+    runner.register("backfill_recipe_summaries")(backfill_recipe_summaries)
+    runner.register("rebuild_meal_plan_rollups")(rebuild_meal_plan_rollups)
+    runner.register("purge_idempotency_keys")(purge_idempotency_keys)
+
+
+def backfill_recipe_summaries(
+    context: JobContext,
+    payload: dict[str, Any],
+) -> dict[str, int]:
+    """Recompute the summary columns that are denormalized onto recipes."""
+    context.check_cancelled()
+    updated = recipe_service.backfill_summaries(
+        context.db,
+        batch_size=payload.get("batch_size", 500),
+    )
+    return {"updated": updated}
+
+
+def rebuild_meal_plan_rollups(
+    context: JobContext,
+    payload: dict[str, Any],
+) -> dict[str, int]:
+    """Recompute the ingredient totals of some or all meal plans."""
+    if "meal_plan_ids" in payload:
+        plan_ids = [UUID(plan_id) for plan_id in payload["meal_plan_ids"]]
+    else:
+        plan_ids = list(context.db.scalars(sa.select(MealPlan.id)))
+    for plan_id in plan_ids:
+        context.check_cancelled()
+        meal_plan_service.rebuild_rollup(context.db, plan_id)
+        context.db.commit()
+    return {"rebuilt": len(plan_ids)}
+
+
+def purge_idempotency_keys(
+    context: JobContext,
+    payload: dict[str, Any],  # noqa: ARG001
+) -> dict[str, int]:
+    """Delete idempotency keys that have expired."""
+    return {"deleted": idempotency_service.purge_expired(context.db)}
@@ -0,0 +1,290 @@
+"""Run background jobs on a bounded pool of worker threads."""
+
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, TypeAlias
+from uuid import UUID, uuid4
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from meal_planner.services.jobs import job_service
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelledError(Exception):
+    """Raised inside a job when it has been asked to stop."""
+
+
+class JobInterruptedError(Exception):
+    """Raised inside a job when the runner is shutting down."""
+
+
+@dataclass
+class JobContext:
+    """The session and job details passed to a job handler."""
+
+    db: Session
+    job_id: UUID
+    stopping: threading.Event = field(default_factory=threading.Event)
+
+    def check_cancelled(self) -> None:
+        """
+        Stop the job if it was cancelled or the runner is shutting down.
+
+        Handlers should call this between units of work, after committing the
+        work done so far, so that they can be stopped part way through.
+        """
+        if self.stopping.is_set():
+            raise JobInterruptedError
+        if job_service.is_cancel_requested(self.db, self.job_id):
+            raise JobCancelledError
+
+
+JobHandler: TypeAlias = Callable[[JobContext, dict[str, Any]], Any]
+
+
+class JobRunner:
+    """
+    Run jobs from the job table on a bounded pool of worker threads.
+
+    The job table is the queue, so only a limited number of jobs are handed
+    to the thread pool at a time. Whenever a worker finishes a job it pulls
+    the next pending jobs from the table, which means that jobs enqueued
+    while the pool is busy, or before the runner started, still get run.
+
+    Each server worker process has its own runner, so the jobs a runner
+    claims are leased to it, and it renews their leases while it's running.
+    Only the jobs whose lease has expired, because the runner that claimed
+    them has stopped, are put back in the queue.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int,
+        max_queued: int,
+        retry_delay: float,
+        lease: float,
+    ) -> None:
+        """Init the JobRunner with the size of its pool and queue."""
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.retry_delay = retry_delay
+        self.lease = timedelta(seconds=lease)
+        self.worker_id = self._new_worker_id()
+        self.handlers: dict[str, JobHandler] = {}
+        self._session_factory: sessionmaker | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._queued: set[UUID] = set()
+        self._timers: set[threading.Timer] = set()
+        self._heartbeat: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def register(self, kind: str) -> Callable[[JobHandler], JobHandler]:
+        """Register a function as the handler for a kind of job."""
+
+        def decorator(handler: JobHandler) -> JobHandler:
+            self.handlers[kind] = handler
+            return handler
+
+        return decorator
+
+    @property
+    def is_running(self) -> bool:
+        """Check whether the runner has been started."""
+        return self._executor is not None
+
+    def start(self, session_factory: sessionmaker) -> None:
+        """Start the worker pool and queue any jobs left from a previous run."""
+        if self.is_running:
+            return
+        self._session_factory = session_factory
+        self.worker_id = self._new_worker_id()
+        self._stopping.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="meal-planner-job",
+        )
+        with session_factory() as db:
+            job_service.recover(db)
+            self._fill_queue(db)
+        self._heartbeat = threading.Thread(
+            target=self._beat,
+            name="meal-planner-job-heartbeat",
+            daemon=True,
+        )
+        self._heartbeat.start()
+
+    def stop(self) -> None:
+        """
+        Stop the worker pool after the jobs that are running have stopped.
+
+        Jobs that haven't started yet are left in the job table, and running
+        jobs are put back in it the next time they check for cancellation, so
+        they are picked up again the next time the runner starts.
+        """
+        if self._executor is None:
+            return
+        self._stopping.set()
+        with self._lock:
+            for timer in self._timers:
+                timer.cancel()
+            self._timers.clear()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+        self._queued.clear()
+
+    def submit(self, job_id: UUID) -> bool:
+        """
+        Hand a job to the worker pool if it has room for it.
+
+        Returns
+        -------
+        bool
+            Returns True if the job was queued, or False if it was left in the
+            job table to be picked up when a worker is free
+
+        """
+        with self._lock:
+            if self._executor is None or self._stopping.is_set():
+                return False
+            if job_id in self._queued:
+                return True
+            if len(self._queued) >= self.max_queued:
+                return False
+            self._queued.add(job_id)
+            self._executor.submit(self._run, job_id)
+            return True
+
+    def execute(self, db: Session, job_id: UUID) -> None:
+        """
+        Run a single job with the session provided and record the outcome.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that the job should use
+        job_id: UUID
+            The id of the job to run, which is skipped if it isn't pending
+
+        """
+        job = job_service.claim(
+            db,
+            job_id,
+            worker_id=self.worker_id,
+            lease=self.lease,
+        )
+        if job is None:
+            return
+        handler = self.handlers.get(job.kind)
+        context = JobContext(db=db, job_id=job.id, stopping=self._stopping)
+        try:
+            if handler is None:
+                msg = f"No handler is registered for {job.kind} jobs"
+                raise LookupError(msg)  # noqa: TRY301
+            result = handler(context, dict(job.payload))
+        except JobCancelledError:
+            db.rollback()
+            job_service.cancel(db, job=job)
+        except JobInterruptedError:
+            db.rollback()
+            job_service.requeue(db, job=job)
+        except Exception as err:
+            logger.exception("Job %s failed", job_id)
+            db.rollback()
+            # the delay doubles with each attempt
+            delay = timedelta(
+                seconds=self.retry_delay * 2 ** (job.attempts - 1),
+            )
+            if job_service.fail(db, job=job, error=str(err), delay=delay):
+                self._retry_later(job.id, delay)
+        else:
+            job_service.succeed(db, job=job, result=result)
+
+    def _run(self, job_id: UUID) -> None:
+        """Run a job in its own session on one of the worker threads."""
+        if self._session_factory is None:  # pragma: no cover
+            return
+        with self._session_factory() as db:
+            try:
+                self.execute(db, job_id)
+            finally:
+                with self._lock:
+                    self._queued.discard(job_id)
+            if not self._stopping.is_set():
+                self._fill_queue(db)
+
+    def _beat(self) -> None:
+        """
+        Renew the leases on this runner's jobs until the runner stops.
+
+        The leases are renewed a few times per lease so a slow beat doesn't
+        let them expire, and the jobs of runners that have stopped renewing
+        theirs are put back in the queue.
+        """
+        interval = self.lease.total_seconds() / 3
+        while not self._stopping.wait(interval):
+            if self._session_factory is None:  # pragma: no cover
+                return
+            try:
+                with self._session_factory() as db:
+                    job_service.renew_leases(
+                        db,
+                        worker_id=self.worker_id,
+                        lease=self.lease,
+                    )
+                    if job_service.recover(db):
+                        self._fill_queue(db)
+            except Exception:
+                logger.exception("Failed to renew the job leases")
+
+    def _fill_queue(self, db: Session) -> None:
+        """Queue the oldest pending jobs until the worker pool is full."""
+        with self._lock:
+            room = self.max_queued - len(self._queued)
+            queued = list(self._queued)
+        if room <= 0:
+            return
+        for job_id in job_service.pending_ids(db, limit=room, exclude=queued):
+            self.submit(job_id)
+
+    def _retry_later(self, job_id: UUID, delay: timedelta) -> None:
+        """
+        Resubmit a failed job once its retry delay has passed.
+
+        The job table also records when the job can run again, so it isn't
+        picked up by _fill_queue() before then, and it's still retried after
+        the delay if the runner restarts in the meantime.
+        """
+        if not self.is_running:
+            return
+        timer = threading.Timer(
+            delay.total_seconds(),
+            self._resubmit,
+            args=(job_id,),
+        )
+        timer.daemon = True
+        with self._lock:
+            self._timers.add(timer)
+        timer.start()
+
+    @staticmethod
+    def _new_worker_id() -> str:
+        """Make an id for a runner that's unique across hosts and restarts."""
+        return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+    def _resubmit(self, job_id: UUID) -> None:
+        """Resubmit a job once its retry timer fires."""
+        with self._lock:
+            self._timers = {t for t in self._timers if t.is_alive()}
+        self.submit(job_id)
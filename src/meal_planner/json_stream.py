@@ -0,0 +1,322 @@
+"""
+Parse a JSON object incrementally, streaming the items of one of its arrays.
+
+The parser is fed the body of a request a chunk at a time and returns each
+item of the streamed array as soon as it's complete, so a client can send
+thousands of items without the whole body ever being held in memory. Only
+the value being parsed is buffered, and it's limited to a maximum length.
+Each value is parsed with json.loads() once its end is found, so the values
+are checked as strictly as the rest of the API checks request bodies.
+"""
+
+import codecs
+import json
+import re
+from enum import Enum, auto
+from typing import Any
+
+# the characters that can start or end a value outside of a string
+STRUCTURE = re.compile(r'["{}\[\],:]')
+# the characters that can end a string or escape the next character
+STRING_SPECIAL = re.compile(r'["\\]')
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+DECODER = json.JSONDecoder()
+
+
+class JSONStreamError(ValueError):
+    """The stream isn't valid JSON, or isn't an object."""
+
+
+class ValueTooLongError(ValueError):
+    """A value in the stream is longer than the parser allows."""
+
+
+class State(Enum):
+    """The token that the parser expects next."""
+
+    OBJECT_START = auto()
+    KEY_OR_END = auto()
+    KEY = auto()
+    COLON = auto()
+    VALUE = auto()
+    FIELD = auto()
+    ITEM_OR_END = auto()
+    ITEM = auto()
+    ITEM_VALUE = auto()
+    AFTER_FIELD = auto()
+    END = auto()
+
+
+class ObjectStreamParser:
+    """
+    Parse a JSON object from chunks of bytes, streaming the items of one array.
+
+    The other fields of the object are collected in ``fields`` as they're
+    parsed, in whatever order they're sent.
+
+    Attributes
+    ----------
+    array_key: str
+        The key of the array whose items are returned by feed()
+    max_value_length: int
+        The maximum number of characters in each field or item
+    fields: dict[str, Any]
+        The values of the object's other fields
+    has_array: bool
+        Whether the streamed array has been started
+
+    """
+
+    def __init__(self, array_key: str, *, max_value_length: int) -> None:
+        """Init the parser with the key of the array to stream."""
+        self.array_key = array_key
+        self.max_value_length = max_value_length
+        self.fields: dict[str, Any] = {}
+        self.has_array = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0  # where the next character to read is
+        self._start = 0  # where the value being read started
+        self._state = State.OBJECT_START
+        self._key = ""
+        # the position inside of the value being read
+        self._depth = 0
+        self._in_string = False
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        """
+        Parse the next chunk of the stream.
+
+        Parameters
+        ----------
+        chunk: bytes
+            The next bytes of the stream, which can end anywhere, even in the
+            middle of a character
+
+        Returns
+        -------
+        list[Any]
+            The items of the streamed array that were completed by this chunk
+
+        Raises
+        ------
+        JSONStreamError
+            If the stream isn't a valid JSON object
+        ValueTooLongError
+            If a field or item is longer than max_value_length
+
+        """
+        return self._parse(self._decode(chunk))
+
+    def close(self) -> None:
+        """Check that the stream ended after the whole object was parsed."""
+        self._parse(self._decode(b"", final=True))
+        if self._state != State.END:
+            msg = "The stream ended before the end of the object"
+            raise JSONStreamError(msg)
+
+    def _decode(self, chunk: bytes, *, final: bool = False) -> str:
+        """Decode the next chunk, keeping any incomplete character for later."""
+        try:
+            return self._decoder.decode(chunk, final=final)
+        except UnicodeDecodeError as error:
+            msg = "The stream isn't valid UTF-8"
+            raise JSONStreamError(msg) from error
+
+    def _parse(self, text: str) -> list[Any]:
+        """Parse the text that was added to the stream."""
+        # drop what's already been parsed, keeping the value being read
+        keep = self._start if self._reading_value else self._pos
+        self._buffer = self._buffer[keep:] + text
+        self._pos -= keep
+        self._start -= keep
+        items: list[Any] = []
+        while self._step(items):
+            pass
+        if self._reading_value:
+            self._check_length(len(self._buffer) - self._start)
+        return items
+
+    @property
+    def _reading_value(self) -> bool:
+        """Check whether the parser is in the middle of a field or item."""
+        return self._state in (State.FIELD, State.ITEM_VALUE)
+
+    def _step(self, items: list[Any]) -> bool:  # noqa: C901, PLR0911, PLR0912
+        """Parse the next token, returning False if more data is needed."""
+        if self._state in (State.FIELD, State.ITEM_VALUE):
+            return self._read_value(items)
+        self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+        if self._pos == len(self._buffer):
+            return False
+        char = self._buffer[self._pos]
+        state = self._state
+        # checked first because it's the state between every pair of items
+        if state is State.ITEM or (state is State.ITEM_OR_END and char != "]"):
+            self._begin_value(State.ITEM_VALUE)
+            return True
+        if state == State.OBJECT_START:
+            self._expect(char, "{")
+            self._state = State.KEY_OR_END
+        elif state == State.KEY_OR_END and char == "}":
+            self._state = State.END
+        elif state in (State.KEY_OR_END, State.KEY):
+            self._expect(char, '"')
+            key = self._read_string()
+            if key is None:
+                return False
+            self._key = key
+            self._state = State.COLON
+            return True
+        elif state == State.COLON:
+            self._expect(char, ":")
+            self._state = State.VALUE
+        elif state == State.VALUE and self._key == self.array_key:
+            if self.has_array:
+                msg = f"The {self.array_key} array can only be sent once"
+                raise JSONStreamError(msg)
+            self._expect(char, "[")
+            self.has_array = True
+            self._state = State.ITEM_OR_END
+        elif state == State.VALUE:
+            self._begin_value(State.FIELD)
+            return True
+        elif state == State.ITEM_OR_END:
+            self._state = State.AFTER_FIELD
+        elif state == State.AFTER_FIELD and char in ",}":
+            self._state = State.KEY if char == "," else State.END
+        else:
+            self._fail()
+        self._pos += 1
+        return True
+
+    def _expect(self, char: str, wanted: str) -> None:
+        """Raise an error if the next character isn't the one expected."""
+        if char != wanted:
+            self._fail()
+
+    def _fail(self) -> None:
+        """Raise an error for an unexpected character."""
+        char = self._buffer[self._pos]
+        msg = f"Unexpected character {char!r} in the stream"
+        raise JSONStreamError(msg)
+
+    def _read_string(self) -> str | None:
+        """Read a complete string starting at the current position."""
+        pos = self._pos + 1
+        while True:
+            match = STRING_SPECIAL.search(self._buffer, pos)
+            if match is None:
+                self._check_length(len(self._buffer) - self._pos)
+                return None
+            if match.group() == '"':
+                end = match.end()
+                break
+            pos = match.end() + 1  # skip the escaped character
+        self._check_length(end - self._pos)
+        value = self._loads(self._buffer[self._pos : end])
+        self._pos = end
+        return value
+
+    def _begin_value(self, state: State) -> None:
+        """Start reading a field or item at the current position."""
+        self._state = state
+        self._start = self._pos
+        self._depth = 0
+        self._in_string = False
+
+    def _read_value(self, items: list[Any]) -> bool:
+        """Parse the field or item being read once its end has arrived."""
+        parsed = self._decode_value() if self._pos == self._start else None
+        if parsed:
+            value, end = parsed
+        else:
+            end = self._find_value_end()
+            if end is None:
+                return False
+            self._check_length(end - self._start)
+            text = self._buffer[self._start : end].strip()
+            self._pos = end
+            if not text:
+                self._fail()
+            value = self._loads(text)
+        char = self._buffer[end]
+        self._pos = end
+        if self._state == State.FIELD:
+            # the comma or brace after a field is read as the next token
+            self.fields[self._key] = value
+            self._state = State.AFTER_FIELD
+            return True
+        if char == "}":
+            self._fail()
+        items.append(value)
+        self._state = State.ITEM if char == "," else State.AFTER_FIELD
+        self._pos += 1
+        return True
+
+    def _decode_value(self) -> tuple[Any, int] | None:
+        """
+        Try to parse a value that has completely arrived in a single pass.
+
+        Most values arrive in the same chunk they start in, so they're parsed
+        by the json module's scanner instead of being scanned for their end
+        first. Returns the value and the position of the comma or bracket
+        after it, or None if it has to be scanned for, like when it's only
+        partly arrived or isn't valid.
+        """
+        try:
+            value, end = DECODER.raw_decode(self._buffer, self._start)
+        except json.JSONDecodeError:
+            return None
+        after = WHITESPACE.match(self._buffer, end).end()
+        # a number at the end of the buffer could still have more digits
+        if after == len(self._buffer) or self._buffer[after] not in ",]}":
+            return None
+        self._check_length(end - self._start)
+        return value, after
+
+    def _find_value_end(self) -> int | None:
+        """
+        Scan the value being read for the comma or bracket that ends it.
+
+        The value ends at the first comma or closing bracket outside of any
+        string, array, or object that it contains. Each character is only
+        scanned once, because the scan picks up where it stopped when more of
+        the stream arrives.
+        """
+        buffer = self._buffer
+        pos = self._pos
+        while True:
+            pattern = STRING_SPECIAL if self._in_string else STRUCTURE
+            match = pattern.search(buffer, pos)
+            if match is None:
+                self._pos = len(buffer)
+                return None
+            char = match.group()
+            pos = match.end()
+            if not self._in_string:
+                if char in ",]}" and not self._depth:
+                    return match.start()
+                self._in_string = char == '"'
+                self._depth += (char in "[{") - (char in "]}")
+            elif char == '"':
+                self._in_string = False
+            elif pos == len(buffer):  # wait for the escaped character
+                self._pos = match.start()
+                return None
+            else:
+                pos += 1  # skip the escaped character
+
+    def _check_length(self, length: int) -> None:
+        """Raise an error if a value is longer than the parser allows."""
+        if length > self.max_value_length:
+            msg = f"Values can't be longer than {self.max_value_length} characters"
+            raise ValueTooLongError(msg)
+
+    def _loads(self, text: str) -> Any:  # noqa: ANN401
+        """Parse a complete JSON value."""
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as error:
+            msg = f"Invalid JSON in the stream: {error.msg}"
+            raise JSONStreamError(msg) from error
@@ -0,0 +1 @@
+"""Manage ASGI middleware that wraps every request to the API."""
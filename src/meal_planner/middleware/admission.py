@@ -0,0 +1,218 @@
+"""Limit how many requests of each class are handled at the same time."""
+
+import asyncio
+import json
+from collections import deque
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Any
+
+from starlette import status
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from meal_planner.config import get_config
+from meal_planner.middleware.read_your_writes import (
+    READ_METHODS,
+    READ_ONLY_PATHS,
+)
+
+# endpoints that load or write many rows in a single request
+BULK_PATHS = {"/recipes/batch-get", "/recipes/stream"}
+# endpoints that should respond even when the API is overloaded
+EXEMPT_PATHS = {"/", "/docs", "/openapi.json", "/metrics/admission"}
+
+
+class RequestClass(StrEnum):
+    """The classes of requests that have separate concurrency limits."""
+
+    READ = "read"
+    WRITE = "write"
+    BULK = "bulk"
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request can't be queued or waited too long for a slot."""
+
+
+@dataclass
+class ConcurrencyLimiter:
+    """
+    Let a fixed number of requests run at once and queue a few more.
+
+    Waiting requests are handed a slot in the order they arrived. Once the
+    queue is full, new requests are rejected right away instead of waiting,
+    so that a slow database causes fast 503s rather than a growing backlog of
+    requests that will time out anyway.
+    """
+
+    concurrency: int
+    queue_size: int
+    timeout: float
+    active: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    _waiting: deque[asyncio.Future] = field(default_factory=deque)
+
+    @property
+    def waiting(self) -> int:
+        """Return the number of requests waiting for a slot."""
+        return len(self._waiting)
+
+    async def acquire(self) -> None:
+        """
+        Wait for a slot to handle a request in.
+
+        Raises
+        ------
+        AdmissionRejectedError
+            If the queue is full or no slot is freed up before the timeout
+
+        """
+        if self.active < self.concurrency and not self._waiting:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiting) >= self.queue_size:
+            self.rejected += 1
+            raise AdmissionRejectedError
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiting.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except (TimeoutError, asyncio.CancelledError) as err:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # the slot was handed over as we gave up
+            elif waiter in self._waiting:
+                self._waiting.remove(waiter)
+            if isinstance(err, TimeoutError):
+                self.timed_out += 1
+                raise AdmissionRejectedError from err
+            raise
+        self.admitted += 1
+
+    def release(self) -> None:
+        """Hand the slot to the next waiting request, or free it up."""
+        while self._waiting:
+            waiter = self._waiting.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # the slot stays active for the waiter
+                return
+        self.active -= 1
+
+    def metrics(self) -> dict[str, int]:
+        """Return the limits and the current and cumulative request counts."""
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class AdmissionController:
+    """Sort requests into classes and keep a limiter for each class."""
+
+    def __init__(
+        self,
+        limits: dict[str, dict[str, int]],
+        timeout: float,
+    ) -> None:
+        """Init the controller with the concurrency and queue size per class."""
+        self.limiters = {
+            request_class: ConcurrencyLimiter(
+                concurrency=limits[request_class]["concurrency"],
+                queue_size=limits[request_class]["queue_size"],
+                timeout=timeout,
+            )
+            for request_class in RequestClass
+        }
+
+    def classify(self, scope: Scope) -> RequestClass | None:
+        """Return the class of a request, or None if it isn't limited."""
+        path = scope["path"]
+        if path in EXEMPT_PATHS:
+            return None
+        if path in BULK_PATHS:
+            return RequestClass.BULK
+        if scope["method"] in READ_METHODS or path in READ_ONLY_PATHS:
+            return RequestClass.READ
+        return RequestClass.WRITE
+
+    def metrics(self) -> dict[str, dict[str, int]]:
+        """Return the metrics of the limiter for each class of request."""
+        return {
+            request_class.value: limiter.metrics()
+            for request_class, limiter in self.limiters.items()
+        }
+
+
+class AdmissionControlMiddleware:
+    """
+    Reject requests with a 503 when too many of their class are in flight.
+
+    The sync route handlers run on a shared threadpool, so without a limit a
+    slow database lets requests pile up until every request is slow. Limiting
+    each class separately also keeps slow bulk requests from starving reads.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        retry_after: int,
+    ) -> None:
+        """Init the middleware with the controller that tracks the limits."""
+        self.app = app
+        self.controller = controller
+        self.retry_after = retry_after
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Wait for a slot before handling the request, or reject it."""
+        request_class = None
+        if scope["type"] == "http":
+            request_class = self.controller.classify(scope)
+        if request_class is None:
+            await self.app(scope, receive, send)
+            return
+        limiter = self.controller.limiters[request_class]
+        try:
+            await limiter.acquire()
+        except AdmissionRejectedError:
+            await self.reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    async def reject(self, send: Send) -> None:
+        """Send a 503 response that tells the client when to try again."""
+        body: dict[str, Any] = {"detail": "Server is busy, try again later"}
+        content = json.dumps(body).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status.HTTP_503_SERVICE_UNAVAILABLE,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(content)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            },
+        )
+        await send({"type": "http.response.body", "body": content})
+
+
+admission_controller = AdmissionController(
+    limits=get_config().admission_limits,
+    timeout=get_config().admission_queue_timeout_seconds,
+)
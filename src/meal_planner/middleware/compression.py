@@ -0,0 +1,118 @@
+"""Compress responses with gzip, or zstd and brotli when they're installed."""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from meal_planner.compression import (
+    Encoding,
+    StreamCompressor,
+    is_compressible,
+    negotiate,
+)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses that are large enough to be worth it.
+
+    Responses that already have a Content-Encoding, like the precompressed
+    bodies served from the recipe cache, are passed through unchanged.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int) -> None:
+        """Init the middleware with the smallest body size to compress."""
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Compress the response if the client accepts a supported encoding."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressingResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressingResponder:
+    """Compress the body of a single response as it's sent."""
+
+    def __init__(
+        self,
+        send: Send,
+        encoding: Encoding,
+        minimum_size: int,
+    ) -> None:
+        """Init the responder with the encoding to apply."""
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self._start: Message | None = None
+        self._compressor: StreamCompressor | None = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        """Hold back the response start until the body shows how to send it."""
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        if self._start is not None:
+            await self._send_first_chunk(self._start, message)
+            self._start = None
+            return
+        await self._send_next_chunk(message)
+
+    async def _send_first_chunk(
+        self,
+        start: Message,
+        message: Message,
+    ) -> None:
+        """Decide whether to compress based on the headers and first chunk."""
+        headers = MutableHeaders(scope=start)
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if (
+            "content-encoding" in headers
+            or not is_compressible(headers.get("content-type", ""))
+            or (not more_body and len(body) < self.minimum_size)
+        ):
+            self._passthrough = True
+            await self._send(start)
+            await self._send(message)
+            return
+        headers["Content-Encoding"] = self.encoding.name
+        headers.add_vary_header("Accept-Encoding")
+        if not more_body:
+            body = self.encoding.compress(body)
+            headers["Content-Length"] = str(len(body))
+            await self._send(start)
+            await self._send({**message, "body": body})
+            return
+        # the final size isn't known until the whole body has been streamed
+        del headers["Content-Length"]
+        self._compressor = self.encoding.compressor()
+        await self._send(start)
+        await self._send_next_chunk(message)
+
+    async def _send_next_chunk(self, message: Message) -> None:
+        """Compress a chunk of a streamed body and flush after the last one."""
+        if self._passthrough or self._compressor is None:
+            await self._send(message)
+            return
+        body = self._compressor.compress(message.get("body", b""))
+        more_body = message.get("more_body", False)
+        if not more_body:
+            body += self._compressor.flush()
+        await self._send({**message, "body": body})
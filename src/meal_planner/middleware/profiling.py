@@ -0,0 +1,94 @@
+"""Profile requests from admins that ask for it with the X-Profile header."""
+
+import hmac
+import time
+
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from meal_planner.profiling import PROFILE, RequestProfile
+
+PROFILE_HEADER = "x-profile"
+
+
+class ProfilingMiddleware:
+    """
+    Run requests under cProfile when they send the admin profiling token.
+
+    Instead of the route's response, the client gets the profile as a text
+    attachment, with the time spent in each phase in the Server-Timing header
+    and the status code the route returned in X-Profiled-Status. Only one
+    request per worker is profiled at a time, and the profile also includes
+    any other requests that ran on the event loop while it was handled.
+    """
+
+    def __init__(self, app: ASGIApp, token: str, report_lines: int) -> None:
+        """Init the middleware with the token that admins have to send."""
+        self.app = app
+        self.token = token.encode()
+        self.report_lines = report_lines
+        self._active = False
+
+    def is_authorized(self, scope: Scope) -> bool:
+        """Check whether the request sent the profiling token."""
+        value = Headers(scope=scope).get(PROFILE_HEADER)
+        if value is None:
+            return False
+        return hmac.compare_digest(value.encode(), self.token)
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Profile the request if it's authorized to, or pass it through."""
+        if scope["type"] != "http" or not self.is_authorized(scope):
+            await self.app(scope, receive, send)
+            return
+        if self._active:
+            response = PlainTextResponse(
+                "Another request is being profiled",
+                status_code=409,
+            )
+            await response(scope, receive, send)
+            return
+        self._active = True
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            self._active = False
+
+    async def _profile(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Handle the request under the profiler and send back the report."""
+        status_code = 500
+
+        async def discard(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        profile = RequestProfile()
+        context = PROFILE.set(profile)
+        start = time.perf_counter()
+        try:
+            with profile.profile_thread():
+                await self.app(scope, receive, discard)
+        finally:
+            PROFILE.reset(context)
+        profile.add_timing("total", time.perf_counter() - start)
+        response = PlainTextResponse(
+            profile.report(self.report_lines),
+            headers={
+                "Content-Disposition": 'attachment; filename="profile.txt"',
+                "Server-Timing": profile.server_timing(),
+                "X-Profiled-Status": str(status_code),
+            },
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,55 @@
+"""Send clients to the primary database for a short time after they write."""
+
+from starlette import status
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from meal_planner.dependencies.database import PRIMARY_COOKIE
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+# endpoints that use POST to send a request body but don't write any data
+READ_ONLY_PATHS = {"/recipes/batch-get"}
+
+
+class ReadYourWritesMiddleware:
+    """
+    Set a short-lived cookie on successful writes so reads use the primary.
+
+    Replicas can lag behind the primary database, so a client that reads right
+    after it writes might not see its own changes. While the cookie is set,
+    get_read_db() connects to the primary instead of a replica.
+    """
+
+    def __init__(self, app: ASGIApp, max_age: int) -> None:
+        """Init the middleware with how long reads should use the primary."""
+        self.app = app
+        self.max_age = max_age
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Add the cookie to successful responses to write requests."""
+        if (
+            scope["type"] != "http"
+            or scope["method"] in READ_METHODS
+            or scope["path"] in READ_ONLY_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] < status.HTTP_400_BAD_REQUEST
+            ):
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{PRIMARY_COOKIE}=1; Max-Age={self.max_age}; Path=/; HttpOnly",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -3,11 +3,33 @@
 __all__ = [
     "UUIDAuditBase",
     "Food",
+    "FoodNutrient",
+    "IdempotencyKey",
     "Ingredient",
+    "Job",
+    "MealPlan",
+    "MealPlanIngredient",
+    "PlannedMeal",
     "Recipe",
+    "IngredientSet",
+    "IngredientSetItem",
+    "RecipeVersion",
 ]
 
 from meal_planner.models.base import UUIDAuditBase
 from meal_planner.models.food import Food
+from meal_planner.models.food_nutrient import FoodNutrient
+from meal_planner.models.idempotency_key import IdempotencyKey
 from meal_planner.models.ingredient import Ingredient
+from meal_planner.models.job import Job
+from meal_planner.models.meal_plan import (
+    MealPlan,
+    MealPlanIngredient,
+    PlannedMeal,
+)
 from meal_planner.models.recipe import Recipe
+from meal_planner.models.recipe_version import (
+    IngredientSet,
+    IngredientSetItem,
+    RecipeVersion,
+)
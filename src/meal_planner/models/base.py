@@ -1,13 +1,16 @@
 # pylint: disable=no-self-argument
 """Create base models that other models can inherit from."""
 
+import unicodedata
 from uuid import UUID
 
 from sqlalchemy import DateTime
+from sqlalchemy.engine import default
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
     mapped_column,
+    validates,
 )
 from sqlalchemy.sql import functions
 
@@ -25,3 +28,37 @@ class UUIDAuditBase(DeclarativeBase):
         default=functions.now(),
         onupdate=functions.now(),
     )
+
+
+def search_key(name: str) -> str:
+    """
+    Normalize a name so that it can be searched for regardless of case.
+
+    SQLite's lower() only folds ASCII letters, so names are folded in Python
+    with str.casefold(), which handles every script, and the result is stored
+    in a column that prefix searches compare against.
+    """
+    return unicodedata.normalize("NFKC", name).casefold()
+
+
+def default_search_key(context: default.DefaultExecutionContext) -> str:
+    """Fill in the name_key of rows that are inserted without the ORM."""
+    return search_key(context.get_current_parameters()["name"])
+
+
+class SearchableNameMixin:
+    """
+    Add a name_key column with the case-folded name, for prefix searches.
+
+    The key is kept in sync when the name is set on a record, and is filled
+    in for rows that are inserted in bulk from dictionaries.
+    """
+
+    name: Mapped[str]
+    name_key: Mapped[str] = mapped_column(default=default_search_key)
+
+    @validates("name")
+    def update_name_key(self, _: str, name: str) -> str:
+        """Fold the name into name_key whenever the name is changed."""
+        self.name_key = search_key(name)
+        return name
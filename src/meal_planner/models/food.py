@@ -4,25 +4,32 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy.orm import Mapped, relationship
+from sqlalchemy import Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from meal_planner.models.base import UUIDAuditBase
+from meal_planner.models.base import SearchableNameMixin, UUIDAuditBase
 
 if TYPE_CHECKING:
+    from meal_planner.models.food_nutrient import FoodNutrient
     from meal_planner.models.ingredient import Ingredient
     from meal_planner.models.recipe import Recipe
 
 
-class Food(UUIDAuditBase):
+class Food(SearchableNameMixin, UUIDAuditBase):
     """A dimensional table for foods referenced by grocery lists or recipes."""
 
     __tablename__ = "food"
+    __table_args__ = (
+        # backs the case-insensitive prefix search that autocompletes names
+        Index("ix_food_name_key", "name_key", "id"),
+    )
 
     ###########
     # columns #
     ###########
 
-    name: Mapped[str]
+    # indexed for the exact lookups made when recipes are saved
+    name: Mapped[str] = mapped_column(index=True)
     kind: Mapped[str | None]
 
     #################
@@ -37,3 +44,7 @@ class Food(UUIDAuditBase):
         back_populates="food",
         cascade="delete",
     )
+    nutrients: Mapped[FoodNutrient | None] = relationship(
+        back_populates="food",
+        cascade="delete",
+    )
@@ -0,0 +1,51 @@
+"""Create an ORM for the food_nutrient table in the database."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from uuid import UUID  # noqa: TCH003  # used by SQLAlchemy at runtime
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from meal_planner.models.base import UUIDAuditBase
+
+if TYPE_CHECKING:
+    from meal_planner.models.food import Food
+
+
+class FoodNutrient(UUIDAuditBase):
+    """
+    The nutrients in 100 g of a food.
+
+    Ingredients measured by weight are converted to grams directly, but those
+    measured by volume or by the item need the weight of a cup or of one item
+    of the food, so their nutrition is unknown if those columns are null.
+    """
+
+    __tablename__ = "food_nutrient"
+
+    ###########
+    # columns #
+    ###########
+
+    # foreign keys
+    food_id: Mapped[UUID] = mapped_column(
+        ForeignKey("food.id"),
+        nullable=False,
+        unique=True,
+    )
+    # nutrients per 100 g
+    kcal: Mapped[float]
+    protein_g: Mapped[float]
+    fat_g: Mapped[float]
+    carbs_g: Mapped[float]
+    # weights used to convert amounts to grams
+    grams_per_cup: Mapped[float | None]
+    grams_each: Mapped[float | None]
+
+    #################
+    # relationships #
+    #################
+
+    food: Mapped[Food] = relationship(back_populates="nutrients")
@@ -0,0 +1,38 @@
+"""Create an ORM for the idempotency_key table in the database."""
+
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import JSON, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from meal_planner.models.base import UUIDAuditBase
+
+
+class IdempotencyKey(UUIDAuditBase):
+    """
+    A record of a request made with an Idempotency-Key header.
+
+    The id is derived from the key itself, so looking up a key is a primary key
+    probe. The response is stored once the request completes so that retries
+    can be answered without repeating the work.
+
+    Until then, expires_at is the end of the lease held by the request that
+    claimed the key, which is identified by claim_id.
+    """
+
+    __tablename__ = "idempotency_key"
+
+    ###########
+    # columns #
+    ###########
+
+    claim_id: Mapped[UUID]
+    request_hash: Mapped[str]
+    status_code: Mapped[int | None]
+    response_body: Mapped[Any | None] = mapped_column(JSON)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        index=True,
+    )
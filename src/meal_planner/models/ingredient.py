@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from meal_planner.models.base import UUIDAuditBase
@@ -18,6 +18,12 @@ class Ingredient(UUIDAuditBase):
     """An ingredient in a recipe."""
 
     __tablename__ = "ingredient"
+    __table_args__ = (
+        # finds the recipes that use a food in recipe id order without a sort
+        Index("ix_ingredient_food_id_recipe_id", "food_id", "recipe_id"),
+        # loads the ingredients of a recipe
+        Index("ix_ingredient_recipe_id", "recipe_id"),
+    )
 
     ###########
     # columns #
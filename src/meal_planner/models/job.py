@@ -0,0 +1,44 @@
+"""Create an ORM for the job table in the database."""
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import JSON, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from meal_planner.models.base import UUIDAuditBase
+
+
+class Job(UUIDAuditBase):
+    """A unit of background work that runs outside of the request path."""
+
+    __tablename__ = "job"
+
+    ###########
+    # columns #
+    ###########
+
+    kind: Mapped[str]
+    status: Mapped[str] = mapped_column(index=True)
+    payload: Mapped[dict[str, Any]] = mapped_column(JSON, default=dict)
+    result: Mapped[Any | None] = mapped_column(JSON)
+    error: Mapped[str | None]
+    attempts: Mapped[int] = mapped_column(default=0)
+    max_attempts: Mapped[int] = mapped_column(default=3)
+    cancel_requested: Mapped[bool] = mapped_column(default=False)
+    # when a failed job can be retried, so it isn't picked up again too soon
+    run_after: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+    )
+    # the runner that's running the job, which holds it until its lease ends
+    # unless the runner renews the lease first
+    worker_id: Mapped[str | None]
+    lease_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+    )
+    started_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+    )
@@ -0,0 +1,142 @@
+"""Create ORMs for the meal plan tables in the database."""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import TYPE_CHECKING
+from uuid import UUID  # noqa: TCH003  # used by SQLAlchemy at runtime
+
+from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from meal_planner.models.base import UUIDAuditBase
+
+if TYPE_CHECKING:
+    from meal_planner.models.food import Food
+    from meal_planner.models.recipe import Recipe
+    from meal_planner.models.recipe_version import RecipeVersion
+
+DAYS_IN_PLAN = 7
+
+
+class MealPlan(UUIDAuditBase):
+    """A plan for the meals to make during a week."""
+
+    __tablename__ = "meal_plan"
+
+    ###########
+    # columns #
+    ###########
+
+    name: Mapped[str]
+    start_date: Mapped[date]
+
+    #################
+    # relationships #
+    #################
+
+    meals: Mapped[list[PlannedMeal]] = relationship(
+        back_populates="meal_plan",
+        cascade="delete",
+        order_by="PlannedMeal.date",
+    )
+    ingredient_totals: Mapped[list[MealPlanIngredient]] = relationship(
+        back_populates="meal_plan",
+        cascade="delete",
+    )
+
+    ##############
+    # properties #
+    ##############
+
+    @property
+    def end_date(self) -> date:
+        """Return the last day of the meal plan."""
+        return self.start_date + timedelta(days=DAYS_IN_PLAN - 1)
+
+    def includes(self, day: date) -> bool:
+        """Check whether a date falls within the meal plan's week."""
+        return self.start_date <= day <= self.end_date
+
+
+class PlannedMeal(UUIDAuditBase):
+    """
+    A recipe that is planned for a given meal slot on a given day.
+
+    The meal is pinned to the version of the recipe that was current when it
+    was planned, so editing the recipe later doesn't change meals that were
+    already planned.
+    """
+
+    __tablename__ = "planned_meal"
+
+    ###########
+    # columns #
+    ###########
+
+    # foreign keys
+    meal_plan_id: Mapped[UUID] = mapped_column(
+        ForeignKey("meal_plan.id"),
+        nullable=False,
+        index=True,
+    )
+    recipe_id: Mapped[UUID] = mapped_column(
+        ForeignKey("recipe.id"),
+        nullable=False,
+        index=True,
+    )
+    recipe_version_id: Mapped[UUID] = mapped_column(
+        ForeignKey("recipe_version.id"),
+        nullable=False,
+    )
+    # regular columns
+    date: Mapped[date]
+    slot: Mapped[str]
+    servings: Mapped[float] = mapped_column(default=1)
+
+    #################
+    # relationships #
+    #################
+
+    meal_plan: Mapped[MealPlan] = relationship(back_populates="meals")
+    recipe: Mapped[Recipe] = relationship()
+    recipe_version: Mapped[RecipeVersion] = relationship()
+
+
+class MealPlanIngredient(UUIDAuditBase):
+    """
+    The total amount of a food needed for a meal plan, in a given unit.
+
+    This table is a materialized rollup of the ingredients of every meal in a
+    plan. It's updated incrementally whenever planned meals change, so that
+    shopping lists don't need to be recomputed from every recipe on each read.
+    """
+
+    __tablename__ = "meal_plan_ingredient"
+    __table_args__ = (UniqueConstraint("meal_plan_id", "food_id", "unit"),)
+
+    ###########
+    # columns #
+    ###########
+
+    # foreign keys
+    meal_plan_id: Mapped[UUID] = mapped_column(
+        ForeignKey("meal_plan.id"),
+        nullable=False,
+    )
+    food_id: Mapped[UUID] = mapped_column(
+        ForeignKey("food.id"),
+        nullable=False,
+    )
+    # regular columns
+    amount: Mapped[float]
+    unit: Mapped[str]
+
+    #################
+    # relationships #
+    #################
+
+    meal_plan: Mapped[MealPlan] = relationship(
+        back_populates="ingredient_totals",
+    )
+    food: Mapped[Food] = relationship()
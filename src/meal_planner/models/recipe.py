@@ -4,18 +4,32 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy.orm import relationship
+from sqlalchemy import JSON, Index, String, literal_column
+from sqlalchemy.orm import mapped_column, relationship
 
-from meal_planner.models.base import Mapped, UUIDAuditBase
+from meal_planner.models.base import (
+    Mapped,
+    SearchableNameMixin,
+    UUIDAuditBase,
+)
 
 if TYPE_CHECKING:
     from meal_planner.models.ingredient import Ingredient
+    from meal_planner.models.recipe_version import RecipeVersion
 
 
-class Recipe(UUIDAuditBase):
+class Recipe(SearchableNameMixin, UUIDAuditBase):
     """A recipe for a meal."""
 
     __tablename__ = "recipe"
+    __table_args__ = (
+        # each index serves one of the sort orders that recipes can be listed
+        # in, and the filters on its leading column, in keyset order
+        Index("ix_recipe_name_key", "name_key", "id"),
+        Index("ix_recipe_created_at", "created_at", "id"),
+        Index("ix_recipe_updated_at", "updated_at", "id"),
+        Index("ix_recipe_ingredient_count", "ingredient_count", "id"),
+    )
 
     ###########
     # columns #
@@ -23,6 +37,20 @@ class Recipe(UUIDAuditBase):
 
     name: Mapped[str]
     description: Mapped[str]
+    # the number of servings that the ingredient amounts make
+    servings: Mapped[int] = mapped_column(default=1)
+    # incremented on every update, unlike updated_at which SQLite only stores
+    # to the second, so it can be used to tell cached copies are out of date
+    revision: Mapped[int] = mapped_column(
+        default=1,
+        onupdate=literal_column("revision + 1"),
+    )
+    # summary columns that are denormalized from the recipe's ingredients so
+    # that listings don't need to join the ingredient or food tables
+    ingredient_count: Mapped[int] = mapped_column(default=0)
+    food_names: Mapped[list[str]] = mapped_column(JSON, default=list)
+    # indexed so that duplicate recipes can be found with a single lookup
+    content_hash: Mapped[str | None] = mapped_column(String(64), index=True)
 
     #################
     # relationships #
@@ -32,3 +60,7 @@ class Recipe(UUIDAuditBase):
         back_populates="recipe",
         cascade="delete",
     )
+    versions: Mapped[list[RecipeVersion]] = relationship(
+        cascade="delete",
+        order_by="RecipeVersion.version",
+    )
@@ -0,0 +1,130 @@
+"""Create ORMs for the recipe version tables in the database."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from uuid import UUID  # noqa: TCH003  # used by SQLAlchemy at runtime
+
+from sqlalchemy import ForeignKey, Index, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from meal_planner.models.base import UUIDAuditBase
+
+if TYPE_CHECKING:
+    from meal_planner.models.food import Food
+
+
+class IngredientSet(UUIDAuditBase):
+    """
+    An immutable set of ingredients that recipe versions can share.
+
+    Sets are identified by a hash of their contents, so every version with the
+    same ingredients, like one that only renames a recipe or one that reverts
+    an edit, points to the same rows instead of copying them.
+    """
+
+    __tablename__ = "ingredient_set"
+
+    ###########
+    # columns #
+    ###########
+
+    content_hash: Mapped[str] = mapped_column(String(64), unique=True)
+
+    #################
+    # relationships #
+    #################
+
+    items: Mapped[list[IngredientSetItem]] = relationship(
+        back_populates="ingredient_set",
+    )
+
+
+class IngredientSetItem(UUIDAuditBase):
+    """An ingredient in an IngredientSet, which is never changed once written."""
+
+    __tablename__ = "ingredient_set_item"
+
+    ###########
+    # columns #
+    ###########
+
+    # foreign keys
+    ingredient_set_id: Mapped[UUID] = mapped_column(
+        ForeignKey("ingredient_set.id"),
+        nullable=False,
+        index=True,
+    )
+    food_id: Mapped[UUID] = mapped_column(
+        ForeignKey("food.id"),
+        nullable=False,
+    )
+    # regular columns
+    amount: Mapped[float]
+    unit: Mapped[str]
+
+    #################
+    # relationships #
+    #################
+
+    ingredient_set: Mapped[IngredientSet] = relationship(
+        back_populates="items",
+    )
+    food: Mapped[Food] = relationship()
+
+
+class RecipeVersion(UUIDAuditBase):
+    """
+    An immutable copy of a recipe's content after it was created or edited.
+
+    The version's ingredients are the items of its IngredientSet, which it
+    shares with every other version that has the same ingredients.
+    """
+
+    __tablename__ = "recipe_version"
+    __table_args__ = (
+        # finds a recipe's latest version, or a specific one, in one seek
+        UniqueConstraint("recipe_id", "version"),
+        # finds the version that was current at a point in time, breaking ties
+        # between versions created in the same second by their number
+        Index(
+            "ix_recipe_version_recipe_id_created_at",
+            "recipe_id",
+            "created_at",
+            "version",
+        ),
+    )
+
+    ###########
+    # columns #
+    ###########
+
+    # foreign keys
+    recipe_id: Mapped[UUID] = mapped_column(
+        ForeignKey("recipe.id"),
+        nullable=False,
+    )
+    ingredient_set_id: Mapped[UUID] = mapped_column(
+        ForeignKey("ingredient_set.id"),
+        nullable=False,
+    )
+    # regular columns
+    version: Mapped[int]
+    name: Mapped[str]
+    description: Mapped[str]
+    servings: Mapped[int]
+
+    #################
+    # relationships #
+    #################
+
+    ingredient_set: Mapped[IngredientSet] = relationship()
+
+    ##############
+    # properties #
+    ##############
+
+    @property
+    def ingredients(self) -> list[IngredientSetItem]:
+        """Return the ingredients in the version's ingredient set."""
+        return self.ingredient_set.items
@@ -0,0 +1,151 @@
+"""Serve a prebuilt OpenAPI document instead of generating it on first use."""
+
+import hashlib
+import json
+import re
+from enum import Enum
+from pathlib import Path
+from typing import Any, get_args
+
+from fastapi import FastAPI
+from fastapi.dependencies.utils import get_flat_params
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+FINGERPRINT_KEY = "x-route-fingerprint"
+# in the reprs of functions and other objects, which change between processes
+MEMORY_ADDRESS = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
+def route_fingerprint(app: FastAPI) -> str:
+    """
+    Hash the inputs of an app's schema to tell whether a document is stale.
+
+    This looks at each route's path, methods, handler, docs and parameters,
+    and at the fields of the models it reads and returns. That's much
+    cheaper than generating the schema, and a change to any of them means a
+    document built for an older version of the app is regenerated instead of
+    being served.
+    """
+    models: dict[str, str] = {}
+    routes = sorted(
+        describe_route(route, models)
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.include_in_schema
+    )
+    content = json.dumps(
+        [
+            app.title,
+            app.version,
+            app.description,
+            app.openapi_tags,
+            routes,
+            sorted(models.items()),
+        ],
+        default=stable_repr,
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def describe_route(route: APIRoute, models: dict[str, str]) -> str:
+    """Describe the parts of a route that appear in the schema."""
+    params = [*get_flat_params(route.dependant), *route.dependant.body_params]
+    for param in params:
+        describe_models(param.field_info.annotation, models)
+    describe_models(route.response_model, models)
+    return stable_repr(
+        [
+            route.path,
+            sorted(route.methods),
+            f"{route.endpoint.__module__}.{route.endpoint.__qualname__}",
+            route.summary,
+            route.description,
+            route.response_description,
+            route.status_code,
+            route.tags,
+            route.deprecated,
+            route.operation_id,
+            route.responses,
+            route.openapi_extra,
+            [(param.name, param.field_info) for param in params],
+            route.response_model,
+        ],
+    )
+
+
+def describe_models(
+    annotation: Any,  # noqa: ANN401
+    models: dict[str, str],
+) -> None:
+    """Describe the models and enums that a type refers to, recursively."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        name = f"{annotation.__module__}.{annotation.__qualname__}"
+        if name in models:
+            return
+        models[name] = stable_repr(
+            [
+                annotation.__doc__,
+                annotation.model_config,
+                annotation.model_fields,
+                annotation.model_computed_fields,
+            ],
+        )
+        for field in annotation.model_fields.values():
+            describe_models(field.annotation, models)
+    elif isinstance(annotation, type) and issubclass(annotation, Enum):
+        name = f"{annotation.__module__}.{annotation.__qualname__}"
+        models[name] = stable_repr([member.value for member in annotation])
+    else:
+        for arg in get_args(annotation):
+            describe_models(arg, models)
+
+
+def stable_repr(value: Any) -> str:  # noqa: ANN401
+    """Return the repr of a value without the memory addresses it includes."""
+    return MEMORY_ADDRESS.sub("", repr(value))
+
+
+def build_openapi(app: FastAPI) -> dict[str, Any]:
+    """Generate the OpenAPI document for an app and tag it with its routes."""
+    app.openapi_schema = None
+    schema = FastAPI.openapi(app)
+    app.openapi_schema = None  # FastAPI.openapi() caches what it generates
+    return {**schema, FINGERPRINT_KEY: route_fingerprint(app)}
+
+
+def write_openapi(app: FastAPI, path: Path) -> None:
+    """Write the OpenAPI document for an app to a file."""
+    path.write_text(json.dumps(build_openapi(app)))
+
+
+def install_openapi(app: FastAPI, path: Path) -> None:
+    """
+    Load the app's OpenAPI document from a file the first time it's requested.
+
+    Parameters
+    ----------
+    app: FastAPI
+        The app whose openapi() method is replaced
+    path: Path
+        The file written by write_openapi(). If it's missing or was built for
+        different routes, the document is generated instead.
+
+    """
+
+    def openapi() -> dict[str, Any]:
+        if app.openapi_schema is None:
+            app.openapi_schema = load_openapi(app, path) or build_openapi(app)
+        return app.openapi_schema
+
+    app.openapi = openapi  # type: ignore[method-assign]
+
+
+def load_openapi(app: FastAPI, path: Path) -> dict[str, Any] | None:
+    """Return a prebuilt OpenAPI document if it matches the app's routes."""
+    try:
+        schema = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if schema.get(FINGERPRINT_KEY) != route_fingerprint(app):
+        return None
+    return schema
@@ -0,0 +1,142 @@
+"""Profile individual requests and time the phases they spend time in."""
+
+import cProfile
+import io
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Iterator
+
+# phases of requests that aren't being profiled share this no-op context
+NO_PHASE: AbstractContextManager[None] = nullcontext()
+
+
+class RequestProfile:
+    """
+    The profiles and phase timings collected while handling one request.
+
+    Before Python 3.12 cProfile only sees the thread that enabled it, so each
+    phase also profiles the thread it runs in, which covers the route handlers
+    that run in the threadpool. The profiles of every thread are combined into
+    one report.
+    """
+
+    def __init__(self) -> None:
+        """Init an empty profile."""
+        self.timings: dict[str, float] = defaultdict(float)
+        self._profilers: list[cProfile.Profile] = []
+        self._threads: set[int] = set()
+        self._lock = threading.Lock()
+
+    def add_timing(self, name: str, seconds: float) -> None:
+        """Add the time spent in a phase to the total for that phase."""
+        with self._lock:
+            self.timings[name] += seconds
+
+    @contextmanager
+    def profile_thread(self) -> Iterator[None]:
+        """Profile the current thread while the block runs, unless it already is."""
+        profiler = self._start_thread()
+        try:
+            yield
+        finally:
+            if profiler:
+                self._stop_thread(profiler)
+
+    def _start_thread(self) -> cProfile.Profile | None:
+        """Enable a profiler for the current thread if it doesn't have one."""
+        thread = threading.get_ident()
+        with self._lock:
+            if thread in self._threads:
+                return None
+            self._threads.add(thread)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # since Python 3.12 there's a single profiler for every thread
+            with self._lock:
+                self._threads.discard(thread)
+            return None
+        return profiler
+
+    def _stop_thread(self, profiler: cProfile.Profile) -> None:
+        """Disable the current thread's profiler and keep its results."""
+        profiler.disable()
+        with self._lock:
+            self._threads.discard(threading.get_ident())
+            self._profilers.append(profiler)
+
+    def server_timing(self) -> str:
+        """Format the phase timings as a Server-Timing header."""
+        with self._lock:
+            timings = dict(self.timings)
+        return ", ".join(
+            f"{name};dur={seconds * 1000:.2f}"
+            for name, seconds in timings.items()
+        )
+
+    def report(self, lines: int) -> str:
+        """
+        Return the functions that took the most time, including their callees.
+
+        Parameters
+        ----------
+        lines: int
+            The number of functions to list
+
+        Returns
+        -------
+        str
+            The combined profile of every thread, sorted by cumulative time
+
+        """
+        with self._lock:
+            profilers = list(self._profilers)
+        if not profilers:
+            return "No profile was collected\n"
+        stream = io.StringIO()
+        stats = pstats.Stats(*profilers, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(lines)
+        return stream.getvalue()
+
+
+# the profile of the request being handled, if it's being profiled
+PROFILE: ContextVar[RequestProfile | None] = ContextVar(
+    "profile",
+    default=None,
+)
+
+
+@contextmanager
+def timed_phase(profile: RequestProfile, name: str) -> Iterator[None]:
+    """Time a phase of a profiled request and profile the thread it runs in."""
+    with profile.profile_thread():
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            profile.add_timing(name, time.perf_counter() - start)
+
+
+def phase(name: str) -> AbstractContextManager[None]:
+    """
+    Time a block of code as a named phase of the current request.
+
+    Unless the request is being profiled this returns a shared no-op context,
+    so the only cost is reading a context variable.
+
+    Parameters
+    ----------
+    name: str
+        The name of the phase in the Server-Timing header, which should be a
+        token without spaces, like recipe_service or serialize
+
+    """
+    profile = PROFILE.get()
+    if profile is None:
+        return NO_PHASE
+    return timed_phase(profile, name)
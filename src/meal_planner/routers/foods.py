@@ -0,0 +1,78 @@
+"""Route API requests related to looking up foods."""
+
+from typing import Annotated, Sequence
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi_pagination.links import Page
+from sqlalchemy.orm import Session
+
+from meal_planner.dependencies.database import get_read_db
+from meal_planner.models.food import Food
+from meal_planner.schemas.food import FoodDumpSchema
+from meal_planner.schemas.recipe import (
+    RecipeCursorPageSchema,
+    RecipeSummarySchema,
+)
+from meal_planner.services.foods import food_service
+from meal_planner.services.recipes import recipe_service
+
+food_router = APIRouter(
+    prefix="/foods",
+    tags=["foods"],
+)
+
+
+@food_router.get(
+    "/",
+    summary="Get a list of foods",
+    response_model=Page[FoodDumpSchema],
+    status_code=status.HTTP_200_OK,
+)
+def list_foods(
+    db: Annotated[Session, Depends(get_read_db)],
+    prefix: Annotated[str | None, Query(min_length=1, max_length=100)] = None,
+) -> Sequence[Food]:
+    """
+    Fetch a paginated list of foods in alphabetical order.
+
+    Set prefix to only return foods whose names start with it, ignoring case,
+    which can be used to autocomplete food names as they're typed.
+    """
+    return paginate(conn=db, query=food_service.query_by_prefix(prefix))
+
+
+@food_router.get(
+    "/{food_id}/recipes",
+    summary="Get the recipes that use a food",
+    response_model=RecipeCursorPageSchema,
+    status_code=status.HTTP_200_OK,
+)
+def list_recipes_for_food(
+    db: Annotated[Session, Depends(get_read_db)],
+    food_id: UUID,
+    cursor: UUID | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 50,
+) -> RecipeCursorPageSchema:
+    """
+    Fetch summaries of the recipes that use a food, a page at a time.
+
+    Pass the next_cursor from a response as the cursor of the next request to
+    get the following page.
+    """
+    if not food_service.get(db, food_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Food not found",
+        )
+    rows, next_cursor = recipe_service.get_page_for_food(
+        db,
+        food_id,
+        cursor=cursor,
+        limit=limit,
+    )
+    return RecipeCursorPageSchema(
+        items=[RecipeSummarySchema.model_validate(row) for row in rows],
+        next_cursor=next_cursor,
+    )
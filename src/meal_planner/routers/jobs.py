@@ -0,0 +1,102 @@
+"""Route API requests related to enqueuing and tracking background jobs."""
+
+from typing import Annotated, Sequence
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi_pagination.links import Page
+from sqlalchemy.orm import Session
+
+from meal_planner.dependencies.database import get_db
+from meal_planner.jobs import job_runner
+from meal_planner.models.job import Job
+from meal_planner.schemas.job import JobCreateSchema, JobDumpSchema
+from meal_planner.services.jobs import FINISHED_STATUSES, job_service
+
+job_router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+)
+
+
+def get_job_or_404(db: Session, job_id: UUID) -> Job:
+    """Fetch a job or raise a 404 error if it doesn't exist."""
+    job = job_service.get(db=db, row_id=job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+    return job
+
+
+# job statuses change while the job runs, so these routes always read from the
+# primary database instead of a replica that might be behind
+
+
+@job_router.get(
+    "/",
+    summary="Get a list of jobs",
+    response_model=Page[JobDumpSchema],
+    status_code=status.HTTP_200_OK,
+)
+def list_jobs(db: Annotated[Session, Depends(get_db)]) -> Sequence[Job]:
+    """Fetch a paginated list of jobs, starting with the most recent."""
+    query = job_service.query_all().order_by(Job.created_at.desc())
+    return paginate(conn=db, query=query)
+
+
+@job_router.post(
+    "/",
+    summary="Enqueue a background job",
+    response_model=JobDumpSchema,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def enqueue_a_job(
+    db: Annotated[Session, Depends(get_db)],
+    payload: JobCreateSchema,
+) -> Job:
+    """Save a job to the job table and hand it to a worker if one is free."""
+    if payload.kind not in job_runner.handlers:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown job kind: {payload.kind}",
+        )
+    job = job_service.create(db, data=payload)
+    job_runner.submit(job.id)
+    return job
+
+
+@job_router.get(
+    "/{job_id}",
+    summary="Get the status of a job",
+    response_model=JobDumpSchema,
+    status_code=status.HTTP_200_OK,
+)
+def get_job_by_id(
+    db: Annotated[Session, Depends(get_db)],
+    job_id: UUID,
+) -> Job:
+    """Fetch a job's status, and its result once it has finished."""
+    return get_job_or_404(db, job_id)
+
+
+@job_router.post(
+    "/{job_id}/cancel",
+    summary="Cancel a job",
+    response_model=JobDumpSchema,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def cancel_a_job(
+    db: Annotated[Session, Depends(get_db)],
+    job_id: UUID,
+) -> Job:
+    """Cancel a pending job, or ask a running job to stop."""
+    job = get_job_or_404(db, job_id)
+    if job.status in FINISHED_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Job has already finished",
+        )
+    return job_service.request_cancel(db, job=job)
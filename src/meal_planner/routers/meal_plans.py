@@ -0,0 +1,254 @@
+"""Route API requests related to managing meal plans and their meals."""
+
+from typing import Annotated, Sequence
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi_pagination.links import Page
+from sqlalchemy.orm import Session
+
+from meal_planner.dependencies.database import get_db, get_read_db
+from meal_planner.models.meal_plan import MealPlan, PlannedMeal
+from meal_planner.schemas.meal_plan import (
+    MealPlanCreateSchema,
+    MealPlanDumpSchema,
+    MealPlanUpdateSchema,
+    MealPlanWeekDumpSchema,
+    PlannedMealCreateSchema,
+    PlannedMealDumpSchema,
+    PlannedMealUpdateSchema,
+)
+from meal_planner.schemas.nutrition import NutritionSchema
+from meal_planner.services.meal_plans import meal_plan_service
+from meal_planner.services.nutrition import nutrition_service
+from meal_planner.services.recipe_versions import RecipeVersionNotFoundError
+from meal_planner.services.recipes import recipe_service
+
+meal_plan_router = APIRouter(
+    prefix="/meal-plans",
+    tags=["meal plans"],
+)
+
+
+def get_plan_or_404(db: Session, plan_id: UUID) -> MealPlan:
+    """Fetch a meal plan or raise a 404 error if it doesn't exist."""
+    plan = meal_plan_service.get(db=db, row_id=plan_id)
+    if not plan:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Meal plan not found",
+        )
+    return plan
+
+
+def get_meal_or_404(db: Session, plan_id: UUID, meal_id: UUID) -> PlannedMeal:
+    """Fetch a planned meal or raise a 404 error if it isn't in the plan."""
+    meal = meal_plan_service.get_meal(db, plan_id=plan_id, meal_id=meal_id)
+    if not meal:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Planned meal not found",
+        )
+    return meal
+
+
+def check_recipes_exist(db: Session, recipe_ids: list[UUID]) -> None:
+    """Raise a 422 error if any of the recipes being planned don't exist."""
+    if None in recipe_service.get_many(db, recipe_ids):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Recipe not found",
+        )
+
+
+def check_date_in_plan(
+    plan: MealPlan,
+    meal: PlannedMealCreateSchema | PlannedMealUpdateSchema,
+) -> None:
+    """Raise a 422 error if a meal is planned outside of the plan's week."""
+    if meal.date and not plan.includes(meal.date):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Meals must be planned within the meal plan's week",
+        )
+
+
+##############
+# Meal plans #
+##############
+
+
+@meal_plan_router.get(
+    "/",
+    summary="Get a list of meal plans",
+    response_model=Page[MealPlanDumpSchema],
+    status_code=status.HTTP_200_OK,
+)
+def list_meal_plans(
+    db: Annotated[Session, Depends(get_read_db)],
+) -> Sequence[MealPlan]:
+    """Fetch a paginated list of meal plans and their planned meals."""
+    return paginate(conn=db, query=meal_plan_service.query_with_meals())
+
+
+@meal_plan_router.post(
+    "/",
+    summary="Create a meal plan",
+    response_model=MealPlanDumpSchema,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_a_meal_plan(
+    db: Annotated[Session, Depends(get_db)],
+    payload: MealPlanCreateSchema,
+) -> MealPlan:
+    """Create a new meal plan, optionally with meals already planned."""
+    check_recipes_exist(db, [meal.recipe_id for meal in payload.meals])
+    return meal_plan_service.create(db, data=payload)
+
+
+@meal_plan_router.get(
+    "/{plan_id}",
+    summary="Get meal plan details",
+    response_model=MealPlanDumpSchema,
+    status_code=status.HTTP_200_OK,
+)
+def get_meal_plan_by_id(
+    db: Annotated[Session, Depends(get_read_db)],
+    plan_id: UUID,
+) -> MealPlan:
+    """Fetch a meal plan and its planned meals using its id."""
+    return get_plan_or_404(db, plan_id)
+
+
+@meal_plan_router.get(
+    "/{plan_id}/week",
+    summary="Get a fully expanded week of meals",
+    response_model=MealPlanWeekDumpSchema,
+    status_code=status.HTTP_200_OK,
+)
+def get_meal_plan_week(
+    db: Annotated[Session, Depends(get_read_db)],
+    plan_id: UUID,
+) -> MealPlan:
+    """Fetch a meal plan with each meal's recipe and the total ingredients."""
+    plan = meal_plan_service.get_week(db, plan_id)
+    if not plan:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Meal plan not found",
+        )
+    return plan
+
+
+@meal_plan_router.get(
+    "/{plan_id}/nutrition",
+    summary="Get the nutrition of a meal plan",
+    response_model=NutritionSchema,
+    status_code=status.HTTP_200_OK,
+)
+def get_meal_plan_nutrition(
+    db: Annotated[Session, Depends(get_read_db)],
+    plan_id: UUID,
+) -> NutritionSchema:
+    """Fetch the total calories and macronutrients of every planned meal."""
+    get_plan_or_404(db, plan_id)
+    nutrition = nutrition_service.for_meal_plan(db, plan_id)
+    return NutritionSchema.model_validate(nutrition)
+
+
+@meal_plan_router.patch(
+    "/{plan_id}",
+    summary="Update a meal plan",
+    response_model=MealPlanDumpSchema,
+    status_code=status.HTTP_200_OK,
+)
+def update_a_meal_plan(
+    db: Annotated[Session, Depends(get_db)],
+    plan_id: UUID,
+    payload: MealPlanUpdateSchema,
+) -> MealPlan:
+    """Update a meal plan's details."""
+    plan = get_plan_or_404(db, plan_id)
+    return meal_plan_service.update(db, record=plan, update_data=payload)
+
+
+@meal_plan_router.delete(
+    "/{plan_id}",
+    summary="Delete a meal plan",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+def delete_a_meal_plan(
+    db: Annotated[Session, Depends(get_db)],
+    plan_id: UUID,
+) -> None:
+    """Delete a meal plan along with its planned meals."""
+    meal_plan_service.delete(db, row_id=plan_id)
+
+
+#################
+# Planned meals #
+#################
+
+
+@meal_plan_router.post(
+    "/{plan_id}/meals",
+    summary="Add a meal to a meal plan",
+    response_model=PlannedMealDumpSchema,
+    status_code=status.HTTP_201_CREATED,
+)
+def add_a_planned_meal(
+    db: Annotated[Session, Depends(get_db)],
+    plan_id: UUID,
+    payload: PlannedMealCreateSchema,
+) -> PlannedMeal:
+    """Plan a recipe for a meal on a given day."""
+    plan = get_plan_or_404(db, plan_id)
+    check_date_in_plan(plan, payload)
+    check_recipes_exist(db, [payload.recipe_id])
+    return meal_plan_service.add_meal(db, plan=plan, data=payload)
+
+
+@meal_plan_router.patch(
+    "/{plan_id}/meals/{meal_id}",
+    summary="Update a planned meal",
+    response_model=PlannedMealDumpSchema,
+    status_code=status.HTTP_200_OK,
+)
+def update_a_planned_meal(
+    db: Annotated[Session, Depends(get_db)],
+    plan_id: UUID,
+    meal_id: UUID,
+    payload: PlannedMealUpdateSchema,
+) -> PlannedMeal:
+    """
+    Update the day, slot, or servings of a planned meal.
+
+    Meals stay pinned to the version of the recipe they were planned with
+    unless recipe_version is set, which pins them to that version instead.
+    """
+    plan = get_plan_or_404(db, plan_id)
+    check_date_in_plan(plan, payload)
+    meal = get_meal_or_404(db, plan_id, meal_id)
+    try:
+        return meal_plan_service.update_meal(db, meal=meal, data=payload)
+    except RecipeVersionNotFoundError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Recipe version not found",
+        ) from error
+
+
+@meal_plan_router.delete(
+    "/{plan_id}/meals/{meal_id}",
+    summary="Remove a meal from a meal plan",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+def remove_a_planned_meal(
+    db: Annotated[Session, Depends(get_db)],
+    plan_id: UUID,
+    meal_id: UUID,
+) -> None:
+    """Remove a planned meal from a meal plan."""
+    meal = get_meal_or_404(db, plan_id, meal_id)
+    meal_plan_service.remove_meal(db, meal=meal)
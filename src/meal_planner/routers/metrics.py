@@ -0,0 +1,20 @@
+"""Route API requests for operational metrics about the API itself."""
+
+from fastapi import APIRouter, status
+
+from meal_planner.middleware.admission import admission_controller
+
+metrics_router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+)
+
+
+@metrics_router.get(
+    "/admission",
+    summary="Get admission control metrics",
+    status_code=status.HTTP_200_OK,
+)
+async def get_admission_metrics() -> dict[str, dict[str, int]]:
+    """Fetch the limits, queue depth, and rejection counts per request class."""
+    return admission_controller.metrics()
@@ -1,33 +1,248 @@
 """Route API requests related to managing recipes and their ingredients."""
 
+from datetime import datetime
 from typing import Annotated, Sequence
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import sqlalchemy as sa
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from fastapi_pagination.api import pagination_ctx, set_page
 from fastapi_pagination.ext.sqlalchemy import paginate
 from fastapi_pagination.links import Page
 from sqlalchemy.orm import Session
 
-from meal_planner.dependencies.database import get_db
+from meal_planner.dependencies.database import get_db, get_read_db
+from meal_planner.json_stream import JSONStreamError, ValueTooLongError
 from meal_planner.models.recipe import Recipe
-from meal_planner.schemas.recipe import RecipeCreateSchema, RecipeDumpSchema
+from meal_planner.models.recipe_version import RecipeVersion
+from meal_planner.profiling import phase
+from meal_planner.schemas.nutrition import NutritionSchema
+from meal_planner.schemas.recipe import (
+    RecipeBatchDumpSchema,
+    RecipeBatchGetSchema,
+    RecipeBatchItemSchema,
+    RecipeCreateSchema,
+    RecipeDumpSchema,
+    RecipeScrollPageSchema,
+    RecipeSummarySchema,
+    RecipeUpdateSchema,
+    RecipeVersionDumpSchema,
+    RecipeVersionSummarySchema,
+    RecipeView,
+)
+from meal_planner.services.base import (
+    InvalidCursorError,
+    ListQuery,
+    UnsupportedListQueryError,
+)
+from meal_planner.services.group_commit import group_committer
+from meal_planner.services.idempotency import (
+    IdempotencyKeyInProgressError,
+    IdempotencyKeyReusedError,
+    idempotency_service,
+)
+from meal_planner.services.nutrition import nutrition_service
+from meal_planner.services.recipe_uploads import (
+    InvalidRecipeUploadError,
+    RecipeUpload,
+    RecipeUploadTooLargeError,
+    upload_limits,
+)
+from meal_planner.services.recipe_versions import recipe_version_service
 from meal_planner.services.recipes import recipe_service
+from meal_planner.services.scaling import recipe_scaler
 
 recipe_router = APIRouter(
     prefix="/recipes",
     tags=["recipes"],
 )
 
+ServingsQuery = Annotated[
+    int | None,
+    Query(
+        ge=1,
+        le=1000,
+        description="Scale ingredients to this many servings",
+    ),
+]
+
+
+def recipe_list_query(  # noqa: PLR0913
+    name_prefix: Annotated[
+        str | None,
+        Query(min_length=1, max_length=100),
+    ] = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    updated_after: datetime | None = None,
+    updated_before: datetime | None = None,
+    contains_food: UUID | None = None,
+    max_ingredient_count: Annotated[int | None, Query(ge=0)] = None,
+    sort: Annotated[
+        str | None,
+        Query(
+            description=(
+                "Sort by id, name, created_at, updated_at, or "
+                "ingredient_count, prefixed with - to sort in descending order"
+            ),
+        ),
+    ] = None,
+) -> ListQuery:
+    """Collect the filters and sort order used to list recipes."""
+    filters = {
+        "name_prefix": name_prefix,
+        "created_after": created_after,
+        "created_before": created_before,
+        "updated_after": updated_after,
+        "updated_before": updated_before,
+        "contains_food": contains_food,
+        "max_ingredient_count": max_ingredient_count,
+    }
+    return ListQuery(filters=filters, sort=sort)
+
+
+RecipeListQuery = Annotated[ListQuery, Depends(recipe_list_query)]
+
+
+def filter_recipes(list_query: ListQuery, query: sa.Select) -> sa.Select:
+    """Apply a listing's filters to a query, or raise a 422 if they can't be."""
+    try:
+        return recipe_service.query_list(list_query, query)
+    except UnsupportedListQueryError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(error),
+        ) from error
+
 
 @recipe_router.get(
     "/",
     summary="Get a list of recipes",
-    response_model=Page[RecipeDumpSchema],
+    response_model=Page[RecipeDumpSchema] | Page[RecipeSummarySchema],
     status_code=status.HTTP_200_OK,
+    # the response model is a union, so the default page type is set explicitly
+    dependencies=[Depends(pagination_ctx(Page[RecipeDumpSchema]))],
 )
-def list_recipes(db: Annotated[Session, Depends(get_db)]) -> Sequence[Recipe]:
-    """Fetch summary-level information about a list of recipes."""
-    return paginate(conn=db, query=recipe_service.query_all())
+def list_recipes(  # noqa: PLR0913
+    db: Annotated[Session, Depends(get_read_db)],
+    list_query: RecipeListQuery,
+    *,
+    view: RecipeView = RecipeView.FULL,
+    include_ingredient_count: bool = False,
+    include_food_names: bool = False,
+    include_nutrition: bool = False,
+) -> Sequence[Recipe]:
+    """
+    Fetch a paginated list of recipes.
+
+    Use view=summary to only return each recipe's id, name, and description,
+    which skips loading ingredients entirely. Set include_ingredient_count or
+    include_food_names to also return the number of ingredients or the names
+    of the foods in each recipe in the summary view. Set include_nutrition to
+    also return the nutrition in one serving of each recipe.
+
+    Recipes can be filtered and sorted, but only by combinations that an index
+    can serve: name_prefix when sorting by name, the created or updated ranges
+    when sorting by that timestamp, max_ingredient_count when sorting by
+    ingredient_count, and contains_food when sorting by id. If sort isn't set,
+    it's picked to match the filters.
+    """
+    if view == RecipeView.SUMMARY:
+        query = recipe_service.query_summaries(
+            ingredient_count=include_ingredient_count,
+            food_names=include_food_names,
+        )
+        query = filter_recipes(list_query, query)
+
+        def add_nutrition(rows: Sequence) -> list[RecipeSummarySchema]:
+            # computes the nutrition of the whole page with a single query
+            nutrition = nutrition_service.per_serving(db, [r.id for r in rows])
+            return [
+                RecipeSummarySchema.model_validate(row).model_copy(
+                    update={
+                        "nutrition": NutritionSchema.model_validate(
+                            nutrition[row.id],
+                        ),
+                    },
+                )
+                for row in rows
+            ]
+
+        with set_page(Page[RecipeSummarySchema]), phase("recipe_service"):
+            # count rows with SELECT count(*) FROM recipe instead of a subquery
+            # and skip deduplicating rows, which can't hash the JSON columns
+            return paginate(
+                conn=db,
+                query=query,
+                subquery_count=False,
+                unique=False,
+                transformer=add_nutrition if include_nutrition else None,
+            )
+    # the page is loaded as plain rows, which are much lighter than ORM records
+    query = filter_recipes(list_query, recipe_service.query_summaries())
+    with phase("recipe_service"):
+        return paginate(
+            conn=db,
+            query=query,
+            subquery_count=False,
+            unique=False,
+            transformer=lambda rows: recipe_service.add_ingredients(db, rows),
+        )
+
+
+@recipe_router.get(
+    "/scroll",
+    summary="Scroll through a filtered list of recipes",
+    response_model=RecipeScrollPageSchema,
+    status_code=status.HTTP_200_OK,
+)
+def scroll_recipes(
+    db: Annotated[Session, Depends(get_read_db)],
+    list_query: RecipeListQuery,
+    cursor: Annotated[str | None, Query(max_length=1000)] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 50,
+) -> RecipeScrollPageSchema:
+    """
+    Fetch summaries of recipes a page at a time, using a cursor.
+
+    Takes the same filters and sort orders as GET /recipes/. Pass the
+    next_cursor from a response as the cursor of the next request, with the
+    same sort order, to get the following page.
+    """
+    try:
+        with phase("recipe_service"):
+            rows, next_cursor = recipe_service.get_keyset_page(
+                db,
+                list_query,
+                cursor=cursor,
+                limit=limit,
+                query=recipe_service.query_summaries(
+                    ingredient_count=True,
+                    food_names=True,
+                ),
+            )
+    except (UnsupportedListQueryError, InvalidCursorError) as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(error),
+        ) from error
+    with phase("serialize"):
+        return RecipeScrollPageSchema(
+            items=[RecipeSummarySchema.model_validate(row) for row in rows],
+            next_cursor=next_cursor,
+        )
 
 
 @recipe_router.post(
@@ -39,9 +254,192 @@ def list_recipes(db: Annotated[Session, Depends(get_db)]) -> Sequence[Recipe]:
 def create_a_recipe(
     db: Annotated[Session, Depends(get_db)],
     payload: RecipeCreateSchema,
-) -> Recipe:
-    """Create a new recipe."""
-    return recipe_service.create(db, data=payload)
+    response: Response,
+    idempotency_key: Annotated[
+        str | None,
+        Header(alias="Idempotency-Key", max_length=255),
+    ] = None,
+    *,
+    dedupe: bool = False,
+) -> Recipe | JSONResponse:
+    """
+    Create a new recipe.
+
+    Clients can send an Idempotency-Key header to safely retry this request.
+    Retries with the same key and payload return the original response instead
+    of creating a duplicate recipe.
+
+    Set dedupe=true to return an existing recipe with the same name and
+    ingredients, with status code 200, instead of creating a new one. Retries
+    with an Idempotency-Key replay the original response before the duplicate
+    is looked up again.
+    """
+    if idempotency_key is None:
+        if dedupe:
+            existing = recipe_service.find_duplicate(db, payload)
+            if existing:
+                response.status_code = status.HTTP_200_OK
+                return existing
+        if group_committer.running:
+            # committed along with other recipes created at the same time
+            with phase("recipe_service"):
+                body = recipe_service.create_in_group(payload)
+            return JSONResponse(
+                content=body,
+                status_code=status.HTTP_201_CREATED,
+            )
+        with phase("recipe_service"):
+            return recipe_service.create(db, data=payload)
+    try:
+        claim = idempotency_service.claim(
+            db,
+            scope="create_a_recipe",
+            key=idempotency_key,
+            request_hash=idempotency_service.fingerprint(payload),
+        )
+    except IdempotencyKeyReusedError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(error),
+        ) from error
+    except IdempotencyKeyInProgressError as error:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(error),
+        ) from error
+    if claim.is_replay:
+        return JSONResponse(
+            content=claim.response_body,
+            status_code=claim.status_code,
+            headers={"Idempotent-Replayed": "true"},
+        )
+    status_code = status.HTTP_201_CREATED
+    try:
+        with phase("recipe_service"):
+            recipe = (
+                recipe_service.find_duplicate(db, payload) if dedupe else None
+            )
+            if recipe:
+                status_code = status.HTTP_200_OK
+            else:
+                recipe = recipe_service.create(db, data=payload)
+    except Exception:
+        idempotency_service.release(db, claim)
+        raise
+    with phase("serialize"):
+        body = RecipeDumpSchema.model_validate(recipe).model_dump(mode="json")
+    idempotency_service.complete(
+        db,
+        claim,
+        status_code=status_code,
+        response_body=body,
+    )
+    return JSONResponse(content=body, status_code=status_code)
+
+
+@recipe_router.post(
+    "/stream",
+    summary="Create a recipe from a body that's parsed as it's uploaded",
+    response_model=RecipeDumpSchema,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "$ref": "#/components/schemas/RecipeCreateSchema",
+                    },
+                },
+            },
+        },
+    },
+)
+async def stream_a_recipe(
+    db: Annotated[Session, Depends(get_db)],
+    request: Request,
+) -> JSONResponse:
+    """
+    Create a recipe with thousands of ingredients, such as an imported one.
+
+    This takes the same body as POST /recipes/, but validates each ingredient
+    as soon as it arrives instead of buffering the whole body first. Invalid
+    ingredients are rejected with a 422 before the rest of the body is read,
+    and bodies with too many bytes or ingredients are rejected with a 413.
+    """
+    content_length = request.headers.get("Content-Length", "")
+    if (
+        content_length.isdigit()
+        and int(content_length) > upload_limits.max_bytes
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Recipes can't be larger than {upload_limits.max_bytes} bytes",
+        )
+    upload = RecipeUpload(db, upload_limits)
+    try:
+        async for chunk in request.stream():
+            # parsing and food lookups would block the event loop
+            await run_in_threadpool(upload.feed, chunk)
+        with phase("recipe_service"):
+            recipe = await run_in_threadpool(upload.finish)
+    except RecipeUploadTooLargeError as error:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(error),
+        ) from error
+    except (JSONStreamError, ValueTooLongError) as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(error),
+        ) from error
+    except InvalidRecipeUploadError as error:
+        raise RequestValidationError(
+            [{**e, "loc": ("body", *e["loc"])} for e in error.errors],
+        ) from error
+    with phase("serialize"):
+        body = await run_in_threadpool(
+            lambda: RecipeDumpSchema.model_validate(recipe).model_dump(
+                mode="json",
+            ),
+        )
+    return JSONResponse(content=body, status_code=status.HTTP_201_CREATED)
+
+
+@recipe_router.post(
+    "/batch-get",
+    summary="Get multiple recipes by id",
+    response_model=RecipeBatchDumpSchema,
+    status_code=status.HTTP_200_OK,
+)
+def get_recipes_by_ids(
+    db: Annotated[Session, Depends(get_read_db)],
+    payload: RecipeBatchGetSchema,
+    servings: ServingsQuery = None,
+) -> RecipeBatchDumpSchema:
+    """
+    Fetch the details for several recipes in the order they were requested.
+
+    Set servings to scale every recipe's ingredients to that many servings.
+    """
+    with phase("recipe_service"):
+        recipes = recipe_service.get_many(
+            db,
+            payload.ids,
+            query=recipe_service.query_with_ingredients(),
+        )
+    with phase("serialize"):
+        items = [
+            RecipeBatchItemSchema(
+                id=recipe_id,
+                found=recipe is not None,
+                recipe=(
+                    recipe_scaler.dump(recipe, servings) if recipe else None
+                ),
+            )
+            for recipe_id, recipe in zip(payload.ids, recipes, strict=True)
+        ]
+        return RecipeBatchDumpSchema(items=items)
 
 
 @recipe_router.get(
@@ -51,14 +449,147 @@ def create_a_recipe(
     status_code=status.HTTP_200_OK,
 )
 def get_recipe_by_id(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     recipe_id: UUID,
-) -> Recipe:
-    """Fetch the details for a specific recipe using its id."""
-    recipe = recipe_service.get(db=db, row_id=recipe_id)
+    servings: ServingsQuery = None,
+    accept_encoding: Annotated[
+        str,
+        Header(alias="Accept-Encoding", include_in_schema=False),
+    ] = "",
+) -> Response:
+    """
+    Fetch the details for a specific recipe using its id.
+
+    Set servings to scale the ingredient amounts to that many servings. The
+    amounts are rounded and converted to larger units where that reads better,
+    for example 48 tsp is returned as 1 cup.
+    """
+    with phase("recipe_service"):
+        recipe = recipe_service.get(db=db, row_id=recipe_id)
     if not recipe:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Recipe not found",
         )
-    return recipe
+    # serve the cached body, compressed ahead of time if the client accepts it
+    with phase("serialize"):
+        return recipe_scaler.response(recipe, servings, accept_encoding)
+
+
+@recipe_router.get(
+    "/{recipe_id}/nutrition",
+    summary="Get the nutrition of a recipe",
+    response_model=NutritionSchema,
+    status_code=status.HTTP_200_OK,
+)
+def get_recipe_nutrition(
+    db: Annotated[Session, Depends(get_read_db)],
+    recipe_id: UUID,
+    servings: Annotated[float, Query(gt=0, le=1000)] = 1,
+) -> NutritionSchema:
+    """
+    Fetch the calories and macronutrients in some servings of a recipe.
+
+    Ingredients whose food has no nutrient data, or whose unit can't be
+    converted to grams, are left out and counted in missing_ingredients.
+    """
+    nutrition = nutrition_service.per_serving(db, [recipe_id])
+    if recipe_id not in nutrition:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recipe not found",
+        )
+    return NutritionSchema.model_validate(
+        nutrition[recipe_id].scaled(servings),
+    )
+
+
+def version_or_404(version: RecipeVersion | None) -> RecipeVersion:
+    """Return a recipe version or raise a 404 error if it wasn't found."""
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recipe version not found",
+        )
+    return version
+
+
+@recipe_router.get(
+    "/{recipe_id}/versions",
+    summary="Get the versions of a recipe",
+    response_model=list[RecipeVersionSummarySchema],
+    status_code=status.HTTP_200_OK,
+)
+def list_recipe_versions(
+    db: Annotated[Session, Depends(get_read_db)],
+    recipe_id: UUID,
+) -> Sequence[RecipeVersion]:
+    """Fetch every version of a recipe, from oldest to newest."""
+    query = recipe_version_service.query_for_recipe(recipe_id)
+    versions = recipe_version_service.get_all(db, query)
+    if not versions:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recipe not found",
+        )
+    return versions
+
+
+@recipe_router.get(
+    "/{recipe_id}/versions/latest",
+    summary="Get the latest version of a recipe",
+    response_model=RecipeVersionDumpSchema,
+    status_code=status.HTTP_200_OK,
+)
+def get_latest_recipe_version(
+    db: Annotated[Session, Depends(get_read_db)],
+    recipe_id: UUID,
+    as_of: Annotated[
+        datetime | None,
+        Query(description="Get the version that was current at this time"),
+    ] = None,
+) -> RecipeVersion:
+    """Fetch the current version of a recipe, or the one current as of a time."""
+    if as_of is None:
+        version = recipe_version_service.get_latest(db, recipe_id)
+    else:
+        version = recipe_version_service.get_as_of(db, recipe_id, as_of)
+    return version_or_404(version)
+
+
+@recipe_router.get(
+    "/{recipe_id}/versions/{version}",
+    summary="Get a version of a recipe",
+    response_model=RecipeVersionDumpSchema,
+    status_code=status.HTTP_200_OK,
+)
+def get_recipe_version(
+    db: Annotated[Session, Depends(get_read_db)],
+    recipe_id: UUID,
+    version: int,
+) -> RecipeVersion:
+    """Fetch a version of a recipe, with the ingredients it had then."""
+    found = recipe_version_service.get_version(db, recipe_id, version)
+    return version_or_404(found)
+
+
+@recipe_router.patch(
+    "/{recipe_id}",
+    summary="Update a recipe",
+    response_model=RecipeDumpSchema,
+    status_code=status.HTTP_200_OK,
+)
+def update_a_recipe(
+    db: Annotated[Session, Depends(get_db)],
+    recipe_id: UUID,
+    payload: RecipeUpdateSchema,
+) -> Recipe:
+    """Update a recipe, only writing the ingredients that changed."""
+    with phase("recipe_service"):
+        recipe = recipe_service.get(db=db, row_id=recipe_id)
+        if not recipe:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Recipe not found",
+            )
+        return recipe_service.update(db, record=recipe, update_data=payload)
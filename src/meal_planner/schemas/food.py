@@ -1,5 +1,7 @@
 """Manage schemas for food."""
 
+from uuid import UUID
+
 from pydantic import BaseModel, ConfigDict
 
 
@@ -13,3 +15,10 @@ class FoodBaseSchema(BaseModel):
 
 class FoodCreateSchema(FoodBaseSchema):
     """Schema used to create new food."""
+
+
+class FoodDumpSchema(FoodBaseSchema):
+    """Schema used to serialize foods for API responses."""
+
+    id: UUID
+    kind: str | None
@@ -0,0 +1,46 @@
+"""Manage schemas for background jobs."""
+
+from datetime import datetime
+from enum import StrEnum
+from typing import Any
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class JobStatus(StrEnum):
+    """The stage of its lifecycle that a job is in."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobBaseSchema(BaseModel):
+    """Job schema with shared fields."""
+
+    kind: str
+    payload: dict[str, Any] = {}
+    max_attempts: int = Field(default=3, ge=1, le=10)
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class JobCreateSchema(JobBaseSchema):
+    """Schema used to enqueue new jobs."""
+
+
+class JobDumpSchema(JobBaseSchema):
+    """Schema used to serialize jobs for API responses."""
+
+    id: UUID
+    status: JobStatus
+    result: Any | None
+    error: str | None
+    attempts: int
+    cancel_requested: bool
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
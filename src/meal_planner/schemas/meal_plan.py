@@ -0,0 +1,149 @@
+# pylint: disable=no-member
+"""Manage schemas for meal plans."""
+
+import datetime as dt
+from enum import StrEnum
+from typing import Self
+from uuid import UUID
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    computed_field,
+    model_validator,
+)
+
+from meal_planner.models.meal_plan import DAYS_IN_PLAN
+from meal_planner.schemas.food import FoodBaseSchema
+from meal_planner.schemas.recipe import RecipeVersionDumpSchema
+
+
+class MealSlot(StrEnum):
+    """The meal of the day that a recipe is planned for."""
+
+    BREAKFAST = "breakfast"
+    LUNCH = "lunch"
+    DINNER = "dinner"
+    SNACK = "snack"
+
+
+class PlannedMealBaseSchema(BaseModel):
+    """Planned meal schema with shared fields."""
+
+    date: dt.date
+    slot: MealSlot
+    servings: float = Field(default=1, gt=0)
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MealPlanBaseSchema(BaseModel):
+    """Meal plan schema with shared fields."""
+
+    name: str
+    start_date: dt.date
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @computed_field  # type: ignore[misc]
+    @property
+    def end_date(self) -> dt.date:
+        """Return the last day of the meal plan."""
+        return self.start_date + dt.timedelta(days=DAYS_IN_PLAN - 1)
+
+
+################
+# CRUD schemas #
+################
+
+
+class PlannedMealCreateSchema(PlannedMealBaseSchema):
+    """Schema used to add a recipe to a meal plan."""
+
+    recipe_id: UUID
+
+
+class PlannedMealUpdateSchema(BaseModel):
+    """Schema used to update a planned meal."""
+
+    date: dt.date | None = None
+    slot: MealSlot | None = None
+    servings: float | None = Field(default=None, gt=0)
+    recipe_version: int | None = Field(
+        default=None,
+        ge=1,
+        description="Pin the meal to this version of its recipe",
+    )
+
+
+class MealPlanCreateSchema(MealPlanBaseSchema):
+    """Schema used to create new meal plans."""
+
+    meals: list[PlannedMealCreateSchema] = []
+
+    @model_validator(mode="after")
+    def meals_are_in_plan(self) -> Self:
+        """Reject meals that are planned outside of the meal plan's week."""
+        for meal in self.meals:
+            if not self.start_date <= meal.date <= self.end_date:
+                msg = f"Meals must be planned between {self.start_date} and {self.end_date}"
+                raise ValueError(msg)
+        return self
+
+
+class MealPlanUpdateSchema(BaseModel):
+    """Schema used to update meal plans."""
+
+    name: str | None = None
+
+
+################
+# Dump schemas #
+################
+
+
+class PlannedMealDumpSchema(PlannedMealBaseSchema):
+    """Schema used to serialize planned meals for API responses."""
+
+    id: UUID
+    recipe_id: UUID
+    recipe_version_id: UUID
+
+
+class MealPlanDumpSchema(MealPlanBaseSchema):
+    """Schema used to serialize meal plans for API responses."""
+
+    id: UUID
+    meals: list[PlannedMealDumpSchema]
+
+
+class MealPlanIngredientDumpSchema(BaseModel):
+    """Schema used to serialize the total amount of a food in a meal plan."""
+
+    amount: float
+    unit: str
+    food_record: FoodBaseSchema = Field(validation_alias="food", exclude=True)
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    def food(self) -> str:
+        """Pluck the name of the food."""
+        return self.food_record.name
+
+
+class WeekMealDumpSchema(PlannedMealDumpSchema):
+    """Schema used to serialize a planned meal with the recipe it's pinned to."""
+
+    recipe: RecipeVersionDumpSchema = Field(validation_alias="recipe_version")
+
+
+class MealPlanWeekDumpSchema(MealPlanBaseSchema):
+    """Schema used to serialize a fully expanded week of meals."""
+
+    id: UUID
+    meals: list[WeekMealDumpSchema]
+    ingredients: list[MealPlanIngredientDumpSchema] = Field(
+        validation_alias="ingredient_totals",
+    )
@@ -0,0 +1,39 @@
+"""Manage schemas for the nutrients in foods, recipes, and meal plans."""
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class FoodNutrientBaseSchema(BaseModel):
+    """Schema with the nutrients in 100 g of a food."""
+
+    kcal: float = Field(ge=0)
+    protein_g: float = Field(ge=0)
+    fat_g: float = Field(ge=0)
+    carbs_g: float = Field(ge=0)
+    grams_per_cup: float | None = Field(default=None, gt=0)
+    grams_each: float | None = Field(default=None, gt=0)
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class FoodNutrientCreateSchema(FoodNutrientBaseSchema):
+    """Schema used to load the nutrients of a food, which is found by name."""
+
+    food: str = Field(min_length=1)
+
+
+class NutritionSchema(BaseModel):
+    """Schema used to serialize the nutrition of a recipe or meal plan."""
+
+    kcal: float
+    protein_g: float
+    fat_g: float
+    carbs_g: float
+    missing_ingredients: int = Field(
+        description=(
+            "The number of ingredients left out of the totals, because their "
+            "food has no nutrient data or their unit can't be converted to grams"
+        ),
+    )
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,10 +1,21 @@
 # pylint: disable=no-member
 """Manage schemas for recipes."""
 
-from pydantic import BaseModel, ConfigDict, Field, computed_field
+from datetime import datetime
+from enum import StrEnum
+from uuid import UUID
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    computed_field,
+    field_validator,
+)
 
 from meal_planner.schemas.food import FoodBaseSchema
 from meal_planner.schemas.ingredient import IngredientBaseSchema
+from meal_planner.schemas.nutrition import NutritionSchema
 
 
 class RecipeBaseSchema(BaseModel):
@@ -12,6 +23,7 @@ class RecipeBaseSchema(BaseModel):
 
     name: str
     description: str
+    servings: int = Field(default=1, ge=1)
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -33,8 +45,34 @@ class RecipeCreateSchema(RecipeBaseSchema):
     ingredients: list[RecipeIngredient]
 
 
-class RecipeUpdateSchema(RecipeBaseSchema):
-    """Schema used to update recipes."""
+class RecipeUpdateSchema(BaseModel):
+    """
+    Schema used to update recipes.
+
+    Every field is optional so that clients only send what changed. When
+    ingredients are provided they replace the recipe's current ingredient
+    list, but only the rows that actually differ are written to the database.
+    """
+
+    name: str | None = None
+    description: str | None = None
+    servings: int | None = Field(default=None, ge=1)
+    ingredients: list[RecipeIngredient] | None = None
+
+    @field_validator("ingredients")
+    @classmethod
+    def foods_are_unique(
+        cls,
+        ingredients: list[RecipeIngredient] | None,
+    ) -> list[RecipeIngredient] | None:
+        """Reject ingredient lists that reference the same food twice."""
+        if ingredients is None:
+            return ingredients
+        foods = [ingredient.food for ingredient in ingredients]
+        if len(foods) != len(set(foods)):
+            msg = "Each food can only be listed once per recipe"
+            raise ValueError(msg)
+        return ingredients
 
 
 ################
@@ -57,3 +95,79 @@ class RecipeDumpSchema(RecipeBaseSchema):
     """Schema used to serialize recipes for API responses."""
 
     ingredients: list[RecipeIngredientDumpSchema]
+
+
+class RecipeVersionSummarySchema(RecipeBaseSchema):
+    """Schema used to list the versions of a recipe without their ingredients."""
+
+    version: int
+    created_at: datetime
+
+
+class RecipeVersionDumpSchema(RecipeDumpSchema):
+    """Schema used to serialize a version of a recipe for API responses."""
+
+    version: int
+    created_at: datetime
+
+
+class RecipeView(StrEnum):
+    """The level of detail to include when listing recipes."""
+
+    FULL = "full"
+    SUMMARY = "summary"
+
+
+class RecipeSummarySchema(RecipeBaseSchema):
+    """Schema used to serialize summary-level information about recipes."""
+
+    id: UUID
+    ingredient_count: int | None = None
+    food_names: list[str] | None = None
+    nutrition: NutritionSchema | None = Field(
+        default=None,
+        description="The nutrition in one serving of the recipe",
+    )
+
+
+class RecipeCursorPageSchema(BaseModel):
+    """A page of recipe summaries with the cursor for the next page."""
+
+    items: list[RecipeSummarySchema]
+    next_cursor: UUID | None = Field(
+        description="Pass as cursor to get the next page, null on the last page",
+    )
+
+
+class RecipeScrollPageSchema(BaseModel):
+    """A page of a filtered and sorted listing of recipe summaries."""
+
+    items: list[RecipeSummarySchema]
+    next_cursor: str | None = Field(
+        description="Pass as cursor to get the next page, null on the last page",
+    )
+
+
+#################
+# Batch schemas #
+#################
+
+
+class RecipeBatchGetSchema(BaseModel):
+    """Schema used to request multiple recipes by id."""
+
+    ids: list[UUID] = Field(min_length=1, max_length=100)
+
+
+class RecipeBatchItemSchema(BaseModel):
+    """A recipe in a batch response, or a marker that it wasn't found."""
+
+    id: UUID
+    found: bool
+    recipe: RecipeDumpSchema | None = None
+
+
+class RecipeBatchDumpSchema(BaseModel):
+    """Schema used to serialize multiple recipes in the order requested."""
+
+    items: list[RecipeBatchItemSchema]
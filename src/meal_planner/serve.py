@@ -0,0 +1,98 @@
+"""
+Run the API in production with uvicorn, using one worker process per core.
+
+The settings come from the server_* options in the config, and the host, port,
+and number of workers can be overridden on the command line:
+    poetry run python -m meal_planner.serve --workers 4
+
+The app is passed to uvicorn as an import string, so each worker imports it
+(and creates its database engines) after the worker process has started
+instead of inheriting them from this one. On SIGTERM or SIGINT each worker
+stops accepting connections and waits up to server_graceful_shutdown_seconds
+for the requests in flight before it shuts down the app.
+"""
+
+import argparse
+import os
+from importlib.util import find_spec
+from typing import Any
+
+from meal_planner.config import Config, get_config
+
+APP = "meal_planner.api:app"
+
+
+def available_cores() -> int:
+    """Return the number of cores this process is allowed to run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1  # pragma: no cover
+
+
+def server_options(
+    config: Config,
+    *,
+    host: str | None = None,
+    port: int | None = None,
+    workers: int | None = None,
+) -> dict[str, Any]:
+    """
+    Build the keyword arguments for uvicorn.run() from the config.
+
+    Parameters
+    ----------
+    config: Config
+        The config with the server_* options
+    host: str | None
+        The interface to bind to instead of config.server_host
+    port: int | None
+        The port to bind to instead of config.server_port
+    workers: int | None
+        The number of worker processes instead of config.server_workers, where
+        0 starts one per available core
+
+    Returns
+    -------
+    dict[str, Any]
+        Keyword arguments for uvicorn.run()
+
+    """
+    workers = config.server_workers if workers is None else workers
+    return {
+        "host": host or config.server_host,
+        "port": port or config.server_port,
+        "workers": workers or available_cores(),
+        # the C implementations are used when they're installed, which they
+        # are with uvicorn[standard]
+        "loop": "uvloop" if find_spec("uvloop") else "asyncio",
+        "http": "httptools" if find_spec("httptools") else "h11",
+        "backlog": config.server_backlog,
+        "timeout_keep_alive": config.server_keep_alive_seconds,
+        "timeout_graceful_shutdown": config.server_graceful_shutdown_seconds,
+        "proxy_headers": True,
+    }
+
+
+def main() -> None:  # pragma: no cover
+    """Start the production server."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+    options = server_options(
+        get_config(),
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+    )
+    uvicorn.run(APP, **options)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -1,22 +1,197 @@
 """Manage shared CRUD logic."""
 
-from typing import Generic, Sequence, Type, TypeVar
+import base64
+import binascii
+import json
+import sys
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Generic,
+    Hashable,
+    Sequence,
+    Type,
+    TypeVar,
+)
 from uuid import UUID, uuid4
 
 import sqlalchemy as sa
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction
 
-from meal_planner.models.base import UUIDAuditBase
+from meal_planner.models.base import UUIDAuditBase, search_key
 
 ModelTypeT = TypeVar("ModelTypeT", bound=UUIDAuditBase)
 CreateSchemaTypeT = TypeVar("CreateSchemaTypeT", bound=BaseModel)
 UpdateSchemaTypeT = TypeVar("UpdateSchemaTypeT", bound=BaseModel)
 
 
+class UnsupportedListQueryError(ValueError):
+    """The filters and sort order requested can't be served by an index."""
+
+
+class InvalidCursorError(ValueError):
+    """The cursor passed doesn't belong to the listing it was used with."""
+
+
+# the key in Session.info of the records that services have looked up
+LOOKUP_CACHE = "lookup_cache"
+# the first and last code points reserved for UTF-16 surrogate pairs
+SURROGATES = (0xD800, 0xDFFF)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def clear_lookup_cache(db: Session, _: SessionTransaction) -> None:
+    """
+    Drop the cached lookups when a transaction or SAVEPOINT ends.
+
+    A commit expires the cached records, so reading them again would issue a
+    SELECT for each one, and a rollback discards records that were created
+    but never committed, so neither can be reused by the next transaction.
+    """
+    db.info.pop(LOOKUP_CACHE, None)
+
+
+def prefix_bounds(prefix: str) -> tuple[str, str | None]:
+    """
+    Return the range of search keys that start with a prefix.
+
+    Matching a prefix with ``column >= start AND column < stop`` instead of
+    LIKE lets the database find the matches with an index on the column. The
+    prefix is folded with search_key(), so it has to be compared against a
+    column of keys folded the same way, like SearchableNameMixin.name_key.
+    The stop is None when no string sorts after every match of the prefix,
+    because it only has the largest code point in it.
+    """
+    start = search_key(prefix)
+    # the smallest string that sorts after every match of the prefix, found
+    # by incrementing the last character that can be incremented
+    head = start.rstrip(chr(sys.maxunicode))
+    if not head:
+        return start, None
+    code = ord(head[-1]) + 1
+    if SURROGATES[0] <= code <= SURROGATES[1]:
+        code = SURROGATES[1] + 1  # surrogates can't be encoded on their own
+    return start, head[:-1] + chr(code)
+
+
+def has_prefix(
+    column: sa.ColumnElement[str],
+    prefix: str,
+) -> sa.ColumnElement[bool]:
+    """Match the search keys in a column that start with a prefix."""
+    start, stop = prefix_bounds(prefix)
+    if stop is None:
+        return column >= start
+    return sa.and_(column >= start, column < stop)
+
+
+@dataclass(frozen=True)
+class ListSort:
+    """
+    A sort order that clients can list records in.
+
+    Attributes
+    ----------
+    key: ColumnElement
+        The column or expression to sort by. Ties are broken by the primary
+        key so that every record has a unique position for cursors.
+    parse: Callable[[Any], Any]
+        Converts the key's value back from the JSON stored in a cursor
+
+    """
+
+    key: sa.ColumnElement
+    parse: Callable[[Any], Any] = lambda value: value
+
+
+@dataclass(frozen=True)
+class ListPlan:
+    """
+    A combination of filters and a sort order that an index can serve.
+
+    Attributes
+    ----------
+    index: str
+        The name of the index that finds and sorts the records
+    sort: str
+        The sort order that the index returns records in
+    required: frozenset[str]
+        The filters that must be passed for the index to be used, because
+        the index is looked up by their values
+    optional: frozenset[str]
+        The filters that can be added, because they're either a range on the
+        index or only applied to the records that the index already found
+
+    """
+
+    index: str
+    sort: str
+    required: frozenset[str] = frozenset()
+    optional: frozenset[str] = frozenset()
+
+    def allows(self, filters: set[str], sort: str | None) -> bool:
+        """Check whether the filters and sort order fit this plan."""
+        if sort not in (None, self.sort):
+            return False
+        return self.required <= filters <= self.required | self.optional
+
+    def __str__(self) -> str:
+        """Describe the plan for error messages."""
+        # optional filters are shown in brackets
+        optional = [f"[{name}]" for name in sorted(self.optional)]
+        filters = [*sorted(self.required), *optional]
+        return f"sort={self.sort} with filters {', '.join(filters) or 'none'}"
+
+
+@dataclass(frozen=True)
+class ListQuery:
+    """
+    The filters and sort order a client asked to list records with.
+
+    Attributes
+    ----------
+    filters: dict[str, Any]
+        Maps the name of each filter to its value. Filters set to None are
+        ignored.
+    sort: str | None
+        The name of the sort order, prefixed with "-" to sort in descending
+        order, or None to use the first plan that allows the filters
+
+    """
+
+    filters: dict[str, Any]
+    sort: str | None = None
+
+    @property
+    def active_filters(self) -> dict[str, Any]:
+        """Return the filters that were set."""
+        return {k: v for k, v in self.filters.items() if v is not None}
+
+    @property
+    def descending(self) -> bool:
+        """Check whether the records should be sorted in descending order."""
+        return bool(self.sort) and self.sort.startswith("-")
+
+    @property
+    def sort_name(self) -> str | None:
+        """Return the name of the sort order without its direction."""
+        return self.sort.removeprefix("-") if self.sort else None
+
+
 class InsertOnlyBase(Generic[ModelTypeT, CreateSchemaTypeT]):
     """Base class that supports Create and Read methods but not Update or Delete."""
 
+    # the filters and sort orders that clients can list records with, which
+    # map names to functions that build a WHERE clause from a value and to
+    # the columns to sort by, and the combinations of them that are allowed
+    list_filters: ClassVar[dict[str, Callable[[Any], sa.ColumnElement]]] = {}
+    list_sorts: ClassVar[dict[str, ListSort]] = {}
+    list_plans: ClassVar[tuple[ListPlan, ...]] = ()
+
     def __init__(self, model: Type[ModelTypeT]) -> None:
         """Init the InsertOnlyBase class with a given SQLAlchemy model."""
         self.model = model
@@ -41,6 +216,61 @@ class InsertOnlyBase(Generic[ModelTypeT, CreateSchemaTypeT]):
         """
         return db.get(self.model, row_id)
 
+    def lookup_cache(self, db: Session) -> dict[Hashable, ModelTypeT | None]:
+        """
+        Return the records of this model that were looked up in a transaction.
+
+        The services for other models look records up through this one's, so
+        every service passed the same session shares the cache. Repeated
+        lookups during a request, like finding the food of each ingredient by
+        name, reuse the record found the first time instead of querying for it
+        again, and lookups that found nothing are cached as None.
+
+        Flush policy: records are added to the cache as soon as they're
+        created, before they're flushed, so that later lookups find the
+        pending record instead of creating a duplicate. Callers that need the
+        row to exist, such as bulk INSERTs that reference its id, still have to
+        flush the session first. The cache is cleared when the transaction or
+        SAVEPOINT ends.
+        """
+        caches = db.info.setdefault(LOOKUP_CACHE, {})
+        return caches.setdefault(self.model, {})
+
+    def get_many(
+        self,
+        db: Session,
+        row_ids: Sequence[UUID],
+        query: sa.Select | None = None,
+    ) -> list[ModelTypeT | None]:
+        """
+        Use a list of primary keys to return multiple records in one query.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        row_ids: Sequence[UUID]
+            The primary key values of the records to retrieve. Duplicate ids
+            are only fetched once.
+        query: Select | None
+            SQLAlchemy query to filter by the ids provided, which can be used
+            to eager load relationships. Defaults to all records in the table.
+
+        Returns
+        -------
+        list[ModelTypeT | None]
+            Returns the records in the same order as row_ids, with None in
+            place of any id that doesn't have a matching row
+
+        """
+        if not row_ids:
+            return []
+        if query is None:
+            query = self.query_all()
+        query = query.where(self.model.id.in_(set(row_ids)))
+        records = {record.id: record for record in self.get_all(db, query)}
+        return [records.get(row_id) for row_id in row_ids]
+
     def get_first(self, db: Session, query: sa.Select) -> ModelTypeT | None:
         """Return the first row of the query provided."""
         return db.scalar(query)
@@ -79,10 +309,210 @@ class InsertOnlyBase(Generic[ModelTypeT, CreateSchemaTypeT]):
             query = self.query_all()
         return db.execute(query).scalars().all()
 
+    def query_rows(self, *columns: sa.ColumnElement) -> sa.Select:
+        """
+        Return a read-only query that loads plain rows instead of ORM records.
+
+        The rows are named tuples of the columns passed, or of every column in
+        the table if none are. They aren't added to the session's identity map
+        or tracked for changes, so they take much less memory and time to load
+        than ORM records, but they can't be updated or load relationships.
+        """
+        if not columns:
+            columns = tuple(self.model.__table__.columns)
+        return sa.select(*columns)
+
+    def get_rows(
+        self,
+        db: Session,
+        query: sa.Select | None = None,
+    ) -> Sequence[sa.Row]:
+        """Return the plain rows of a read-only query, or of the whole table."""
+        if query is None:
+            query = self.query_rows()
+        return db.execute(query).all()
+
     def query_all(self) -> sa.Select:
         """Return a query of all records that can be paginated."""
         return sa.select(self.model)
 
+    def plan_list(self, list_query: ListQuery) -> ListPlan:
+        """
+        Find the plan that serves a listing's filters and sort order.
+
+        Only the combinations in list_plans are allowed, so that every listing
+        is read from an index in sort order instead of scanning the table.
+
+        Raises
+        ------
+        UnsupportedListQueryError
+            If a filter or sort order is unknown, or no plan allows them
+
+        """
+        filters = set(list_query.active_filters)
+        unknown = sorted(filters - self.list_filters.keys())
+        if unknown:
+            msg = f"Unknown filters: {', '.join(unknown)}"
+            raise UnsupportedListQueryError(msg)
+        sort = list_query.sort_name
+        if sort is not None and sort not in self.list_sorts:
+            msg = f"Unknown sort order: {sort}"
+            raise UnsupportedListQueryError(msg)
+        for plan in self.list_plans:
+            if plan.allows(filters, sort):
+                return plan
+        supported = "; ".join(str(plan) for plan in self.list_plans)
+        msg = (
+            "These filters can't be combined with this sort order. "
+            f"Supported combinations are: {supported}"
+        )
+        raise UnsupportedListQueryError(msg)
+
+    def query_list(
+        self,
+        list_query: ListQuery,
+        query: sa.Select | None = None,
+    ) -> sa.Select:
+        """
+        Filter and sort a query of records as a client asked to.
+
+        Parameters
+        ----------
+        list_query: ListQuery
+            The filters and sort order to apply
+        query: Select | None
+            SQLAlchemy query that selects the columns to return. Defaults to
+            all records in the table.
+
+        Returns
+        -------
+        Select
+            Returns the query with a WHERE clause for each filter, sorted by
+            the plan's sort order and then the primary key
+
+        """
+        plan = self.plan_list(list_query)
+        if query is None:
+            query = self.query_all()
+        for name, value in list_query.active_filters.items():
+            query = query.where(self.list_filters[name](value))
+        columns = self.sort_columns(plan.sort)
+        if list_query.descending:
+            columns = [column.desc() for column in columns]
+        return query.order_by(*columns)
+
+    def sort_columns(self, sort: str) -> list[sa.ColumnElement]:
+        """Return the columns to sort by, ending with the primary key."""
+        key = self.list_sorts[sort].key
+        if key is self.model.id:
+            return [key]
+        return [key, self.model.id]
+
+    def get_keyset_page(  # noqa: PLR0913
+        self,
+        db: Session,
+        list_query: ListQuery,
+        *,
+        cursor: str | None,
+        limit: int,
+        query: sa.Select | None = None,
+    ) -> tuple[list[sa.Row], str | None]:
+        """
+        Return a page of a filtered and sorted listing after a cursor.
+
+        Pages start after the sort key and primary key of the last record on
+        the previous page instead of skipping an offset, so every page is read
+        straight from the index no matter how deep into the listing it is.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        list_query: ListQuery
+            The filters and sort order to apply
+        cursor: str | None
+            The next_cursor returned with the previous page, or None to fetch
+            the first page
+        limit: int
+            The maximum number of records to return
+        query: Select | None
+            SQLAlchemy query that selects the columns to return. Defaults to
+            all records in the table.
+
+        Returns
+        -------
+        tuple[list[Row], str | None]
+            Returns the rows on the page and the cursor for the next page,
+            which is None if this is the last page
+
+        Raises
+        ------
+        InvalidCursorError
+            If the cursor is malformed or was returned for another sort order
+
+        """
+        stmt = self.query_list(list_query, query)
+        sort = self.plan_list(list_query).sort
+        key = self.list_sorts[sort].key
+        stmt = stmt.add_columns(
+            key.label("sort_value"),
+            self.model.id.label("sort_id"),
+        )
+        if cursor:
+            value, row_id = self.decode_cursor(cursor, list_query, sort)
+            position = sa.tuple_(key, self.model.id)
+            # bind the cursor with the same types as the columns it's compared to
+            after = sa.tuple_(
+                sa.literal(value, key.type),
+                sa.literal(row_id, self.model.id.type),
+            )
+            if list_query.descending:
+                stmt = stmt.where(position < after)
+            else:
+                stmt = stmt.where(position > after)
+        # fetch one extra row to tell if there's another page
+        rows = list(db.execute(stmt.limit(limit + 1)).all())
+        if len(rows) <= limit:
+            return rows, None
+        last = rows[limit - 1]
+        next_cursor = self.encode_cursor(
+            last.sort_value,
+            last.sort_id,
+            list_query,
+        )
+        return rows[:limit], next_cursor
+
+    def encode_cursor(
+        self,
+        value: Any,  # noqa: ANN401
+        row_id: UUID,
+        list_query: ListQuery,
+    ) -> str:
+        """Encode the position of a record in a listing as an opaque string."""
+        position = [list_query.sort, value, str(row_id)]
+        data = json.dumps(position, default=str, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def decode_cursor(
+        self,
+        cursor: str,
+        list_query: ListQuery,
+        sort: str,
+    ) -> tuple[Any, UUID]:
+        """Decode the sort key and primary key stored in a cursor."""
+        try:
+            data = base64.urlsafe_b64decode(cursor.encode())
+            cursor_sort, value, row_id = json.loads(data)
+            value = self.list_sorts[sort].parse(value)
+            row_id = UUID(row_id)
+        except (binascii.Error, TypeError, ValueError) as error:
+            msg = "The cursor is malformed"
+            raise InvalidCursorError(msg) from error
+        if cursor_sort != list_query.sort:
+            msg = "The cursor was returned for a different sort order"
+            raise InvalidCursorError(msg)
+        return value, row_id
+
     def create(
         self,
         db: Session,
@@ -1,11 +1,14 @@
 """Handle business logic for food."""
 
+from typing import Iterable
+from uuid import uuid4
+
 import sqlalchemy as sa
 from sqlalchemy.orm import Session
 
 from meal_planner.models.food import Food
 from meal_planner.schemas.food import FoodCreateSchema
-from meal_planner.services.base import InsertOnlyBase
+from meal_planner.services.base import InsertOnlyBase, has_prefix
 
 
 class FoodService(InsertOnlyBase[Food, FoodCreateSchema]):
@@ -23,9 +26,93 @@ class FoodService(InsertOnlyBase[Food, FoodCreateSchema]):
         )
 
     def get_by_name(self, db: Session, name: str) -> Food | None:
-        """Find food by name."""
-        stmt = sa.select(Food).where(Food.name == name)
-        return self.get_first(db, stmt)
+        """Find food by name, reusing lookups made earlier in the transaction."""
+        cache = self.lookup_cache(db)
+        if name not in cache:
+            stmt = sa.select(Food).where(Food.name == name)
+            cache[name] = self.get_first(db, stmt)
+        return cache[name]
+
+    def create(
+        self,
+        db: Session,
+        *,
+        data: FoodCreateSchema,
+        defer_commit: bool = False,
+    ) -> Food:
+        """Create a new food and remember it for lookups by name."""
+        food = super().create(db, data=data, defer_commit=defer_commit)
+        self.lookup_cache(db)[food.name] = food
+        return food
+
+    def query_by_prefix(self, prefix: str | None = None) -> sa.Select:
+        """
+        Return a query of foods in name order, optionally filtered by a prefix.
+
+        The prefix is matched case-insensitively with a range comparison on
+        the case-folded name_key instead of LIKE, so that the index on that
+        column is used to find and sort the matches.
+        """
+        stmt = sa.select(Food).order_by(Food.name_key, Food.id)
+        if prefix:
+            stmt = stmt.where(has_prefix(Food.name_key, prefix))
+        return stmt
+
+    def get_many_by_name(
+        self,
+        db: Session,
+        names: Iterable[str],
+    ) -> dict[str, Food]:
+        """
+        Find several foods by name using at most one lookup query.
+
+        Names that were already looked up in the transaction aren't queried
+        for again, and names without a food are left out of the result.
+        """
+        wanted = set(names)
+        cache = self.lookup_cache(db)
+        missing = {name for name in wanted if name not in cache}
+        if missing:
+            # remember the names that weren't found as well
+            cache.update(dict.fromkeys(missing))
+            stmt = sa.select(Food).where(Food.name.in_(missing))
+            cache.update((food.name, food) for food in self.get_all(db, stmt))
+        return {
+            name: food
+            for name in wanted
+            if (food := cache.get(name)) is not None
+        }
+
+    def get_or_create_many(
+        self,
+        db: Session,
+        names: Iterable[str],
+    ) -> dict[str, Food]:
+        """
+        Find or create several foods by name using at most one lookup query.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        names: Iterable[str]
+            The names of the foods to find or create
+
+        Returns
+        -------
+        dict[str, Food]
+            Maps each name to its food record. Foods that didn't exist yet are
+            added to the session but aren't committed.
+
+        """
+        wanted = set(names)
+        foods = self.get_many_by_name(db, wanted)
+        cache = self.lookup_cache(db)
+        for name in wanted - foods.keys():
+            food = Food(id=uuid4(), name=name)
+            db.add(food)
+            foods[name] = cache[name] = food
+        return foods
 
 
 food_service = FoodService(model=Food)
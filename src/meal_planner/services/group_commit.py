@@ -0,0 +1,196 @@
+"""Coalesce concurrent writes into shared transactions to commit them together."""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from meal_planner.config import get_config
+
+ResultT = TypeVar("ResultT")
+
+logger = logging.getLogger(__name__)
+
+
+class GroupCommitStoppedError(RuntimeError):
+    """Raised when a write is submitted while the committer isn't running."""
+
+
+@dataclass
+class PendingWrite:
+    """A write waiting to be run in the next shared transaction."""
+
+    work: Callable[[Session], Any]
+    future: Future = field(default_factory=Future)
+    result: Any = None
+
+
+class GroupCommitter:
+    """
+    Run writes from many requests in one transaction with a single commit.
+
+    Each commit waits for the database to flush its changes to disk, which
+    caps how many transactions can be committed per second. Writes submitted
+    within a short window of each other are run together on a background
+    thread instead: each one in its own SAVEPOINT, so that a write that fails
+    is rolled back without affecting the rest, followed by one commit for the
+    whole batch. Callers get their results only once that commit succeeds.
+
+    If the background thread hits an error it can't pin on a single write,
+    such as a session that fails to roll back or close, it fails the batch
+    and stops, so that callers are rejected instead of waiting forever.
+    """
+
+    def __init__(self, *, window: float, max_batch: int) -> None:
+        """Init the GroupCommitter with how long to wait for more writes."""
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: queue.Queue[PendingWrite | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Check whether writes can be submitted."""
+        return self._thread is not None
+
+    def start(self, session_factory: sessionmaker) -> None:
+        """Start committing writes with sessions from the factory."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(session_factory,),
+                name="group-commit",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Commit the writes that were already submitted, then stop."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            # queued under the lock, so no write can be submitted after it
+            self._queue.put(None)
+        thread.join()
+        # fail any writes left behind if the thread stopped early
+        self._fail_queued()
+
+    def submit(self, work: Callable[[Session], ResultT]) -> ResultT:
+        """
+        Run a write in the next shared transaction and wait for its commit.
+
+        Parameters
+        ----------
+        work: Callable[[Session], ResultT]
+            Makes the changes with the session passed to it, without
+            committing them. It should return plain data, like a serialized
+            response, because the session belongs to another thread.
+
+        Returns
+        -------
+        ResultT
+            Returns what the work returned, once its changes are committed
+
+        Raises
+        ------
+        GroupCommitStoppedError
+            If the committer isn't running
+        Exception
+            Whatever the work raised, or the error that failed the commit
+
+        """
+        write = PendingWrite(work=work)
+        # checked under the lock so the write can't be queued after stop()
+        # has queued the sentinel, where it would never be run
+        with self._lock:
+            if not self.running:
+                raise GroupCommitStoppedError
+            self._queue.put(write)
+        return write.future.result()
+
+    def _run(self, session_factory: sessionmaker) -> None:
+        """Commit batches of writes until the committer is stopped."""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stopping = self._collect(first)
+            try:
+                with session_factory() as db:
+                    self._commit(db, batch)
+            except Exception as err:
+                logger.exception("Group commit thread failed, stopping it")
+                # stopped before the batch fails, so its callers see it stopped
+                with self._lock:
+                    if self._thread is threading.current_thread():
+                        self._thread = None
+                        self._fail_queued()
+                for write in batch:
+                    if not write.future.done():
+                        write.future.set_exception(err)
+                return
+            if stopping:
+                return
+
+    def _fail_queued(self) -> None:
+        """Reject the writes that are still queued after the thread stopped."""
+        while not self._queue.empty():
+            write = self._queue.get_nowait()
+            if write is not None:
+                write.future.set_exception(GroupCommitStoppedError())
+
+    def _collect(self, first: PendingWrite) -> tuple[list[PendingWrite], bool]:
+        """Wait up to the window for more writes to join the batch."""
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                write = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if write is None:
+                return batch, True
+            batch.append(write)
+        return batch, False
+
+    def _commit(self, db: Session, batch: list[PendingWrite]) -> None:
+        """Run each write in a SAVEPOINT and commit the batch together."""
+        done = [write for write in batch if self._apply(db, write)]
+        try:
+            db.commit()
+        except Exception as err:  # noqa: BLE001
+            db.rollback()
+            for write in done:
+                write.future.set_exception(err)
+            return
+        for write in done:
+            write.future.set_result(write.result)
+
+    def _apply(self, db: Session, write: PendingWrite) -> bool:
+        """Run a write in a SAVEPOINT, and fail it alone if it raises."""
+        try:
+            with db.begin_nested():
+                write.result = write.work(db)
+        except Exception as err:  # noqa: BLE001
+            # only this write's SAVEPOINT was rolled back
+            write.future.set_exception(err)
+            return False
+        return True
+
+
+group_committer = GroupCommitter(
+    window=get_config().group_commit_window_seconds,
+    max_batch=get_config().group_commit_max_batch,
+)
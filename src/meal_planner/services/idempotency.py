@@ -0,0 +1,282 @@
+"""Handle the business logic for replaying requests made with idempotency keys."""
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID, uuid4, uuid5
+
+import sqlalchemy as sa
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from meal_planner.config import get_config
+from meal_planner.models.idempotency_key import IdempotencyKey
+
+IDEMPOTENCY_NAMESPACE = UUID("6f1c0f8e-5d0e-4b44-9a43-0e7d5c3b8a21")
+POLL_INTERVAL_SECONDS = 0.1
+
+
+class IdempotencyKeyReusedError(Exception):
+    """Raised when an idempotency key is reused with a different request."""
+
+
+class IdempotencyKeyInProgressError(Exception):
+    """Raised when a request with the same key is still being processed."""
+
+
+@dataclass
+class IdempotencyClaim:
+    """The result of claiming an idempotency key for a request."""
+
+    row_id: UUID
+    claim_id: UUID | None = None
+    status_code: int | None = None
+    response_body: Any = None
+
+    @property
+    def is_replay(self) -> bool:
+        """Check whether the stored response should be replayed."""
+        return self.status_code is not None
+
+
+class IdempotencyService:
+    """
+    Handle the business logic for requests made with an Idempotency-Key header.
+
+    The first request with a key claims it by inserting a row, then stores its
+    response when it completes. Retries with the same key get the stored
+    response back, and retries that arrive while the first request is still
+    running wait for it to finish instead of repeating the work.
+
+    A key that's in progress is only held for a short lease, so if the
+    request that claimed it crashes, a retry can take the key over once the
+    lease expires instead of being rejected until the key's ttl is up.
+    """
+
+    def __init__(
+        self,
+        ttl: timedelta,
+        wait_seconds: float,
+        lease: timedelta,
+    ) -> None:
+        """Init the IdempotencyService with how long keys and waits last."""
+        self.ttl = ttl
+        self.wait_seconds = wait_seconds
+        self.lease = lease
+        # wakes up requests waiting on a key claimed by this same process
+        self._events: dict[UUID, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def fingerprint(self, payload: BaseModel) -> str:
+        """Return a hash of a request payload to detect reused keys."""
+        return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+    def claim(
+        self,
+        db: Session,
+        *,
+        scope: str,
+        key: str,
+        request_hash: str,
+    ) -> IdempotencyClaim:
+        """
+        Claim an idempotency key, or return the response stored for it.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        scope: str
+            The name of the operation the key is used for, so that the same
+            key can be used safely with different endpoints
+        key: str
+            The value of the Idempotency-Key header sent by the client
+        request_hash: str
+            The fingerprint of the request payload
+
+        Returns
+        -------
+        IdempotencyClaim
+            A claim with a stored response to replay if the key was already
+            used, or an empty claim if this request should do the work
+
+        Raises
+        ------
+        IdempotencyKeyReusedError
+            If the key was already used with a different request payload
+        IdempotencyKeyInProgressError
+            If another request with the key didn't finish in time
+
+        """
+        row_id = uuid5(IDEMPOTENCY_NAMESPACE, f"{scope}:{key}")
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            record = db.get(IdempotencyKey, row_id, populate_existing=True)
+            if record is None or as_utc(record.expires_at) <= datetime.now(
+                UTC,
+            ):
+                # the key is new, or its stored response or lease has expired
+                claim_id = (
+                    self._insert_claim(db, row_id, request_hash)
+                    if record is None
+                    else self._take_over(db, row_id, request_hash)
+                )
+                if claim_id is not None:
+                    return IdempotencyClaim(row_id=row_id, claim_id=claim_id)
+                continue  # another request claimed the key first
+            if record.request_hash != request_hash:
+                msg = (
+                    "Idempotency key was already used with a different request"
+                )
+                raise IdempotencyKeyReusedError(msg)
+            if record.status_code is not None:
+                return IdempotencyClaim(
+                    row_id=row_id,
+                    status_code=record.status_code,
+                    response_body=record.response_body,
+                )
+            if time.monotonic() >= deadline:
+                msg = (
+                    "A request with this idempotency key is still in progress"
+                )
+                raise IdempotencyKeyInProgressError(msg)
+            db.commit()  # end the transaction so the next read sees new rows
+            self._event(row_id).wait(POLL_INTERVAL_SECONDS)
+
+    def complete(
+        self,
+        db: Session,
+        claim: IdempotencyClaim,
+        *,
+        status_code: int,
+        response_body: Any,  # noqa: ANN401
+    ) -> None:
+        """
+        Store the response for a claimed key so retries can replay it.
+
+        The response isn't stored if the claim's lease expired and another
+        request took the key over, since that request will store its own.
+        """
+        db.execute(
+            sa.update(IdempotencyKey)
+            .where(
+                IdempotencyKey.id == claim.row_id,
+                IdempotencyKey.claim_id == claim.claim_id,
+            )
+            .values(
+                status_code=status_code,
+                response_body=response_body,
+                expires_at=datetime.now(UTC) + self.ttl,
+            ),
+        )
+        db.commit()
+        self._notify(claim.row_id)
+
+    def release(self, db: Session, claim: IdempotencyClaim) -> None:
+        """Release a claimed key after a failure so the request can be retried."""
+        db.rollback()
+        db.execute(
+            sa.delete(IdempotencyKey).where(
+                IdempotencyKey.id == claim.row_id,
+                IdempotencyKey.claim_id == claim.claim_id,
+            ),
+        )
+        db.commit()
+        self._notify(claim.row_id)
+
+    def purge_expired(self, db: Session) -> int:
+        """Delete expired keys and return the number of keys deleted."""
+        result = db.execute(
+            sa.delete(IdempotencyKey).where(
+                IdempotencyKey.expires_at <= datetime.now(UTC),
+            ),
+        )
+        db.commit()
+        return result.rowcount
+
+    def _insert_claim(
+        self,
+        db: Session,
+        row_id: UUID,
+        request_hash: str,
+    ) -> UUID | None:
+        """Insert a row to claim a key, returning None if it already exists."""
+        record = IdempotencyKey(
+            id=row_id,
+            claim_id=uuid4(),
+            request_hash=request_hash,
+            expires_at=datetime.now(UTC) + self.lease,
+        )
+        try:
+            with db.begin_nested():
+                db.add(record)
+        except IntegrityError:
+            return None
+        db.commit()
+        return record.claim_id
+
+    def _take_over(
+        self,
+        db: Session,
+        row_id: UUID,
+        request_hash: str,
+    ) -> UUID | None:
+        """
+        Claim a key whose row has expired, returning None if it's been taken.
+
+        The row is updated in place rather than deleted and inserted again,
+        and only if it's still expired, so when several requests try to take
+        over the same key only one of them succeeds.
+        """
+        now = datetime.now(UTC)
+        claim_id = uuid4()
+        result = db.execute(
+            sa.update(IdempotencyKey)
+            .where(
+                IdempotencyKey.id == row_id,
+                IdempotencyKey.expires_at <= now,
+            )
+            .values(
+                claim_id=claim_id,
+                request_hash=request_hash,
+                status_code=None,
+                response_body=None,
+                expires_at=now + self.lease,
+            )
+            # rows are re-read with populate_existing, so the session doesn't
+            # need to evaluate the WHERE clause against the naive datetimes
+            # that SQLite returns
+            .execution_options(synchronize_session=False),
+        )
+        db.commit()
+        return claim_id if result.rowcount else None
+
+    def _event(self, row_id: UUID) -> threading.Event:
+        """Return the event that's set when a claimed key is released."""
+        with self._lock:
+            return self._events.setdefault(row_id, threading.Event())
+
+    def _notify(self, row_id: UUID) -> None:
+        """Wake up any requests in this process waiting on a key."""
+        with self._lock:
+            event = self._events.pop(row_id, None)
+        if event:
+            event.set()
+
+
+def as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes, which SQLite returns, as UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value
+
+
+idempotency_service = IdempotencyService(
+    ttl=timedelta(seconds=get_config().idempotency_ttl_seconds),
+    wait_seconds=get_config().idempotency_wait_seconds,
+    lease=timedelta(seconds=get_config().idempotency_lease_seconds),
+)
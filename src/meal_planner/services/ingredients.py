@@ -1,11 +1,15 @@
 """Handle business logic for ingredients."""
 
-from uuid import uuid4
+from typing import Sequence
+from uuid import UUID, uuid4
 
+import sqlalchemy as sa
 from sqlalchemy.orm import Session
 
+from meal_planner.models.food import Food
 from meal_planner.models.ingredient import Ingredient
 from meal_planner.schemas.ingredient import IngredientCreateSchema
+from meal_planner.schemas.recipe import RecipeIngredient
 from meal_planner.services.base import InsertOnlyBase
 from meal_planner.services.foods import food_service
 
@@ -34,5 +38,86 @@ class IngredientService(InsertOnlyBase[Ingredient, IngredientCreateSchema]):
             return ingredient
         return self.commit_changes(db, ingredient)
 
+    def sync_recipe_ingredients(
+        self,
+        db: Session,
+        *,
+        recipe_id: UUID,
+        ingredients: Sequence[RecipeIngredient],
+    ) -> bool:
+        """
+        Make a recipe's ingredients match the list provided with minimal writes.
+
+        The current ingredients are diffed against the list provided by food
+        name, then the changes are applied with at most one bulk INSERT, one
+        bulk UPDATE, and one DELETE statement. Rows that didn't change are
+        left untouched so their updated_at timestamps are preserved. Changes
+        are not committed, so the caller controls the transaction.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        recipe_id: UUID
+            The id of the recipe whose ingredients are being updated
+        ingredients: Sequence[RecipeIngredient]
+            The complete list of ingredients the recipe should have
+
+        Returns
+        -------
+        bool
+            True if any ingredient rows were inserted, updated, or deleted
+
+        """
+        stmt = (
+            sa.select(
+                Ingredient.id,
+                Ingredient.amount,
+                Ingredient.unit,
+                Food.name,
+            )
+            .join(Food, Ingredient.food_id == Food.id)
+            .where(Ingredient.recipe_id == recipe_id)
+        )
+        current = {row.name: row for row in db.execute(stmt)}
+        wanted = {ingredient.food: ingredient for ingredient in ingredients}
+        # compute the diff
+        deleted = [
+            row.id for name, row in current.items() if name not in wanted
+        ]
+        updated = [
+            {"id": current[name].id, "amount": item.amount, "unit": item.unit}
+            for name, item in wanted.items()
+            if name in current
+            and (current[name].amount, current[name].unit)
+            != (item.amount, item.unit)
+        ]
+        inserted = [
+            item for name, item in wanted.items() if name not in current
+        ]
+        # apply the changes using bulk statements
+        if inserted:
+            foods = food_service.get_or_create_many(
+                db,
+                [item.food for item in inserted],
+            )
+            db.flush()  # insert new foods before the ingredients that use them
+            rows = [
+                {
+                    "id": uuid4(),
+                    "recipe_id": recipe_id,
+                    "food_id": foods[item.food].id,
+                    "amount": item.amount,
+                    "unit": item.unit,
+                }
+                for item in inserted
+            ]
+            db.execute(sa.insert(Ingredient), rows)
+        if updated:
+            db.execute(sa.update(Ingredient), updated)
+        if deleted:
+            db.execute(sa.delete(Ingredient).where(Ingredient.id.in_(deleted)))
+        return bool(inserted or updated or deleted)
+
 
 ingredient_service = IngredientService(model=Ingredient)
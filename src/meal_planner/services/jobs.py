@@ -0,0 +1,274 @@
+"""Handle the business logic for tracking the state of background jobs."""
+
+from datetime import UTC, datetime, timedelta
+from typing import Any, Sequence
+from uuid import UUID, uuid4
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from meal_planner.models.job import Job
+from meal_planner.schemas.job import JobCreateSchema, JobStatus
+from meal_planner.services.base import InsertOnlyBase
+
+FINISHED_STATUSES = {
+    JobStatus.SUCCEEDED,
+    JobStatus.FAILED,
+    JobStatus.CANCELLED,
+}
+
+
+class JobService(InsertOnlyBase[Job, JobCreateSchema]):
+    """
+    Handle the business logic for moving jobs through their lifecycle.
+
+    Every transition is committed as soon as it's made so that the job table
+    is always an accurate record of which jobs still need to run, even if the
+    process running them stops unexpectedly.
+    """
+
+    def create(
+        self,
+        db: Session,
+        *,
+        data: JobCreateSchema,
+        defer_commit: bool = False,
+    ) -> Job:
+        """Insert a new job that's waiting to be run."""
+        record = self.model(
+            id=uuid4(),
+            status=JobStatus.PENDING,
+            **data.model_dump(),
+        )
+        if defer_commit:
+            return record
+        return self.commit_changes(db, record)
+
+    def claim(
+        self,
+        db: Session,
+        job_id: UUID,
+        *,
+        worker_id: str,
+        lease: timedelta,
+    ) -> Job | None:
+        """
+        Mark a pending job as running so that no other worker can run it.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        job_id: UUID
+            The id of the job to claim
+        worker_id: str
+            The id of the runner claiming the job
+        lease: timedelta
+            How long the job is held for unless the runner renews the lease
+
+        Returns
+        -------
+        Job | None
+            Returns the claimed job, or None if the job doesn't exist, was
+            cancelled, or was already claimed by another worker
+
+        """
+        result = db.execute(
+            sa.update(Job)
+            .where(
+                Job.id == job_id,
+                Job.status == JobStatus.PENDING,
+                Job.cancel_requested.is_(False),
+            )
+            .values(
+                status=JobStatus.RUNNING,
+                attempts=Job.attempts + 1,
+                worker_id=worker_id,
+                lease_expires_at=datetime.now(UTC) + lease,
+                started_at=datetime.now(UTC),
+            ),
+        )
+        db.commit()
+        if not result.rowcount:
+            return None
+        return db.get(Job, job_id, populate_existing=True)
+
+    def is_cancel_requested(self, db: Session, job_id: UUID) -> bool:
+        """Check whether a job has been asked to stop."""
+        stmt = sa.select(Job.cancel_requested).where(Job.id == job_id)
+        return bool(db.scalar(stmt))
+
+    def succeed(
+        self,
+        db: Session,
+        *,
+        job: Job,
+        result: Any,  # noqa: ANN401
+    ) -> Job:
+        """Record the result of a job that finished successfully."""
+        return self._finish(db, job, JobStatus.SUCCEEDED, result=result)
+
+    def fail(
+        self,
+        db: Session,
+        *,
+        job: Job,
+        error: str,
+        delay: timedelta = timedelta(0),
+    ) -> bool:
+        """
+        Record an error raised by a job and decide whether to retry it.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        job: Job
+            The job that raised the error
+        error: str
+            The error message to record
+        delay: timedelta
+            How long to wait before the job is retried, if it's retried
+
+        Returns
+        -------
+        bool
+            Returns True if the job was put back in the queue to be retried,
+            or False if it has used up all of its attempts
+
+        """
+        if job.attempts < job.max_attempts and not job.cancel_requested:
+            job.status = JobStatus.PENDING
+            job.error = error
+            job.run_after = datetime.now(UTC) + delay
+            self.commit_changes(db, job)
+            return True
+        self._finish(db, job, JobStatus.FAILED, error=error)
+        return False
+
+    def cancel(self, db: Session, *, job: Job) -> Job:
+        """Record that a job stopped because it was cancelled."""
+        return self._finish(db, job, JobStatus.CANCELLED)
+
+    def requeue(self, db: Session, *, job: Job) -> Job:
+        """Put a job that was interrupted back in the queue without a penalty."""
+        job.status = JobStatus.PENDING
+        job.attempts -= 1
+        return self.commit_changes(db, job)
+
+    def request_cancel(self, db: Session, *, job: Job) -> Job:
+        """
+        Ask a job to stop running.
+
+        Pending jobs are cancelled right away, while running jobs are flagged
+        so that they stop the next time they check for cancellation. The job
+        is only cancelled if it's still pending when the row is updated, so a
+        worker that claims it in the meantime sees the flag instead.
+        """
+        result = db.execute(
+            sa.update(Job)
+            .where(Job.id == job.id, Job.status == JobStatus.PENDING)
+            .values(
+                status=JobStatus.CANCELLED,
+                cancel_requested=True,
+                finished_at=datetime.now(UTC),
+            )
+            .execution_options(synchronize_session=False),
+        )
+        if not result.rowcount:
+            db.execute(
+                sa.update(Job)
+                .where(Job.id == job.id)
+                .values(cancel_requested=True)
+                .execution_options(synchronize_session=False),
+            )
+        db.commit()
+        return db.get(Job, job.id, populate_existing=True)
+
+    def renew_leases(
+        self,
+        db: Session,
+        *,
+        worker_id: str,
+        lease: timedelta,
+    ) -> int:
+        """Extend the leases on the jobs a runner is running, returning how many."""
+        result = db.execute(
+            sa.update(Job)
+            .where(
+                Job.status == JobStatus.RUNNING,
+                Job.worker_id == worker_id,
+            )
+            .values(lease_expires_at=datetime.now(UTC) + lease)
+            .execution_options(synchronize_session=False),
+        )
+        db.commit()
+        return result.rowcount
+
+    def recover(self, db: Session) -> int:
+        """
+        Requeue running jobs whose runner stopped without finishing them.
+
+        Only jobs whose lease has expired are requeued, because the runners
+        in other worker processes renew the leases on the jobs they're still
+        running. Returns the number of jobs that were requeued.
+        """
+        result = db.execute(
+            sa.update(Job)
+            .where(
+                Job.status == JobStatus.RUNNING,
+                sa.or_(
+                    Job.lease_expires_at.is_(None),
+                    Job.lease_expires_at <= datetime.now(UTC),
+                ),
+            )
+            .values(status=JobStatus.PENDING, worker_id=None)
+            .execution_options(synchronize_session=False),
+        )
+        db.commit()
+        return result.rowcount
+
+    def pending_ids(
+        self,
+        db: Session,
+        *,
+        limit: int,
+        exclude: Sequence[UUID] = (),
+    ) -> list[UUID]:
+        """
+        Return the ids of the oldest jobs that are waiting to be run.
+
+        Jobs that are waiting for their retry delay to pass are skipped.
+        """
+        stmt = (
+            sa.select(Job.id)
+            .where(
+                Job.status == JobStatus.PENDING,
+                sa.or_(
+                    Job.run_after.is_(None),
+                    Job.run_after <= datetime.now(UTC),
+                ),
+            )
+            .order_by(Job.created_at, Job.id)
+            .limit(limit)
+        )
+        if exclude:
+            stmt = stmt.where(Job.id.not_in(exclude))
+        return list(db.scalars(stmt).all())
+
+    def _finish(
+        self,
+        db: Session,
+        job: Job,
+        status: JobStatus,
+        **fields: Any,  # noqa: ANN401
+    ) -> Job:
+        """Move a job into one of the statuses that it won't leave again."""
+        job.status = status
+        job.finished_at = datetime.now(UTC)
+        for field, value in fields.items():
+            setattr(job, field, value)
+        return self.commit_changes(db, job)
+
+
+job_service = JobService(model=Job)
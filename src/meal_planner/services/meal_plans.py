@@ -0,0 +1,343 @@
+"""Handle the business logic for reading and writing meal plans."""
+
+from uuid import UUID, uuid4
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from meal_planner.models.meal_plan import (
+    MealPlan,
+    MealPlanIngredient,
+    PlannedMeal,
+)
+from meal_planner.models.recipe_version import (
+    IngredientSet,
+    IngredientSetItem,
+    RecipeVersion,
+)
+from meal_planner.schemas.meal_plan import (
+    MealPlanCreateSchema,
+    MealPlanUpdateSchema,
+    PlannedMealCreateSchema,
+    PlannedMealUpdateSchema,
+)
+from meal_planner.services.base import CRUDBase
+from meal_planner.services.recipe_versions import (
+    RecipeVersionNotFoundError,
+    recipe_version_service,
+)
+
+# totals at or below this amount are treated as zero and removed from a plan
+ROLLUP_TOLERANCE = 1e-9
+
+
+class MealPlanService(
+    CRUDBase[MealPlan, MealPlanCreateSchema, MealPlanUpdateSchema],
+):
+    """Handle the business logic for meal plans and their planned meals."""
+
+    def query_with_meals(self) -> sa.Select:
+        """Return a query of all meal plans that eager loads their meals."""
+        return self.query_all().options(selectinload(MealPlan.meals))
+
+    def get_week(self, db: Session, plan_id: UUID) -> MealPlan | None:
+        """
+        Return a meal plan with its meals, recipes, and ingredient totals.
+
+        Every planned meal is expanded into the version of the recipe it's
+        pinned to, and that version's ingredients and foods, with a single
+        joined query. The ingredient totals are read from the materialized
+        rollup instead of being recomputed from each recipe.
+        """
+        stmt = (
+            self.query_all()
+            .options(
+                joinedload(MealPlan.meals)
+                .joinedload(PlannedMeal.recipe_version)
+                .joinedload(RecipeVersion.ingredient_set)
+                .joinedload(IngredientSet.items)
+                .joinedload(IngredientSetItem.food),
+                selectinload(MealPlan.ingredient_totals).joinedload(
+                    MealPlanIngredient.food,
+                ),
+            )
+            .where(MealPlan.id == plan_id)
+        )
+        return db.scalars(stmt).unique().first()
+
+    def create(
+        self,
+        db: Session,
+        *,
+        data: MealPlanCreateSchema,
+        defer_commit: bool = False,
+    ) -> MealPlan:
+        """Create a new meal plan along with any meals planned in it."""
+        plan = MealPlan(
+            id=uuid4(),
+            **data.model_dump(exclude={"meals", "end_date"}),
+        )
+        db.add(plan)
+        for meal in data.meals:
+            self.add_meal(db, plan=plan, data=meal, defer_commit=True)
+        if defer_commit:
+            return plan
+        return self.commit_changes(db, plan)
+
+    #################
+    # Planned meals #
+    #################
+
+    def get_meal(
+        self,
+        db: Session,
+        *,
+        plan_id: UUID,
+        meal_id: UUID,
+    ) -> PlannedMeal | None:
+        """Return a planned meal if it belongs to the meal plan provided."""
+        meal = db.get(PlannedMeal, meal_id)
+        if meal is None or meal.meal_plan_id != plan_id:
+            return None
+        return meal
+
+    def add_meal(
+        self,
+        db: Session,
+        *,
+        plan: MealPlan,
+        data: PlannedMealCreateSchema,
+        defer_commit: bool = False,
+    ) -> PlannedMeal:
+        """
+        Plan a recipe for a meal and add its ingredients to the plan totals.
+
+        The meal is pinned to the latest version of the recipe, which has to
+        exist.
+        """
+        version = recipe_version_service.get_latest_or_snapshot(
+            db,
+            data.recipe_id,
+        )
+        if version is None:
+            msg = f"Recipe {data.recipe_id} doesn't exist"
+            raise RecipeVersionNotFoundError(msg)
+        meal = PlannedMeal(
+            id=uuid4(),
+            meal_plan_id=plan.id,
+            recipe_version_id=version.id,
+            **data.model_dump(),
+        )
+        db.add(meal)
+        self.apply_to_rollup(
+            db,
+            plan_id=plan.id,
+            recipe_version_id=meal.recipe_version_id,
+            factor=meal.servings,
+        )
+        if not defer_commit:
+            db.commit()
+            db.refresh(meal)
+        return meal
+
+    def update_meal(
+        self,
+        db: Session,
+        *,
+        meal: PlannedMeal,
+        data: PlannedMealUpdateSchema,
+    ) -> PlannedMeal:
+        """
+        Update a planned meal and adjust the plan totals if its amounts changed.
+
+        If a recipe version is passed, the meal is pinned to that version of
+        its recipe instead, and the totals swap the old version's ingredients
+        for the new one's.
+        """
+        changes = data.model_dump(exclude_unset=True, exclude_none=True)
+        version_id = meal.recipe_version_id
+        if "recipe_version" in changes:
+            number = changes.pop("recipe_version")
+            version = recipe_version_service.get_version(
+                db,
+                meal.recipe_id,
+                number,
+            )
+            if version is None:
+                msg = f"Version {number} of recipe {meal.recipe_id} doesn't exist"
+                raise RecipeVersionNotFoundError(msg)
+            version_id = version.id
+        servings = changes.get("servings", meal.servings)
+        if version_id != meal.recipe_version_id:
+            self.apply_to_rollup(
+                db,
+                plan_id=meal.meal_plan_id,
+                recipe_version_id=meal.recipe_version_id,
+                factor=-meal.servings,
+            )
+            self.apply_to_rollup(
+                db,
+                plan_id=meal.meal_plan_id,
+                recipe_version_id=version_id,
+                factor=servings,
+            )
+            meal.recipe_version_id = version_id
+        elif servings != meal.servings:
+            self.apply_to_rollup(
+                db,
+                plan_id=meal.meal_plan_id,
+                recipe_version_id=meal.recipe_version_id,
+                factor=servings - meal.servings,
+            )
+        for field, value in changes.items():
+            setattr(meal, field, value)
+        db.add(meal)
+        db.commit()
+        db.refresh(meal)
+        return meal
+
+    def remove_meal(self, db: Session, *, meal: PlannedMeal) -> None:
+        """Remove a planned meal and subtract its ingredients from the totals."""
+        self.apply_to_rollup(
+            db,
+            plan_id=meal.meal_plan_id,
+            recipe_version_id=meal.recipe_version_id,
+            factor=-meal.servings,
+        )
+        db.delete(meal)
+        db.commit()
+
+    #####################
+    # Ingredient rollup #
+    #####################
+
+    def apply_to_rollup(
+        self,
+        db: Session,
+        *,
+        plan_id: UUID,
+        recipe_version_id: UUID,
+        factor: float,
+    ) -> None:
+        """
+        Incrementally add a multiple of a recipe's ingredients to a plan's totals.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        plan_id: UUID
+            The id of the meal plan whose ingredient totals will be updated
+        recipe_version_id: UUID
+            The id of the recipe version whose ingredients are added to the
+            totals
+        factor: float
+            The number of servings of the recipe to add, which is negative
+            when servings are removed from the plan. The version's ingredient
+            amounts are divided by the number of servings the version makes.
+
+        """
+        stmt = (
+            sa.select(
+                IngredientSetItem.food_id,
+                IngredientSetItem.unit,
+                (IngredientSetItem.amount / RecipeVersion.servings).label(
+                    "amount",
+                ),
+            )
+            .join(
+                RecipeVersion,
+                RecipeVersion.ingredient_set_id
+                == IngredientSetItem.ingredient_set_id,
+            )
+            .where(RecipeVersion.id == recipe_version_id)
+        )
+        deltas: dict[tuple[UUID, str], float] = {}
+        for row in db.execute(stmt):
+            key = (row.food_id, row.unit)
+            deltas[key] = deltas.get(key, 0) + row.amount * factor
+        if not deltas:
+            return
+        # load the totals that will be changed
+        stmt = sa.select(
+            MealPlanIngredient.id,
+            MealPlanIngredient.food_id,
+            MealPlanIngredient.unit,
+            MealPlanIngredient.amount,
+        ).where(
+            MealPlanIngredient.meal_plan_id == plan_id,
+            MealPlanIngredient.food_id.in_({food for food, _ in deltas}),
+        )
+        current = {(row.food_id, row.unit): row for row in db.execute(stmt)}
+        # compute the new totals
+        inserted, updated, deleted = [], [], []
+        for (food_id, unit), delta in deltas.items():
+            row = current.get((food_id, unit))
+            amount = delta + (row.amount if row else 0)
+            if row and amount <= ROLLUP_TOLERANCE:
+                deleted.append(row.id)
+            elif row:
+                updated.append({"id": row.id, "amount": amount})
+            elif amount > ROLLUP_TOLERANCE:
+                inserted.append(
+                    {
+                        "id": uuid4(),
+                        "meal_plan_id": plan_id,
+                        "food_id": food_id,
+                        "unit": unit,
+                        "amount": amount,
+                    },
+                )
+        # apply the changes using bulk statements
+        db.flush()  # insert the meal plan before the totals that reference it
+        if inserted:
+            db.execute(sa.insert(MealPlanIngredient), inserted)
+        if updated:
+            db.execute(sa.update(MealPlanIngredient), updated)
+        if deleted:
+            db.execute(
+                sa.delete(MealPlanIngredient).where(
+                    MealPlanIngredient.id.in_(deleted),
+                ),
+            )
+
+    def rebuild_rollup(self, db: Session, plan_id: UUID) -> None:
+        """Recompute a plan's ingredient totals from all of its planned meals."""
+        total = sa.func.sum(
+            IngredientSetItem.amount
+            * PlannedMeal.servings
+            / RecipeVersion.servings,
+        )
+        stmt = (
+            sa.select(
+                IngredientSetItem.food_id,
+                IngredientSetItem.unit,
+                total.label("amount"),
+            )
+            .select_from(PlannedMeal)
+            .join(
+                RecipeVersion,
+                RecipeVersion.id == PlannedMeal.recipe_version_id,
+            )
+            .join(
+                IngredientSetItem,
+                IngredientSetItem.ingredient_set_id
+                == RecipeVersion.ingredient_set_id,
+            )
+            .where(PlannedMeal.meal_plan_id == plan_id)
+            .group_by(IngredientSetItem.food_id, IngredientSetItem.unit)
+        )
+        rows = [
+            {"id": uuid4(), "meal_plan_id": plan_id, **row._asdict()}
+            for row in db.execute(stmt)
+        ]
+        db.execute(
+            sa.delete(MealPlanIngredient).where(
+                MealPlanIngredient.meal_plan_id == plan_id,
+            ),
+        )
+        if rows:
+            db.execute(sa.insert(MealPlanIngredient), rows)
+
+
+meal_plan_service = MealPlanService(model=MealPlan)
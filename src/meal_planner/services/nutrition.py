@@ -0,0 +1,332 @@
+"""Compute the nutrition of recipes and meal plans from their ingredients."""
+
+import csv
+import threading
+from collections import OrderedDict
+from typing import Iterable, Iterator, NamedTuple, Self
+from uuid import UUID, uuid4
+
+import sqlalchemy as sa
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+from meal_planner.models.food_nutrient import FoodNutrient
+from meal_planner.models.ingredient import Ingredient
+from meal_planner.models.meal_plan import PlannedMeal
+from meal_planner.models.recipe import Recipe
+from meal_planner.models.recipe_version import IngredientSetItem, RecipeVersion
+from meal_planner.schemas.nutrition import FoodNutrientCreateSchema
+from meal_planner.services.base import InsertOnlyBase
+from meal_planner.services.foods import food_service
+from meal_planner.units import CUPS, EACH, GRAMS
+
+NUTRIENTS = ("kcal", "protein_g", "fat_g", "carbs_g")
+
+
+class Nutrition(NamedTuple):
+    """The nutrients in a recipe or meal plan."""
+
+    kcal: float = 0
+    protein_g: float = 0
+    fat_g: float = 0
+    carbs_g: float = 0
+    missing_ingredients: int = 0
+
+    def scaled(self, factor: float) -> Self:
+        """Return the nutrients in a multiple of this amount of food."""
+        return self._replace(
+            **{name: getattr(self, name) * factor for name in NUTRIENTS},
+        )
+
+    def plus(self, other: Self) -> Self:
+        """Add up the nutrients in two recipes or meal plans."""
+        return type(self)(*(a + b for a, b in zip(self, other, strict=True)))
+
+
+def ingredient_grams(
+    amount: InstrumentedAttribute[float] = Ingredient.amount,
+    unit: InstrumentedAttribute[str] = Ingredient.unit,
+) -> sa.ColumnElement[float]:
+    """
+    Return a SQL expression that converts ingredient amounts to grams.
+
+    Weights are converted with a fixed factor, volumes with the weight of a
+    cup of the food, and items with the weight of one of them. The expression
+    is NULL for ingredients that can't be converted. It converts the columns
+    of recipes' current ingredients unless the columns of another table, like
+    the ingredients of recipe versions, are passed.
+    """
+    weight = sa.case(GRAMS, value=unit)
+    volume = sa.case(CUPS, value=unit) * FoodNutrient.grams_per_cup
+    each = sa.case((unit == EACH, FoodNutrient.grams_each))
+    return amount * sa.func.coalesce(weight, volume, each)
+
+
+def read_nutrient_csv(
+    lines: Iterable[str],
+) -> Iterator[FoodNutrientCreateSchema]:
+    """
+    Parse the rows of a CSV of food nutrients.
+
+    The CSV needs a header with the columns food, kcal, protein_g, fat_g, and
+    carbs_g, which are per 100 g, and can have grams_per_cup and grams_each.
+    Empty cells are treated as missing values.
+    """
+    for row in csv.DictReader(lines):
+        values = {key: value for key, value in row.items() if value != ""}
+        yield FoodNutrientCreateSchema.model_validate(values)
+
+
+class NutritionService(
+    InsertOnlyBase[FoodNutrient, FoodNutrientCreateSchema],
+):
+    """
+    Handle the business logic for food nutrients and nutrition rollups.
+
+    The nutrition of each recipe is computed for many recipes at once with a
+    single aggregate query, and cached per serving by the recipe's id and
+    revision. Updating a recipe's ingredients or servings bumps its revision,
+    so cached nutrition never needs to be invalidated explicitly.
+    """
+
+    def __init__(self, model: type[FoodNutrient], maxsize: int) -> None:
+        """Init the NutritionService with the number of recipes to cache."""
+        super().__init__(model=model)
+        self.maxsize = maxsize
+        self._cache: OrderedDict[tuple[UUID, int], Nutrition] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compute(
+        self,
+        db: Session,
+        recipe_ids: Iterable[UUID],
+    ) -> dict[UUID, Nutrition]:
+        """
+        Compute the total nutrition of each recipe without using the cache.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        recipe_ids: Iterable[UUID]
+            The ids of the recipes to compute the nutrition of
+
+        Returns
+        -------
+        dict[UUID, Nutrition]
+            Maps each recipe id to the nutrients in all of its servings.
+            Recipes without any ingredients have no nutrients.
+
+        """
+        ids = set(recipe_ids)
+        if not ids:
+            return {}
+        grams = ingredient_grams()
+        # ingredients that have both a weight and nutrient data
+        known = sa.case((FoodNutrient.id.is_not(None), grams))
+        totals = [
+            sa.func.coalesce(
+                sa.func.sum(grams * getattr(FoodNutrient, name) / 100),
+                0,
+            ).label(name)
+            for name in NUTRIENTS
+        ]
+        missing = sa.func.count(Ingredient.id) - sa.func.count(known)
+        stmt = (
+            sa.select(
+                Ingredient.recipe_id,
+                *totals,
+                missing.label("missing_ingredients"),
+            )
+            .outerjoin(
+                FoodNutrient,
+                FoodNutrient.food_id == Ingredient.food_id,
+            )
+            .where(Ingredient.recipe_id.in_(ids))
+            .group_by(Ingredient.recipe_id)
+        )
+        nutrition = dict.fromkeys(ids, Nutrition())
+        for recipe_id, *values in db.execute(stmt):
+            nutrition[recipe_id] = Nutrition(*values)
+        return nutrition
+
+    def per_serving(
+        self,
+        db: Session,
+        recipe_ids: Iterable[UUID],
+    ) -> dict[UUID, Nutrition]:
+        """
+        Return the nutrition in one serving of each recipe.
+
+        Recipes whose current revision is cached are read from the cache, and
+        the rest are computed together with a single query.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        recipe_ids: Iterable[UUID]
+            The ids of the recipes to return the nutrition of
+
+        Returns
+        -------
+        dict[UUID, Nutrition]
+            Maps the id of each recipe that exists to its nutrition per serving
+
+        """
+        ids = set(recipe_ids)
+        if not ids:
+            return {}
+        stmt = sa.select(Recipe.id, Recipe.revision, Recipe.servings).where(
+            Recipe.id.in_(ids),
+        )
+        recipes = db.execute(stmt).all()
+        nutrition: dict[UUID, Nutrition] = {}
+        with self._lock:
+            for recipe in recipes:
+                key = (recipe.id, recipe.revision)
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    nutrition[recipe.id] = self._cache[key]
+        misses = [recipe for recipe in recipes if recipe.id not in nutrition]
+        totals = self.compute(db, [recipe.id for recipe in misses])
+        with self._lock:
+            for recipe in misses:
+                value = totals[recipe.id].scaled(1 / recipe.servings)
+                nutrition[recipe.id] = value
+                self._cache[(recipe.id, recipe.revision)] = value
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return nutrition
+
+    def for_meal_plan(self, db: Session, plan_id: UUID) -> Nutrition:
+        """
+        Return the total nutrition of every meal planned in a meal plan.
+
+        Each meal is computed from the version of the recipe it's pinned to,
+        with a single aggregate query over the ingredients of those versions,
+        so editing a recipe doesn't change the nutrition of plans that already
+        include it.
+        """
+        grams = ingredient_grams(
+            IngredientSetItem.amount,
+            IngredientSetItem.unit,
+        )
+        scale = PlannedMeal.servings / RecipeVersion.servings
+        known = sa.case((FoodNutrient.id.is_not(None), grams))
+        totals = [
+            sa.func.coalesce(
+                sa.func.sum(grams * getattr(FoodNutrient, name) / 100 * scale),
+                0,
+            ).label(name)
+            for name in NUTRIENTS
+        ]
+        missing = sa.func.count(IngredientSetItem.id) - sa.func.count(known)
+        stmt = (
+            sa.select(*totals, missing.label("missing_ingredients"))
+            .select_from(PlannedMeal)
+            .join(
+                RecipeVersion,
+                RecipeVersion.id == PlannedMeal.recipe_version_id,
+            )
+            .join(
+                IngredientSetItem,
+                IngredientSetItem.ingredient_set_id
+                == RecipeVersion.ingredient_set_id,
+            )
+            .outerjoin(
+                FoodNutrient,
+                FoodNutrient.food_id == IngredientSetItem.food_id,
+            )
+            .where(PlannedMeal.meal_plan_id == plan_id)
+        )
+        return Nutrition(*db.execute(stmt).one())
+
+    def load(
+        self,
+        db: Session,
+        rows: Iterable[FoodNutrientCreateSchema],
+        batch_size: int = 500,
+    ) -> int:
+        """
+        Insert or update the nutrients of foods in batches.
+
+        Foods are found by name and created if they don't exist yet. Each
+        batch is committed separately, and bumps the revision of the recipes
+        that use its foods so that their cached nutrition is recomputed.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        rows: Iterable[FoodNutrientCreateSchema]
+            The nutrients of each food, for example from read_nutrient_csv()
+        batch_size: int
+            The number of foods to load in each transaction
+
+        Returns
+        -------
+        int
+            The number of foods whose nutrients were loaded
+
+        """
+        total = 0
+        batch: list[FoodNutrientCreateSchema] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                total += self._load_batch(db, batch)
+                batch = []
+        if batch:
+            total += self._load_batch(db, batch)
+        return total
+
+    def _load_batch(
+        self,
+        db: Session,
+        batch: list[FoodNutrientCreateSchema],
+    ) -> int:
+        """Insert or update the nutrients of a batch of foods and commit them."""
+        foods = food_service.get_or_create_many(
+            db,
+            [row.food for row in batch],
+        )
+        db.flush()
+        food_ids = [food.id for food in foods.values()]
+        stmt = sa.select(FoodNutrient).where(
+            FoodNutrient.food_id.in_(food_ids),
+        )
+        existing = {record.food_id: record for record in db.scalars(stmt)}
+        for row in batch:
+            food_id = foods[row.food].id
+            values = row.model_dump(exclude={"food"})
+            record = existing.get(food_id)
+            if record is None:
+                record = FoodNutrient(id=uuid4(), food_id=food_id, **values)
+                existing[food_id] = record
+                db.add(record)
+            else:
+                for field, value in values.items():
+                    setattr(record, field, value)
+        # new revisions invalidate the cached nutrition of affected recipes,
+        # without changing when the recipes themselves were last updated
+        recipe_ids = sa.select(Ingredient.recipe_id).where(
+            Ingredient.food_id.in_(food_ids),
+        )
+        db.execute(
+            sa.update(Recipe)
+            .where(Recipe.id.in_(recipe_ids))
+            .values(
+                revision=Recipe.revision + 1,
+                updated_at=Recipe.updated_at,
+            ),
+        )
+        db.commit()
+        return len(batch)
+
+    def clear(self) -> None:
+        """Remove the nutrition of every recipe from the cache."""
+        with self._lock:
+            self._cache.clear()
+
+
+nutrition_service = NutritionService(model=FoodNutrient, maxsize=4096)
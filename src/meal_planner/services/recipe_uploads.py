@@ -0,0 +1,178 @@
+"""Create recipes from request bodies that are parsed as they're uploaded."""
+
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from meal_planner.config import get_config
+from meal_planner.json_stream import ObjectStreamParser
+from meal_planner.models.recipe import Recipe
+from meal_planner.schemas.recipe import RecipeBaseSchema, RecipeIngredient
+from meal_planner.services.recipes import ResolvedIngredient, recipe_service
+
+
+class RecipeUploadTooLargeError(ValueError):
+    """The upload has more bytes or ingredients than are allowed."""
+
+
+class InvalidRecipeUploadError(ValueError):
+    """
+    A field or ingredient in the upload failed validation.
+
+    Attributes
+    ----------
+    errors: list[dict[str, Any]]
+        The validation errors, in the format pydantic reports them in, with
+        locations relative to the root of the recipe
+
+    """
+
+    def __init__(self, errors: list[dict[str, Any]]) -> None:
+        """Init the error with the validation errors."""
+        super().__init__("The recipe upload is invalid")
+        self.errors = errors
+
+
+@dataclass(frozen=True)
+class RecipeUploadLimits:
+    """
+    The limits that keep the memory used by each upload bounded.
+
+    Attributes
+    ----------
+    max_bytes: int
+        The maximum size of the request body
+    max_ingredients: int
+        The maximum number of ingredients in the recipe
+    max_value_length: int
+        The maximum number of characters in each field or ingredient
+    batch_size: int
+        The number of ingredients whose foods are looked up together
+
+    """
+
+    max_bytes: int
+    max_ingredients: int
+    max_value_length: int
+    batch_size: int
+
+
+def relocate(error: ValidationError, *loc: str | int) -> list[dict[str, Any]]:
+    """Prefix the locations of validation errors with where the value was."""
+    return [
+        {**detail, "loc": (*loc, *detail["loc"])}
+        for detail in error.errors(include_url=False)
+    ]
+
+
+class RecipeUpload:
+    """
+    A recipe whose JSON body is validated and resolved as it's streamed in.
+
+    The body has the same fields as RecipeCreateSchema. Each ingredient is
+    validated as soon as it has arrived, so an invalid one fails the upload
+    before the rest of the body is read, and the foods of the ingredients are
+    looked up in batches while the upload continues. The recipe is written in
+    a single transaction once the whole body has arrived.
+    """
+
+    def __init__(self, db: Session, limits: RecipeUploadLimits) -> None:
+        """Init an upload that will create the recipe with the session given."""
+        self.db = db
+        self.limits = limits
+        self.received = 0
+        self.ingredients: list[ResolvedIngredient] = []
+        self._pending: list[RecipeIngredient] = []
+        self._count = 0
+        self._parser = ObjectStreamParser(
+            "ingredients",
+            max_value_length=limits.max_value_length,
+        )
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        Parse the next chunk of the body and validate its ingredients.
+
+        Raises
+        ------
+        RecipeUploadTooLargeError
+            If the body has more bytes or ingredients than the limits allow
+        InvalidRecipeUploadError
+            If an ingredient failed validation
+        JSONStreamError
+            If the body isn't a valid JSON object
+        ValueTooLongError
+            If a field or ingredient is longer than the limits allow
+
+        """
+        self.received += len(chunk)
+        if self.received > self.limits.max_bytes:
+            msg = f"Recipes can't be larger than {self.limits.max_bytes} bytes"
+            raise RecipeUploadTooLargeError(msg)
+        for item in self._parser.feed(chunk):
+            self._add(item)
+
+    def finish(self) -> Recipe:
+        """Check that the whole body arrived and create the recipe."""
+        self._parser.close()
+        fields = self._parser.fields
+        errors = []
+        if not self._parser.has_array:
+            errors.append(
+                {
+                    "type": "missing",
+                    "loc": ("ingredients",),
+                    "msg": "Field required",
+                    "input": fields,
+                },
+            )
+        try:
+            data = RecipeBaseSchema.model_validate(fields)
+        except ValidationError as error:
+            errors.extend(relocate(error))
+        if errors:
+            raise InvalidRecipeUploadError(errors)
+        self._resolve()
+        return recipe_service.create_from_resolved(
+            self.db,
+            data=data,
+            ingredients=self.ingredients,
+            batch_size=self.limits.batch_size,
+        )
+
+    def _add(self, item: Any) -> None:  # noqa: ANN401
+        """Validate an ingredient and resolve its food with the next batch."""
+        index = self._count
+        self._count += 1
+        if self._count > self.limits.max_ingredients:
+            msg = (
+                f"Recipes can't have more than {self.limits.max_ingredients} "
+                "ingredients"
+            )
+            raise RecipeUploadTooLargeError(msg)
+        try:
+            ingredient = RecipeIngredient.model_validate(item)
+        except ValidationError as error:
+            errors = relocate(error, "ingredients", index)
+            raise InvalidRecipeUploadError(errors) from error
+        self._pending.append(ingredient)
+        if len(self._pending) >= self.limits.batch_size:
+            self._resolve()
+
+    def _resolve(self) -> None:
+        """Look up the foods of the ingredients that are waiting for them."""
+        if self._pending:
+            self.ingredients.extend(
+                recipe_service.resolve_ingredients(self.db, self._pending),
+            )
+            self._pending = []
+
+
+upload_limits = RecipeUploadLimits(
+    max_bytes=get_config().recipe_upload_max_bytes,
+    max_ingredients=get_config().recipe_upload_max_ingredients,
+    max_value_length=get_config().recipe_upload_max_value_length,
+    batch_size=get_config().recipe_upload_batch_size,
+)
@@ -0,0 +1,338 @@
+"""Handle the business logic for the immutable versions of recipes."""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Iterable
+from uuid import UUID, uuid4
+
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+
+from meal_planner.models.ingredient import Ingredient
+from meal_planner.models.recipe import Recipe
+from meal_planner.models.recipe_version import (
+    IngredientSet,
+    IngredientSetItem,
+    RecipeVersion,
+)
+from meal_planner.schemas.recipe import RecipeBaseSchema
+from meal_planner.services.base import InsertOnlyBase
+
+# how many times snapshot() picks the next version number again after another
+# request has taken it
+SNAPSHOT_ATTEMPTS = 5
+
+
+class RecipeVersionNotFoundError(ValueError):
+    """The version requested doesn't exist for the recipe."""
+
+
+class RecipeVersionConflictError(RuntimeError):
+    """Other requests kept taking the next version number of the recipe."""
+
+
+def ingredient_set_hash(items: Iterable[tuple[UUID, float, str]]) -> str:
+    """
+    Hash the contents of an ingredient set, ignoring the order of its items.
+
+    Parameters
+    ----------
+    items: Iterable[tuple[UUID, float, str]]
+        The food id, amount, and unit of each ingredient in the set
+
+    Returns
+    -------
+    str
+        A hash that is the same for every set with the same ingredients
+
+    """
+    rows = sorted(
+        (str(food_id), round(float(amount), 6), unit)
+        for food_id, amount, unit in items
+    )
+    content = json.dumps(rows, separators=(",", ":"))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Convert a datetime to UTC without a timezone, as timestamps are stored."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class RecipeVersionService(InsertOnlyBase[RecipeVersion, RecipeBaseSchema]):
+    """
+    Handle the business logic for the immutable versions of recipes.
+
+    A new version is snapshotted each time a recipe is created or its content
+    changes, and planned meals are pinned to the version that was current when
+    they were planned. Versions are never updated, and their ingredients are
+    stored in content-addressed ingredient sets, so a version that doesn't
+    change the ingredients reuses the rows of the version before it.
+    """
+
+    def query_with_ingredients(self) -> sa.Select:
+        """Return a query of all versions that eager loads their ingredients."""
+        return self.query_all().options(
+            selectinload(RecipeVersion.ingredient_set)
+            .selectinload(IngredientSet.items)
+            .joinedload(IngredientSetItem.food),
+        )
+
+    def query_for_recipe(self, recipe_id: UUID) -> sa.Select:
+        """Return a query of a recipe's versions, from oldest to newest."""
+        return (
+            self.query_all()
+            .where(RecipeVersion.recipe_id == recipe_id)
+            .order_by(RecipeVersion.version)
+        )
+
+    def get_version(
+        self,
+        db: Session,
+        recipe_id: UUID,
+        version: int,
+    ) -> RecipeVersion | None:
+        """Return a version of a recipe by its number, with its ingredients."""
+        stmt = self.query_with_ingredients().where(
+            RecipeVersion.recipe_id == recipe_id,
+            RecipeVersion.version == version,
+        )
+        return self.get_first(db, stmt)
+
+    def get_latest(
+        self,
+        db: Session,
+        recipe_id: UUID,
+    ) -> RecipeVersion | None:
+        """
+        Return the latest version of a recipe, with its ingredients.
+
+        The version is read from the end of the (recipe_id, version) unique
+        index, so the lookup doesn't depend on how many versions there are.
+        """
+        stmt = (
+            self.query_with_ingredients()
+            .where(RecipeVersion.recipe_id == recipe_id)
+            .order_by(RecipeVersion.version.desc())
+            .limit(1)
+        )
+        return self.get_first(db, stmt)
+
+    def get_as_of(
+        self,
+        db: Session,
+        recipe_id: UUID,
+        as_of: datetime,
+    ) -> RecipeVersion | None:
+        """
+        Return the version of a recipe that was current at a point in time.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        recipe_id: UUID
+            The id of the recipe to find the version of
+        as_of: datetime
+            The point in time, which is assumed to be in UTC if it doesn't have
+            a timezone
+
+        Returns
+        -------
+        RecipeVersion | None
+            The last version created at or before as_of, or None if the recipe
+            didn't exist yet. Timestamps are stored to the second, so versions
+            created in the same second are ordered by their number.
+
+        """
+        stmt = (
+            self.query_with_ingredients()
+            .where(
+                RecipeVersion.recipe_id == recipe_id,
+                RecipeVersion.created_at <= naive_utc(as_of),
+            )
+            .order_by(
+                RecipeVersion.created_at.desc(),
+                RecipeVersion.version.desc(),
+            )
+            .limit(1)
+        )
+        return self.get_first(db, stmt)
+
+    def get_or_create_set(
+        self,
+        db: Session,
+        items: list[tuple[UUID, float, str]],
+    ) -> IngredientSet:
+        """
+        Return the ingredient set with these items, creating it if needed.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        items: list[tuple[UUID, float, str]]
+            The food id, amount, and unit of each ingredient in the set
+
+        Returns
+        -------
+        IngredientSet
+            The existing set with the same contents, or a new one whose items
+            are written with a single bulk INSERT. If another request creates
+            the same set first, the set it created is returned.
+
+        """
+        content_hash = ingredient_set_hash(items)
+        stmt = sa.select(IngredientSet).where(
+            IngredientSet.content_hash == content_hash,
+        )
+        existing = db.scalar(stmt)
+        if existing:
+            return existing
+        ingredient_set = IngredientSet(id=uuid4(), content_hash=content_hash)
+        try:
+            with db.begin_nested():
+                db.add(ingredient_set)
+                db.flush()  # insert the set before the items that reference it
+                if items:
+                    db.execute(
+                        sa.insert(IngredientSetItem),
+                        [
+                            {
+                                "id": uuid4(),
+                                "ingredient_set_id": ingredient_set.id,
+                                "food_id": food_id,
+                                "amount": amount,
+                                "unit": unit,
+                            }
+                            for food_id, amount, unit in items
+                        ],
+                    )
+        except IntegrityError:
+            return db.scalars(stmt).one()
+        return ingredient_set
+
+    def snapshot(self, db: Session, recipe: Recipe) -> RecipeVersion:
+        """
+        Record the current content of a recipe as a new version if it changed.
+
+        The session is flushed so that the recipe and its ingredients are read
+        as they'll be committed. If they match the latest version, that version
+        is returned instead of creating an identical one. If another request
+        takes the next version number first, the latest version is read again
+        and the snapshot is retried with the number after it.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        recipe: Recipe
+            The recipe that was created or changed, which must be in the session
+
+        Returns
+        -------
+        RecipeVersion
+            The version with the recipe's current content
+
+        """
+        db.flush()
+        stmt = sa.select(
+            Ingredient.food_id,
+            Ingredient.amount,
+            Ingredient.unit,
+        ).where(Ingredient.recipe_id == recipe.id)
+        items = [tuple(row) for row in db.execute(stmt)]
+        ingredient_set = self.get_or_create_set(db, items)
+        for _ in range(SNAPSHOT_ATTEMPTS):
+            latest = self.get_latest(db, recipe.id)
+            if (
+                latest
+                and latest.ingredient_set_id == ingredient_set.id
+                and latest.name == recipe.name
+                and latest.description == recipe.description
+                and latest.servings == recipe.servings
+            ):
+                return latest
+            version = RecipeVersion(
+                id=uuid4(),
+                recipe_id=recipe.id,
+                version=latest.version + 1 if latest else 1,
+                name=recipe.name,
+                description=recipe.description,
+                servings=recipe.servings,
+                ingredient_set=ingredient_set,
+            )
+            if self._insert_version(db, version):
+                return version
+        msg = f"Recipe {recipe.id} changed too often to snapshot a version"
+        raise RecipeVersionConflictError(msg)
+
+    def _insert_version(self, db: Session, version: RecipeVersion) -> bool:
+        """Insert a version, returning False if its number has been taken."""
+        try:
+            with db.begin_nested():
+                db.add(version)
+        except IntegrityError:
+            return False
+        return True
+
+    def get_latest_or_snapshot(
+        self,
+        db: Session,
+        recipe_id: UUID,
+    ) -> RecipeVersion | None:
+        """
+        Return the latest version of a recipe, snapshotting it if it has none.
+
+        Recipes are versioned when they're created, so this only snapshots
+        recipes that were created before versions were recorded. It returns
+        None if the recipe doesn't exist.
+        """
+        latest = self.get_latest(db, recipe_id)
+        if latest:
+            return latest
+        recipe = db.get(Recipe, recipe_id)
+        if recipe is None:
+            return None
+        return self.snapshot(db, recipe)
+
+    def backfill(self, db: Session, batch_size: int = 500) -> int:
+        """
+        Snapshot the first version of every recipe that doesn't have one.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        batch_size: int
+            The number of recipes to snapshot in each transaction
+
+        Returns
+        -------
+        int
+            The number of recipes that were versioned
+
+        """
+        versioned = sa.select(RecipeVersion.recipe_id)
+        stmt = (
+            sa.select(Recipe)
+            .where(Recipe.id.not_in(versioned))
+            .order_by(Recipe.id)
+            .limit(batch_size)
+        )
+        total = 0
+        while True:
+            batch = db.scalars(stmt).all()
+            if not batch:
+                return total
+            for recipe in batch:
+                self.snapshot(db, recipe)
+            db.commit()
+            total += len(batch)
+
+
+recipe_version_service = RecipeVersionService(model=RecipeVersion)
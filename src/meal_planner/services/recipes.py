@@ -1,38 +1,619 @@
 """Handle the business logic for reading and creating recipes."""
 
-from uuid import uuid4
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, ClassVar, Iterable, NamedTuple, Sequence
+from uuid import UUID, uuid4
 
-from sqlalchemy.orm import Session
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.sql import functions
 
+from meal_planner.models.food import Food
+from meal_planner.models.ingredient import Ingredient
 from meal_planner.models.recipe import Recipe
 from meal_planner.schemas.ingredient import IngredientCreateSchema
 from meal_planner.schemas.recipe import (
+    RecipeBaseSchema,
     RecipeCreateSchema,
+    RecipeDumpSchema,
     RecipeIngredient,
     RecipeUpdateSchema,
 )
-from meal_planner.services.base import CRUDBase
+from meal_planner.services.base import (
+    CRUDBase,
+    ListPlan,
+    ListSort,
+    has_prefix,
+)
+from meal_planner.services.foods import food_service
+from meal_planner.services.group_commit import group_committer
 from meal_planner.services.ingredients import ingredient_service
+from meal_planner.services.recipe_versions import recipe_version_service
+
+
+class RecipeSummary(NamedTuple):
+    """The summary columns that are denormalized onto each recipe."""
+
+    ingredient_count: int
+    food_names: list[str]
+    content_hash: str
+
+
+class ResolvedIngredient(NamedTuple):
+    """An ingredient whose food has been found or created, but isn't saved."""
+
+    food: str
+    food_id: UUID
+    amount: float
+    unit: str
+
+
+class FoodRow(NamedTuple):
+    """The name of a food, shared by the read-only ingredients that use it."""
+
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class IngredientRow:
+    """A read-only ingredient in a RecipeRow."""
+
+    amount: float
+    unit: str
+    food: FoodRow
+
+
+@dataclass(frozen=True, slots=True)
+class RecipeRow:
+    """
+    A read-only recipe and its ingredients, loaded without the ORM.
+
+    It has the attributes that RecipeDumpSchema reads from a Recipe, so it can
+    be serialized the same way.
+    """
+
+    id: UUID
+    name: str
+    description: str
+    servings: int
+    ingredients: list[IngredientRow]
+
+
+def name_has_prefix(prefix: str) -> sa.ColumnElement[bool]:
+    """Match recipes whose names start with a prefix, ignoring case."""
+    return has_prefix(Recipe.name_key, prefix)
+
+
+def contains_food(food_id: UUID) -> sa.ColumnElement[bool]:
+    """Match recipes that have an ingredient made from a food."""
+    recipe_ids = sa.select(Ingredient.recipe_id).where(
+        Ingredient.food_id == food_id,
+    )
+    return Recipe.id.in_(recipe_ids)
+
+
+def normalize(text: str) -> str:
+    """Ignore differences in case and whitespace when comparing names."""
+    return " ".join(text.casefold().split())
+
+
+def summarize(
+    name: str,
+    ingredients: Iterable[tuple[str, float, str]],
+) -> RecipeSummary:
+    """
+    Compute the summary columns for a recipe from its name and ingredients.
+
+    Parameters
+    ----------
+    name: str
+        The name of the recipe
+    ingredients: Iterable[tuple[str, float, str]]
+        The food name, amount, and unit of each ingredient in the recipe
+
+    Returns
+    -------
+    RecipeSummary
+        The ingredient count, sorted food names, and a hash of the normalized
+        name and ingredients that is the same for recipes with the same content
+
+    """
+    ingredients = list(ingredients)
+    rows = sorted(
+        (normalize(food), round(float(amount), 6), normalize(unit))
+        for food, amount, unit in ingredients
+    )
+    content = json.dumps([normalize(name), rows], separators=(",", ":"))
+    return RecipeSummary(
+        ingredient_count=len(rows),
+        food_names=sorted({food for food, _, _ in ingredients}),
+        content_hash=hashlib.sha256(content.encode()).hexdigest(),
+    )
 
 
 class RecipeService(CRUDBase[Recipe, RecipeCreateSchema, RecipeUpdateSchema]):
     """Handle the business logic for reading and creating recipes."""
 
+    list_filters: ClassVar[dict[str, Callable[[Any], sa.ColumnElement]]] = {
+        "name_prefix": name_has_prefix,
+        "created_after": lambda value: Recipe.created_at >= value,
+        "created_before": lambda value: Recipe.created_at < value,
+        "updated_after": lambda value: Recipe.updated_at >= value,
+        "updated_before": lambda value: Recipe.updated_at < value,
+        "contains_food": contains_food,
+        "max_ingredient_count": lambda value: Recipe.ingredient_count <= value,
+    }
+    # timestamps are compared in the format they're stored in, because SQLite
+    # stores the server default without the microseconds that binding a
+    # datetime would add, which would skip ties between pages
+    list_sorts: ClassVar[dict[str, ListSort]] = {
+        "id": ListSort(key=Recipe.id, parse=UUID),
+        "name": ListSort(key=Recipe.name_key),
+        "created_at": ListSort(
+            key=sa.type_coerce(Recipe.created_at, sa.String),
+        ),
+        "updated_at": ListSort(
+            key=sa.type_coerce(Recipe.updated_at, sa.String),
+        ),
+        "ingredient_count": ListSort(key=Recipe.ingredient_count),
+    }
+    list_plans: ClassVar[tuple[ListPlan, ...]] = (
+        ListPlan(index="recipe primary key", sort="id"),
+        # the ingredients that use the food are found with the index, so only
+        # their recipes are checked against the other filters
+        ListPlan(
+            index="ix_ingredient_food_id_recipe_id",
+            sort="id",
+            required=frozenset({"contains_food"}),
+            optional=frozenset({"max_ingredient_count"}),
+        ),
+        ListPlan(
+            index="ix_recipe_name_key",
+            sort="name",
+            optional=frozenset({"name_prefix"}),
+        ),
+        ListPlan(
+            index="ix_recipe_created_at",
+            sort="created_at",
+            optional=frozenset({"created_after", "created_before"}),
+        ),
+        ListPlan(
+            index="ix_recipe_updated_at",
+            sort="updated_at",
+            optional=frozenset({"updated_after", "updated_before"}),
+        ),
+        ListPlan(
+            index="ix_recipe_ingredient_count",
+            sort="ingredient_count",
+            optional=frozenset({"max_ingredient_count"}),
+        ),
+    )
+
+    def query_with_ingredients(self) -> sa.Select:
+        """
+        Return a query of all recipes that eager loads their ingredients.
+
+        Ingredients and their foods are each loaded with a single SELECT ... IN
+        statement, so the number of queries stays fixed no matter how many
+        recipes are returned.
+        """
+        return self.query_all().options(
+            selectinload(Recipe.ingredients).selectinload(Ingredient.food),
+        )
+
+    def query_summaries(
+        self,
+        *,
+        ingredient_count: bool = False,
+        food_names: bool = False,
+    ) -> sa.Select:
+        """
+        Return a query of summary-level columns for all recipes.
+
+        Only the columns requested are selected from the recipe table. The
+        ingredient count and food names are read from denormalized columns,
+        so the ingredient and food tables are never read.
+        """
+        columns: list = [
+            Recipe.id,
+            Recipe.name,
+            Recipe.description,
+            Recipe.servings,
+        ]
+        if ingredient_count:
+            columns.append(Recipe.ingredient_count)
+        if food_names:
+            columns.append(Recipe.food_names)
+        return self.query_rows(*columns)
+
+    def add_ingredients(
+        self,
+        db: Session,
+        rows: Sequence[sa.Row],
+    ) -> list[RecipeRow]:
+        """
+        Load the ingredients of plain recipe rows with a single query.
+
+        This is the read-only counterpart of query_with_ingredients() for
+        listings that only serialize the recipes. Nothing is added to the
+        session, and each food's name is shared by every ingredient that uses
+        it, so a page of recipes takes a fraction of the memory of ORM records.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        rows: Sequence[Row]
+            Rows from query_summaries(), which need the id, name, description,
+            and servings of each recipe
+
+        Returns
+        -------
+        list[RecipeRow]
+            The recipes in the same order as the rows
+
+        """
+        ingredients: dict[UUID, list[IngredientRow]] = {
+            row.id: [] for row in rows
+        }
+        if not ingredients:
+            return []
+        stmt = (
+            sa.select(
+                Ingredient.recipe_id,
+                Ingredient.amount,
+                Ingredient.unit,
+                Food.name,
+            )
+            .join(Food, Ingredient.food_id == Food.id)
+            .where(Ingredient.recipe_id.in_(ingredients))
+        )
+        foods: dict[str, FoodRow] = {}
+        for recipe_id, amount, unit, name in db.execute(stmt):
+            food = foods.get(name) or foods.setdefault(name, FoodRow(name))
+            ingredients[recipe_id].append(IngredientRow(amount, unit, food))
+        return [
+            RecipeRow(
+                id=row.id,
+                name=row.name,
+                description=row.description,
+                servings=row.servings,
+                ingredients=ingredients[row.id],
+            )
+            for row in rows
+        ]
+
+    def get_page_for_food(
+        self,
+        db: Session,
+        food_id: UUID,
+        *,
+        cursor: UUID | None,
+        limit: int,
+    ) -> tuple[list[sa.Row], UUID | None]:
+        """
+        Return a page of summaries of the recipes that use a food.
+
+        Recipes are returned in id order and paginated with a keyset instead of
+        an offset, so each page is read straight from the ingredient table's
+        (food_id, recipe_id) index no matter how deep into the results it is.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        food_id: UUID
+            The id of the food to find recipes for
+        cursor: UUID | None
+            The id of the last recipe on the previous page, or None to fetch
+            the first page
+        limit: int
+            The maximum number of recipes to return
+
+        Returns
+        -------
+        tuple[list[Row], UUID | None]
+            Returns the summaries on the page and the cursor for the next page,
+            which is None if this is the last page
+
+        """
+        recipe_ids = sa.select(Ingredient.recipe_id).where(
+            Ingredient.food_id == food_id,
+        )
+        if cursor:
+            recipe_ids = recipe_ids.where(Ingredient.recipe_id > cursor)
+        stmt = (
+            self.query_summaries(ingredient_count=True, food_names=True)
+            .where(Recipe.id.in_(recipe_ids))
+            .order_by(Recipe.id)
+            .limit(limit + 1)  # fetch one extra row to tell if there's more
+        )
+        rows = list(db.execute(stmt).all())
+        if len(rows) > limit:
+            return rows[:limit], rows[limit - 1].id
+        return rows, None
+
     def create(
         self,
         db: Session,
         *,
         data: RecipeCreateSchema,
         defer_commit: bool = False,
+        dedupe: bool = False,
     ) -> Recipe:
-        """Create a new recipe."""
-        recipe = Recipe(id=uuid4(), **data.model_dump(exclude={"ingredients"}))
+        """
+        Create a new recipe and snapshot its first version.
+
+        If dedupe is True and a recipe with the same normalized name and
+        ingredients already exists, that recipe is returned instead.
+        """
+        summary = self.summarize_payload(data)
+        if dedupe:
+            existing = self.get_by_content_hash(db, summary.content_hash)
+            if existing:
+                return existing
+        recipe = Recipe(
+            id=uuid4(),
+            **data.model_dump(exclude={"ingredients"}),
+            **summary._asdict(),
+        )
+        # find the existing foods in one query, which each ingredient reuses
+        food_service.get_many_by_name(
+            db,
+            [ingredient.food for ingredient in data.ingredients],
+        )
         for ingredient in data.ingredients:
             self.add_ingredient(db, recipe, ingredient)
+        db.add(recipe)
+        recipe_version_service.snapshot(db, recipe)
         if defer_commit:
             return recipe
         return self.commit_changes(db, recipe)
 
+    def create_in_group(self, data: RecipeCreateSchema) -> dict:
+        """
+        Create a recipe in the next group commit and return its response body.
+
+        The recipe is inserted in a transaction shared with other concurrent
+        writes, and this only returns once that transaction is committed. The
+        group committer must be running.
+        """
+
+        def insert(db: Session) -> dict:
+            recipe = self.create(db, data=data, defer_commit=True)
+            db.flush()
+            view = RecipeDumpSchema.model_validate(recipe)
+            return view.model_dump(mode="json")
+
+        return group_committer.submit(insert)
+
+    def resolve_ingredients(
+        self,
+        db: Session,
+        ingredients: Sequence[RecipeIngredient],
+    ) -> list[ResolvedIngredient]:
+        """
+        Find or create the foods of a batch of ingredients with one lookup.
+
+        New foods are added to the session but not flushed, so resolving the
+        batches of a recipe that's still being uploaded only reads from the
+        database and doesn't hold SQLite's write lock while the rest arrives.
+        """
+        foods = food_service.get_or_create_many(
+            db,
+            [ingredient.food for ingredient in ingredients],
+        )
+        return [
+            ResolvedIngredient(
+                food=ingredient.food,
+                food_id=foods[ingredient.food].id,
+                amount=ingredient.amount,
+                unit=ingredient.unit,
+            )
+            for ingredient in ingredients
+        ]
+
+    def create_from_resolved(
+        self,
+        db: Session,
+        *,
+        data: RecipeBaseSchema,
+        ingredients: Sequence[ResolvedIngredient],
+        batch_size: int = 500,
+    ) -> Recipe:
+        """
+        Create a recipe from ingredients whose foods were already resolved.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        data: RecipeBaseSchema
+            The name, description, and servings of the recipe
+        ingredients: Sequence[ResolvedIngredient]
+            The ingredients returned by resolve_ingredients()
+        batch_size: int
+            The number of ingredients to write with each bulk INSERT
+
+        Returns
+        -------
+        Recipe
+            The committed recipe with its ingredients and their foods loaded
+
+        """
+        summary = summarize(
+            data.name,
+            ((i.food, i.amount, i.unit) for i in ingredients),
+        )
+        recipe = Recipe(id=uuid4(), **data.model_dump(), **summary._asdict())
+        db.add(recipe)
+        db.flush()  # insert the recipe and new foods before the ingredients
+        for start in range(0, len(ingredients), batch_size):
+            rows = [
+                {
+                    "id": uuid4(),
+                    "recipe_id": recipe.id,
+                    "food_id": ingredient.food_id,
+                    "amount": ingredient.amount,
+                    "unit": ingredient.unit,
+                }
+                for ingredient in ingredients[start : start + batch_size]
+            ]
+            db.execute(sa.insert(Ingredient), rows)
+        recipe_version_service.snapshot(db, recipe)
+        db.commit()
+        stmt = self.query_with_ingredients().where(Recipe.id == recipe.id)
+        return db.scalars(stmt).one()
+
+    def summarize_payload(self, data: RecipeCreateSchema) -> RecipeSummary:
+        """Compute the summary columns for a recipe that is being created."""
+        return summarize(
+            data.name,
+            ((i.food, i.amount, i.unit) for i in data.ingredients),
+        )
+
+    def get_by_content_hash(
+        self,
+        db: Session,
+        content_hash: str,
+    ) -> Recipe | None:
+        """Find a recipe with the same content using the content_hash index."""
+        stmt = sa.select(Recipe).where(Recipe.content_hash == content_hash)
+        return self.get_first(db, stmt.limit(1))
+
+    def find_duplicate(
+        self,
+        db: Session,
+        data: RecipeCreateSchema,
+    ) -> Recipe | None:
+        """Find an existing recipe with the same content as the one provided."""
+        summary = self.summarize_payload(data)
+        return self.get_by_content_hash(db, summary.content_hash)
+
+    def update(
+        self,
+        db: Session,
+        *,
+        record: Recipe,
+        update_data: RecipeUpdateSchema,
+    ) -> Recipe:
+        """
+        Update a recipe and patch its ingredients in a single transaction.
+
+        Only the fields that were set on update_data are changed. If a list of
+        ingredients is included, it is diffed against the recipe's current
+        ingredients so that only new, changed, or removed rows are written.
+
+        If the recipe's content changed, a new version is snapshotted. Meals
+        that were already planned stay pinned to the version they were planned
+        with, so the edit doesn't change them.
+        """
+        changes = update_data.model_dump(
+            exclude_unset=True,
+            exclude_none=True,
+            exclude={"ingredients"},
+        )
+        for field, value in changes.items():
+            setattr(record, field, value)
+        ingredients_changed = False
+        if update_data.ingredients is not None:
+            ingredients_changed = ingredient_service.sync_recipe_ingredients(
+                db,
+                recipe_id=record.id,
+                ingredients=update_data.ingredients,
+            )
+            # bump the recipe's timestamp even if only its ingredients changed
+            if ingredients_changed:
+                record.updated_at = functions.now()
+        # keep the summary columns in sync with the name and ingredients
+        if update_data.ingredients is not None:
+            ingredients = [
+                (i.food, i.amount, i.unit) for i in update_data.ingredients
+            ]
+            summary = summarize(record.name, ingredients)
+        elif "name" in changes:
+            ingredients = self.ingredients_from_db(db, [record.id])[record.id]
+            summary = summarize(record.name, ingredients)
+        else:
+            summary = None
+        if summary:
+            for field, value in summary._asdict().items():
+                setattr(record, field, value)
+        recipe_version_service.snapshot(db, record)
+        return self.commit_changes(db, record)
+
+    def ingredients_from_db(
+        self,
+        db: Session,
+        recipe_ids: list[UUID],
+    ) -> dict[UUID, list[tuple[str, float, str]]]:
+        """Return the food name, amount, and unit of each recipe's ingredients."""
+        stmt = (
+            sa.select(
+                Ingredient.recipe_id,
+                Food.name,
+                Ingredient.amount,
+                Ingredient.unit,
+            )
+            .join(Food, Ingredient.food_id == Food.id)
+            .where(Ingredient.recipe_id.in_(recipe_ids))
+        )
+        ingredients: dict[UUID, list[tuple[str, float, str]]] = {
+            recipe_id: [] for recipe_id in recipe_ids
+        }
+        for row in db.execute(stmt):
+            ingredients[row.recipe_id].append((row.name, row.amount, row.unit))
+        return ingredients
+
+    def backfill_summaries(self, db: Session, batch_size: int = 500) -> int:
+        """
+        Recompute the summary columns of every recipe in batches.
+
+        Each batch is written with a single bulk UPDATE and committed, and the
+        recipes' updated_at timestamps are preserved.
+
+        Parameters
+        ----------
+        db: Session
+            Instance of SQLAlchemy session that manages database transactions
+        batch_size: int
+            The number of recipes to update in each transaction
+
+        Returns
+        -------
+        int
+            The number of recipes that were updated
+
+        """
+        total = 0
+        last_id: UUID | None = None
+        while True:
+            stmt = sa.select(Recipe.id, Recipe.name, Recipe.updated_at)
+            stmt = stmt.order_by(Recipe.id)
+            if last_id is not None:
+                stmt = stmt.where(Recipe.id > last_id)
+            batch = db.execute(stmt.limit(batch_size)).all()
+            if not batch:
+                return total
+            ingredients = self.ingredients_from_db(
+                db,
+                [row.id for row in batch],
+            )
+            rows = [
+                {
+                    "id": row.id,
+                    "updated_at": row.updated_at,
+                    **summarize(row.name, ingredients[row.id])._asdict(),
+                }
+                for row in batch
+            ]
+            db.execute(sa.update(Recipe), rows)
+            db.commit()
+            total += len(batch)
+            last_id = batch[-1].id
+
     def add_ingredient(
         self,
         db: Session,
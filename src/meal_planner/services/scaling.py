@@ -0,0 +1,135 @@
+"""Scale recipes to a different number of servings for API responses."""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from uuid import UUID
+
+from starlette.responses import Response
+
+from meal_planner.compression import PrecompressedBody
+from meal_planner.config import get_config
+from meal_planner.models.recipe import Recipe
+from meal_planner.schemas.recipe import RecipeDumpSchema
+from meal_planner.units import promote
+
+CacheKey = tuple[UUID, int, int | None]
+
+
+@dataclass
+class CachedRecipe:
+    """A serialized recipe and, once it's been requested, its response body."""
+
+    view: RecipeDumpSchema
+    body: PrecompressedBody | None = None
+
+
+class RecipeScaler:
+    """
+    Serialize recipes, optionally with their ingredients scaled to servings.
+
+    Serialized views are cached by the recipe's id, revision, and the number
+    of servings requested. The revision changes whenever the recipe is
+    updated, so cached views never need to be invalidated, and a cache hit
+    doesn't need to load the recipe's ingredients at all. The response body
+    of each view is cached too, along with a copy compressed in each encoding
+    that clients have asked for, unless compression is turned off.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        minimum_compress_size: int,
+        *,
+        compress: bool = True,
+    ) -> None:
+        """Init the RecipeScaler with the number of views to cache."""
+        self.maxsize = maxsize
+        self.minimum_compress_size = minimum_compress_size
+        self.compress = compress
+        self._cache: OrderedDict[CacheKey, CachedRecipe] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def dump(self, recipe: Recipe, servings: int | None) -> RecipeDumpSchema:
+        """
+        Serialize a recipe, scaling its ingredients if servings are given.
+
+        Parameters
+        ----------
+        recipe: Recipe
+            The recipe to serialize
+        servings: int | None
+            The number of servings to scale the ingredients to. Amounts are
+            rounded and converted to larger units where that reads better.
+            If None, the recipe is serialized as it's stored.
+
+        """
+        return self._entry(recipe, servings).view
+
+    def body(self, recipe: Recipe, servings: int | None) -> PrecompressedBody:
+        """Return the JSON response body for a recipe, as dump() serializes it."""
+        entry = self._entry(recipe, servings)
+        if entry.body is None:
+            entry.body = PrecompressedBody(
+                entry.view.model_dump_json().encode(),
+                minimum_size=self.minimum_compress_size,
+            )
+        return entry.body
+
+    def response(
+        self,
+        recipe: Recipe,
+        servings: int | None,
+        accept_encoding: str,
+    ) -> Response:
+        """Return the response for a recipe, compressed if the client accepts."""
+        body = self.body(recipe, servings)
+        if not self.compress:
+            return body.response("")  # send the body as it is
+        return body.response(accept_encoding)
+
+    def scale(
+        self,
+        recipe: RecipeDumpSchema,
+        servings: int,
+    ) -> RecipeDumpSchema:
+        """Return a copy of a serialized recipe scaled to some servings."""
+        factor = servings / recipe.servings
+        ingredients = []
+        for ingredient in recipe.ingredients:
+            amount, unit = promote(ingredient.amount * factor, ingredient.unit)
+            ingredients.append(
+                ingredient.model_copy(update={"amount": amount, "unit": unit}),
+            )
+        return recipe.model_copy(
+            update={"servings": servings, "ingredients": ingredients},
+        )
+
+    def clear(self) -> None:
+        """Remove every view from the cache."""
+        with self._lock:
+            self._cache.clear()
+
+    def _entry(self, recipe: Recipe, servings: int | None) -> CachedRecipe:
+        """Return the cached view of a recipe, serializing it on a miss."""
+        key = (recipe.id, recipe.revision, servings)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        view = RecipeDumpSchema.model_validate(recipe)
+        if servings is not None:
+            view = self.scale(view, servings)
+        entry = CachedRecipe(view=view)
+        with self._lock:
+            self._cache[key] = entry
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return entry
+
+
+recipe_scaler = RecipeScaler(
+    maxsize=1024,
+    minimum_compress_size=get_config().compression_minimum_size,
+    compress=get_config().compression_enabled,
+)
@@ -0,0 +1,93 @@
+"""Convert ingredient amounts between the units of measure that recipes use."""
+
+from typing import NamedTuple
+
+# amounts are promoted to units that are a multiple of this fraction
+NICE_FRACTION = 0.25
+ROUND_DIGITS = 2
+TOLERANCE = 1e-6
+
+
+class Unit(NamedTuple):
+    """A unit of measure and its size in the base unit of its dimension."""
+
+    name: str
+    dimension: str
+    size: float
+
+
+# only units in the same dimension are converted into each other, and units
+# that aren't listed here, like "self", are never converted
+UNITS = {
+    unit.name: unit
+    for unit in [
+        Unit("tsp", "volume", 1),
+        Unit("tbsp", "volume", 3),
+        Unit("cup", "volume", 48),
+        Unit("ml", "metric volume", 1),
+        Unit("l", "metric volume", 1000),
+        Unit("oz", "weight", 1),
+        Unit("lb", "weight", 16),
+        Unit("g", "metric weight", 1),
+        Unit("kg", "metric weight", 1000),
+    ]
+}
+# the weight of the base unit of each weight dimension in grams, and the
+# volume of the base unit of each volume dimension in cups, which are used to
+# convert ingredient amounts to grams to compute their nutrition
+GRAMS_PER_OUNCE = 28.349523125
+MILLILITERS_PER_CUP = 236.5882365
+GRAMS_PER_BASE = {"weight": GRAMS_PER_OUNCE, "metric weight": 1}
+CUPS_PER_BASE = {"volume": 1 / 48, "metric volume": 1 / MILLILITERS_PER_CUP}
+GRAMS = {
+    unit.name: unit.size * GRAMS_PER_BASE[unit.dimension]
+    for unit in UNITS.values()
+    if unit.dimension in GRAMS_PER_BASE
+}
+CUPS = {
+    unit.name: unit.size * CUPS_PER_BASE[unit.dimension]
+    for unit in UNITS.values()
+    if unit.dimension in CUPS_PER_BASE
+}
+# the unit of ingredients that are counted by the item, like 2 tomatoes
+EACH = "self"
+
+# the units of each dimension from largest to smallest
+DIMENSIONS: dict[str, list[Unit]] = {}
+for _unit in sorted(UNITS.values(), key=lambda unit: -unit.size):
+    DIMENSIONS.setdefault(_unit.dimension, []).append(_unit)
+
+
+def promote(amount: float, unit: str) -> tuple[float, str]:
+    """
+    Express an amount in the largest unit that measures it in quarters.
+
+    For example 48 tsp becomes 1 cup and 6 tsp becomes 2 tbsp, but 4 tsp
+    stays 4 tsp because it isn't a whole number of quarter tablespoons.
+
+    Parameters
+    ----------
+    amount: float
+        The amount of the ingredient
+    unit: str
+        The unit the amount is measured in
+
+    Returns
+    -------
+    tuple[float, str]
+        Returns the amount and unit to display, rounded to ROUND_DIGITS
+
+    """
+    source = UNITS.get(unit)
+    if source is None:
+        return round(amount, ROUND_DIGITS), unit
+    base_amount = amount * source.size
+    for candidate in DIMENSIONS[source.dimension]:
+        value = base_amount / candidate.size
+        quarters = value / NICE_FRACTION
+        if (
+            value >= NICE_FRACTION
+            and abs(quarters - round(quarters)) < TOLERANCE
+        ):
+            return round(value, ROUND_DIGITS), candidate.name
+    return round(amount, ROUND_DIGITS), unit
@@ -5,12 +5,15 @@ from typing import Generator
 import pytest
 from dynaconf import Dynaconf
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 
 from meal_planner.api import app
 from meal_planner.config import settings
 from meal_planner.dependencies import database
+from meal_planner.services.nutrition import nutrition_service
+from meal_planner.services.scaling import recipe_scaler
 
 from tests.utils.database import init_test_db, populate_db
 
@@ -21,45 +24,53 @@ def fixture_config():
     return settings.from_env("testing")
 
 
-@pytest.fixture(scope="session", name="session")
-def fixture_db(test_config: Dynaconf):
-    """Create a connection to a test db with scope session."""
+@pytest.fixture(scope="session", name="engine")
+def fixture_engine(test_config: Dynaconf) -> Generator[Engine, None, None]:
+    """
+    Create an in-memory test database with the test data once per process.
+
+    StaticPool hands every checkout the same connection, which is what keeps
+    the in-memory database alive for the whole test session. Each pytest-xdist
+    worker is a separate process, so each one gets its own database.
+    """
     # check that the testing configs are correctly set
-    assert test_config.database_url == "sqlite:///mock.db"
-    # connect to mock.db using the sqlalchemy engine
+    assert test_config.database_url == "sqlite://"
     engine = create_engine(
         url=test_config.database_url,
-        pool_pre_ping=True,
         connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
     )
-    # initiate a db session using that connection
-    test_session = sessionmaker(
-        autocommit=False,
-        autoflush=False,
-        bind=engine,
-    )
-    with test_session() as session:
+    database.apply_sqlite_profile(engine, "default")
+    database.enable_savepoints(engine)
+    with Session(engine) as session:
         init_test_db(session)
         populate_db(session)
-        yield session
+    yield engine
+    engine.dispose()
 
 
 @pytest.fixture(name="test_session")
-def fixture_scoped_session(session: Session, monkeypatch: pytest.MonkeyPatch):
-    """Create a scoped session that automatically rolls back after each test."""
-
-    def flush_instead_of_commit() -> None:
-        """Flush the transaction instead of committing it to allow rollback."""
-        session.flush()
-        session.expire_all()
-
-    # replace commit() with flush() to enable rolling back test-specific changes
-    monkeypatch.setattr(session, "commit", flush_instead_of_commit)
-    # started a nested transaction then yield the session for use in a test
-    session.begin_nested()
-    yield session
-    # roll back the transaction explicitly to undo the changes made in a test
-    session.rollback()
+def fixture_scoped_session(engine: Engine) -> Generator[Session, None, None]:
+    """
+    Create a session whose changes are rolled back after each test.
+
+    The test runs inside a transaction that's never committed. The session
+    joins it with a SAVEPOINT, so code under test can call commit() and
+    rollback() as usual, and those only release or roll back the savepoint.
+    """
+    # cached recipes are keyed by revision, which repeats once a test rolls back
+    recipe_scaler.clear()
+    nutrition_service.clear()
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        session = Session(
+            bind=connection,
+            autoflush=False,
+            join_transaction_mode="create_savepoint",
+        )
+        yield session
+        session.close()
+        transaction.rollback()
 
 
 @pytest.fixture(name="client")
@@ -71,4 +82,5 @@ def mock_client(test_session: Session) -> TestClient:
         yield test_session
 
     app.dependency_overrides[database.get_db] = override_get_db
+    app.dependency_overrides[database.get_read_db] = override_get_db
     return TestClient(app)
@@ -1,7 +1,24 @@
 """Test the database connection."""
 
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+from dataclasses import replace
+from functools import lru_cache
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+import sqlalchemy as sa
+from fastapi import Request
+from sqlalchemy import Engine, create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from meal_planner.config import get_config
+from meal_planner.dependencies import database
+from meal_planner.models.base import UUIDAuditBase
+from meal_planner.models.idempotency_key import IdempotencyKey
+from meal_planner.models.recipe import Recipe
+from meal_planner.models.recipe_version import RecipeVersion
+from meal_planner.services.idempotency import idempotency_service
+from meal_planner.services.recipe_versions import recipe_version_service
 
 
 def test_that_mock_session_is_active(test_session: Session):
@@ -10,3 +27,206 @@ def test_that_mock_session_is_active(test_session: Session):
     result = test_session.scalar(text("SELECT 1"))
     # assert
     assert result == 1
+
+
+class TestApplySqliteProfile:
+    """Test the apply_sqlite_profile() function."""
+
+    def pragma(self, engine: Engine, name: str) -> str | int:
+        """Return the value of a PRAGMA on a new connection."""
+        with engine.connect() as conn:
+            return conn.exec_driver_sql(f"PRAGMA {name}").scalar_one()
+
+    def test_default_profile_enables_foreign_keys(self, tmp_path: Path):
+        """The default profile should only turn on foreign key constraints."""
+        # arrange
+        engine = create_engine(f"sqlite:///{tmp_path / 'default.db'}")
+        # act
+        database.apply_sqlite_profile(engine, "default")
+        # assert
+        assert self.pragma(engine, "foreign_keys") == 1
+        assert self.pragma(engine, "journal_mode") == "delete"
+
+    def test_production_profile_enables_wal(self, tmp_path: Path):
+        """The production profile should enable WAL and tune the connection."""
+        # arrange
+        engine = create_engine(f"sqlite:///{tmp_path / 'production.db'}")
+        # act
+        database.apply_sqlite_profile(engine, "production")
+        # assert
+        assert self.pragma(engine, "foreign_keys") == 1
+        assert self.pragma(engine, "journal_mode") == "wal"
+        assert self.pragma(engine, "synchronous") == 1  # NORMAL
+        assert self.pragma(engine, "busy_timeout") == 5000
+
+
+class TestCreateSessionFactory:
+    """Test the sessions made by the create_session_factory() function."""
+
+    @pytest.fixture(name="factory")
+    def fixture_factory(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> sessionmaker:
+        """Return a factory for a file database, skipping the cache."""
+        url = f"sqlite:///{tmp_path / 'primary.db'}"
+        config = replace(get_config(), database_url=url)
+        monkeypatch.setattr(database, "get_config", lambda: config)
+        factory = database.create_session_factory.__wrapped__()
+        UUIDAuditBase.metadata.create_all(factory.kw["bind"])
+        return factory
+
+    def count(self, db: Session, model: type[UUIDAuditBase]) -> int:
+        """Return the number of rows in a model's table."""
+        return db.scalar(sa.select(sa.func.count()).select_from(model))
+
+    def test_roll_back_snapshots(self, factory: sessionmaker):
+        """A snapshot shouldn't be committed by its SAVEPOINT."""
+        # arrange
+        recipe_id = uuid4()
+        with factory() as db:
+            db.add(Recipe(id=recipe_id, name="Salsa", description="Fresh"))
+            db.commit()
+        # act
+        with factory() as db:
+            recipe_version_service.get_latest_or_snapshot(db, recipe_id)
+            db.rollback()
+            # assert
+            assert self.count(db, RecipeVersion) == 0
+
+    def test_lose_race_to_claim_key(self, factory: sessionmaker):
+        """A key inserted by another session should roll back the SAVEPOINT."""
+        # arrange
+        row_id = uuid4()
+        with factory() as db:
+            winner = idempotency_service._insert_claim(  # noqa: SLF001
+                db,
+                row_id,
+                "abc123",
+            )
+        # act
+        with factory() as db:
+            recipe_id = uuid4()
+            db.add(Recipe(id=recipe_id, name="Salsa", description="Fresh"))
+            loser = idempotency_service._insert_claim(  # noqa: SLF001
+                db,
+                row_id,
+                "abc123",
+            )
+            db.rollback()
+            # assert
+            assert winner is not None
+            assert loser is None
+            assert db.get(IdempotencyKey, row_id).claim_id == winner
+            assert db.get(Recipe, recipe_id) is None
+
+
+class TestReplicaPool:
+    """Test the ReplicaPool class."""
+
+    def replica_urls(self, tmp_path: Path) -> list[str]:
+        """Return the URLs of two replicas."""
+        return [f"sqlite:///{tmp_path / f'replica_{i}.db'}" for i in range(2)]
+
+    def test_sessions_rotate_between_replicas(self, tmp_path: Path):
+        """Each session should connect to the next replica in the list."""
+        # arrange
+        urls = self.replica_urls(tmp_path)
+        pool = database.ReplicaPool(urls=urls, retry_seconds=30)
+        # act
+        sessions = [pool.session() for _ in range(4)]
+        # assert
+        got = [str(db.get_bind().url) for db in sessions if db]
+        assert got == [urls[0], urls[1], urls[0], urls[1]]
+
+    def test_skip_unhealthy_replicas(self, tmp_path: Path):
+        """Replicas that can't be reached should be skipped."""
+        # arrange
+        healthy = self.replica_urls(tmp_path)[0]
+        unreachable = f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"
+        pool = database.ReplicaPool(
+            urls=[unreachable, healthy],
+            retry_seconds=30,
+        )
+        # act
+        sessions = [pool.session() for _ in range(3)]
+        # assert
+        assert [str(db.get_bind().url) for db in sessions if db] == [
+            healthy,
+        ] * 3
+
+    def test_return_none_if_no_replicas_are_healthy(self, tmp_path: Path):
+        """Callers should fall back to the primary if no replica is healthy."""
+        # arrange
+        unreachable = f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"
+        pool = database.ReplicaPool(urls=[unreachable], retry_seconds=30)
+        # act
+        got = pool.session()
+        # assert
+        assert got is None
+
+
+class TestDisposeEngines:
+    """Test the dispose_engines() function."""
+
+    def test_forked_workers_get_new_pools(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Inherited connections should be dropped without being closed."""
+        # arrange
+        engine = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+        factory = lru_cache(lambda: sessionmaker(bind=engine))
+        monkeypatch.setattr(database, "create_session_factory", factory)
+        with factory()() as db:
+            inherited = db.connection().connection.dbapi_connection
+        old_pool = engine.pool
+        # act
+        database.dispose_engines(close=False)
+        # assert
+        assert engine.pool is not old_pool
+        assert inherited.execute("SELECT 1").fetchone() == (1,)
+
+    def test_skip_engines_that_were_never_created(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Disposing shouldn't create engines that haven't been used yet."""
+        # arrange
+        factory = lru_cache(lambda: pytest.fail("engine was created"))
+        monkeypatch.setattr(database, "create_session_factory", factory)
+        monkeypatch.setattr(
+            database,
+            "create_group_commit_session_factory",
+            factory,
+        )
+        monkeypatch.setattr(database, "create_replica_pool", factory)
+        # act - assert
+        database.dispose_engines()
+
+
+class TestWantsPrimary:
+    """Test the wants_primary() function."""
+
+    def request(self, headers: dict[str, str]) -> Request:
+        """Make a request with the headers provided."""
+        raw_headers = [
+            (k.lower().encode(), v.encode()) for k, v in headers.items()
+        ]
+        return Request({"type": "http", "headers": raw_headers})
+
+    def test_read_from_replica_by_default(self):
+        """Requests without the cookie or header should use a replica."""
+        assert database.wants_primary(self.request({})) is False
+
+    def test_read_from_primary_after_writes(self):
+        """Requests with the cookie set after a write should use the primary."""
+        headers = {"Cookie": f"{database.PRIMARY_COOKIE}=1"}
+        assert database.wants_primary(self.request(headers)) is True
+
+    def test_read_from_primary_if_requested(self):
+        """Requests can ask for strongly consistent reads with a header."""
+        headers = {database.CONSISTENCY_HEADER: "strong"}
+        assert database.wants_primary(self.request(headers)) is True
@@ -0,0 +1 @@
+"""Test the jobs sub-package."""
@@ -0,0 +1,325 @@
+"""Test the JobRunner class."""
+
+from contextlib import nullcontext
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import pytest
+from sqlalchemy.orm import Session
+
+from meal_planner.jobs import JobContext, JobRunner
+from meal_planner.jobs.handlers import register_handlers
+from meal_planner.models.job import Job
+from meal_planner.models.recipe import Recipe
+from meal_planner.schemas.job import JobCreateSchema, JobStatus
+from meal_planner.services.jobs import job_service
+
+from tests.utils import test_data
+
+
+@pytest.fixture(name="runner")
+def fixture_runner() -> JobRunner:
+    """Return a JobRunner with the app's handlers and a few test handlers."""
+    runner = JobRunner(max_workers=1, max_queued=2, retry_delay=0, lease=60)
+    register_handlers(runner)
+
+    @runner.register("echo")
+    def echo(
+        context: JobContext,
+        payload: dict[str, Any],
+    ) -> dict[str, Any]:
+        context.check_cancelled()
+        return payload
+
+    @runner.register("broken")
+    def broken(
+        context: JobContext,  # noqa: ARG001
+        payload: dict[str, Any],  # noqa: ARG001
+    ) -> None:
+        msg = "Something went wrong"
+        raise ValueError(msg)
+
+    @runner.register("cancelled")
+    def cancelled(
+        context: JobContext,
+        payload: dict[str, Any],  # noqa: ARG001
+    ) -> None:
+        job = job_service.get(context.db, context.job_id)
+        job_service.request_cancel(context.db, job=job)
+        context.check_cancelled()
+
+    return runner
+
+
+@pytest.fixture(name="db")
+def fixture_db(test_session: Session) -> Session:
+    """Return the test session, which jobs can commit and roll back freely."""
+    return test_session
+
+
+def enqueue(db: Session, kind: str, **kwargs: Any) -> Job:  # noqa: ANN401
+    """Insert a pending job of the kind provided."""
+    return job_service.create(db, data=JobCreateSchema(kind=kind, **kwargs))
+
+
+class TestExecute:
+    """Test the execute() method."""
+
+    def test_store_result_of_successful_job(
+        self,
+        db: Session,
+        runner: JobRunner,
+    ):
+        """A job that finishes should store the value its handler returns."""
+        # arrange
+        job = enqueue(db, "echo", payload={"hello": "world"})
+        # act
+        runner.execute(db, job.id)
+        # assert
+        db.refresh(job)
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.result == {"hello": "world"}
+        assert job.attempts == 1
+        assert job.finished_at is not None
+
+    def test_retry_failed_job_until_out_of_attempts(
+        self,
+        db: Session,
+        runner: JobRunner,
+    ):
+        """A failed job should go back in the queue until it runs out of tries."""
+        # arrange
+        job = enqueue(db, "broken", max_attempts=2)
+        # act - first attempt
+        runner.execute(db, job.id)
+        # assert - job is waiting to be retried
+        db.refresh(job)
+        assert job.status == JobStatus.PENDING
+        assert job.error == "Something went wrong"
+        # act - second attempt
+        runner.execute(db, job.id)
+        # assert - job has failed for good
+        db.refresh(job)
+        assert job.status == JobStatus.FAILED
+        assert job.attempts == 2
+
+    def test_wait_for_retry_delay_before_picking_up_job(self, db: Session):
+        """A failed job shouldn't be picked up again until its delay passes."""
+        # arrange
+        runner = JobRunner(
+            max_workers=1,
+            max_queued=1,
+            retry_delay=60,
+            lease=60,
+        )
+
+        @runner.register("broken")
+        def broken(
+            context: JobContext,  # noqa: ARG001
+            payload: dict[str, Any],  # noqa: ARG001
+        ) -> None:
+            msg = "Something went wrong"
+            raise ValueError(msg)
+
+        job = enqueue(db, "broken")
+        # act
+        runner.execute(db, job.id)
+        # assert - job is waiting for its delay to pass
+        db.refresh(job)
+        assert job.status == JobStatus.PENDING
+        assert job.id not in job_service.pending_ids(db, limit=10)
+        # assert - job is picked up once the delay has passed
+        job.run_after = datetime.now(UTC) - timedelta(seconds=1)
+        db.commit()
+        assert job.id in job_service.pending_ids(db, limit=10)
+
+    def test_lease_claimed_job_to_runner(
+        self,
+        db: Session,
+        runner: JobRunner,
+    ):
+        """A running job should be leased to the runner that claimed it."""
+        # arrange
+        job = enqueue(db, "echo")
+        # act
+        claimed = job_service.claim(
+            db,
+            job.id,
+            worker_id=runner.worker_id,
+            lease=runner.lease,
+        )
+        # assert
+        assert claimed is not None
+        assert claimed.worker_id == runner.worker_id
+        assert claimed.lease_expires_at is not None
+
+    def test_cancel_running_job(self, db: Session, runner: JobRunner):
+        """A running job should stop when it checks for cancellation."""
+        # arrange
+        job = enqueue(db, "cancelled")
+        # act
+        runner.execute(db, job.id)
+        # assert
+        db.refresh(job)
+        assert job.status == JobStatus.CANCELLED
+
+    def test_flag_job_claimed_before_cancel(
+        self,
+        db: Session,
+        runner: JobRunner,
+    ):
+        """A job claimed after it was loaded should be asked to stop instead."""
+        # arrange - load the job, then let a worker claim it
+        job = enqueue(db, "echo")
+        db.expunge(job)
+        job_service.claim(
+            db,
+            job.id,
+            worker_id=runner.worker_id,
+            lease=runner.lease,
+        )
+        # act
+        got = job_service.request_cancel(db, job=job)
+        # assert
+        assert got.status == JobStatus.RUNNING
+        assert got.cancel_requested is True
+        assert got.finished_at is None
+
+    def test_skip_job_that_is_not_pending(
+        self,
+        db: Session,
+        runner: JobRunner,
+    ):
+        """Jobs that were cancelled before they started should not run."""
+        # arrange
+        job = enqueue(db, "echo")
+        job_service.request_cancel(db, job=job)
+        # act
+        runner.execute(db, job.id)
+        # assert
+        db.refresh(job)
+        assert job.status == JobStatus.CANCELLED
+        assert job.attempts == 0
+
+    def test_fail_job_without_a_handler(self, db: Session, runner: JobRunner):
+        """Jobs of a kind that isn't registered should fail."""
+        # arrange
+        job = enqueue(db, "missing", max_attempts=1)
+        # act
+        runner.execute(db, job.id)
+        # assert
+        db.refresh(job)
+        assert job.status == JobStatus.FAILED
+        assert "missing" in job.error
+
+    def test_requeue_job_when_runner_is_stopping(
+        self,
+        db: Session,
+        runner: JobRunner,
+    ):
+        """Jobs interrupted by a shutdown should be run again without a penalty."""
+        # arrange
+        job = enqueue(db, "echo")
+        runner._stopping.set()  # noqa: SLF001
+        # act
+        runner.execute(db, job.id)
+        # assert
+        db.refresh(job)
+        assert job.status == JobStatus.PENDING
+        assert job.attempts == 0
+
+    def test_backfill_recipe_summaries(self, db: Session, runner: JobRunner):
+        """The backfill job should recompute the summary columns of recipes."""
+        # arrange
+        recipe = db.get(Recipe, test_data.TACOS)
+        recipe.ingredient_count = 0
+        db.commit()
+        job = enqueue(db, "backfill_recipe_summaries")
+        # act
+        runner.execute(db, job.id)
+        # assert
+        db.refresh(job)
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.result == {"updated": 3}
+        assert db.get(Recipe, test_data.TACOS).ingredient_count > 0
+
+
+class TestSubmit:
+    """Test the submit() method."""
+
+    def test_leave_job_in_table_if_runner_is_not_started(self, db: Session):
+        """Jobs submitted before the runner starts should wait in the table."""
+        # arrange
+        runner = JobRunner(
+            max_workers=1,
+            max_queued=1,
+            retry_delay=0,
+            lease=60,
+        )
+        job = enqueue(db, "echo")
+        # act
+        queued = runner.submit(job.id)
+        # assert
+        assert queued is False
+        assert job_service.pending_ids(db, limit=10) == [job.id]
+
+
+class TestLeases:
+    """Test renewing and recovering the leases on running jobs."""
+
+    def claim(self, db: Session, worker_id: str, lease: timedelta) -> Job:
+        """Enqueue a job and claim it for a worker with the lease provided."""
+        job = enqueue(db, "echo")
+        return job_service.claim(db, job.id, worker_id=worker_id, lease=lease)
+
+    def test_recover_only_expired_leases(self, db: Session):
+        """Jobs still leased to a live worker shouldn't be put back."""
+        # arrange
+        live = self.claim(db, "live", timedelta(minutes=1))
+        dead = self.claim(db, "dead", timedelta(minutes=-1))
+        # act
+        recovered = job_service.recover(db)
+        # assert
+        db.refresh(live)
+        db.refresh(dead)
+        assert recovered == 1
+        assert live.status == JobStatus.RUNNING
+        assert live.worker_id == "live"
+        assert dead.status == JobStatus.PENDING
+        assert dead.worker_id is None
+
+    def test_renew_only_own_leases(self, db: Session):
+        """A worker should only extend the leases on the jobs it's running."""
+        # arrange
+        own = self.claim(db, "own", timedelta(minutes=-1))
+        other = self.claim(db, "other", timedelta(minutes=-1))
+        # act
+        renewed = job_service.renew_leases(
+            db,
+            worker_id="own",
+            lease=timedelta(minutes=1),
+        )
+        recovered = job_service.recover(db)
+        # assert
+        db.refresh(own)
+        db.refresh(other)
+        assert renewed == 1
+        assert recovered == 1
+        assert own.status == JobStatus.RUNNING
+        assert other.status == JobStatus.PENDING
+
+    def test_start_leaves_jobs_of_other_runners(
+        self,
+        db: Session,
+        runner: JobRunner,
+    ):
+        """A runner that starts shouldn't take over jobs that are leased."""
+        # arrange
+        job = self.claim(db, "other", timedelta(minutes=1))
+        # act
+        runner.start(lambda: nullcontext(db))
+        runner.stop()
+        # assert
+        db.refresh(job)
+        assert job.status == JobStatus.RUNNING
+        assert job.worker_id == "other"
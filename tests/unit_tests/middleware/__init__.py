@@ -0,0 +1 @@
+"""Test the middleware sub-package."""
@@ -0,0 +1,157 @@
+"""Test the AdmissionControlMiddleware and the limiters it uses."""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from meal_planner.middleware.admission import (
+    AdmissionController,
+    AdmissionControlMiddleware,
+    AdmissionRejectedError,
+    ConcurrencyLimiter,
+    RequestClass,
+)
+
+LIMITS = {
+    "read": {"concurrency": 1, "queue_size": 1},
+    "write": {"concurrency": 0, "queue_size": 0},
+    "bulk": {"concurrency": 1, "queue_size": 0},
+}
+
+
+@pytest.fixture(name="controller")
+def fixture_controller() -> AdmissionController:
+    """Return a controller that rejects every write request."""
+    return AdmissionController(limits=LIMITS, timeout=1)
+
+
+@pytest.fixture(name="app_client")
+def fixture_app_client(controller: AdmissionController) -> TestClient:
+    """Create a client for an app that uses the middleware."""
+    app = FastAPI()
+
+    @app.get("/items")
+    def read_items() -> list:
+        return []
+
+    @app.post("/items")
+    def create_item() -> dict:
+        return {}
+
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        controller=controller,
+        retry_after=3,
+    )
+    return TestClient(app)
+
+
+class TestConcurrencyLimiter:
+    """Test the ConcurrencyLimiter class."""
+
+    def test_reject_when_queue_is_full(self):
+        """Requests beyond the concurrency and queue size should be rejected."""
+
+        async def scenario() -> ConcurrencyLimiter:
+            limiter = ConcurrencyLimiter(
+                concurrency=1,
+                queue_size=1,
+                timeout=1,
+            )
+            await limiter.acquire()
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)  # let the second request join the queue
+            with pytest.raises(AdmissionRejectedError):
+                await limiter.acquire()
+            limiter.release()
+            await waiter
+            return limiter
+
+        # act
+        limiter = asyncio.run(scenario())
+        # assert
+        assert limiter.active == 1
+        assert limiter.waiting == 0
+        assert limiter.admitted == 2
+        assert limiter.rejected == 1
+
+    def test_reject_when_wait_times_out(self):
+        """Requests that wait longer than the timeout should be rejected."""
+
+        async def scenario() -> ConcurrencyLimiter:
+            limiter = ConcurrencyLimiter(
+                concurrency=1,
+                queue_size=1,
+                timeout=0.01,
+            )
+            await limiter.acquire()
+            with pytest.raises(AdmissionRejectedError):
+                await limiter.acquire()
+            return limiter
+
+        # act
+        limiter = asyncio.run(scenario())
+        # assert
+        assert limiter.timed_out == 1
+        assert limiter.waiting == 0
+
+    def test_free_slot_when_nobody_is_waiting(self):
+        """Releasing a slot without any waiting requests should free it up."""
+
+        async def scenario() -> ConcurrencyLimiter:
+            limiter = ConcurrencyLimiter(
+                concurrency=1,
+                queue_size=0,
+                timeout=1,
+            )
+            await limiter.acquire()
+            limiter.release()
+            return limiter
+
+        # act
+        limiter = asyncio.run(scenario())
+        # assert
+        assert limiter.active == 0
+
+
+class TestAdmissionControlMiddleware:
+    """Test the AdmissionControlMiddleware class."""
+
+    def test_admit_request_with_free_slot(
+        self,
+        app_client: TestClient,
+        controller: AdmissionController,
+    ):
+        """Requests should be handled while their class has free slots."""
+        # act
+        response = app_client.get("/items")
+        # assert
+        assert response.status_code == 200
+        assert controller.metrics()["read"]["admitted"] == 1
+        assert controller.metrics()["read"]["active"] == 0
+
+    def test_reject_with_503_and_retry_after(self, app_client: TestClient):
+        """Requests that can't be queued should get a 503 with Retry-After."""
+        # act
+        response = app_client.post("/items")
+        # assert
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "3"
+
+    def test_classify_requests(self, controller: AdmissionController):
+        """Batch endpoints should be limited separately from reads and writes."""
+        # arrange
+        scopes = {
+            RequestClass.BULK: {
+                "method": "POST",
+                "path": "/recipes/batch-get",
+            },
+            RequestClass.READ: {"method": "GET", "path": "/recipes/"},
+            RequestClass.WRITE: {"method": "PATCH", "path": "/recipes/1"},
+            None: {"method": "GET", "path": "/metrics/admission"},
+        }
+        # act - assert
+        for request_class, scope in scopes.items():
+            assert controller.classify(scope) == request_class
@@ -0,0 +1,92 @@
+"""Test the CompressionMiddleware."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from meal_planner.middleware.compression import CompressionMiddleware
+
+ITEMS = [{"name": f"Item {index}"} for index in range(100)]
+
+
+@pytest.fixture(name="app_client")
+def fixture_app_client() -> TestClient:
+    """Create a client for an app that uses the middleware."""
+    app = FastAPI()
+
+    @app.get("/items")
+    def read_items() -> list:
+        return ITEMS
+
+    @app.get("/items/first")
+    def read_first_item() -> dict:
+        return ITEMS[0]
+
+    @app.get("/stream")
+    def stream() -> StreamingResponse:
+        chunks = (b"line of text\n" for _ in range(500))
+        return StreamingResponse(chunks, media_type="text/plain")
+
+    @app.get("/encoded")
+    def encoded() -> Response:
+        return Response(
+            b"x" * 2000,
+            media_type="application/json",
+            headers={"Content-Encoding": "br"},
+        )
+
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return TestClient(app)
+
+
+def test_compress_large_responses(app_client: TestClient):
+    """Bodies over the minimum size should be compressed."""
+    # act
+    response = app_client.get("/items", headers={"Accept-Encoding": "gzip"})
+    # assert
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.json() == ITEMS
+
+
+def test_skip_small_responses(app_client: TestClient):
+    """Bodies under the minimum size aren't worth compressing."""
+    # act
+    response = app_client.get(
+        "/items/first",
+        headers={"Accept-Encoding": "gzip"},
+    )
+    # assert
+    assert "content-encoding" not in response.headers
+
+
+def test_skip_if_client_does_not_accept_encoding(app_client: TestClient):
+    """Clients that don't send Accept-Encoding should get plain responses."""
+    # act
+    response = app_client.get("/items", headers={"Accept-Encoding": ""})
+    # assert
+    assert "content-encoding" not in response.headers
+    assert response.json() == ITEMS
+
+
+def test_compress_streamed_responses(app_client: TestClient):
+    """Streamed bodies should be compressed chunk by chunk."""
+    # act
+    response = app_client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    # assert
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == "line of text\n" * 500
+
+
+def test_pass_through_encoded_responses(app_client: TestClient):
+    """Responses that are already encoded shouldn't be compressed again."""
+    # act
+    response = app_client.get(
+        "/encoded",
+        headers={"Accept-Encoding": "gzip, br"},
+    )
+    # assert
+    assert response.headers["content-encoding"] == "br"
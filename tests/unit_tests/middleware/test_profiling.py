@@ -0,0 +1,80 @@
+"""Test the ProfilingMiddleware."""
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from meal_planner.middleware.profiling import ProfilingMiddleware
+from meal_planner.profiling import phase
+
+TOKEN = "admin-token"  # noqa: S105
+
+
+def build_items() -> list[dict]:
+    """Build a response that shows up in the profile."""
+    return [{"name": f"Item {index}"} for index in range(100)]
+
+
+@pytest.fixture(name="app_client")
+def fixture_app_client() -> TestClient:
+    """Create a client for an app that uses the middleware."""
+    app = FastAPI()
+
+    @app.get("/items")
+    def read_items() -> list:
+        with phase("serialize"):
+            return build_items()
+
+    @app.get("/missing")
+    def read_missing() -> None:
+        raise HTTPException(status_code=404)
+
+    app.add_middleware(ProfilingMiddleware, token=TOKEN, report_lines=200)
+    return TestClient(app)
+
+
+def test_return_the_profile_as_an_attachment(app_client: TestClient):
+    """Requests with the token should get the profile instead of the body."""
+    # act
+    response = app_client.get("/items", headers={"X-Profile": TOKEN})
+    # assert
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "attachment" in response.headers["content-disposition"]
+    assert response.headers["x-profiled-status"] == "200"
+    assert "build_items" in response.text
+
+
+def test_report_phase_timings(app_client: TestClient):
+    """The time in each phase should be sent in the Server-Timing header."""
+    # act
+    response = app_client.get("/items", headers={"X-Profile": TOKEN})
+    # assert
+    timings = response.headers["server-timing"].split(", ")
+    assert [timing.split(";")[0] for timing in timings] == [
+        "serialize",
+        "total",
+    ]
+    assert all(";dur=" in timing for timing in timings)
+
+
+def test_report_the_status_of_the_profiled_route(app_client: TestClient):
+    """Errors from the route should still be reported."""
+    # act
+    response = app_client.get("/missing", headers={"X-Profile": TOKEN})
+    # assert
+    assert response.status_code == 200
+    assert response.headers["x-profiled-status"] == "404"
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Profile": "wrong-token"}])
+def test_pass_through_unauthorized_requests(
+    app_client: TestClient,
+    headers: dict[str, str],
+):
+    """Requests without the right token should be handled normally."""
+    # act
+    response = app_client.get("/items", headers=headers)
+    # assert
+    assert response.json() == build_items()
+    assert "server-timing" not in response.headers
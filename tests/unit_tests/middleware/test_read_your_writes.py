@@ -0,0 +1,50 @@
+"""Test the ReadYourWritesMiddleware."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from meal_planner.dependencies.database import PRIMARY_COOKIE
+from meal_planner.middleware.read_your_writes import ReadYourWritesMiddleware
+
+
+@pytest.fixture(name="app_client")
+def fixture_app_client() -> TestClient:
+    """Create a client for an app that uses the middleware."""
+    app = FastAPI()
+
+    @app.get("/items")
+    def read_items() -> list:
+        return []
+
+    @app.post("/items")
+    def create_item() -> dict:
+        return {}
+
+    @app.post("/recipes/batch-get")
+    def batch_get() -> dict:
+        return {}
+
+    app.add_middleware(ReadYourWritesMiddleware, max_age=5)
+    return TestClient(app)
+
+
+def test_set_cookie_after_write(app_client: TestClient):
+    """Successful writes should send later reads to the primary."""
+    # act
+    response = app_client.post("/items")
+    # assert
+    assert response.cookies.get(PRIMARY_COOKIE) == "1"
+    assert "Max-Age=5" in response.headers["set-cookie"]
+
+
+def test_do_not_set_cookie_after_read(app_client: TestClient):
+    """Reads shouldn't change where later reads are sent."""
+    # act
+    responses = [
+        app_client.get("/items"),
+        app_client.post("/recipes/batch-get"),
+    ]
+    # assert
+    for response in responses:
+        assert PRIMARY_COOKIE not in response.cookies
@@ -0,0 +1,96 @@
+"""Test the food_router."""
+
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from meal_planner.services.foods import food_service
+
+from tests.utils import test_data
+
+
+class TestListFoods:
+    """Test the GET /foods/ endpoint."""
+
+    ENDPOINT = "/foods/"
+
+    def test_return_foods_in_name_order(self, client: TestClient):
+        """Foods should be paginated in alphabetical order."""
+        # execution
+        response = client.get(self.ENDPOINT)
+        names = [food["name"] for food in response.json()["items"]]
+        # validation
+        assert response.status_code == 200
+        assert len(names) == len(test_data.FOODS)
+        assert names == sorted(names, key=str.lower)
+
+    def test_filter_foods_by_prefix(self, client: TestClient):
+        """Only foods whose names start with the prefix should be returned."""
+        # execution
+        response = client.get(self.ENDPOINT, params={"prefix": "s"})
+        names = [food["name"] for food in response.json()["items"]]
+        # validation - the prefix is matched regardless of case
+        assert response.status_code == 200
+        assert names == ["Salt", "Steak", "Sweet corn"]
+
+    @pytest.mark.parametrize("prefix", ["é", "É", "éCL"])
+    def test_filter_foods_by_non_ascii_prefix(
+        self,
+        client: TestClient,
+        test_session: Session,
+        prefix: str,
+    ):
+        """Letters outside of ASCII should be matched regardless of case."""
+        # setup
+        food_service.get_or_create_many(test_session, ["Éclair", "Eclipse"])
+        test_session.commit()
+        # execution
+        response = client.get(self.ENDPOINT, params={"prefix": prefix})
+        names = [food["name"] for food in response.json()["items"]]
+        # validation
+        assert response.status_code == 200
+        assert names == ["Éclair"]
+
+
+class TestListRecipesForFood:
+    """Test the GET /foods/<food_id>/recipes endpoint."""
+
+    def endpoint(self, food_id: object) -> str:
+        """Make the endpoint path to test."""
+        return f"/foods/{food_id}/recipes"
+
+    def test_page_through_recipes_with_cursor(self, client: TestClient):
+        """Each page should link to the next until every recipe is returned."""
+        # setup - every recipe uses onions
+        endpoint = self.endpoint(test_data.ONION)
+        # execution
+        first = client.get(endpoint, params={"limit": 2}).json()
+        params = {"limit": 2, "cursor": first["next_cursor"]}
+        second = client.get(endpoint, params=params).json()
+        # validation
+        ids = [item["id"] for item in first["items"] + second["items"]]
+        assert len(first["items"]) == 2
+        assert second["next_cursor"] is None
+        assert ids == sorted(str(recipe_id) for recipe_id in test_data.RECIPES)
+        assert first["items"][0]["ingredient_count"] > 0
+
+    def test_only_return_recipes_that_use_the_food(self, client: TestClient):
+        """Recipes that don't use the food should be left out."""
+        # execution
+        response = client.get(self.endpoint(test_data.STEAK))
+        response_body = response.json()
+        # validation
+        assert response.status_code == 200
+        assert [item["id"] for item in response_body["items"]] == [
+            str(test_data.FAJITAS),
+        ]
+        assert response_body["next_cursor"] is None
+
+    def test_return_404_if_food_does_not_exist(self, client: TestClient):
+        """A food id that doesn't exist should return a 404."""
+        # execution
+        response = client.get(self.endpoint(uuid4()))
+        # validation
+        assert response.status_code == 404
@@ -0,0 +1,78 @@
+"""Test the job_router."""
+
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+
+class TestPostJob:
+    """Test the POST /jobs/ endpoint."""
+
+    ENDPOINT = "/jobs/"
+
+    def test_return_status_code_202_if_successful(self, client: TestClient):
+        """Enqueuing a job should return it with a pending status."""
+        # setup
+        payload = {"kind": "backfill_recipe_summaries"}
+        # execution
+        response = client.post(self.ENDPOINT, json=payload)
+        response_body = response.json()
+        # validation
+        assert response.status_code == 202
+        assert response_body["status"] == "pending"
+        assert response_body["attempts"] == 0
+
+    def test_return_422_if_kind_is_unknown(self, client: TestClient):
+        """Only kinds of jobs that have a handler can be enqueued."""
+        # execution
+        response = client.post(self.ENDPOINT, json={"kind": "unknown"})
+        # validation
+        assert response.status_code == 422
+
+
+class TestGetJob:
+    """Test the GET /jobs/<job_id> endpoint."""
+
+    def test_return_job_status(self, client: TestClient):
+        """The status of an enqueued job should be available by its id."""
+        # setup
+        job = client.post("/jobs/", json={"kind": "purge_idempotency_keys"})
+        job_id = job.json()["id"]
+        # execution
+        response = client.get(f"/jobs/{job_id}")
+        # validation
+        assert response.status_code == 200
+        assert response.json()["kind"] == "purge_idempotency_keys"
+
+    def test_return_404_if_job_does_not_exist(self, client: TestClient):
+        """A job id that doesn't exist should return a 404."""
+        # execution
+        response = client.get(f"/jobs/{uuid4()}")
+        # validation
+        assert response.status_code == 404
+
+
+class TestCancelJob:
+    """Test the POST /jobs/<job_id>/cancel endpoint."""
+
+    def test_cancel_pending_job(self, client: TestClient):
+        """A job that hasn't started yet should be cancelled right away."""
+        # setup
+        job = client.post("/jobs/", json={"kind": "purge_idempotency_keys"})
+        endpoint = f"/jobs/{job.json()['id']}/cancel"
+        # execution
+        response = client.post(endpoint)
+        # validation
+        assert response.status_code == 202
+        assert response.json()["status"] == "cancelled"
+
+    def test_return_409_if_job_already_finished(self, client: TestClient):
+        """Jobs that have already finished can't be cancelled."""
+        # setup
+        job = client.post("/jobs/", json={"kind": "purge_idempotency_keys"})
+        endpoint = f"/jobs/{job.json()['id']}/cancel"
+        client.post(endpoint)
+        # execution
+        response = client.post(endpoint)
+        # validation
+        assert response.status_code == 409
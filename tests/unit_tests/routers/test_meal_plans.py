@@ -0,0 +1,195 @@
+"""Test the meal_plan_router."""
+
+from uuid import UUID, uuid4
+
+from fastapi.testclient import TestClient
+
+from tests.utils import test_data
+
+
+class TestPostMealPlan:
+    """Test the POST /meal-plans/ endpoint."""
+
+    ENDPOINT = "/meal-plans/"
+
+    def test_return_status_code_201_if_successful(self, client: TestClient):
+        """A successful response should return status code 201."""
+        # setup
+        payload = {
+            "name": "Test plan",
+            "start_date": "2024-06-10",
+            "meals": [
+                {
+                    "recipe_id": str(test_data.SALSA),
+                    "date": "2024-06-11",
+                    "slot": "lunch",
+                    "servings": 2,
+                },
+            ],
+        }
+        # execution
+        response = client.post(self.ENDPOINT, json=payload)
+        response_body = response.json()
+        # validation
+        assert response.status_code == 201
+        assert response_body["end_date"] == "2024-06-16"
+        assert len(response_body["meals"]) == 1
+
+    def test_return_422_if_recipe_does_not_exist(self, client: TestClient):
+        """Meals can only be planned for recipes that exist."""
+        # setup
+        payload = {
+            "name": "Test plan",
+            "start_date": "2024-06-10",
+            "meals": [
+                {
+                    "recipe_id": str(uuid4()),
+                    "date": "2024-06-11",
+                    "slot": "lunch",
+                },
+            ],
+        }
+        # execution
+        response = client.post(self.ENDPOINT, json=payload)
+        # validation
+        assert response.status_code == 422
+
+
+class TestGetMealPlanWeek:
+    """Test the GET /meal-plans/<plan_id>/week endpoint."""
+
+    DEFAULT = test_data.WEEK
+
+    def endpoint(self, plan_id: UUID) -> str:
+        """Make the endpoint path to test."""
+        return f"/meal-plans/{plan_id}/week"
+
+    def test_return_expanded_week(self, client: TestClient):
+        """The week should include each meal's recipe and ingredient totals."""
+        # execution
+        response = client.get(self.endpoint(self.DEFAULT))
+        response_body = response.json()
+        # validation
+        assert response.status_code == 200
+        recipes = {meal["recipe"]["name"] for meal in response_body["meals"]}
+        assert recipes == {
+            test_data.RECIPES[test_data.TACOS]["name"],
+            test_data.RECIPES[test_data.FAJITAS]["name"],
+        }
+        ingredients = {
+            (row["food"], row["unit"]): row["amount"]
+            for row in response_body["ingredients"]
+        }
+        assert ingredients[("Corn tortillas", "self")] == 18
+
+    def test_keep_meals_pinned_to_their_version(self, client: TestClient):
+        """Editing a planned recipe shouldn't change the meals in the week."""
+        # setup
+        client.patch(f"/recipes/{test_data.FAJITAS}", json={"servings": 4})
+        # execution
+        response_body = client.get(self.endpoint(self.DEFAULT)).json()
+        # validation
+        fajitas = next(
+            meal["recipe"]
+            for meal in response_body["meals"]
+            if meal["recipe_id"] == str(test_data.FAJITAS)
+        )
+        assert fajitas["version"] == 1
+        assert fajitas["servings"] == 1
+
+    def test_return_404_if_id_has_no_match(self, client: TestClient):
+        """Return 404 if id provided doesn't have a database match."""
+        # execution
+        response = client.get(self.endpoint(uuid4()))
+        # validation
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Meal plan not found"}
+
+
+class TestGetMealPlanNutrition:
+    """Test the GET /meal-plans/<plan_id>/nutrition endpoint."""
+
+    def test_return_total_nutrition(self, client: TestClient):
+        """The nutrition of every planned meal should be added up."""
+        # execution
+        response = client.get(f"/meal-plans/{test_data.WEEK}/nutrition")
+        # validation
+        assert response.status_code == 200
+        body = response.json()
+        assert body["kcal"] > 0
+        assert body["missing_ingredients"] == 0
+
+    def test_return_404_if_id_has_no_match(self, client: TestClient):
+        """Return 404 if id provided doesn't have a database match."""
+        # execution
+        response = client.get(f"/meal-plans/{uuid4()}/nutrition")
+        # validation
+        assert response.status_code == 404
+
+
+class TestPlannedMeals:
+    """Test the /meal-plans/<plan_id>/meals endpoints."""
+
+    PLAN = test_data.WEEK
+
+    def endpoint(self, meal_id: UUID | None = None) -> str:
+        """Make the endpoint path to test."""
+        path = f"/meal-plans/{self.PLAN}/meals"
+        return f"{path}/{meal_id}" if meal_id else path
+
+    def test_add_meal(self, client: TestClient):
+        """Adding a meal should return it and include it in the plan."""
+        # setup
+        payload = {
+            "recipe_id": str(test_data.SALSA),
+            "date": "2024-06-05",
+            "slot": "snack",
+        }
+        # execution
+        response = client.post(self.endpoint(), json=payload)
+        plan = client.get(f"/meal-plans/{self.PLAN}").json()
+        # validation
+        assert response.status_code == 201
+        assert response.json()["id"] in {meal["id"] for meal in plan["meals"]}
+
+    def test_return_422_if_version_does_not_exist(self, client: TestClient):
+        """Meals can only be pinned to versions of their recipe that exist."""
+        # execution
+        response = client.patch(
+            self.endpoint(test_data.TACO_NIGHT),
+            json={"recipe_version": 99},
+        )
+        # validation
+        assert response.status_code == 422
+        assert response.json() == {"detail": "Recipe version not found"}
+
+    def test_return_422_if_meal_is_outside_of_week(self, client: TestClient):
+        """Meals can't be moved outside of the plan's week."""
+        # setup
+        payload = {"date": "2024-06-12"}
+        # execution
+        response = client.patch(
+            self.endpoint(test_data.TACO_NIGHT),
+            json=payload,
+        )
+        # validation
+        assert response.status_code == 422
+
+    def test_remove_meal(self, client: TestClient):
+        """Removing a meal should remove it from the plan."""
+        # execution
+        response = client.delete(self.endpoint(test_data.TACO_NIGHT))
+        plan = client.get(f"/meal-plans/{self.PLAN}").json()
+        # validation
+        assert response.status_code == 204
+        assert str(test_data.TACO_NIGHT) not in {
+            meal["id"] for meal in plan["meals"]
+        }
+
+    def test_return_404_if_meal_has_no_match(self, client: TestClient):
+        """Return 404 if the meal id isn't part of the plan."""
+        # execution
+        response = client.delete(self.endpoint(uuid4()))
+        # validation
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Planned meal not found"}
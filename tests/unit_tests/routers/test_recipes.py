@@ -1,8 +1,21 @@
 """Test the recipe_router."""
 
+from dataclasses import replace
 from uuid import UUID, uuid4
 
+import pytest
+import sqlalchemy as sa
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
+
+from meal_planner.middleware.profiling import ProfilingMiddleware
+from meal_planner.models.recipe import Recipe
+from meal_planner.routers import recipes
+from meal_planner.services.recipe_uploads import upload_limits
+from meal_planner.services.recipe_versions import recipe_version_service
+from meal_planner.services.recipes import recipe_service
+from meal_planner.services.group_commit import group_committer
+from meal_planner.services.scaling import recipe_scaler
 
 from tests.utils import test_data
 
@@ -44,6 +57,139 @@ class TestListRecipes:
         assert response_body["links"]["next"] is not None
         assert response_body["links"]["prev"] is None
 
+    def test_summary_view_omits_ingredients(self, client: TestClient):
+        """The summary view should only return top-level recipe fields."""
+        # setup
+        params = {"view": "summary"}
+        # execution
+        response = client.get(self.ENDPOINT, params=params)
+        items = response.json()["items"]
+        # validation
+        assert response.status_code == 200
+        assert len(items) == len(test_data.RECIPES)
+        for item in items:
+            assert "ingredients" not in item
+            assert item["ingredient_count"] is None
+            wanted = test_data.RECIPES[UUID(item["id"])]
+            assert item["name"] == wanted["name"]
+
+    def test_summary_view_can_include_ingredient_count(
+        self,
+        client: TestClient,
+    ):
+        """The summary view should include ingredient counts if requested."""
+        # setup
+        params = {"view": "summary", "include_ingredient_count": True}
+        # execution
+        response = client.get(self.ENDPOINT, params=params)
+        items = response.json()["items"]
+        # validation
+        assert response.status_code == 200
+        for item in items:
+            wanted = test_data.INGREDIENTS[UUID(item["id"])]
+            assert item["ingredient_count"] == len(wanted)
+
+    def test_summary_view_can_include_food_names(self, client: TestClient):
+        """The summary view should include food names if requested."""
+        # setup
+        params = {"view": "summary", "include_food_names": True}
+        # execution
+        response = client.get(self.ENDPOINT, params=params)
+        items = {UUID(item["id"]): item for item in response.json()["items"]}
+        # validation
+        assert response.status_code == 200
+        foods = {food: row["name"] for food, row in test_data.FOODS.items()}
+        wanted = sorted(
+            foods[food] for food in test_data.INGREDIENTS[test_data.SALSA]
+        )
+        assert items[test_data.SALSA]["food_names"] == wanted
+
+    def test_summary_view_can_include_nutrition(self, client: TestClient):
+        """The summary view should include nutrition per serving if requested."""
+        # setup
+        params = {"view": "summary", "include_nutrition": True}
+        # execution
+        response = client.get(self.ENDPOINT, params=params)
+        items = response.json()["items"]
+        # validation
+        assert response.status_code == 200
+        assert len(items) == len(test_data.RECIPES)
+        for item in items:
+            assert item["nutrition"]["kcal"] > 0
+
+    def test_filter_and_sort_recipes(self, client: TestClient):
+        """Recipes should be filtered and sorted by the params passed."""
+        # setup
+        params = {"name_prefix": "s", "sort": "-name", "view": "summary"}
+        # execution
+        response = client.get(self.ENDPOINT, params=params)
+        # validation
+        assert response.status_code == 200
+        assert response.json()["total"] == 1
+        assert response.json()["items"][0]["name"] == "Steak fajitas"
+
+    def test_filter_by_food(self, client: TestClient):
+        """Only the recipes that use the food should be returned."""
+        # setup
+        params = {"contains_food": str(test_data.STEAK), "view": "summary"}
+        # execution
+        response = client.get(self.ENDPOINT, params=params)
+        # validation
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert [UUID(item["id"]) for item in items] == [test_data.FAJITAS]
+
+    def test_filter_by_prefix_of_largest_code_point(self, client: TestClient):
+        """Prefixes that can't be incremented shouldn't cause an error."""
+        # setup
+        params = {"name_prefix": "\U0010ffff", "view": "summary"}
+        # execution
+        response = client.get(self.ENDPOINT, params=params)
+        # validation
+        assert response.status_code == 200
+        assert response.json()["total"] == 0
+
+    def test_return_422_for_unsupported_combination(self, client: TestClient):
+        """Filters that can't use the sort order's index should be rejected."""
+        # setup
+        params = {"name_prefix": "s", "sort": "created_at"}
+        # execution
+        response = client.get(self.ENDPOINT, params=params)
+        # validation
+        assert response.status_code == 422
+        assert "Supported combinations" in response.json()["detail"]
+
+
+class TestScrollRecipes:
+    """Test the GET /recipes/scroll endpoint."""
+
+    ENDPOINT = "/recipes/scroll"
+
+    def test_follow_cursor_to_last_page(self, client: TestClient):
+        """Following next_cursor should return every recipe once, in order."""
+        # setup
+        params = {"sort": "name", "limit": 2}
+        wanted = sorted(row["name"] for row in test_data.RECIPES.values())
+        names = []
+        # execution
+        while True:
+            response = client.get(self.ENDPOINT, params=params)
+            assert response.status_code == 200
+            body = response.json()
+            names.extend(item["name"] for item in body["items"])
+            if body["next_cursor"] is None:
+                break
+            params["cursor"] = body["next_cursor"]
+        # validation
+        assert names == sorted(wanted, key=str.lower)
+
+    def test_return_422_for_invalid_cursor(self, client: TestClient):
+        """A cursor that wasn't returned by the endpoint should be rejected."""
+        # execution
+        response = client.get(self.ENDPOINT, params={"cursor": "abc"})
+        # validation
+        assert response.status_code == 422
+
 
 class TestPostRecipe:
     """Test the POST /recipes/ endpoint."""
@@ -71,6 +217,166 @@ class TestPostRecipe:
         assert response.status_code == 201
         assert response_body["name"] == "Test recipe"
 
+    def test_create_recipe_with_group_commit(
+        self,
+        client: TestClient,
+        test_session: Session,
+    ):
+        """Recipes should be created in a group commit if it's running."""
+        # setup
+        payload = {
+            "name": "Grouped recipe",
+            "description": "This is a test description.",
+            "ingredients": [{"food": "Garlic", "amount": 2, "unit": "self"}],
+        }
+        factory = sessionmaker(
+            bind=test_session.get_bind(),
+            autoflush=False,
+            join_transaction_mode="create_savepoint",
+        )
+        group_committer.start(factory)
+        # execution
+        try:
+            response = client.post(self.ENDPOINT, json=payload)
+        finally:
+            group_committer.stop()
+        # validation
+        assert response.status_code == 201
+        assert response.json()["ingredients"][0]["food"] == "Garlic"
+        params = {"name_prefix": "Grouped", "view": "summary"}
+        assert client.get("/recipes/", params=params).json()["total"] == 1
+
+    def test_replay_request_with_same_idempotency_key(
+        self,
+        client: TestClient,
+    ):
+        """Retrying with the same idempotency key shouldn't create a duplicate."""
+        # setup
+        payload = {
+            "name": "Idempotent recipe",
+            "description": "This is a test description.",
+            "ingredients": [{"food": "Onion", "amount": 2, "unit": "self"}],
+        }
+        headers = {"Idempotency-Key": "test-key"}
+        count_old = client.get(self.ENDPOINT).json()["total"]
+        # execution
+        first = client.post(self.ENDPOINT, json=payload, headers=headers)
+        retry = client.post(self.ENDPOINT, json=payload, headers=headers)
+        count_new = client.get(self.ENDPOINT).json()["total"]
+        # validation
+        assert first.status_code == retry.status_code == 201
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert count_new == count_old + 1
+
+    def test_return_422_if_idempotency_key_is_reused(
+        self,
+        client: TestClient,
+    ):
+        """Reusing an idempotency key with a different payload isn't allowed."""
+        # setup
+        payload = {"name": "Recipe", "description": "Test", "ingredients": []}
+        headers = {"Idempotency-Key": "reused-key"}
+        # execution
+        client.post(self.ENDPOINT, json=payload, headers=headers)
+        payload["name"] = "Different recipe"
+        response = client.post(self.ENDPOINT, json=payload, headers=headers)
+        # validation
+        assert response.status_code == 422
+
+    def test_return_existing_recipe_if_dedupe_is_set(
+        self,
+        client: TestClient,
+    ):
+        """With dedupe=true, posting a duplicate recipe should return 200."""
+        # setup
+        payload = {
+            "name": "Dedupe recipe",
+            "description": "This is a test description.",
+            "ingredients": [{"food": "Onion", "amount": 2, "unit": "self"}],
+        }
+        params = {"dedupe": True}
+        # execution
+        first = client.post(self.ENDPOINT, json=payload, params=params)
+        count_old = client.get(self.ENDPOINT).json()["total"]
+        retry = client.post(self.ENDPOINT, json=payload, params=params)
+        count_new = client.get(self.ENDPOINT).json()["total"]
+        # validation
+        assert first.status_code == 201
+        assert retry.status_code == 200
+        assert retry.json() == first.json()
+        assert count_new == count_old
+
+    def test_replay_dedupe_request_without_looking_up_duplicates(
+        self,
+        client: TestClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Retries with a key should be replayed before dedupe runs again."""
+        # setup
+        payload = {
+            "name": "Dedupe recipe",
+            "description": "This is a test description.",
+            "ingredients": [{"food": "Onion", "amount": 2, "unit": "self"}],
+        }
+        params = {"dedupe": True}
+        headers = {"Idempotency-Key": "dedupe-key"}
+        first = client.post(
+            self.ENDPOINT,
+            json=payload,
+            params=params,
+            headers=headers,
+        )
+        monkeypatch.setattr(
+            recipe_service,
+            "find_duplicate",
+            lambda *_: pytest.fail("duplicate was looked up"),
+        )
+        # execution
+        retry = client.post(
+            self.ENDPOINT,
+            json=payload,
+            params=params,
+            headers=headers,
+        )
+        # validation
+        assert first.status_code == retry.status_code == 201
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+
+    def test_record_dedupe_hit_against_idempotency_key(
+        self,
+        client: TestClient,
+    ):
+        """A duplicate found with a key should be replayed with status 200."""
+        # setup
+        payload = {
+            "name": "Dedupe recipe",
+            "description": "This is a test description.",
+            "ingredients": [{"food": "Onion", "amount": 2, "unit": "self"}],
+        }
+        params = {"dedupe": True}
+        headers = {"Idempotency-Key": "dedupe-hit-key"}
+        existing = client.post(self.ENDPOINT, json=payload)
+        # execution
+        first = client.post(
+            self.ENDPOINT,
+            json=payload,
+            params=params,
+            headers=headers,
+        )
+        retry = client.post(
+            self.ENDPOINT,
+            json=payload,
+            params=params,
+            headers=headers,
+        )
+        # validation
+        assert first.status_code == retry.status_code == 200
+        assert first.json() == existing.json()
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+
     def test_return_status_code_422_if_required_field_is_missing(
         self,
         client: TestClient,
@@ -87,6 +393,139 @@ class TestPostRecipe:
         assert response.status_code == 422
 
 
+class TestStreamRecipe:
+    """Test the POST /recipes/stream endpoint."""
+
+    ENDPOINT = "/recipes/stream"
+
+    def test_create_recipe_and_first_version(
+        self,
+        client: TestClient,
+        test_session: Session,
+    ):
+        """The recipe should be created with all of its ingredients."""
+        # setup
+        payload = {
+            "name": "Imported chili",
+            "ingredients": [
+                {"food": f"Pepper {i}", "amount": i + 1, "unit": "self"}
+                for i in range(50)
+            ],
+            "description": "Imported from a spreadsheet",
+        }
+        # execution
+        response = client.post(self.ENDPOINT, json=payload)
+        response_body = response.json()
+        # validation
+        assert response.status_code == 201
+        assert response_body["name"] == "Imported chili"
+        assert len(response_body["ingredients"]) == 50
+        recipe = test_session.scalar(
+            sa.select(Recipe).where(Recipe.name == "Imported chili"),
+        )
+        assert recipe is not None
+        version = recipe_version_service.get_latest(test_session, recipe.id)
+        assert version is not None
+        assert version.version == 1
+
+    def test_return_422_with_location_of_invalid_ingredient(
+        self,
+        client: TestClient,
+    ):
+        """Errors should point to the ingredient that failed validation."""
+        # setup
+        payload = {
+            "name": "Imported chili",
+            "description": "Imported from a spreadsheet",
+            "ingredients": [
+                {"food": "Onion", "amount": 1, "unit": "self"},
+                {"food": "Garlic", "amount": "lots", "unit": "self"},
+            ],
+        }
+        # execution
+        response = client.post(self.ENDPOINT, json=payload)
+        # validation
+        assert response.status_code == 422
+        assert [e["loc"] for e in response.json()["detail"]] == [
+            ["body", "ingredients", 1, "amount"],
+        ]
+
+    def test_return_422_for_invalid_json(self, client: TestClient):
+        """Bodies that aren't a JSON object should be rejected."""
+        # execution
+        response = client.post(
+            self.ENDPOINT,
+            content=b'{"name": "Imported chili",',
+            headers={"Content-Type": "application/json"},
+        )
+        # validation
+        assert response.status_code == 422
+        assert "ended before the end" in response.json()["detail"]
+
+    def test_return_413_if_body_is_too_large(
+        self,
+        client: TestClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Bodies larger than the limit should be rejected."""
+        # setup
+        limits = replace(upload_limits, max_bytes=100)
+        monkeypatch.setattr(recipes, "upload_limits", limits)
+        payload = {
+            "name": "Imported chili",
+            "description": "x" * 100,
+            "ingredients": [],
+        }
+        # execution
+        response = client.post(self.ENDPOINT, json=payload)
+        # validation
+        assert response.status_code == 413
+
+
+class TestBatchGetRecipes:
+    """Test the POST /recipes/batch-get endpoint."""
+
+    ENDPOINT = "/recipes/batch-get"
+
+    def test_return_recipes_in_request_order(self, client: TestClient):
+        """Recipes should be returned in order with not-found markers."""
+        # setup
+        fake_id = uuid4()
+        ids = [test_data.FAJITAS, fake_id, test_data.SALSA]
+        payload = {"ids": [str(recipe_id) for recipe_id in ids]}
+        # execution
+        response = client.post(self.ENDPOINT, json=payload)
+        items = response.json()["items"]
+        # validation
+        assert response.status_code == 200
+        assert [item["id"] for item in items] == payload["ids"]
+        assert [item["found"] for item in items] == [True, False, True]
+        assert items[1]["recipe"] is None
+        wanted = test_data.RECIPES[test_data.FAJITAS]["name"]
+        assert items[0]["recipe"]["name"] == wanted
+
+    def test_scale_recipes_to_servings(self, client: TestClient):
+        """Every recipe in the batch should be scaled to the servings given."""
+        # setup
+        payload = {"ids": [str(test_data.FAJITAS)]}
+        # execution
+        response = client.post(f"{self.ENDPOINT}?servings=2", json=payload)
+        recipe = response.json()["items"][0]["recipe"]
+        # validation - 8 oz of steak for 2 servings is 1 lb
+        assert response.status_code == 200
+        assert recipe["servings"] == 2
+        ingredients = {row["food"]: row for row in recipe["ingredients"]}
+        assert ingredients["Steak"]["amount"] == 1
+        assert ingredients["Steak"]["unit"] == "lb"
+
+    def test_return_422_if_no_ids_are_requested(self, client: TestClient):
+        """At least one id must be requested."""
+        # execution
+        response = client.post(self.ENDPOINT, json={"ids": []})
+        # validation
+        assert response.status_code == 422
+
+
 class TestGetRecipeById:
     """Test the GET /recipes/<recipe_id> endpoint."""
 
@@ -108,6 +547,94 @@ class TestGetRecipeById:
         assert response.status_code == 200
         assert response.json()["name"] == wanted["name"]
 
+    def test_scale_recipe_to_servings(self, client: TestClient):
+        """Ingredient amounts should be scaled and shown in larger units."""
+        # setup
+        endpoint = self.endpoint(test_data.TACOS)
+        # execution
+        response = client.get(endpoint, params={"servings": 4})
+        response_body = response.json()
+        # validation
+        assert response.status_code == 200
+        assert response_body["servings"] == 4
+        ingredients = {
+            row["food"]: row for row in response_body["ingredients"]
+        }
+        assert ingredients["Black beans"] == {
+            "food": "Black beans",
+            "amount": 8,
+            "unit": "cup",
+        }
+        # 14 oz of corn for 4 servings is 56 oz, or 3.5 lb
+        assert ingredients["Sweet corn"]["amount"] == 3.5
+        assert ingredients["Sweet corn"]["unit"] == "lb"
+
+    def test_serve_precompressed_body(
+        self,
+        client: TestClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Cached recipes should be sent in the encoding the client accepts."""
+        # setup - compress every body, however small
+        monkeypatch.setattr(recipe_scaler, "minimum_compress_size", 0)
+        endpoint = self.endpoint(self.DEFAULT)
+        headers = {"Accept-Encoding": "gzip"}
+        # execution
+        first = client.get(endpoint, headers=headers)
+        second = client.get(endpoint, headers=headers)
+        # validation
+        assert first.headers["content-encoding"] == "gzip"
+        assert first.content == second.content
+        assert first.json()["name"] == test_data.RECIPES[self.DEFAULT]["name"]
+
+    def test_skip_compression_if_disabled(
+        self,
+        client: TestClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Recipes should be sent uncompressed if compression is turned off."""
+        # setup - compress every body, however small, unless it's disabled
+        monkeypatch.setattr(recipe_scaler, "minimum_compress_size", 0)
+        monkeypatch.setattr(recipe_scaler, "compress", False)
+        # execution
+        response = client.get(
+            self.endpoint(self.DEFAULT),
+            headers={"Accept-Encoding": "gzip"},
+        )
+        # validation
+        assert "content-encoding" not in response.headers
+        assert (
+            response.json()["name"] == test_data.RECIPES[self.DEFAULT]["name"]
+        )
+
+    def test_time_phases_of_profiled_requests(self, client: TestClient):
+        """Profiled requests should time the service call and serialization."""
+        # setup - wrap the app with the profiler, keeping its dependencies
+        token = "admin-token"  # noqa: S105
+        profiled = TestClient(
+            ProfilingMiddleware(client.app, token=token, report_lines=50),
+        )
+        # execution
+        response = profiled.get(
+            self.endpoint(self.DEFAULT),
+            headers={"X-Profile": token},
+        )
+        # validation
+        assert response.headers["x-profiled-status"] == "200"
+        phases = response.headers["server-timing"]
+        assert "recipe_service;dur=" in phases
+        assert "serialize;dur=" in phases
+
+    def test_return_422_if_servings_is_not_positive(self, client: TestClient):
+        """Recipes can't be scaled to zero servings."""
+        # execution
+        response = client.get(
+            self.endpoint(self.DEFAULT),
+            params={"servings": 0},
+        )
+        # validation
+        assert response.status_code == 422
+
     def test_return_404_if_id_has_no_match(self, client: TestClient):
         """Return 404 if id provided doesn't have a database match."""
         # setup - use an id that doesn't match an existing record
@@ -117,3 +644,134 @@ class TestGetRecipeById:
         # validation - response code should be 404
         assert response.status_code == 404
         assert response.json() == {"detail": "Recipe not found"}
+
+
+class TestGetRecipeNutrition:
+    """Test the GET /recipes/<recipe_id>/nutrition endpoint."""
+
+    def endpoint(self, recipe_id: UUID) -> str:
+        """Make the endpoint path to test."""
+        return f"/recipes/{recipe_id}/nutrition"
+
+    def test_scale_nutrition_to_servings(self, client: TestClient):
+        """Nutrition should be returned for the number of servings requested."""
+        # execution
+        one = client.get(self.endpoint(test_data.SALSA)).json()
+        two = client.get(
+            self.endpoint(test_data.SALSA),
+            params={"servings": 2},
+        ).json()
+        # validation
+        assert two["kcal"] == pytest.approx(one["kcal"] * 2)
+        assert two["missing_ingredients"] == one["missing_ingredients"] == 1
+
+    def test_return_404_if_id_has_no_match(self, client: TestClient):
+        """Return 404 if id provided doesn't have a database match."""
+        # execution
+        response = client.get(self.endpoint(uuid4()))
+        # validation
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Recipe not found"}
+
+
+class TestRecipeVersions:
+    """Test the /recipes/<recipe_id>/versions endpoints."""
+
+    DEFAULT = test_data.TACOS
+
+    def endpoint(self, recipe_id: UUID, version: str = "") -> str:
+        """Make the endpoint path to test."""
+        path = f"/recipes/{recipe_id}/versions"
+        return f"{path}/{version}" if version else path
+
+    def test_list_versions_after_an_edit(self, client: TestClient):
+        """Each edit should add a version with the recipe's new content."""
+        # setup
+        client.patch(f"/recipes/{self.DEFAULT}", json={"name": "Tacos"})
+        # execution
+        response = client.get(self.endpoint(self.DEFAULT))
+        # validation
+        assert response.status_code == 200
+        assert [(v["version"], v["name"]) for v in response.json()] == [
+            (1, test_data.RECIPES[self.DEFAULT]["name"]),
+            (2, "Tacos"),
+        ]
+
+    def test_get_latest_and_earlier_versions(self, client: TestClient):
+        """Earlier versions should keep the content they had."""
+        # setup
+        payload = {
+            "ingredients": [{"food": "Onion", "amount": 1, "unit": "self"}],
+        }
+        client.patch(f"/recipes/{self.DEFAULT}", json=payload)
+        # execution
+        latest = client.get(self.endpoint(self.DEFAULT, "latest")).json()
+        first = client.get(self.endpoint(self.DEFAULT, "1")).json()
+        # validation
+        assert latest["version"] == 2
+        assert [row["food"] for row in latest["ingredients"]] == ["Onion"]
+        assert first["version"] == 1
+        assert len(first["ingredients"]) == len(
+            test_data.INGREDIENTS[self.DEFAULT],
+        )
+
+    def test_return_404_before_the_recipe_existed(self, client: TestClient):
+        """There's no version of a recipe as of a time before it was created."""
+        # execution
+        response = client.get(
+            self.endpoint(self.DEFAULT, "latest"),
+            params={"as_of": "2000-01-01T00:00:00Z"},
+        )
+        # validation
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Recipe version not found"}
+
+    def test_return_404_if_version_has_no_match(self, client: TestClient):
+        """Return 404 for versions and recipes that don't exist."""
+        # execution
+        version = client.get(self.endpoint(self.DEFAULT, "99"))
+        recipe = client.get(self.endpoint(uuid4()))
+        # validation
+        assert version.status_code == 404
+        assert recipe.status_code == 404
+
+
+class TestPatchRecipe:
+    """Test the PATCH /recipes/<recipe_id> endpoint."""
+
+    DEFAULT = test_data.TACOS
+
+    def endpoint(self, recipe_id: UUID) -> str:
+        """Make the endpoint path to test."""
+        return f"/recipes/{recipe_id}"
+
+    def test_update_name_and_ingredients(self, client: TestClient):
+        """The response should reflect the updated fields and ingredients."""
+        # setup
+        payload = {
+            "name": "Black bean tacos",
+            "ingredients": [
+                {"food": "Onion", "amount": 1, "unit": "self"},
+                {"food": "Black beans", "amount": 3, "unit": "cup"},
+                {"food": "Corn tortillas", "amount": 6, "unit": "self"},
+            ],
+        }
+        # execution
+        response = client.patch(self.endpoint(self.DEFAULT), json=payload)
+        response_body = response.json()
+        # validation
+        assert response.status_code == 200
+        assert response_body["name"] == "Black bean tacos"
+        ingredients = {
+            row["food"]: row for row in response_body["ingredients"]
+        }
+        assert set(ingredients) == {"Onion", "Black beans", "Corn tortillas"}
+        assert ingredients["Black beans"]["amount"] == 3
+
+    def test_return_404_if_id_has_no_match(self, client: TestClient):
+        """Return 404 if id provided doesn't have a database match."""
+        # execution
+        response = client.patch(self.endpoint(uuid4()), json={"name": "New"})
+        # validation
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Recipe not found"}
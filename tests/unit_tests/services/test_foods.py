@@ -0,0 +1,119 @@
+"""Test the FoodService class."""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from meal_planner.schemas.recipe import RecipeCreateSchema, RecipeIngredient
+from meal_planner.services.foods import food_service
+from meal_planner.services.recipes import recipe_service
+
+
+@contextmanager
+def count_selects(db: Session) -> Iterator[list[str]]:
+    """Collect the SELECT statements issued while the block runs."""
+    statements: list[str] = []
+
+    def count_statement(*args: str) -> None:
+        if args[2].startswith("SELECT"):
+            statements.append(args[2])
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+
+class TestLookupCache:
+    """Test that food lookups are reused within a transaction."""
+
+    def test_repeated_lookups_query_once(self, test_session: Session):
+        """Finding the same food twice should only query for it once."""
+        # act
+        with count_selects(test_session) as statements:
+            first = food_service.get_by_name(test_session, "Onion")
+            second = food_service.get_by_name(test_session, "Onion")
+        # assert
+        assert first is not None
+        assert first is second
+        assert len(statements) == 1
+
+    def test_bulk_lookups_only_query_for_new_names(
+        self,
+        test_session: Session,
+    ):
+        """Foods that were already found shouldn't be queried for again."""
+        # arrange
+        onion = food_service.get_by_name(test_session, "Onion")
+        # act
+        with count_selects(test_session) as statements:
+            got = food_service.get_or_create_many(
+                test_session,
+                ["Onion", "Tomato"],
+            )
+            again = food_service.get_many_by_name(
+                test_session,
+                ["Onion", "Tomato"],
+            )
+        # assert
+        assert got["Onion"] is onion
+        assert again == got
+        assert len(statements) == 1
+
+    def test_reuse_foods_created_in_the_transaction(
+        self,
+        test_session: Session,
+    ):
+        """A food created but not flushed yet should be found, not duplicated."""
+        # arrange
+        created = food_service.get_or_create_by_name(test_session, "Paprika")
+        # act
+        with count_selects(test_session) as statements:
+            got = food_service.get_or_create_many(test_session, ["Paprika"])
+        # assert
+        assert got["Paprika"] is created
+        assert statements == []
+
+    def test_creating_a_recipe_looks_up_foods_once(
+        self,
+        test_session: Session,
+    ):
+        """The foods of every ingredient should be found in one query."""
+        # arrange
+        data = RecipeCreateSchema(
+            name="Pico de gallo",
+            description="Fresh salsa",
+            ingredients=[
+                RecipeIngredient(food=food, amount=1, unit="self")
+                for food in ["Onion", "Tomato", "Salt", "Cilantro"]
+            ],
+        )
+        # act
+        with count_selects(test_session) as statements:
+            recipe = recipe_service.create(
+                test_session,
+                data=data,
+                defer_commit=True,
+            )
+        # assert - the other statements snapshot the recipe's first version
+        food_lookups = [stmt for stmt in statements if "\nFROM food " in stmt]
+        assert len(recipe.ingredients) == 4
+        assert len(food_lookups) == 1
+
+    def test_clear_the_cache_when_the_transaction_ends(
+        self,
+        test_session: Session,
+    ):
+        """Foods created in a rolled back transaction shouldn't be reused."""
+        # arrange
+        created = food_service.get_or_create_by_name(test_session, "Paprika")
+        # act
+        test_session.rollback()
+        got = food_service.get_by_name(test_session, "Paprika")
+        # assert
+        assert created is not None
+        assert got is None
@@ -0,0 +1,154 @@
+"""Test the GroupCommitter class."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Generator
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+
+from meal_planner.models.food import Food
+from meal_planner.services.foods import food_service
+from meal_planner.services.group_commit import (
+    GroupCommitStoppedError,
+    GroupCommitter,
+)
+
+
+@pytest.fixture(name="session_factory")
+def fixture_session_factory(test_session: Session) -> sessionmaker:
+    """Create sessions that join the test's transaction."""
+    return sessionmaker(
+        bind=test_session.get_bind(),
+        autoflush=False,
+        join_transaction_mode="create_savepoint",
+    )
+
+
+@pytest.fixture(name="committer")
+def fixture_committer(
+    session_factory: sessionmaker,
+) -> Generator[GroupCommitter, None, None]:
+    """Start a committer with a window long enough to batch every write."""
+    committer = GroupCommitter(window=0.2, max_batch=5)
+    committer.start(session_factory)
+    yield committer
+    committer.stop()
+
+
+def add_food(name: str, *, fail: bool = False) -> Callable[[Session], str]:
+    """Return a write that adds a food, then optionally raises."""
+
+    def work(db: Session) -> str:
+        db.add(Food(id=uuid4(), name=name))
+        db.flush()
+        if fail:
+            msg = f"Failed to add {name}"
+            raise ValueError(msg)
+        return name
+
+    return work
+
+
+def test_commit_concurrent_writes_together(
+    committer: GroupCommitter,
+    session_factory: sessionmaker,
+    test_session: Session,
+):
+    """Writes submitted at the same time should share one commit."""
+    # arrange
+    commits = []
+
+    def count_commit(session: Session) -> None:
+        # ignore the SAVEPOINT that each write runs in
+        if not session.in_nested_transaction():
+            commits.append(session)
+
+    event.listen(session_factory, "after_commit", count_commit)
+    names = [f"Food {index}" for index in range(5)]
+    # act
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        results = list(pool.map(committer.submit, map(add_food, names)))
+    # assert
+    assert results == names
+    assert len(commits) == 1
+    for name in names:
+        assert food_service.get_by_name(test_session, name) is not None
+
+
+def test_isolate_failed_writes(
+    committer: GroupCommitter,
+    test_session: Session,
+):
+    """A write that fails should be rolled back without affecting the rest."""
+    # arrange
+    barrier = threading.Barrier(2)
+
+    def submit(work: Callable[[Session], str]) -> str:
+        barrier.wait()  # submit both writes within the same window
+        return committer.submit(work)
+
+    # act
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        failed = pool.submit(submit, add_food("Garlic", fail=True))
+        saved = pool.submit(submit, add_food("Ginger"))
+        # assert
+        with pytest.raises(ValueError, match="Failed to add Garlic"):
+            failed.result()
+        assert saved.result() == "Ginger"
+    assert food_service.get_by_name(test_session, "Garlic") is None
+    assert food_service.get_by_name(test_session, "Ginger") is not None
+
+
+def test_reject_writes_once_stopped(committer: GroupCommitter):
+    """Writes can't be submitted after the committer is stopped."""
+    # arrange
+    committer.stop()
+    # act - assert
+    assert not committer.running
+    with pytest.raises(GroupCommitStoppedError):
+        committer.submit(add_food("Garlic"))
+
+
+def test_resolve_writes_submitted_while_stopping(committer: GroupCommitter):
+    """Every write should be committed or rejected if it races with stop()."""
+    # arrange
+    barrier = threading.Barrier(9)
+
+    def submit(index: int) -> str | None:
+        barrier.wait()  # submit every write at the same time as stop()
+        try:
+            return committer.submit(add_food(f"Food {index}"))
+        except GroupCommitStoppedError:
+            return None
+
+    pool = ThreadPoolExecutor(max_workers=8)
+    futures = [pool.submit(submit, index) for index in range(8)]
+    # act
+    barrier.wait()
+    committer.stop()
+    _, not_done = wait(futures, timeout=5)
+    pool.shutdown(wait=False)
+    # assert
+    assert not not_done
+
+
+def test_stop_if_the_thread_fails():
+    """Writes should be rejected rather than wait on a thread that died."""
+    # arrange
+    committer = GroupCommitter(window=0, max_batch=1)
+
+    def broken_factory() -> Session:
+        msg = "Failed to connect"
+        raise RuntimeError(msg)
+
+    committer.start(broken_factory)
+    # act
+    with pytest.raises(RuntimeError, match="Failed to connect"):
+        committer.submit(add_food("Garlic"))
+    # assert
+    assert not committer.running
+    with pytest.raises(GroupCommitStoppedError):
+        committer.submit(add_food("Ginger"))
@@ -0,0 +1,232 @@
+"""Test the IdempotencyService class."""
+
+from datetime import timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from meal_planner.models.idempotency_key import IdempotencyKey
+from meal_planner.services.idempotency import (
+    IdempotencyKeyInProgressError,
+    IdempotencyKeyReusedError,
+    IdempotencyService,
+)
+
+SCOPE = "test"
+HASH = "abc123"
+
+
+@pytest.fixture(name="service")
+def fixture_service() -> IdempotencyService:
+    """Return an IdempotencyService that doesn't wait on keys in progress."""
+    return IdempotencyService(
+        ttl=timedelta(minutes=5),
+        wait_seconds=0,
+        lease=timedelta(minutes=1),
+    )
+
+
+class TestClaim:
+    """Test the claim() method."""
+
+    def test_first_request_claims_key(
+        self,
+        test_session: Session,
+        service: IdempotencyService,
+    ):
+        """The first request with a key should claim it and do the work."""
+        # act
+        claim = service.claim(
+            test_session,
+            scope=SCOPE,
+            key="a",
+            request_hash=HASH,
+        )
+        # assert
+        assert claim.is_replay is False
+        assert test_session.get(IdempotencyKey, claim.row_id) is not None
+
+    def test_replay_completed_request(
+        self,
+        test_session: Session,
+        service: IdempotencyService,
+    ):
+        """A retry after the first request completes should get its response."""
+        # arrange
+        first = service.claim(
+            test_session,
+            scope=SCOPE,
+            key="b",
+            request_hash=HASH,
+        )
+        service.complete(
+            test_session,
+            first,
+            status_code=201,
+            response_body={"name": "Test"},
+        )
+        # act
+        retry = service.claim(
+            test_session,
+            scope=SCOPE,
+            key="b",
+            request_hash=HASH,
+        )
+        # assert
+        assert retry.is_replay is True
+        assert retry.status_code == 201
+        assert retry.response_body == {"name": "Test"}
+
+    def test_reject_key_reused_with_different_request(
+        self,
+        test_session: Session,
+        service: IdempotencyService,
+    ):
+        """A key can't be reused with a different request payload."""
+        # arrange
+        service.claim(test_session, scope=SCOPE, key="c", request_hash=HASH)
+        # act
+        with pytest.raises(IdempotencyKeyReusedError):
+            service.claim(
+                test_session,
+                scope=SCOPE,
+                key="c",
+                request_hash="xyz",
+            )
+
+    def test_raise_error_if_request_is_still_in_progress(
+        self,
+        test_session: Session,
+        service: IdempotencyService,
+    ):
+        """A retry should give up if the first request doesn't finish in time."""
+        # arrange
+        service.claim(test_session, scope=SCOPE, key="d", request_hash=HASH)
+        # act
+        with pytest.raises(IdempotencyKeyInProgressError):
+            service.claim(
+                test_session,
+                scope=SCOPE,
+                key="d",
+                request_hash=HASH,
+            )
+
+    def test_released_key_can_be_claimed_again(
+        self,
+        test_session: Session,
+        service: IdempotencyService,
+    ):
+        """A key released after a failure can be claimed by a retry."""
+        # arrange
+        first = service.claim(
+            test_session,
+            scope=SCOPE,
+            key="e",
+            request_hash=HASH,
+        )
+        service.release(test_session, first)
+        # act
+        retry = service.claim(
+            test_session,
+            scope=SCOPE,
+            key="e",
+            request_hash=HASH,
+        )
+        # assert
+        assert retry.is_replay is False
+
+    def test_expired_key_can_be_claimed_again(self, test_session: Session):
+        """A key whose time to live has passed can be claimed again."""
+        # arrange
+        service = IdempotencyService(
+            ttl=timedelta(seconds=-1),
+            wait_seconds=0,
+            lease=timedelta(minutes=1),
+        )
+        first = service.claim(
+            test_session,
+            scope=SCOPE,
+            key="f",
+            request_hash=HASH,
+        )
+        service.complete(
+            test_session,
+            first,
+            status_code=201,
+            response_body={"name": "Test"},
+        )
+        # act
+        retry = service.claim(
+            test_session,
+            scope=SCOPE,
+            key="f",
+            request_hash="xyz",
+        )
+        # assert
+        assert retry.is_replay is False
+
+    def test_expired_lease_can_be_taken_over(self, test_session: Session):
+        """A retry can take over a key whose request never finished."""
+        # arrange
+        service = IdempotencyService(
+            ttl=timedelta(minutes=5),
+            wait_seconds=0,
+            lease=timedelta(seconds=-1),
+        )
+        crashed = service.claim(
+            test_session,
+            scope=SCOPE,
+            key="g",
+            request_hash=HASH,
+        )
+        # act
+        retry = service.claim(
+            test_session,
+            scope=SCOPE,
+            key="g",
+            request_hash=HASH,
+        )
+        # assert
+        assert retry.is_replay is False
+        assert retry.claim_id != crashed.claim_id
+
+    def test_expired_lease_does_not_store_response(
+        self,
+        test_session: Session,
+    ):
+        """A request that lost its key shouldn't overwrite the new claim."""
+        # arrange
+        service = IdempotencyService(
+            ttl=timedelta(minutes=5),
+            wait_seconds=0,
+            lease=timedelta(seconds=-1),
+        )
+        slow = service.claim(
+            test_session,
+            scope=SCOPE,
+            key="h",
+            request_hash=HASH,
+        )
+        retry = service.claim(
+            test_session,
+            scope=SCOPE,
+            key="h",
+            request_hash=HASH,
+        )
+        # act
+        service.complete(
+            test_session,
+            slow,
+            status_code=201,
+            response_body={"name": "Slow"},
+        )
+        service.release(test_session, slow)
+        # assert
+        record = test_session.get(
+            IdempotencyKey,
+            retry.row_id,
+            populate_existing=True,
+        )
+        assert record is not None
+        assert record.claim_id == retry.claim_id
+        assert record.status_code is None
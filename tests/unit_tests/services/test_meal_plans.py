@@ -0,0 +1,232 @@
+"""Test the MealPlanService class."""
+
+from datetime import date
+from uuid import UUID
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from meal_planner.models.food import Food
+from meal_planner.models.meal_plan import MealPlanIngredient
+from meal_planner.schemas.meal_plan import (
+    MealPlanCreateSchema,
+    PlannedMealCreateSchema,
+    PlannedMealUpdateSchema,
+)
+from meal_planner.schemas.recipe import RecipeIngredient, RecipeUpdateSchema
+from meal_planner.services.meal_plans import meal_plan_service
+from meal_planner.services.recipe_versions import RecipeVersionNotFoundError
+from meal_planner.services.recipes import recipe_service
+
+from tests.utils import test_data
+
+
+def totals(db: Session, plan_id: UUID) -> dict[tuple[str, str], float]:
+    """Map the food name and unit to each ingredient total in a meal plan."""
+    stmt = (
+        select(Food.name, MealPlanIngredient.unit, MealPlanIngredient.amount)
+        .join(Food, MealPlanIngredient.food_id == Food.id)
+        .where(MealPlanIngredient.meal_plan_id == plan_id)
+    )
+    return {(row.name, row.unit): row.amount for row in db.execute(stmt)}
+
+
+def rebuilt_totals(db: Session, plan_id: UUID) -> dict[tuple[str, str], float]:
+    """Recompute the ingredient totals of a meal plan from scratch."""
+    meal_plan_service.rebuild_rollup(db, plan_id)
+    return totals(db, plan_id)
+
+
+class TestIngredientRollup:
+    """Test that meal plan ingredient totals are kept up to date."""
+
+    PLAN = test_data.WEEK
+
+    def test_totals_sum_ingredients_across_meals(self, test_session: Session):
+        """Totals should sum each recipe's ingredients times its servings."""
+        # act
+        got = totals(test_session, self.PLAN)
+        # assert - tacos have 2 servings and fajitas have 1
+        assert got[("Onion", "self")] == 1 * 2 + 1.5
+        assert got[("Corn tortillas", "self")] == 6 * 2 + 6
+        assert got[("Steak", "oz")] == 8
+        assert ("Tomato", "self") not in got
+
+    def test_add_meal_updates_totals(self, test_session: Session):
+        """Adding a meal should add its ingredients to the existing totals."""
+        # arrange
+        plan = meal_plan_service.get(test_session, self.PLAN)
+        assert plan is not None
+        data = PlannedMealCreateSchema(
+            recipe_id=test_data.SALSA,
+            date=date(2024, 6, 5),
+            slot="snack",
+            servings=2,
+        )
+        # act
+        meal_plan_service.add_meal(test_session, plan=plan, data=data)
+        got = totals(test_session, self.PLAN)
+        # assert
+        assert got[("Tomato", "self")] == 4
+        assert got[("Onion", "self")] == 1 * 2 + 1.5 + 0.5 * 2
+        assert got == rebuilt_totals(test_session, self.PLAN)
+
+    def test_update_servings_updates_totals(self, test_session: Session):
+        """Changing a meal's servings should adjust the totals by the difference."""
+        # arrange
+        meal = meal_plan_service.get_meal(
+            test_session,
+            plan_id=self.PLAN,
+            meal_id=test_data.FAJITA_NIGHT,
+        )
+        assert meal is not None
+        data = PlannedMealUpdateSchema(servings=3)
+        # act
+        meal_plan_service.update_meal(test_session, meal=meal, data=data)
+        got = totals(test_session, self.PLAN)
+        # assert
+        assert got[("Steak", "oz")] == 24
+        assert got == rebuilt_totals(test_session, self.PLAN)
+
+    def test_remove_meal_updates_totals(self, test_session: Session):
+        """Removing a meal should subtract its ingredients and drop zero totals."""
+        # arrange
+        meal = meal_plan_service.get_meal(
+            test_session,
+            plan_id=self.PLAN,
+            meal_id=test_data.FAJITA_NIGHT,
+        )
+        assert meal is not None
+        # act
+        meal_plan_service.remove_meal(test_session, meal=meal)
+        got = totals(test_session, self.PLAN)
+        # assert
+        assert ("Steak", "oz") not in got
+        assert got[("Onion", "self")] == 2
+        assert got == rebuilt_totals(test_session, self.PLAN)
+
+    def test_recipe_changes_do_not_change_planned_meals(
+        self,
+        test_session: Session,
+    ):
+        """Editing a planned recipe shouldn't change the meals already planned."""
+        # arrange
+        before = totals(test_session, self.PLAN)
+        recipe = recipe_service.get(test_session, test_data.FAJITAS)
+        assert recipe is not None
+        data = RecipeUpdateSchema(
+            ingredients=[RecipeIngredient(food="Steak", amount=12, unit="oz")],
+        )
+        # act
+        recipe_service.update(test_session, record=recipe, update_data=data)
+        got = totals(test_session, self.PLAN)
+        # assert
+        assert got == before
+        assert got == rebuilt_totals(test_session, self.PLAN)
+
+    def test_pin_meal_to_new_version(self, test_session: Session):
+        """Pinning a meal to a new version should swap its ingredients."""
+        # arrange
+        recipe = recipe_service.get(test_session, test_data.FAJITAS)
+        assert recipe is not None
+        data = RecipeUpdateSchema(
+            ingredients=[RecipeIngredient(food="Steak", amount=12, unit="oz")],
+        )
+        recipe_service.update(test_session, record=recipe, update_data=data)
+        meal = meal_plan_service.get_meal(
+            test_session,
+            plan_id=self.PLAN,
+            meal_id=test_data.FAJITA_NIGHT,
+        )
+        assert meal is not None
+        # act
+        meal_plan_service.update_meal(
+            test_session,
+            meal=meal,
+            data=PlannedMealUpdateSchema(recipe_version=2),
+        )
+        got = totals(test_session, self.PLAN)
+        # assert
+        assert got[("Steak", "oz")] == 12
+        assert ("Red pepper", "self") not in got
+        assert got[("Onion", "self")] == 2
+        assert got == rebuilt_totals(test_session, self.PLAN)
+
+    def test_version_servings_scale_totals(self, test_session: Session):
+        """Planned servings should be divided by the servings a version makes."""
+        # arrange
+        recipe = recipe_service.get(test_session, test_data.FAJITAS)
+        assert recipe is not None
+        data = RecipeUpdateSchema(servings=2)
+        recipe_service.update(test_session, record=recipe, update_data=data)
+        meal = meal_plan_service.get_meal(
+            test_session,
+            plan_id=self.PLAN,
+            meal_id=test_data.FAJITA_NIGHT,
+        )
+        assert meal is not None
+        # act
+        meal_plan_service.update_meal(
+            test_session,
+            meal=meal,
+            data=PlannedMealUpdateSchema(recipe_version=2, servings=3),
+        )
+        got = totals(test_session, self.PLAN)
+        # assert - fajitas are planned for 3 servings and version 2 makes 2
+        assert got[("Steak", "oz")] == 12
+        assert got == rebuilt_totals(test_session, self.PLAN)
+
+    def test_reject_versions_that_do_not_exist(self, test_session: Session):
+        """Meals can only be pinned to versions of their recipe that exist."""
+        # arrange
+        meal = meal_plan_service.get_meal(
+            test_session,
+            plan_id=self.PLAN,
+            meal_id=test_data.FAJITA_NIGHT,
+        )
+        assert meal is not None
+        data = PlannedMealUpdateSchema(recipe_version=2)
+        # act
+        with pytest.raises(RecipeVersionNotFoundError):
+            meal_plan_service.update_meal(test_session, meal=meal, data=data)
+
+
+class TestCreate:
+    """Test the create() method."""
+
+    def test_create_plan_with_meals(self, test_session: Session):
+        """Meals planned when a plan is created should be added to its totals."""
+        # arrange
+        data = MealPlanCreateSchema(
+            name="Second week of June",
+            start_date=date(2024, 6, 10),
+            meals=[
+                PlannedMealCreateSchema(
+                    recipe_id=test_data.SALSA,
+                    date=date(2024, 6, 10),
+                    slot="lunch",
+                ),
+            ],
+        )
+        # act
+        plan = meal_plan_service.create(test_session, data=data)
+        # assert
+        assert len(plan.meals) == 1
+        assert totals(test_session, plan.id)[("Tomato", "self")] == 2
+
+    def test_reject_meals_outside_of_plan_week(self):
+        """Meals can't be planned outside of the plan's week."""
+        # act
+        with pytest.raises(ValueError, match="Meals must be planned between"):
+            MealPlanCreateSchema(
+                name="Second week of June",
+                start_date=date(2024, 6, 10),
+                meals=[
+                    PlannedMealCreateSchema(
+                        recipe_id=test_data.SALSA,
+                        date=date(2024, 6, 17),
+                        slot="lunch",
+                    ),
+                ],
+            )
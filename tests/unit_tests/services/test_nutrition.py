@@ -0,0 +1,205 @@
+"""Test the NutritionService class."""
+
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from meal_planner.models.food_nutrient import FoodNutrient
+from meal_planner.schemas.recipe import RecipeIngredient, RecipeUpdateSchema
+from meal_planner.services.foods import food_service
+from meal_planner.services.nutrition import (
+    NutritionService,
+    nutrition_service,
+    read_nutrient_csv,
+)
+from meal_planner.services.recipes import recipe_service
+from meal_planner.units import CUPS, EACH, GRAMS
+
+from tests.utils import test_data
+
+
+def expected_kcal(recipe_id: UUID) -> float:
+    """Add up the calories in a recipe's ingredients from the test data."""
+    nutrients = {
+        row["food_id"]: row for row in test_data.FOOD_NUTRIENTS.values()
+    }
+    total = 0.0
+    for food_id, ingredient in test_data.INGREDIENTS[recipe_id].items():
+        row = nutrients.get(food_id)
+        if row is None:
+            continue
+        unit, amount = ingredient["unit"], ingredient["amount"]
+        if unit in GRAMS:
+            grams = amount * GRAMS[unit]
+        elif unit in CUPS:
+            grams = amount * CUPS[unit] * row["grams_per_cup"]
+        else:
+            assert unit == EACH
+            grams = amount * row["grams_each"]
+        total += grams * row["kcal"] / 100
+    return total
+
+
+class TestCompute:
+    """Test the compute() method."""
+
+    def test_add_up_nutrients_of_each_recipe(self, test_session: Session):
+        """Amounts in weight, volume, and items should all be converted."""
+        # act
+        got = nutrition_service.compute(test_session, test_data.RECIPES)
+        # assert
+        for recipe_id in test_data.RECIPES:
+            assert got[recipe_id].kcal == pytest.approx(
+                expected_kcal(recipe_id),
+            )
+
+    def test_count_ingredients_without_nutrients(self, test_session: Session):
+        """Ingredients whose food has no nutrient data should be counted."""
+        # act
+        got = nutrition_service.compute(test_session, [test_data.SALSA])
+        # assert
+        assert got[test_data.SALSA].missing_ingredients == 1  # salt
+
+    def test_return_zeros_for_recipe_without_ingredients(
+        self,
+        test_session: Session,
+    ):
+        """Recipes without ingredients should have no nutrients."""
+        # arrange
+        recipe = recipe_service.get(test_session, test_data.SALSA)
+        assert recipe is not None
+        recipe_service.update(
+            test_session,
+            record=recipe,
+            update_data=RecipeUpdateSchema(ingredients=[]),
+        )
+        # act
+        got = nutrition_service.compute(test_session, [test_data.SALSA])
+        # assert
+        assert got[test_data.SALSA].kcal == 0
+        assert got[test_data.SALSA].missing_ingredients == 0
+
+
+class TestPerServing:
+    """Test the per_serving() method."""
+
+    def test_divide_by_recipe_servings(self, test_session: Session):
+        """Nutrition should be returned for one serving of each recipe."""
+        # arrange
+        recipe = recipe_service.get(test_session, test_data.TACOS)
+        assert recipe is not None
+        recipe_service.update(
+            test_session,
+            record=recipe,
+            update_data=RecipeUpdateSchema(servings=4),
+        )
+        # act
+        got = nutrition_service.per_serving(test_session, [test_data.TACOS])
+        # assert
+        wanted = expected_kcal(test_data.TACOS) / 4
+        assert got[test_data.TACOS].kcal == pytest.approx(wanted)
+
+    def test_cache_until_ingredients_change(self, test_session: Session):
+        """Cached nutrition should be reused until the recipe is updated."""
+        # arrange
+        service = NutritionService(model=FoodNutrient, maxsize=10)
+        engine = test_session.get_bind()
+        statements = []
+
+        def count_statement(*args: object) -> None:
+            statements.append(args[2])
+
+        first = service.per_serving(test_session, [test_data.SALSA])
+        # act
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            cached = service.per_serving(test_session, [test_data.SALSA])
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+        recipe = recipe_service.get(test_session, test_data.SALSA)
+        assert recipe is not None
+        steak = RecipeIngredient(food="Steak", amount=16, unit="oz")
+        recipe_service.update(
+            test_session,
+            record=recipe,
+            update_data=RecipeUpdateSchema(ingredients=[steak]),
+        )
+        updated = service.per_serving(test_session, [test_data.SALSA])
+        # assert
+        assert cached == first
+        assert len(statements) == 1  # only the revision lookup
+        assert updated[test_data.SALSA].kcal == pytest.approx(
+            16 * GRAMS["oz"] * 271 / 100,
+        )
+
+    def test_skip_missing_recipes(self, test_session: Session):
+        """Ids without a recipe shouldn't be included."""
+        # act
+        got = nutrition_service.per_serving(test_session, [uuid4()])
+        # assert
+        assert got == {}
+
+
+class TestForMealPlan:
+    """Test the for_meal_plan() method."""
+
+    def test_scale_recipes_by_planned_servings(self, test_session: Session):
+        """Each planned meal should add the nutrition of its servings."""
+        # arrange
+        wanted = sum(
+            expected_kcal(meal["recipe_id"]) * meal["servings"]
+            for meal in test_data.PLANNED_MEALS.values()
+        )
+        # act
+        got = nutrition_service.for_meal_plan(test_session, test_data.WEEK)
+        # assert
+        assert got.kcal == pytest.approx(wanted)
+
+
+class TestLoad:
+    """Test loading food nutrients with read_nutrient_csv() and load()."""
+
+    CSV = (
+        "food,kcal,protein_g,fat_g,carbs_g,grams_per_cup,grams_each\n",
+        "Salt,0,0,0,0,292,\n",
+        "Tomato,20,1,0.2,4,180,100\n",
+        "Garlic,149,6.4,0.5,33,136,3\n",
+    )
+
+    def test_insert_and_update_nutrients(self, test_session: Session):
+        """Nutrients should be created or updated, along with new foods."""
+        # act
+        total = nutrition_service.load(
+            test_session,
+            read_nutrient_csv(self.CSV),
+            batch_size=2,
+        )
+        # assert
+        assert total == 3
+        garlic = food_service.get_by_name(test_session, "Garlic")
+        tomato = food_service.get_by_name(test_session, "Tomato")
+        assert garlic is not None
+        assert tomato is not None
+        assert garlic.nutrients is not None
+        assert garlic.nutrients.grams_each == 3
+        assert tomato.nutrients is not None
+        assert tomato.nutrients.kcal == 20
+
+    def test_invalidate_cached_recipes(self, test_session: Session):
+        """Recipes that use the foods loaded should be recomputed."""
+        # arrange
+        before = nutrition_service.per_serving(test_session, [test_data.SALSA])
+        recipe = recipe_service.get(test_session, test_data.SALSA)
+        assert recipe is not None
+        updated_at = recipe.updated_at
+        # act
+        nutrition_service.load(test_session, read_nutrient_csv(self.CSV))
+        after = nutrition_service.per_serving(test_session, [test_data.SALSA])
+        # assert
+        test_session.refresh(recipe)
+        assert before[test_data.SALSA].missing_ingredients == 1
+        assert after[test_data.SALSA].missing_ingredients == 0
+        assert after[test_data.SALSA].kcal != before[test_data.SALSA].kcal
+        assert recipe.updated_at == updated_at
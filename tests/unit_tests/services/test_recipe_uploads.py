@@ -0,0 +1,124 @@
+"""Test the RecipeUpload class."""
+
+import json
+from dataclasses import replace
+
+import pytest
+from sqlalchemy.orm import Session
+
+from meal_planner.services.foods import food_service
+from meal_planner.services.recipe_uploads import (
+    InvalidRecipeUploadError,
+    RecipeUpload,
+    RecipeUploadLimits,
+    RecipeUploadTooLargeError,
+)
+from meal_planner.services.recipe_versions import recipe_version_service
+
+LIMITS = RecipeUploadLimits(
+    max_bytes=10000,
+    max_ingredients=10,
+    max_value_length=200,
+    batch_size=2,
+)
+
+
+def ingredient(food: str, amount: float = 1) -> bytes:
+    """Encode an ingredient the way it's streamed in a body."""
+    return json.dumps(
+        {"food": food, "amount": amount, "unit": "self"},
+    ).encode()
+
+
+class TestRecipeUpload:
+    """Test creating recipes from bodies that arrive in chunks."""
+
+    def test_create_recipe_from_chunks(self, test_session: Session):
+        """The recipe and its first version should be created at the end."""
+        # arrange
+        upload = RecipeUpload(test_session, LIMITS)
+        chunks = [
+            b'{"name": "Pico de gallo", "ingredients": [',
+            ingredient("Tomato", 2) + b",",
+            ingredient("Onion") + b",",
+            ingredient("Cilantro") + b'], "description": "Fresh salsa"}',
+        ]
+        # act
+        for chunk in chunks:
+            upload.feed(chunk)
+        recipe = upload.finish()
+        # assert
+        assert recipe.name == "Pico de gallo"
+        assert recipe.ingredient_count == 3
+        assert {i.food.name: i.amount for i in recipe.ingredients} == {
+            "Tomato": 2,
+            "Onion": 1,
+            "Cilantro": 1,
+        }
+        version = recipe_version_service.get_latest(test_session, recipe.id)
+        assert version is not None
+        assert len(version.ingredients) == 3
+
+    def test_resolve_foods_in_batches(self, test_session: Session):
+        """Foods should be looked up once a batch of ingredients has arrived."""
+        # arrange
+        upload = RecipeUpload(test_session, LIMITS)
+        # act
+        upload.feed(b'{"ingredients": [' + ingredient("Tomato") + b",")
+        first = list(upload.ingredients)
+        upload.feed(ingredient("Paprika") + b",")
+        # assert
+        assert first == []
+        assert [i.food for i in upload.ingredients] == ["Tomato", "Paprika"]
+        tomato = food_service.get_by_name(test_session, "Tomato")
+        assert tomato is not None
+        assert upload.ingredients[0].food_id == tomato.id
+
+    def test_fail_fast_on_invalid_ingredients(self, test_session: Session):
+        """An invalid ingredient should fail as soon as it has arrived."""
+        # arrange
+        upload = RecipeUpload(test_session, LIMITS)
+        upload.feed(b'{"ingredients": [' + ingredient("Tomato") + b",")
+        # act
+        with pytest.raises(InvalidRecipeUploadError) as error:
+            upload.feed(
+                b'{"food": "Onion", "amount": "lots", "unit": "self"},',
+            )
+        # assert
+        assert [e["loc"] for e in error.value.errors] == [
+            ("ingredients", 1, "amount"),
+        ]
+
+    def test_report_missing_fields(self, test_session: Session):
+        """The fields that are required by RecipeCreateSchema are checked."""
+        # arrange
+        upload = RecipeUpload(test_session, LIMITS)
+        upload.feed(b'{"name": "Pico de gallo"}')
+        # act
+        with pytest.raises(InvalidRecipeUploadError) as error:
+            upload.finish()
+        # assert
+        assert {e["loc"] for e in error.value.errors} == {
+            ("ingredients",),
+            ("description",),
+        }
+
+    def test_reject_too_many_ingredients(self, test_session: Session):
+        """Uploads can't have more ingredients than the limit."""
+        # arrange
+        upload = RecipeUpload(test_session, LIMITS)
+        items = b",".join(ingredient(f"Food {i}") for i in range(11))
+        # act
+        with pytest.raises(RecipeUploadTooLargeError, match="10 ingredients"):
+            upload.feed(b'{"ingredients": [' + items + b"]}")
+
+    def test_reject_too_many_bytes(self, test_session: Session):
+        """Uploads can't be larger than the limit, however they're chunked."""
+        # arrange
+        limits = replace(LIMITS, max_value_length=LIMITS.max_bytes)
+        upload = RecipeUpload(test_session, limits)
+        for _ in range(100):
+            upload.feed(b" " * 100)
+        # act
+        with pytest.raises(RecipeUploadTooLargeError, match="10000 bytes"):
+            upload.feed(b'{"description": "Fresh salsa"}')
@@ -0,0 +1,328 @@
+"""Test the RecipeVersionService class."""
+
+from datetime import UTC, datetime, timedelta
+from uuid import UUID, uuid4
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from meal_planner.models.recipe_version import IngredientSet, RecipeVersion
+from meal_planner.schemas.recipe import (
+    RecipeCreateSchema,
+    RecipeIngredient,
+    RecipeUpdateSchema,
+)
+from meal_planner.services.recipe_versions import (
+    RecipeVersionConflictError,
+    ingredient_set_hash,
+    recipe_version_service,
+)
+from meal_planner.services.recipes import recipe_service
+
+from tests.utils import test_data
+
+STEAK = RecipeIngredient(food="Steak", amount=12, unit="oz")
+
+
+def update(db: Session, data: RecipeUpdateSchema) -> None:
+    """Update the fajitas recipe with the changes provided."""
+    recipe = recipe_service.get(db, test_data.FAJITAS)
+    assert recipe is not None
+    recipe_service.update(db, record=recipe, update_data=data)
+
+
+def version_numbers(db: Session) -> list[int]:
+    """Return the numbers of the fajitas recipe's versions."""
+    query = recipe_version_service.query_for_recipe(test_data.FAJITAS)
+    return [v.version for v in recipe_version_service.get_all(db, query)]
+
+
+class TestIngredientSetHash:
+    """Test the ingredient_set_hash() function."""
+
+    def test_ignore_the_order_of_items(self):
+        """Sets with the same items in a different order should match."""
+        # arrange
+        items = [
+            (test_data.ONION, 1, "self"),
+            (test_data.STEAK, 8, "oz"),
+        ]
+        # act
+        got = ingredient_set_hash(reversed(items))
+        # assert
+        assert got == ingredient_set_hash(items)
+
+    def test_amounts_change_the_hash(self):
+        """Sets with different amounts of the same food shouldn't match."""
+        # act
+        got = ingredient_set_hash([(test_data.STEAK, 8, "oz")])
+        # assert
+        assert got != ingredient_set_hash([(test_data.STEAK, 12, "oz")])
+
+
+class TestSnapshot:
+    """Test that recipes are versioned when they're created or changed."""
+
+    def test_create_the_first_version(self, test_session: Session):
+        """Creating a recipe should snapshot it as version 1."""
+        # arrange
+        data = RecipeCreateSchema(
+            name="Pico de gallo",
+            description="Fresh salsa",
+            ingredients=[
+                RecipeIngredient(food="Tomato", amount=2, unit="self"),
+                RecipeIngredient(food="Cilantro", amount=1, unit="tbsp"),
+            ],
+        )
+        # act
+        recipe = recipe_service.create(test_session, data=data)
+        got = recipe_version_service.get_latest(test_session, recipe.id)
+        # assert
+        assert got is not None
+        assert got.version == 1
+        assert got.name == "Pico de gallo"
+        assert {item.food.name for item in got.ingredients} == {
+            "Tomato",
+            "Cilantro",
+        }
+
+    def test_rename_shares_the_ingredient_set(self, test_session: Session):
+        """A version that only changes the name should reuse the ingredients."""
+        # arrange
+        first = recipe_version_service.get_latest(
+            test_session,
+            test_data.FAJITAS,
+        )
+        assert first is not None
+        sets_before = test_session.scalar(
+            sa.select(sa.func.count()).select_from(IngredientSet),
+        )
+        # act
+        update(test_session, RecipeUpdateSchema(name="Chicken fajitas"))
+        got = recipe_version_service.get_latest(
+            test_session,
+            test_data.FAJITAS,
+        )
+        # assert
+        assert got is not None
+        assert got.version == 2
+        assert got.name == "Chicken fajitas"
+        assert got.ingredient_set_id == first.ingredient_set_id
+        assert sets_before == test_session.scalar(
+            sa.select(sa.func.count()).select_from(IngredientSet),
+        )
+
+    def test_skip_updates_that_change_nothing(self, test_session: Session):
+        """Updates that don't change the content shouldn't add a version."""
+        # act
+        update(test_session, RecipeUpdateSchema(name="Steak fajitas"))
+        # assert
+        assert version_numbers(test_session) == [1]
+
+    def test_keep_the_ingredients_of_old_versions(self, test_session: Session):
+        """Changing the ingredients shouldn't change earlier versions."""
+        # act
+        update(test_session, RecipeUpdateSchema(ingredients=[STEAK]))
+        first = recipe_version_service.get_version(
+            test_session,
+            test_data.FAJITAS,
+            1,
+        )
+        second = recipe_version_service.get_version(
+            test_session,
+            test_data.FAJITAS,
+            2,
+        )
+        # assert
+        assert first is not None
+        assert second is not None
+        assert len(first.ingredients) == 4
+        assert [(i.food.name, i.amount) for i in second.ingredients] == [
+            ("Steak", 12),
+        ]
+
+    def test_reverted_ingredients_reuse_the_set(self, test_session: Session):
+        """Reverting to earlier ingredients should point to the earlier set."""
+        # arrange
+        first = recipe_version_service.get_latest(
+            test_session,
+            test_data.FAJITAS,
+        )
+        assert first is not None
+        ingredients = [
+            RecipeIngredient(
+                food=item.food.name,
+                amount=item.amount,
+                unit=item.unit,
+            )
+            for item in first.ingredients
+        ]
+        # act
+        update(test_session, RecipeUpdateSchema(ingredients=[STEAK]))
+        update(test_session, RecipeUpdateSchema(ingredients=ingredients))
+        got = recipe_version_service.get_latest(
+            test_session,
+            test_data.FAJITAS,
+        )
+        # assert
+        assert got is not None
+        assert got.version == 3
+        assert got.ingredient_set_id == first.ingredient_set_id
+
+    def test_backfill_skips_versioned_recipes(self, test_session: Session):
+        """Recipes that already have a version shouldn't be snapshotted again."""
+        # act
+        got = recipe_version_service.backfill(test_session)
+        # assert
+        assert got == 0
+
+
+class TestConcurrentSnapshots:
+    """Test snapshots that race with another request writing the same rows."""
+
+    def test_reuse_set_created_by_another_request(
+        self,
+        test_session: Session,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """A set inserted after the lookup missed it should be returned."""
+        # arrange
+        items = [(test_data.STEAK, 12, "oz")]
+        content_hash = ingredient_set_hash(items)
+        competing = uuid4()
+        scalar = test_session.scalar
+
+        def insert_after_lookup(stmt: sa.Select) -> IngredientSet | None:
+            result = scalar(stmt)
+            test_session.execute(
+                sa.insert(IngredientSet).values(
+                    id=competing,
+                    content_hash=content_hash,
+                ),
+            )
+            return result
+
+        monkeypatch.setattr(test_session, "scalar", insert_after_lookup)
+        # act
+        got = recipe_version_service.get_or_create_set(test_session, items)
+        # assert
+        assert got.id == competing
+
+    def test_retry_version_number_taken_by_another_request(
+        self,
+        test_session: Session,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """A snapshot should take the next number after a competing version."""
+        # arrange
+        get_latest = recipe_version_service.get_latest
+
+        def insert_after_lookup(
+            db: Session,
+            recipe_id: UUID,
+        ) -> RecipeVersion | None:
+            latest = get_latest(db, recipe_id)
+            db.execute(
+                sa.insert(RecipeVersion).values(
+                    id=uuid4(),
+                    recipe_id=recipe_id,
+                    version=latest.version + 1,
+                    name="Veggie fajitas",
+                    description=latest.description,
+                    servings=latest.servings,
+                    ingredient_set_id=latest.ingredient_set_id,
+                ),
+            )
+            monkeypatch.undo()
+            return latest
+
+        monkeypatch.setattr(
+            recipe_version_service,
+            "get_latest",
+            insert_after_lookup,
+        )
+        # act
+        update(test_session, RecipeUpdateSchema(name="Chicken fajitas"))
+        got = recipe_version_service.get_latest(
+            test_session,
+            test_data.FAJITAS,
+        )
+        # assert
+        assert got is not None
+        assert got.version == 3
+        assert got.name == "Chicken fajitas"
+        assert version_numbers(test_session) == [1, 2, 3]
+
+    def test_give_up_if_the_number_is_always_taken(
+        self,
+        test_session: Session,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Snapshots should fail rather than retry forever."""
+        # arrange
+        monkeypatch.setattr(
+            recipe_version_service,
+            "get_latest",
+            lambda *_: None,
+        )
+        recipe = recipe_service.get(test_session, test_data.FAJITAS)
+        recipe.name = "Chicken fajitas"
+        # act
+        with pytest.raises(RecipeVersionConflictError):
+            recipe_version_service.snapshot(test_session, recipe)
+
+
+class TestGetAsOf:
+    """Test the get_as_of() method."""
+
+    def test_return_the_version_current_at_a_time(self, test_session: Session):
+        """The last version created before the time should be returned."""
+        # arrange
+        update(test_session, RecipeUpdateSchema(name="Chicken fajitas"))
+        test_session.execute(
+            sa.update(RecipeVersion)
+            .where(
+                RecipeVersion.recipe_id == test_data.FAJITAS,
+                RecipeVersion.version == 1,
+            )
+            .values(created_at=datetime(2024, 1, 1, tzinfo=UTC)),
+        )
+        # act
+        got = recipe_version_service.get_as_of(
+            test_session,
+            test_data.FAJITAS,
+            datetime(2024, 2, 1, tzinfo=UTC),
+        )
+        # assert
+        assert got is not None
+        assert got.version == 1
+
+    def test_break_ties_by_version(self, test_session: Session):
+        """Versions created in the same second should return the newest one."""
+        # arrange
+        update(test_session, RecipeUpdateSchema(name="Chicken fajitas"))
+        update(test_session, RecipeUpdateSchema(name="Veggie fajitas"))
+        # act
+        got = recipe_version_service.get_as_of(
+            test_session,
+            test_data.FAJITAS,
+            datetime.now(tz=UTC) + timedelta(minutes=1),
+        )
+        # assert
+        assert got is not None
+        assert got.version == 3
+
+    def test_return_none_before_the_recipe_existed(
+        self,
+        test_session: Session,
+    ):
+        """There's no version of a recipe from before it was created."""
+        # act
+        got = recipe_version_service.get_as_of(
+            test_session,
+            test_data.FAJITAS,
+            datetime(2000, 1, 1, tzinfo=UTC),
+        )
+        # assert
+        assert got is None
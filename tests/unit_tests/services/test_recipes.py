@@ -1,15 +1,34 @@
 """Test the RecipeService class."""
 
-from uuid import uuid4
+from datetime import UTC, datetime
+from typing import ClassVar
+from uuid import UUID, uuid4
 
-from sqlalchemy import select
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import event, select, update
 from sqlalchemy.orm import Session
 
+from meal_planner.models.ingredient import Ingredient
 from meal_planner.models.recipe import Recipe
-from meal_planner.services.recipes import recipe_service
+from meal_planner.services.base import (
+    InvalidCursorError,
+    ListQuery,
+    UnsupportedListQueryError,
+    prefix_bounds,
+)
+from meal_planner.services.recipes import (
+    RecipeRow,
+    recipe_service,
+    summarize,
+)
 from meal_planner.services.foods import food_service
 from meal_planner.services.ingredients import ingredient_service
-from meal_planner.schemas.recipe import RecipeCreateSchema, RecipeIngredient
+from meal_planner.schemas.recipe import (
+    RecipeCreateSchema,
+    RecipeIngredient,
+    RecipeUpdateSchema,
+)
 
 from tests.utils import test_data
 
@@ -89,6 +108,52 @@ class TestBaseMethods:
         assert got.id == self.DEFAULT_RECIPE
         assert got.name == wanted["name"]
 
+    def test_get_many_preserves_order(self, test_session: Session):
+        """get_many() should return records in the order of the ids passed."""
+        # arrange
+        fake_id = uuid4()
+        row_ids = [test_data.TACOS, fake_id, test_data.SALSA, test_data.TACOS]
+        # act
+        got = recipe_service.get_many(test_session, row_ids)
+        # assert
+        assert [row.id if row else None for row in got] == [
+            test_data.TACOS,
+            None,
+            test_data.SALSA,
+            test_data.TACOS,
+        ]
+
+    def test_get_many_uses_fixed_number_of_queries(
+        self,
+        test_session: Session,
+    ):
+        """Loading recipes with ingredients shouldn't issue a query per row."""
+        # arrange
+        statements = []
+
+        def count_statement(*args: str) -> None:
+            if args[2].startswith("SELECT"):
+                statements.append(args[2])
+
+        engine = test_session.get_bind()
+        test_session.expire_all()
+        event.listen(engine, "before_cursor_execute", count_statement)
+        # act
+        try:
+            got = recipe_service.get_many(
+                test_session,
+                list(self.RECIPES),
+                query=recipe_service.query_with_ingredients(),
+            )
+            foods = {
+                i.food.name for row in got if row for i in row.ingredients
+            }
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+        # assert
+        assert "Onion" in foods
+        assert len(statements) == 3  # recipes, ingredients, and foods
+
     def test_getting_a_missing_record_returns_none(
         self,
         test_session: Session,
@@ -129,6 +194,301 @@ class TestBaseMethods:
         assert recipe_service.get(test_session, recipe_id) is None
 
 
+class TestReadOnlyRows:
+    """Test loading recipes as plain rows instead of ORM records."""
+
+    def test_get_rows_returns_every_column(self, test_session: Session):
+        """Rows of the whole table should have each of its columns."""
+        # act
+        rows = recipe_service.get_rows(test_session)
+        # assert
+        assert {row.id for row in rows} == set(test_data.RECIPES)
+        assert set(rows[0]._fields) >= {"name", "servings", "revision"}
+
+    def test_rows_are_not_tracked_by_the_session(self, test_session: Session):
+        """Nothing should be added to the identity map."""
+        # arrange
+        test_session.expunge_all()
+        rows = recipe_service.get_rows(
+            test_session,
+            recipe_service.query_summaries(),
+        )
+        # act
+        got = recipe_service.add_ingredients(test_session, rows)
+        # assert
+        assert all(isinstance(recipe, RecipeRow) for recipe in got)
+        assert len(test_session.identity_map) == 0
+
+    def test_add_ingredients_matches_the_orm(self, test_session: Session):
+        """Read-only recipes should have the same ingredients as ORM records."""
+        # arrange
+        query = recipe_service.query_summaries().order_by(Recipe.id)
+        rows = recipe_service.get_rows(test_session, query)
+        # act
+        got = recipe_service.add_ingredients(test_session, rows)
+        # assert
+        for recipe in got:
+            record = recipe_service.get(test_session, recipe.id)
+            assert record is not None
+            assert recipe.name == record.name
+            assert sorted(
+                (i.food.name, i.amount, i.unit) for i in recipe.ingredients
+            ) == sorted(
+                (i.food.name, i.amount, i.unit) for i in record.ingredients
+            )
+
+    def test_foods_are_shared_between_recipes(self, test_session: Session):
+        """Each food should only be loaded into memory once."""
+        # arrange
+        rows = recipe_service.get_rows(
+            test_session,
+            recipe_service.query_summaries(),
+        )
+        # act
+        got = recipe_service.add_ingredients(test_session, rows)
+        # assert
+        onions = {
+            id(i.food)
+            for recipe in got
+            for i in recipe.ingredients
+            if i.food.name == "Onion"
+        }
+        assert len(onions) == 1
+
+
+class TestListQueries:
+    """Test filtering and sorting recipes with list_filters and list_sorts."""
+
+    NAMES: ClassVar[dict[str, UUID]] = {
+        row["name"]: recipe_id for recipe_id, row in test_data.RECIPES.items()
+    }
+
+    FILTER_VALUES: ClassVar[dict[str, object]] = {
+        "name_prefix": "ta",
+        "created_after": datetime(2024, 1, 1, tzinfo=UTC),
+        "created_before": datetime(2024, 2, 1, tzinfo=UTC),
+        "updated_after": datetime(2024, 1, 1, tzinfo=UTC),
+        "updated_before": datetime(2024, 2, 1, tzinfo=UTC),
+        "contains_food": test_data.ONION,
+        "max_ingredient_count": 3,
+    }
+
+    def list_names(self, db: Session, list_query: ListQuery) -> list[str]:
+        """Return the names of the recipes in a listing in order."""
+        stmt = recipe_service.query_list(list_query)
+        return [recipe.name for recipe in recipe_service.get_all(db, stmt)]
+
+    def test_filter_by_name_prefix(self, test_session: Session):
+        """Recipes should be matched by the start of their name in any case."""
+        # arrange
+        list_query = ListQuery(filters={"name_prefix": "STEAK"})
+        # act
+        got = self.list_names(test_session, list_query)
+        # assert
+        assert got == ["Steak fajitas"]
+
+    def test_filter_by_non_ascii_name_prefix(self, test_session: Session):
+        """Letters outside of ASCII should be matched regardless of case."""
+        # arrange
+        recipe = recipe_service.get(test_session, test_data.TACOS)
+        assert recipe is not None
+        recipe_service.update(
+            test_session,
+            record=recipe,
+            update_data=RecipeUpdateSchema(name="Émincé de poulet"),
+        )
+        list_query = ListQuery(filters={"name_prefix": "éMIN"})
+        # act
+        got = self.list_names(test_session, list_query)
+        # assert
+        assert got == ["Émincé de poulet"]
+
+    @pytest.mark.parametrize("prefix", ["\U0010ffff", "a\U0010ffff"])
+    def test_filter_by_prefix_of_largest_code_point(
+        self,
+        test_session: Session,
+        prefix: str,
+    ):
+        """Prefixes that end in the largest code point should match nothing."""
+        # arrange
+        list_query = ListQuery(filters={"name_prefix": prefix})
+        # act
+        got = self.list_names(test_session, list_query)
+        # assert
+        assert got == []
+
+    def test_sort_in_descending_order(self, test_session: Session):
+        """Prefixing the sort order with - should reverse it."""
+        # arrange
+        list_query = ListQuery(filters={}, sort="-name")
+        # act
+        got = self.list_names(test_session, list_query)
+        # assert
+        assert got == sorted(self.NAMES, key=str.lower, reverse=True)
+
+    def test_filter_by_food_and_ingredient_count(self, test_session: Session):
+        """Filters allowed by the same plan should be combined."""
+        # arrange
+        test_session.add(
+            Ingredient(
+                id=uuid4(),
+                recipe_id=test_data.SALSA,
+                food_id=test_data.CORN,
+                amount=1,
+                unit="cup",
+            ),
+        )
+        salsa = recipe_service.get(test_session, test_data.SALSA)
+        assert salsa is not None
+        salsa.ingredient_count += 1
+        test_session.flush()
+        filters = {"contains_food": test_data.CORN, "max_ingredient_count": 4}
+        # act
+        got = self.list_names(test_session, ListQuery(filters=filters))
+        # assert
+        assert got == ["Black bean and corn tacos"]
+
+    def test_pick_sort_order_to_match_filters(self):
+        """If no sort order is given, the first plan to allow the filters is used."""
+        # arrange
+        list_query = ListQuery(filters={"max_ingredient_count": 3})
+        # act
+        plan = recipe_service.plan_list(list_query)
+        # assert
+        assert plan.sort == "ingredient_count"
+
+    @pytest.mark.parametrize(
+        ("filters", "sort"),
+        [
+            ({"name_prefix": "s"}, "created_at"),
+            ({"name_prefix": "s", "created_after": "2024-01-01"}, None),
+            ({"max_ingredient_count": 3}, "id"),
+            ({"description": "salsa"}, None),
+            ({}, "description"),
+        ],
+    )
+    def test_reject_unsupported_combinations(self, filters: dict, sort: str):
+        """Filters and sort orders that no index can serve should be rejected."""
+        # arrange
+        list_query = ListQuery(filters=filters, sort=sort)
+        # act - assert
+        with pytest.raises(UnsupportedListQueryError):
+            recipe_service.query_list(list_query)
+
+    def test_every_filtered_plan_uses_an_index(self, test_session: Session):
+        """No combination of filters should scan or sort the recipe table."""
+        for plan in recipe_service.list_plans:
+            if not plan.optional:
+                continue
+            # arrange
+            filters = {
+                name: self.FILTER_VALUES[name]
+                for name in plan.required | plan.optional
+            }
+            list_query = ListQuery(filters=filters, sort=plan.sort)
+            stmt = recipe_service.query_list(list_query).limit(10)
+            compiled = stmt.compile(test_session.get_bind())
+            # act
+            rows = test_session.connection().exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {compiled}",
+                (None,) * len(compiled.positiontup),
+            )
+            details = [row[3] for row in rows]
+            # assert
+            assert not any(
+                d.startswith("SCAN recipe") for d in details
+            ), details
+            assert not any("TEMP B-TREE" in d for d in details), details
+
+    @pytest.mark.parametrize(
+        "sort",
+        ["id", "-id", "name", "-name", "created_at", "-updated_at"],
+    )
+    def test_keyset_pages_cover_listing(
+        self,
+        test_session: Session,
+        sort: str,
+    ):
+        """Following the cursors should return every recipe once, in order."""
+        # arrange
+        list_query = ListQuery(filters={}, sort=sort)
+        wanted = [
+            recipe.id
+            for recipe in recipe_service.get_all(
+                test_session,
+                recipe_service.query_list(list_query),
+            )
+        ]
+        got, cursor = [], None
+        # act
+        while True:
+            rows, cursor = recipe_service.get_keyset_page(
+                test_session,
+                list_query,
+                cursor=cursor,
+                limit=2,
+                query=recipe_service.query_summaries(),
+            )
+            got.extend(row.id for row in rows)
+            if cursor is None:
+                break
+        # assert
+        assert got == wanted
+        assert len(got) == len(self.NAMES)
+
+    def test_reject_cursor_for_another_sort_order(self, test_session: Session):
+        """A cursor should only be used with the sort order it was made for."""
+        # arrange
+        _, cursor = recipe_service.get_keyset_page(
+            test_session,
+            ListQuery(filters={}, sort="name"),
+            cursor=None,
+            limit=1,
+        )
+        assert cursor is not None
+        # act - assert
+        with pytest.raises(InvalidCursorError):
+            recipe_service.get_keyset_page(
+                test_session,
+                ListQuery(filters={}, sort="-name"),
+                cursor=cursor,
+                limit=1,
+            )
+        with pytest.raises(InvalidCursorError):
+            recipe_service.get_keyset_page(
+                test_session,
+                ListQuery(filters={}, sort="name"),
+                cursor="not-a-cursor",
+                limit=1,
+            )
+
+
+class TestPrefixBounds:
+    """Test the prefix_bounds() function."""
+
+    @pytest.mark.parametrize(
+        ("prefix", "wanted"),
+        [
+            ("Ta", ("ta", "tb")),
+            ("É", ("é", "ê")),
+            ("Straße", ("strasse", "strassf")),
+            ("a\U0010ffff", ("a\U0010ffff", "b")),
+            ("\U0010ffff\U0010ffff", ("\U0010ffff\U0010ffff", None)),
+            ("\ud7ff", ("\ud7ff", "\ue000")),
+        ],
+    )
+    def test_fold_case_and_find_the_upper_bound(
+        self,
+        prefix: str,
+        wanted: tuple[str, str | None],
+    ):
+        """The bounds should be folded and skip code points that can't sort."""
+        # act
+        got = prefix_bounds(prefix)
+        # assert
+        assert got == wanted
+
+
 class TestCreate:
     """Test the create() method."""
 
@@ -187,3 +547,248 @@ class TestCreate:
         assert recipe is not None
         assert recipe_count_new == recipe_count_old + 1
         assert food_count_new == food_count_old + 1
+
+
+class TestDedupe:
+    """Test creating recipes with dedupe=True."""
+
+    def salsa(self, name: str = "Zesty salsa") -> RecipeCreateSchema:
+        """Return a payload with the same content as the salsa test recipe."""
+        return RecipeCreateSchema(
+            name=name,
+            description="A different description",
+            ingredients=[
+                RecipeIngredient(food="Tomato", amount=2, unit="self"),
+                RecipeIngredient(food="salt", amount=0.25, unit="tsp"),
+                RecipeIngredient(food="Red pepper", amount=0.5, unit="self"),
+                RecipeIngredient(food="Onion", amount=0.5, unit="self"),
+            ],
+        )
+
+    def test_return_existing_recipe_with_same_content(
+        self,
+        test_session: Session,
+    ):
+        """A recipe with the same name and ingredients shouldn't be inserted."""
+        # arrange
+        count_old = recipe_service.get_count(test_session)
+        # act
+        got = recipe_service.create(
+            test_session,
+            data=self.salsa(name="  ZESTY salsa"),
+            dedupe=True,
+        )
+        # assert
+        assert got.id == test_data.SALSA
+        assert recipe_service.get_count(test_session) == count_old
+
+    def test_create_recipe_with_different_content(self, test_session: Session):
+        """A recipe with different content should still be created."""
+        # arrange
+        count_old = recipe_service.get_count(test_session)
+        # act
+        got = recipe_service.create(
+            test_session,
+            data=self.salsa(name="Spicy salsa"),
+            dedupe=True,
+        )
+        # assert
+        assert got.id != test_data.SALSA
+        assert recipe_service.get_count(test_session) == count_old + 1
+
+
+class TestUpdate:
+    """Test the update() method."""
+
+    DEFAULT_RECIPE = test_data.SALSA
+
+    def current_ingredients(self, db: Session) -> dict[str, Ingredient]:
+        """Map the food name to each of the default recipe's ingredients."""
+        recipe = recipe_service.get(db, self.DEFAULT_RECIPE)
+        assert recipe is not None
+        return {row.food.name: row for row in recipe.ingredients}
+
+    def test_only_update_fields_that_were_set(self, test_session: Session):
+        """Fields that aren't included in the update should be unchanged."""
+        # arrange
+        recipe = recipe_service.get(test_session, self.DEFAULT_RECIPE)
+        assert recipe is not None
+        data = RecipeUpdateSchema(name="Mild salsa")
+        # act
+        got = recipe_service.update(
+            test_session,
+            record=recipe,
+            update_data=data,
+        )
+        # assert
+        wanted = test_data.RECIPES[self.DEFAULT_RECIPE]
+        assert got.name == "Mild salsa"
+        assert got.description == wanted["description"]
+        assert len(got.ingredients) == len(
+            test_data.INGREDIENTS[self.DEFAULT_RECIPE],
+        )
+
+    def test_patch_ingredients_with_minimal_diff(self, test_session: Session):
+        """Only new, changed, or removed ingredients should be written."""
+        # arrange
+        backdated = datetime(2024, 1, 1, tzinfo=UTC)
+        test_session.execute(
+            update(Ingredient)
+            .where(Ingredient.recipe_id == self.DEFAULT_RECIPE)
+            .values(updated_at=backdated),
+        )
+        test_session.expire_all()
+        # SQLite doesn't store the time zone
+        stored = backdated.replace(tzinfo=None)
+        old = self.current_ingredients(test_session)
+        old_ids = {name: row.id for name, row in old.items()}
+        assert {row.updated_at for row in old.values()} == {stored}
+        recipe = recipe_service.get(test_session, self.DEFAULT_RECIPE)
+        data = RecipeUpdateSchema(
+            ingredients=[
+                # unchanged
+                RecipeIngredient(food="Onion", amount=0.5, unit="self"),
+                RecipeIngredient(food="Tomato", amount=2, unit="self"),
+                # changed
+                RecipeIngredient(food="Salt", amount=1, unit="tsp"),
+                # added
+                RecipeIngredient(food="Lime", amount=1, unit="self"),
+                # Red pepper was removed
+            ],
+        )
+        # act
+        recipe_service.update(test_session, record=recipe, update_data=data)
+        # assert
+        new = self.current_ingredients(test_session)
+        assert set(new) == {"Onion", "Salt", "Tomato", "Lime"}
+        assert new["Onion"].id == old_ids["Onion"]
+        assert new["Tomato"].id == old_ids["Tomato"]
+        assert new["Salt"].id == old_ids["Salt"]
+        assert new["Salt"].amount == 1
+        assert food_service.get_by_name(test_session, "Lime") is not None
+        # rows that didn't change shouldn't have been written
+        test_session.expire_all()
+        new = self.current_ingredients(test_session)
+        assert new["Onion"].updated_at == stored
+        assert new["Tomato"].updated_at == stored
+        assert new["Salt"].updated_at != stored
+
+    def test_unchanged_ingredients_issue_no_writes(
+        self,
+        test_session: Session,
+    ):
+        """Sending the current ingredient list back shouldn't write any rows."""
+        # arrange
+        ingredients = [
+            RecipeIngredient(food=name, amount=row.amount, unit=row.unit)
+            for name, row in self.current_ingredients(test_session).items()
+        ]
+        # act
+        changed = ingredient_service.sync_recipe_ingredients(
+            test_session,
+            recipe_id=self.DEFAULT_RECIPE,
+            ingredients=ingredients,
+        )
+        # assert
+        assert changed is False
+
+    def test_reject_duplicate_foods(self):
+        """The same food shouldn't be listed twice in an update."""
+        # arrange
+        ingredients = [
+            {"food": "Salt", "amount": 1, "unit": "tsp"},
+            {"food": "Salt", "amount": 2, "unit": "tsp"},
+        ]
+        # act
+        with pytest.raises(ValidationError) as failure:
+            RecipeUpdateSchema(ingredients=ingredients)
+        # assert
+        assert "Each food can only be listed once" in str(failure.value)
+
+
+class TestSummaryColumns:
+    """Test that the denormalized summary columns are kept up to date."""
+
+    DEFAULT_RECIPE = test_data.TACOS
+
+    def test_summarize_ignores_order_case_and_whitespace(self):
+        """Recipes with the same content should have the same hash."""
+        # arrange
+        first = [("Onion", 1, "self"), ("Salt", 0.5, "tsp")]
+        second = [("salt ", 0.5, "TSP"), ("onion", 1.0, "self")]
+        # act
+        got = [summarize("Salsa", first), summarize(" salsa", second)]
+        # assert
+        assert got[0].content_hash == got[1].content_hash
+        assert got[0].ingredient_count == 2
+        assert got[0].food_names == ["Onion", "Salt"]
+
+    def test_create_sets_summary_columns(self, test_session: Session):
+        """Creating a recipe should set its summary columns."""
+        # arrange
+        data = RecipeCreateSchema(
+            name="New recipe",
+            description="This is a new test recipe.",
+            ingredients=[
+                RecipeIngredient(food="Tomato", amount=2, unit="self"),
+                RecipeIngredient(food="Lime", amount=1, unit="self"),
+            ],
+        )
+        # act
+        recipe = recipe_service.create(test_session, data=data)
+        # assert
+        assert recipe.ingredient_count == 2
+        assert recipe.food_names == ["Lime", "Tomato"]
+        assert recipe.content_hash is not None
+
+    def test_update_refreshes_summary_columns(self, test_session: Session):
+        """Updating a recipe's ingredients should refresh its summary columns."""
+        # arrange
+        recipe = recipe_service.get(test_session, self.DEFAULT_RECIPE)
+        assert recipe is not None
+        old_hash = recipe.content_hash
+        data = RecipeUpdateSchema(
+            ingredients=[
+                RecipeIngredient(food="Onion", amount=1, unit="self"),
+            ],
+        )
+        # act
+        recipe_service.update(test_session, record=recipe, update_data=data)
+        # assert
+        assert recipe.ingredient_count == 1
+        assert recipe.food_names == ["Onion"]
+        assert recipe.content_hash != old_hash
+
+    def test_rename_refreshes_content_hash(self, test_session: Session):
+        """Renaming a recipe should refresh its content hash."""
+        # arrange
+        recipe = recipe_service.get(test_session, self.DEFAULT_RECIPE)
+        assert recipe is not None
+        old_hash = recipe.content_hash
+        data = RecipeUpdateSchema(name="Veggie tacos")
+        # act
+        recipe_service.update(test_session, record=recipe, update_data=data)
+        # assert
+        assert recipe.content_hash != old_hash
+        assert recipe.ingredient_count == len(
+            test_data.INGREDIENTS[self.DEFAULT_RECIPE],
+        )
+
+    def test_backfill_preserves_updated_at(self, test_session: Session):
+        """Backfilling the summary columns shouldn't change updated_at."""
+        # arrange
+        recipe = recipe_service.get(test_session, self.DEFAULT_RECIPE)
+        assert recipe is not None
+        recipe.ingredient_count = 0
+        test_session.commit()
+        updated_at = recipe.updated_at
+        # act
+        total = recipe_service.backfill_summaries(test_session, batch_size=2)
+        # assert
+        recipe = recipe_service.get(test_session, self.DEFAULT_RECIPE)
+        assert recipe is not None
+        assert total == len(test_data.RECIPES)
+        assert recipe.updated_at == updated_at
+        assert recipe.ingredient_count == len(
+            test_data.INGREDIENTS[self.DEFAULT_RECIPE],
+        )
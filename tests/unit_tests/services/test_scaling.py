@@ -0,0 +1,69 @@
+"""Test the RecipeScaler class."""
+
+from sqlalchemy.orm import Session
+
+from meal_planner.schemas.recipe import RecipeUpdateSchema
+from meal_planner.services.recipes import recipe_service
+from meal_planner.services.scaling import RecipeScaler
+
+from tests.utils import test_data
+
+
+class TestDump:
+    """Test the dump() method."""
+
+    def test_scale_amounts_by_recipe_servings(self, test_session: Session):
+        """Amounts should be scaled relative to the servings a recipe makes."""
+        # arrange
+        recipe = recipe_service.get(test_session, test_data.SALSA)
+        assert recipe is not None
+        recipe_service.update(
+            test_session,
+            record=recipe,
+            update_data=RecipeUpdateSchema(servings=2),
+        )
+        # act
+        scaled = RecipeScaler(maxsize=10, minimum_compress_size=1024).dump(
+            recipe,
+            3,
+        )
+        # assert
+        amounts = {row.food: row.amount for row in scaled.ingredients}
+        assert scaled.servings == 3
+        assert amounts["Tomato"] == 3
+        assert amounts["Onion"] == 0.75
+
+    def test_reuse_cached_view_until_recipe_changes(
+        self,
+        test_session: Session,
+    ):
+        """Scaled views should be cached until the recipe is updated."""
+        # arrange
+        scaler = RecipeScaler(maxsize=10, minimum_compress_size=1024)
+        recipe = recipe_service.get(test_session, test_data.SALSA)
+        assert recipe is not None
+        first = scaler.dump(recipe, 2)
+        # act
+        cached = scaler.dump(recipe, 2)
+        recipe_service.update(
+            test_session,
+            record=recipe,
+            update_data=RecipeUpdateSchema(name="Mild salsa"),
+        )
+        updated = scaler.dump(recipe, 2)
+        # assert
+        assert cached is first
+        assert updated is not first
+        assert updated.name == "Mild salsa"
+
+    def test_evict_least_recently_used_views(self, test_session: Session):
+        """The cache should only keep the most recently used views."""
+        # arrange
+        scaler = RecipeScaler(maxsize=1, minimum_compress_size=1024)
+        recipe = recipe_service.get(test_session, test_data.SALSA)
+        assert recipe is not None
+        first = scaler.dump(recipe, 2)
+        # act
+        scaler.dump(recipe, 3)
+        # assert
+        assert scaler.dump(recipe, 2) is not first
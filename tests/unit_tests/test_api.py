@@ -10,3 +10,12 @@ def test_root_path_redirects_to_docs(client: TestClient):
     # assert
     assert response.status_code == 200
     assert "/docs" in str(response.url)
+
+
+def test_admission_metrics(client: TestClient):
+    """The admission metrics should be reported for each class of request."""
+    # act
+    response = client.get("/metrics/admission")
+    # assert
+    assert response.status_code == 200
+    assert set(response.json()) == {"read", "write", "bulk"}
@@ -0,0 +1,59 @@
+"""Test choosing encodings and precompressing response bodies."""
+
+import gzip
+
+from meal_planner.compression import (
+    ENCODINGS,
+    PrecompressedBody,
+    is_compressible,
+    negotiate,
+)
+
+
+def test_negotiate_encoding_by_quality():
+    """The accepted encoding with the highest quality value should be used."""
+    # act - assert
+    assert negotiate("gzip") == ENCODINGS["gzip"]
+    assert negotiate("deflate, gzip;q=0.5") == ENCODINGS["gzip"]
+    assert negotiate("*") is not None
+    assert negotiate("gzip;q=0") is None
+    assert negotiate("identity") is None
+    assert negotiate("") is None
+
+
+def test_only_compress_text_and_json():
+    """Binary media types shouldn't be compressed again."""
+    # act - assert
+    assert is_compressible("application/json")
+    assert is_compressible("text/html; charset=utf-8")
+    assert is_compressible("application/problem+json")
+    assert not is_compressible("image/png")
+
+
+class TestPrecompressedBody:
+    """Test the PrecompressedBody class."""
+
+    CONTENT = b'{"name": "Salsa"}' * 100
+
+    def test_compress_once_per_encoding(self):
+        """Each encoding should only be applied the first time it's needed."""
+        # arrange
+        body = PrecompressedBody(self.CONTENT, minimum_size=10)
+        # act
+        first = body.response("gzip")
+        second = body.response("gzip")
+        # assert
+        assert first.headers["content-encoding"] == "gzip"
+        assert first.body is second.body
+        assert gzip.decompress(first.body) == self.CONTENT
+
+    def test_skip_compression_below_minimum_size(self):
+        """Small bodies should be sent uncompressed."""
+        # arrange
+        body = PrecompressedBody(self.CONTENT, minimum_size=10_000)
+        # act
+        response = body.response("gzip")
+        # assert
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.body == self.CONTENT
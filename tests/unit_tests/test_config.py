@@ -0,0 +1,62 @@
+"""Test the frozen configuration settings."""
+
+import dataclasses
+
+import pytest
+
+from meal_planner.config import (
+    DEFAULT_ADMISSION_LIMITS,
+    get_config,
+    merge_admission_limits,
+    valid_admission_limits,
+)
+from meal_planner.middleware.admission import AdmissionController
+
+
+def test_config_is_frozen():
+    """The config shouldn't be changed after it's been read at startup."""
+    # arrange
+    config = get_config()
+    # act - assert
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        config.jobs_enabled = False  # type: ignore[misc]
+
+
+def test_config_has_plain_values():
+    """Settings should be copied into plain python types."""
+    # act
+    config = get_config()
+    # assert
+    assert config is get_config()
+    assert config.database_replica_urls == ()
+    assert isinstance(config.admission_limits, dict)
+    assert not hasattr(config.admission_limits, "to_dict")
+
+
+def test_merge_partial_admission_limits():
+    """Overriding some admission limits should keep the other defaults."""
+    # act
+    limits = merge_admission_limits({"bulk": {"concurrency": 2}})
+    controller = AdmissionController(limits, timeout=1)
+    # assert
+    assert limits["bulk"] == {"concurrency": 2, "queue_size": 8}
+    assert limits["read"] == DEFAULT_ADMISSION_LIMITS["read"]
+    assert controller.metrics()["write"]["concurrency"] == 8
+    assert valid_admission_limits(limits) is True
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"bulk": {"concurency": 2}},
+        {"admin": {"concurrency": 2}},
+        {"bulk": 2},
+        {"bulk": {"concurrency": "2"}},
+    ],
+)
+def test_reject_unknown_admission_limits(value: dict):
+    """Misspelled classes or limits should fail validation at startup."""
+    # act
+    got = valid_admission_limits(merge_admission_limits(value))
+    # assert
+    assert got is False
@@ -0,0 +1,104 @@
+"""Test the incremental JSON object parser."""
+
+import json
+
+import pytest
+
+from meal_planner.json_stream import (
+    JSONStreamError,
+    ObjectStreamParser,
+    ValueTooLongError,
+)
+
+RECIPE = {
+    "name": 'Pico de "gallo"',
+    "ingredients": [
+        {"food": "Jalapeño", "amount": 1, "unit": "self"},
+        {"food": "Tomato [ripe], chopped", "amount": 2.5, "unit": "self"},
+        {"food": "Salt \\ pepper", "amount": 1e-1, "unit": "tsp"},
+    ],
+    "description": "Chop, then {mix}",
+    "servings": 4,
+}
+
+
+def parse(body: bytes, chunk_size: int, max_value_length: int = 1000):
+    """Feed a body to a parser in chunks and return it with the items."""
+    parser = ObjectStreamParser(
+        "ingredients",
+        max_value_length=max_value_length,
+    )
+    items = []
+    for start in range(0, len(body), chunk_size):
+        items.extend(parser.feed(body[start : start + chunk_size]))
+    parser.close()
+    return parser, items
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 1000])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_parse_the_same_values_as_json_loads(chunk_size: int, indent: int):
+    """Items and fields should match json.loads() wherever the chunks split."""
+    # arrange
+    body = json.dumps(RECIPE, indent=indent, ensure_ascii=False).encode()
+    # act
+    parser, items = parse(body, chunk_size)
+    # assert
+    assert items == RECIPE["ingredients"]
+    assert parser.has_array
+    assert parser.fields == {
+        key: value for key, value in RECIPE.items() if key != "ingredients"
+    }
+
+
+def test_return_items_as_soon_as_they_end():
+    """Each item should be returned by the chunk that completes it."""
+    # arrange
+    parser = ObjectStreamParser("ingredients", max_value_length=100)
+    # act
+    first = parser.feed(b'{"ingredients": [{"amount": 1}, {"amou')
+    second = parser.feed(b'nt": 2}]}')
+    parser.close()
+    # assert
+    assert first == [{"amount": 1}]
+    assert second == [{"amount": 2}]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b'["not", "an", "object"]',
+        b'{"name": "Salsa",}',
+        b'{"ingredients": [{"amount": 1},]}',
+        b'{"ingredients": [{"amount": 1}}',
+        b'{"ingredients": null}',
+        b'{"ingredients": [1 2]}',
+        b'{"name": tru}',
+        b'{"name" "Salsa"}',
+        b'{"name": "Salsa"} {}',
+        b'{"ingredients": [], "ingredients": []}',
+        b'{"name": "\xff"}',
+    ],
+)
+def test_reject_invalid_json(body: bytes):
+    """Bodies that json.loads() would reject should raise an error."""
+    # act
+    with pytest.raises(JSONStreamError):
+        parse(body, chunk_size=3)
+
+
+def test_reject_bodies_that_end_early():
+    """The stream has to end after the object is closed."""
+    # act
+    with pytest.raises(JSONStreamError, match="ended before the end"):
+        parse(b'{"ingredients": [{"amount": 1}', chunk_size=100)
+
+
+def test_reject_values_that_are_too_long():
+    """A value that's too long should fail before the rest of it arrives."""
+    # arrange
+    parser = ObjectStreamParser("ingredients", max_value_length=20)
+    parser.feed(b'{"ingredients": [{"food": "')
+    # act
+    with pytest.raises(ValueTooLongError):
+        parser.feed(b"a" * 21)
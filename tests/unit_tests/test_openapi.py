@@ -0,0 +1,120 @@
+"""Test loading a prebuilt OpenAPI document."""
+
+import json
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from pydantic import BaseModel, create_model
+
+from meal_planner.openapi import (
+    FINGERPRINT_KEY,
+    install_openapi,
+    route_fingerprint,
+    write_openapi,
+)
+
+
+@pytest.fixture(name="app")
+def fixture_app() -> FastAPI:
+    """Create an app with a single route."""
+    app = FastAPI()
+
+    @app.get("/items")
+    def read_items() -> list:
+        return []
+
+    return app
+
+
+def test_load_prebuilt_document(app: FastAPI, tmp_path: Path):
+    """A document built for the same routes should be served as is."""
+    # arrange
+    path = tmp_path / "openapi.json"
+    write_openapi(app, path)
+    prebuilt = json.loads(path.read_text())
+    prebuilt["info"]["title"] = "Prebuilt"
+    path.write_text(json.dumps(prebuilt))
+    # act
+    install_openapi(app, path)
+    schema = app.openapi()
+    # assert
+    assert schema["info"]["title"] == "Prebuilt"
+    assert app.openapi() is schema
+
+
+def test_regenerate_stale_document(app: FastAPI, tmp_path: Path):
+    """A document built for different routes should be ignored."""
+    # arrange
+    path = tmp_path / "openapi.json"
+    write_openapi(app, path)
+
+    @app.post("/items")
+    def create_item() -> dict:
+        return {}
+
+    # act
+    install_openapi(app, path)
+    schema = app.openapi()
+    # assert
+    assert "post" in schema["paths"]["/items"]
+    assert schema[FINGERPRINT_KEY] == route_fingerprint(app)
+
+
+def make_app(model: type[BaseModel], limit: int = 10) -> FastAPI:
+    """Create an app whose route returns the model provided."""
+    app = FastAPI()
+
+    @app.get("/items", response_model=list[model])
+    def read_items(max_items: int = limit) -> list:  # noqa: ARG001
+        return []
+
+    return app
+
+
+def test_regenerate_document_when_a_model_changes(tmp_path: Path):
+    """A document built for an older version of a model should be ignored."""
+    # arrange
+    path = tmp_path / "openapi.json"
+    write_openapi(make_app(create_model("Item", name=(str, ...))), path)
+    item = create_model("Item", name=(str, ...), price=(float, ...))
+    app = make_app(item)
+    # act
+    install_openapi(app, path)
+    schema = app.openapi()
+    # assert
+    assert "price" in schema["components"]["schemas"]["Item"]["properties"]
+
+
+def test_regenerate_document_when_a_parameter_changes(tmp_path: Path):
+    """A document built for a different query parameter should be ignored."""
+    # arrange
+    path = tmp_path / "openapi.json"
+    item = create_model("Item", name=(str, ...))
+    write_openapi(make_app(item, limit=10), path)
+    app = make_app(item, limit=20)
+    # act
+    install_openapi(app, path)
+    schema = app.openapi()
+    # assert
+    params = schema["paths"]["/items"]["get"]["parameters"]
+    assert params[0]["schema"]["default"] == 20
+
+
+def test_fingerprint_is_stable_for_the_same_routes():
+    """Fingerprints shouldn't depend on where objects are in memory."""
+    # arrange
+    item = create_model("Item", name=(str, ...))
+    # act
+    got = route_fingerprint(make_app(item))
+    # assert
+    assert got == route_fingerprint(make_app(item))
+
+
+def test_generate_document_if_file_is_missing(app: FastAPI, tmp_path: Path):
+    """The document should be generated when there isn't a prebuilt one."""
+    # act
+    install_openapi(app, tmp_path / "missing.json")
+    schema = app.openapi()
+    # assert
+    assert "/items" in schema["paths"]
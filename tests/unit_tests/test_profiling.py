@@ -0,0 +1,61 @@
+"""Test the request profiling helpers."""
+
+import threading
+
+from meal_planner.profiling import NO_PHASE, PROFILE, RequestProfile, phase
+
+
+def test_phases_are_no_ops_without_a_profile():
+    """Phases of requests that aren't profiled shouldn't do any work."""
+    # act
+    got = phase("serialize")
+    # assert
+    assert got is NO_PHASE
+
+
+def test_phases_add_up_their_time():
+    """Phases with the same name should be added together."""
+    # arrange
+    profile = RequestProfile()
+    context = PROFILE.set(profile)
+    # act
+    try:
+        for _ in range(2):
+            with phase("recipe_service"):
+                sum(range(1000))
+    finally:
+        PROFILE.reset(context)
+    # assert
+    assert list(profile.timings) == ["recipe_service"]
+    assert profile.timings["recipe_service"] > 0
+    assert profile.server_timing().startswith("recipe_service;dur=")
+
+
+def test_profile_phases_in_other_threads():
+    """Phases run in the threadpool should be included in the report."""
+    # arrange
+    profile = RequestProfile()
+
+    def handle_request() -> None:
+        context = PROFILE.set(profile)
+        try:
+            with phase("recipe_service"):
+                sorted(str(index) for index in range(1000))
+        finally:
+            PROFILE.reset(context)
+
+    # act
+    thread = threading.Thread(target=handle_request)
+    thread.start()
+    thread.join()
+    report = profile.report(lines=20)
+    # assert
+    assert "builtins.sorted" in report
+
+
+def test_report_without_a_profile():
+    """A profile that never ran should say so instead of failing."""
+    # act
+    got = RequestProfile().report(lines=20)
+    # assert
+    assert got == "No profile was collected\n"
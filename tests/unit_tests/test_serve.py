@@ -0,0 +1,61 @@
+"""Test the production server entry point."""
+
+import dataclasses
+
+import pytest
+
+from meal_planner import serve
+from meal_planner.config import get_config
+
+
+class TestServerOptions:
+    """Test the server_options() function."""
+
+    def test_start_one_worker_per_core_by_default(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Setting server_workers to 0 should size the workers to the cores."""
+        # arrange
+        monkeypatch.setattr(serve, "available_cores", lambda: 6)
+        config = dataclasses.replace(get_config(), server_workers=0)
+        # act
+        options = serve.server_options(config)
+        # assert
+        assert options["workers"] == 6
+        assert options["host"] == config.server_host
+        assert options["port"] == config.server_port
+        assert options["backlog"] == config.server_backlog
+        assert (
+            options["timeout_graceful_shutdown"]
+            == config.server_graceful_shutdown_seconds
+        )
+
+    def test_override_settings_from_the_command_line(self):
+        """Values passed in should take precedence over the config."""
+        # arrange
+        config = dataclasses.replace(get_config(), server_workers=2)
+        # act
+        options = serve.server_options(
+            config,
+            host="0.0.0.0",  # noqa: S104
+            port=9000,
+            workers=3,
+        )
+        # assert
+        assert options["workers"] == 3
+        assert options["host"] == "0.0.0.0"  # noqa: S104
+        assert options["port"] == 9000
+
+    def test_fall_back_to_pure_python_implementations(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """The server should still start without uvloop and httptools."""
+        # arrange
+        monkeypatch.setattr(serve, "find_spec", lambda _: None)
+        # act
+        options = serve.server_options(get_config())
+        # assert
+        assert options["loop"] == "asyncio"
+        assert options["http"] == "h11"
@@ -0,0 +1,31 @@
+"""Test converting ingredient amounts between units."""
+
+from meal_planner.units import promote
+
+
+def test_promote_to_largest_unit_in_quarters():
+    """Amounts should use the largest unit that measures them in quarters."""
+    # arrange
+    cases = {
+        (48, "tsp"): (1, "cup"),
+        (6, "tsp"): (2, "tbsp"),
+        (12, "tsp"): (0.25, "cup"),
+        (32, "oz"): (2, "lb"),
+        (2500, "g"): (2.5, "kg"),
+    }
+    # act - assert
+    for (amount, unit), wanted in cases.items():
+        assert promote(amount, unit) == wanted
+
+
+def test_keep_unit_if_no_larger_unit_fits():
+    """Amounts that don't convert to quarters should keep their unit."""
+    # act - assert
+    assert promote(4, "tsp") == (4, "tsp")
+    assert promote(0.1, "cup") == (0.1, "cup")
+
+
+def test_round_units_that_cannot_be_converted():
+    """Units missing from the unit table should only be rounded."""
+    # act - assert
+    assert promote(4 / 3, "self") == (1.33, "self")
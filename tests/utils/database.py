@@ -3,10 +3,13 @@
 from uuid import uuid4
 
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 
 from meal_planner.models.base import UUIDAuditBase
 from meal_planner.models.ingredient import Ingredient
+from meal_planner.models.meal_plan import PlannedMeal
+from meal_planner.services.meal_plans import meal_plan_service
+from meal_planner.services.recipe_versions import recipe_version_service
+from meal_planner.services.recipes import recipe_service
 
 from tests.utils import test_data as data
 
@@ -57,8 +60,6 @@ def init_test_db(db: Session) -> None:
     # Drop and recreate all tables
     UUIDAuditBase.metadata.drop_all(bind=db.get_bind())
     UUIDAuditBase.metadata.create_all(bind=db.get_bind())
-    # Enable foreign key constraints in SQLite
-    db.execute(text("PRAGMA foreign_keys=ON"))
 
 
 def populate_db(session: Session) -> None:
@@ -93,3 +94,24 @@ def populate_db(session: Session) -> None:
 
     # commit the changes
     session.commit()
+
+    # compute the summary columns that are denormalized onto each recipe
+    recipe_service.backfill_summaries(session)
+
+    # snapshot the first version of each recipe and plan meals with them
+    recipe_version_service.backfill(session)
+    for meal_id, meal_data in data.PLANNED_MEALS.items():
+        version = recipe_version_service.get_latest(
+            session,
+            meal_data["recipe_id"],
+        )
+        assert version is not None
+        session.add(
+            PlannedMeal(id=meal_id, recipe_version_id=version.id, **meal_data),
+        )
+    session.commit()
+
+    # materialize the ingredient totals for each meal plan
+    for plan_id in data.MEAL_PLANS:
+        meal_plan_service.rebuild_rollup(session, plan_id)
+    session.commit()
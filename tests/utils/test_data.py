@@ -1,10 +1,13 @@
 """Create mock data to populate the database for testing."""
 
 from dataclasses import dataclass
+from datetime import date
 from uuid import UUID, uuid4
 
 from meal_planner.models.base import UUIDAuditBase
 from meal_planner.models.food import Food
+from meal_planner.models.food_nutrient import FoodNutrient
+from meal_planner.models.meal_plan import MealPlan
 from meal_planner.models.recipe import Recipe
 
 
@@ -38,6 +41,31 @@ FOODS = {
     TORTILLA: {"name": "Corn tortillas", "kind": "Grocery"},
 }
 
+##################
+# Food nutrients #
+##################
+# nutrients per 100 g, salt is left out to test missing nutrient data
+FOOD_NUTRIENTS = {
+    uuid4(): {
+        "food_id": food_id,
+        "kcal": kcal,
+        "protein_g": protein,
+        "fat_g": fat,
+        "carbs_g": carbs,
+        "grams_per_cup": per_cup,
+        "grams_each": each,
+    }
+    for food_id, kcal, protein, fat, carbs, per_cup, each in [
+        (BEAN, 132, 8.9, 0.5, 23.7, 172, None),
+        (CORN, 86, 3.3, 1.4, 19, 145, None),
+        (ONION, 40, 1.1, 0.1, 9.3, 160, 110),
+        (STEAK, 271, 25, 19, 0, None, None),
+        (PEPPER, 31, 1, 0.3, 6, 150, 120),
+        (TOMATO, 18, 0.9, 0.2, 3.9, 180, 120),
+        (TORTILLA, 218, 5.7, 2.9, 44.6, None, 26),
+    ]
+}
+
 ###########
 # Recipes #
 ###########
@@ -83,8 +111,40 @@ INGREDIENTS = {
     },
 }
 
+##############
+# Meal plans #
+##############
+WEEK = uuid4()
+MEAL_PLANS = {
+    WEEK: {"name": "First week of June", "start_date": date(2024, 6, 3)},
+}
+
+TACO_NIGHT = uuid4()
+FAJITA_NIGHT = uuid4()
+PLANNED_MEALS = {
+    TACO_NIGHT: {
+        "meal_plan_id": WEEK,
+        "recipe_id": TACOS,
+        "date": date(2024, 6, 4),
+        "slot": "dinner",
+        "servings": 2,
+    },
+    FAJITA_NIGHT: {
+        "meal_plan_id": WEEK,
+        "recipe_id": FAJITAS,
+        "date": date(2024, 6, 7),
+        "slot": "dinner",
+        "servings": 1,
+    },
+}
+
 # records to create and insert directly
 UUID_TABLES = {
     "food": UUIDTableData(model=Food, records=FOODS),
+    "food_nutrients": UUIDTableData(
+        model=FoodNutrient,
+        records=FOOD_NUTRIENTS,
+    ),
     "recipes": UUIDTableData(model=Recipe, records=RECIPES),
+    "meal_plans": UUIDTableData(model=MealPlan, records=MEAL_PLANS),
 }